@@ -0,0 +1,42 @@
+"""add instagram hashtag lookup cache
+
+Revision ID: 20261017_090000
+Revises: 20251028_080000
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261017_090000'
+down_revision: Union[str, None] = '20251028_080000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create instagram_hashtag_lookups table"""
+    op.create_table(
+        'instagram_hashtag_lookups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('external_id', sa.String(), nullable=True),
+        sa.Column('resolved_by', sa.String(), nullable=True),
+        sa.Column('resolved_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_instagram_hashtag_lookups_id', 'instagram_hashtag_lookups', ['id'], unique=False)
+    op.create_index('ix_instagram_hashtag_lookups_name', 'instagram_hashtag_lookups', ['name'], unique=True)
+    op.create_index('idx_hashtag_lookup_resolved_by_at', 'instagram_hashtag_lookups', ['resolved_by', 'resolved_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop instagram_hashtag_lookups table"""
+    op.drop_index('idx_hashtag_lookup_resolved_by_at', table_name='instagram_hashtag_lookups')
+    op.drop_index('ix_instagram_hashtag_lookups_name', table_name='instagram_hashtag_lookups')
+    op.drop_index('ix_instagram_hashtag_lookups_id', table_name='instagram_hashtag_lookups')
+    op.drop_table('instagram_hashtag_lookups')
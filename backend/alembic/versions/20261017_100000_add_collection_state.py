@@ -0,0 +1,55 @@
+"""add incremental collection state
+
+Revision ID: 20261017_100000
+Revises: 20261017_090000
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261017_100000'
+down_revision: Union[str, None] = '20261017_090000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create instagram_collection_states table and post refresh tracking"""
+    op.create_table(
+        'instagram_collection_states',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('instagram_user_id', sa.String(), nullable=True),
+        sa.Column('last_media_id', sa.String(), nullable=True),
+        sa.Column('last_media_timestamp', sa.DateTime(), nullable=True),
+        sa.Column('profile_etag', sa.String(), nullable=True),
+        sa.Column('username', sa.String(), nullable=True),
+        sa.Column('account_type', sa.String(), nullable=True),
+        sa.Column('media_count', sa.Integer(), nullable=True),
+        sa.Column('last_full_refresh_at', sa.DateTime(), nullable=True),
+        sa.Column('last_collected_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True, server_default=sa.text('now()')),
+        sa.Column('updated_at', sa.DateTime(), nullable=True, server_default=sa.text('now()')),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_instagram_collection_states_id', 'instagram_collection_states', ['id'], unique=False)
+    op.create_index('ix_instagram_collection_states_user_id', 'instagram_collection_states', ['user_id'], unique=True)
+
+    op.add_column('instagram_posts', sa.Column('metrics_refreshed_at', sa.DateTime(), nullable=True))
+    op.create_index('idx_instagram_posts_user_timestamp', 'instagram_posts', ['user_id', 'timestamp'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop instagram_collection_states table and post refresh tracking"""
+    op.drop_index('idx_instagram_posts_user_timestamp', table_name='instagram_posts')
+    op.drop_column('instagram_posts', 'metrics_refreshed_at')
+
+    op.drop_index('ix_instagram_collection_states_user_id', table_name='instagram_collection_states')
+    op.drop_index('ix_instagram_collection_states_id', table_name='instagram_collection_states')
+    op.drop_table('instagram_collection_states')
@@ -0,0 +1,46 @@
+"""add instagram hashtag media window
+
+Revision ID: 20261017_110000
+Revises: 20261017_100000
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261017_110000'
+down_revision: Union[str, None] = '20261017_100000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create instagram_hashtag_media table"""
+    op.create_table(
+        'instagram_hashtag_media',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('hashtag_name', sa.String(), nullable=False),
+        sa.Column('media_id', sa.String(), nullable=False),
+        sa.Column('posted_at', sa.DateTime(), nullable=False),
+        sa.Column('like_count', sa.Integer(), nullable=True),
+        sa.Column('comment_count', sa.Integer(), nullable=True),
+        sa.Column('observed_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_instagram_hashtag_media_id', 'instagram_hashtag_media', ['id'], unique=False)
+    op.create_index('idx_hashtag_media_name_media', 'instagram_hashtag_media', ['hashtag_name', 'media_id'], unique=True)
+    op.create_index('idx_hashtag_media_name_posted', 'instagram_hashtag_media', ['hashtag_name', 'posted_at'], unique=False)
+    op.create_index('idx_hashtag_media_posted_at', 'instagram_hashtag_media', ['posted_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop instagram_hashtag_media table"""
+    op.drop_index('idx_hashtag_media_posted_at', table_name='instagram_hashtag_media')
+    op.drop_index('idx_hashtag_media_name_posted', table_name='instagram_hashtag_media')
+    op.drop_index('idx_hashtag_media_name_media', table_name='instagram_hashtag_media')
+    op.drop_index('ix_instagram_hashtag_media_id', table_name='instagram_hashtag_media')
+    op.drop_table('instagram_hashtag_media')
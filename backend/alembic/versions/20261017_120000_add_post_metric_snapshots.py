@@ -0,0 +1,42 @@
+"""add instagram post metric snapshots
+
+Revision ID: 20261017_120000
+Revises: 20261017_110000
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261017_120000'
+down_revision: Union[str, None] = '20261017_110000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create instagram_post_metrics table"""
+    op.create_table(
+        'instagram_post_metrics',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('post_id', sa.Integer(), nullable=False),
+        sa.Column('captured_at', sa.DateTime(), nullable=False),
+        sa.Column('like_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('comment_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('resolution', sa.String(length=8), nullable=False, server_default='raw'),
+        sa.ForeignKeyConstraint(['post_id'], ['instagram_posts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_post_metrics_post_captured', 'instagram_post_metrics', ['post_id', 'captured_at'], unique=False)
+    op.create_index('idx_post_metrics_resolution_captured', 'instagram_post_metrics', ['resolution', 'captured_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop instagram_post_metrics table"""
+    op.drop_index('idx_post_metrics_resolution_captured', table_name='instagram_post_metrics')
+    op.drop_index('idx_post_metrics_post_captured', table_name='instagram_post_metrics')
+    op.drop_table('instagram_post_metrics')
@@ -0,0 +1,38 @@
+"""add polling schedule to instagram collection states
+
+Revision ID: 20261017_130000
+Revises: 20261017_120000
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261017_130000'
+down_revision: Union[str, None] = '20261017_120000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add polling schedule columns to instagram_collection_states"""
+    op.add_column('instagram_collection_states', sa.Column('next_due_at', sa.DateTime(), nullable=True))
+    op.add_column('instagram_collection_states', sa.Column('poll_interval_seconds', sa.Integer(), nullable=True))
+    op.add_column('instagram_collection_states', sa.Column('posts_per_day', sa.Float(), nullable=True))
+    op.add_column('instagram_collection_states', sa.Column('engagement_velocity', sa.Float(), nullable=True))
+    op.add_column('instagram_collection_states', sa.Column('last_api_calls', sa.Integer(), nullable=True))
+    op.create_index('ix_instagram_collection_states_next_due_at', 'instagram_collection_states', ['next_due_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Remove polling schedule columns from instagram_collection_states"""
+    op.drop_index('ix_instagram_collection_states_next_due_at', table_name='instagram_collection_states')
+    op.drop_column('instagram_collection_states', 'last_api_calls')
+    op.drop_column('instagram_collection_states', 'engagement_velocity')
+    op.drop_column('instagram_collection_states', 'posts_per_day')
+    op.drop_column('instagram_collection_states', 'poll_interval_seconds')
+    op.drop_column('instagram_collection_states', 'next_due_at')
@@ -0,0 +1,83 @@
+"""add collection run checkpoints and dead-letter table
+
+Revision ID: 20261017_140000
+Revises: 20261017_130000
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261017_140000'
+down_revision: Union[str, None] = '20261017_130000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create instagram_collection_runs, instagram_collection_run_accounts and instagram_collection_failures tables"""
+    op.create_table(
+        'instagram_collection_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False, server_default='running'),
+        sa.Column('total_accounts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('resumed_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('started_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_instagram_collection_runs_id', 'instagram_collection_runs', ['id'], unique=False)
+    op.create_index('idx_collection_runs_status_started', 'instagram_collection_runs', ['status', 'started_at'], unique=False)
+
+    op.create_table(
+        'instagram_collection_run_accounts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('run_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False, server_default='pending'),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['run_id'], ['instagram_collection_runs.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_instagram_collection_run_accounts_id', 'instagram_collection_run_accounts', ['id'], unique=False)
+    op.create_index('idx_collection_run_accounts_run_user', 'instagram_collection_run_accounts', ['run_id', 'user_id'], unique=True)
+    op.create_index('idx_collection_run_accounts_run_status', 'instagram_collection_run_accounts', ['run_id', 'status'], unique=False)
+
+    op.create_table(
+        'instagram_collection_failures',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('error_class', sa.String(length=16), nullable=False),
+        sa.Column('error_code', sa.Integer(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('failure_count', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('next_retry_at', sa.DateTime(), nullable=True),
+        sa.Column('first_failed_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.Column('last_failed_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_instagram_collection_failures_id', 'instagram_collection_failures', ['id'], unique=False)
+    op.create_index('ix_instagram_collection_failures_user_id', 'instagram_collection_failures', ['user_id'], unique=True)
+    op.create_index('ix_instagram_collection_failures_next_retry_at', 'instagram_collection_failures', ['next_retry_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop instagram_collection_failures, instagram_collection_run_accounts and instagram_collection_runs tables"""
+    op.drop_index('ix_instagram_collection_failures_next_retry_at', table_name='instagram_collection_failures')
+    op.drop_index('ix_instagram_collection_failures_user_id', table_name='instagram_collection_failures')
+    op.drop_index('ix_instagram_collection_failures_id', table_name='instagram_collection_failures')
+    op.drop_table('instagram_collection_failures')
+    op.drop_index('idx_collection_run_accounts_run_status', table_name='instagram_collection_run_accounts')
+    op.drop_index('idx_collection_run_accounts_run_user', table_name='instagram_collection_run_accounts')
+    op.drop_index('ix_instagram_collection_run_accounts_id', table_name='instagram_collection_run_accounts')
+    op.drop_table('instagram_collection_run_accounts')
+    op.drop_index('idx_collection_runs_status_started', table_name='instagram_collection_runs')
+    op.drop_index('ix_instagram_collection_runs_id', table_name='instagram_collection_runs')
+    op.drop_table('instagram_collection_runs')
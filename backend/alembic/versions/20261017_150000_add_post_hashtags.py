@@ -0,0 +1,100 @@
+"""add normalized post hashtag index
+
+Revision ID: 20261017_150000
+Revises: 20261017_140000
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+import unicodedata
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261017_150000'
+down_revision: Union[str, None] = '20261017_140000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BACKFILL_BATCH_SIZE = 5000  # Posts read per batch
+
+posts = sa.table('instagram_posts', sa.column('id', sa.Integer), sa.column('hashtags', sa.JSON))
+hashtag_names = sa.table('hashtag_names', sa.column('id', sa.Integer), sa.column('name', sa.String))
+post_hashtags = sa.table('post_hashtags', sa.column('post_id', sa.Integer), sa.column('hashtag_id', sa.Integer))
+
+
+def _normalize(name: str) -> str:
+    """Same as app.services.hashtag_resolver.normalize_hashtag at this revision"""
+    return unicodedata.normalize("NFKC", name).strip().lstrip("#").strip().lower()
+
+
+def _backfill() -> None:
+    """Index existing posts' hashtags column, BACKFILL_BATCH_SIZE posts per batch by id"""
+    bind = op.get_bind()
+    ids = {}
+    last_id = 0
+    while True:
+        batch = bind.execute(
+            sa.select(posts.c.id, posts.c.hashtags)
+            .where(posts.c.id > last_id)
+            .order_by(posts.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not batch:
+            break
+        last_id = batch[-1][0]
+
+        names_by_post = {
+            post_id: {_normalize(name) for name in hashtags or [] if isinstance(name, str)} - {""}
+            for post_id, hashtags in batch
+        }
+        new_names = sorted({name for names in names_by_post.values() for name in names} - ids.keys())
+        if new_names:
+            bind.execute(hashtag_names.insert(), [{"name": name} for name in new_names])
+            ids.update(bind.execute(
+                sa.select(hashtag_names.c.name, hashtag_names.c.id).where(hashtag_names.c.name.in_(new_names))
+            ).all())
+
+        rows = [
+            {"post_id": post_id, "hashtag_id": ids[name]}
+            for post_id, names in names_by_post.items()
+            for name in names
+        ]
+        if rows:
+            bind.execute(post_hashtags.insert(), rows)
+
+
+def upgrade() -> None:
+    """Create hashtag_names and post_hashtags tables and backfill them from instagram_posts.hashtags"""
+    op.create_table(
+        'hashtag_names',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_hashtag_names_name'), 'hashtag_names', ['name'], unique=True)
+
+    op.create_table(
+        'post_hashtags',
+        sa.Column('post_id', sa.Integer(), nullable=False),
+        sa.Column('hashtag_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['post_id'], ['instagram_posts.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['hashtag_id'], ['hashtag_names.id']),
+        sa.PrimaryKeyConstraint('post_id', 'hashtag_id')
+    )
+
+    _backfill()
+
+    # Built after the backfill rather than maintained row by row during it
+    op.create_index('idx_post_hashtags_hashtag_post', 'post_hashtags', ['hashtag_id', 'post_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop post_hashtags and hashtag_names tables"""
+    op.drop_index('idx_post_hashtags_hashtag_post', table_name='post_hashtags')
+    op.drop_table('post_hashtags')
+    op.drop_index(op.f('ix_hashtag_names_name'), table_name='hashtag_names')
+    op.drop_table('hashtag_names')
@@ -0,0 +1,33 @@
+"""add collection run kind
+
+Revision ID: 20261017_160000
+Revises: 20261017_150000
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261017_160000'
+down_revision: Union[str, None] = '20261017_150000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add instagram_collection_runs.kind so dispatcher ticks are checkpointed separately from sweeps"""
+    op.add_column(
+        'instagram_collection_runs',
+        sa.Column('kind', sa.String(length=16), nullable=False, server_default='sweep')
+    )
+    op.create_index('idx_collection_runs_kind_status', 'instagram_collection_runs', ['kind', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop instagram_collection_runs.kind"""
+    op.drop_index('idx_collection_runs_kind_status', table_name='instagram_collection_runs')
+    op.drop_column('instagram_collection_runs', 'kind')
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.endpoints import auth, users, instagram, ai_analysis
+from app.api.endpoints import auth, users, instagram, ai_analysis, admin
 from app.api.v1.endpoints import instagram_auth
 
 api_router = APIRouter()
@@ -10,5 +10,6 @@ api_router.include_router(users.router, prefix="/users", tags=["Users"])
 api_router.include_router(instagram.router, prefix="/instagram", tags=["Instagram"])
 api_router.include_router(instagram_auth.router, prefix="/instagram/auth", tags=["Instagram OAuth"])
 api_router.include_router(ai_analysis.router, prefix="/analysis", tags=["AI Analysis"])
+api_router.include_router(admin.router, prefix="/admin", tags=["Admin"])
 
 __all__ = ["api_router"]
@@ -2,6 +2,7 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
+from app.core.config import get_settings
 from app.core.database import get_db
 from app.core.security import decode_access_token
 from app.models.user import User
@@ -70,3 +71,26 @@ async def get_current_active_user(
             detail="Inactive user"
         )
     return current_user
+
+
+async def get_current_admin_user(
+    current_user: User = Depends(get_current_active_user)
+) -> User:
+    """
+    Dependency to get the current user if they are an admin (listed in ADMIN_EMAILS)
+    
+    Args:
+        current_user: Current user from get_current_active_user dependency
+        
+    Returns:
+        User: Current admin user
+        
+    Raises:
+        HTTPException: If the user is not an admin
+    """
+    if current_user.email not in get_settings().ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return current_user
@@ -0,0 +1,40 @@
+"""
+Admin API Endpoints
+
+Operational views of background tasks, for users listed in ADMIN_EMAILS.
+"""
+
+import asyncio
+from datetime import datetime
+
+from fastapi import APIRouter, Depends
+
+from app.api.dependencies.auth import get_current_admin_user
+from app.models.user import User
+from app.services.task_leases import lease_holders
+
+router = APIRouter()
+
+
+@router.get("/tasks/leases")
+async def get_task_leases(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Get the background task runs currently holding a lease
+    
+    Returns one entry per running leased task with its holder (host:pid),
+    Celery task ID, acquisition and last heartbeat times, lease expiry and
+    the progress the task last reported.
+    """
+    # The lease backend is usually Redis (SCAN + MGET); keep it off the event loop
+    leases = await asyncio.to_thread(lease_holders)
+    now = datetime.utcnow()
+    for lease in leases:
+        lease["expires_in_seconds"] = round(
+            (datetime.fromisoformat(lease["expires_at"]) - now).total_seconds(), 1
+        )
+    return {
+        "leases": leases,
+        "timestamp": now.isoformat()
+    }
@@ -23,6 +23,7 @@ from app.models.instagram_hashtag import InstagramHashtag
 from app.models.instagram_influencer import InstagramInfluencer
 from app.services.ai_analyzer import AIAnalyzer
 from app.services.ai_analyzer_extended import AIAnalyzerExtended
+from app.services.post_hashtags import filter_by_hashtag
 
 
 router = APIRouter()
@@ -83,7 +84,7 @@ async def analyze_sentiment(
         query = db.query(InstagramPost).filter(InstagramPost.market == request.market)
         
         if request.hashtag:
-            query = query.filter(InstagramPost.hashtags.contains([request.hashtag]))
+            query = filter_by_hashtag(query, request.hashtag)
         
         posts = query.limit(request.limit).all()
         
@@ -119,7 +120,7 @@ async def get_market_sentiment(
         
         query = db.query(InstagramPost).filter(InstagramPost.market == market)
         if hashtag:
-            query = query.filter(InstagramPost.hashtags.contains([hashtag]))
+            query = filter_by_hashtag(query, hashtag)
         
         posts = query.limit(limit).all()
         
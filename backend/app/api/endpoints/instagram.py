@@ -7,18 +7,23 @@ Provides access to Instagram data, insights, and analytics.
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from datetime import datetime, timedelta
 
 from app.core.database import get_db
 from app.api.dependencies.auth import get_current_active_user
 from app.models.user import User
 from app.services.instagram_service import InstagramService
 from app.services.ai_analyzer import AIAnalyzer
+from app.integrations.circuit_breaker import circuit_status
+from app.integrations.response_cache import get_response_cache
+from app.services.post_metrics import get_post_metric_series
 from app.schemas.instagram import (
     InstagramPostResponse,
     InstagramHashtagResponse,
     InstagramInfluencerResponse,
     MarketInsightsResponse,
-    PostAnalyticsResponse
+    PostAnalyticsResponse,
+    PostMetricSeriesResponse
 )
 
 router = APIRouter()
@@ -70,6 +75,41 @@ async def get_instagram_post(
     return post
 
 
+@router.get("/posts/{post_id}/metrics", response_model=PostMetricSeriesResponse)
+async def get_instagram_post_metrics(
+    post_id: int,
+    hours: Optional[int] = Query(None, ge=1, description="Only snapshots from the last N hours"),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get a post's like/comment snapshots with engagement velocity and acceleration
+    
+    Velocity is engagement gained per hour between snapshots; acceleration
+    is the change in velocity per hour. Snapshots older than the raw
+    retention are daily rollups.
+    """
+    service = InstagramService(db)
+    post = await service.get_post_by_id(post_id)
+    
+    if not post:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Instagram post not found"
+        )
+    
+    since = datetime.utcnow() - timedelta(hours=hours) if hours else None
+    points = get_post_metric_series(db, post.id, since)
+    latest = points[-1] if points else {}
+    return {
+        "post_id": post.id,
+        "external_id": post.external_id,
+        "points": points,
+        "velocity": latest.get("velocity"),
+        "acceleration": latest.get("acceleration")
+    }
+
+
 @router.get("/posts/analyze", response_model=PostAnalyticsResponse)
 async def analyze_posts(
     market: str = Query(..., description="Target market"),
@@ -88,15 +128,13 @@ async def analyze_posts(
     - Total likes/comments
     """
     service = InstagramService(db)
-    posts = await service.search_posts(
+    analytics = await service.analyze_matching_posts(
         market=market,
         hashtag=hashtag,
         category=category,
         limit=100
     )
     
-    analytics = await service.analyze_post_engagement(posts)
-    
     return analytics
 
 
@@ -261,6 +299,24 @@ async def update_influencer_status(
     }
 
 
+@router.get("/integration/status")
+async def get_integration_status(
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Get Instagram Graph API health for this process
+    
+    Returns circuit breaker state and latency percentiles per endpoint
+    family (media, insights, hashtag, oauth), plus response cache counters.
+    """
+    circuits = circuit_status()
+    return {
+        "healthy": all(circuit["state"] == "closed" for circuit in circuits.values()),
+        "circuits": circuits,
+        "response_cache": get_response_cache().stats.as_dict()
+    }
+
+
 @router.get("/insights/{market}", response_model=MarketInsightsResponse)
 async def get_market_insights(
     market: str,
@@ -4,6 +4,7 @@ Instagram OAuth 2.0 Authentication Endpoints
 Handles Instagram login flow and token management
 """
 
+import asyncio
 from fastapi import APIRouter, HTTPException, Query, Depends
 from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session
@@ -263,7 +264,8 @@ async def get_rate_limit_status(
         )
     
     instagram_client = InstagramGraphAPI(current_user.instagram_access_token)
-    rate_limit_info = instagram_client.get_rate_limit_status()
+    # The shared rate limit backend may be Redis; keep its calls off the event loop
+    rate_limit_info = await asyncio.to_thread(instagram_client.get_rate_limit_status)
     await instagram_client.close()
     
     return {
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, List, Optional
 import os
 
 
@@ -21,6 +21,7 @@ class Settings(BaseSettings):
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    ADMIN_EMAILS: List[str] = []  # Users allowed on /admin endpoints (JSON list in env)
     
     # AI APIs
     OPENAI_API_KEY: Optional[str] = None
@@ -34,6 +35,62 @@ class Settings(BaseSettings):
     INSTAGRAM_ACCESS_TOKEN: Optional[str] = None
     INSTAGRAM_REDIRECT_URI: str = "http://localhost:8000/api/v1/instagram/callback"
     USE_REAL_INSTAGRAM_API: bool = False  # Toggle between real API and mock data
+    INSTAGRAM_API_BASE_URL: Optional[str] = None  # Override Graph API host (e.g. local stand-in server)
+    INSTAGRAM_RATE_LIMIT_BACKEND: str = "memory"  # "memory" (per process) or "redis" (shared by all workers)
+    INSTAGRAM_RATE_LIMIT_MAX_CALLS: int = 200  # Calls per token per period
+    INSTAGRAM_RATE_LIMIT_PERIOD: int = 3600  # Seconds
+    INSTAGRAM_RATE_LIMIT_MAX_WAIT: float = 0.0  # Seconds to wait for a free slot before raising RateLimitError
+    INSTAGRAM_HTTP2: bool = True  # Multiplex requests over HTTP/2 (requires the h2 package)
+    INSTAGRAM_HTTP_TIMEOUT: float = 30.0  # Seconds
+    INSTAGRAM_HTTP_MAX_CONNECTIONS: int = 100  # Shared pool size per process
+    INSTAGRAM_HTTP_MAX_KEEPALIVE: int = 20  # Idle connections kept open for reuse
+    INSTAGRAM_HTTP_KEEPALIVE_EXPIRY: float = 60.0  # Seconds an idle connection is kept
+    INSTAGRAM_THROTTLE_SOFT_LIMIT: float = 75.0  # Usage % (X-App-Usage etc.) above which requests slow down
+    INSTAGRAM_THROTTLE_MAX_DELAY: float = 10.0  # Seconds between requests just below 100% usage
+    INSTAGRAM_MAX_RETRIES: int = 3  # Retries for transient errors on GET requests
+    INSTAGRAM_RETRY_BASE_DELAY: float = 0.5  # Seconds, decorrelated jitter backoff
+    INSTAGRAM_RETRY_MAX_DELAY: float = 30.0  # Seconds
+    INSTAGRAM_RESPONSE_CACHE_TTL: float = 60.0  # Seconds profiles/media details are served from cache
+    INSTAGRAM_RESPONSE_CACHE_SIZE: int = 1024  # Cached responses kept for ETag revalidation
+    INSTAGRAM_CIRCUIT_FAILURE_THRESHOLD: int = 5  # Consecutive failures that open an endpoint circuit
+    INSTAGRAM_CIRCUIT_RECOVERY_TIMEOUT: float = 30.0  # Seconds open before a half-open probe
+    INSTAGRAM_CIRCUIT_LATENCY_WINDOW: int = 200  # Recent latencies kept for percentiles
+    INSTAGRAM_COLLECT_CONCURRENCY: int = 10  # Users collected at once per worker (keep <= DB pool size)
+    INSTAGRAM_COLLECT_SHARD_SIZE: int = 50  # Users per collection task (one chord header task each)
+    INSTAGRAM_COLLECT_SHARD_TIMEOUT: int = 900  # Seconds before a shard cancels users still running
+    INSTAGRAM_TOKEN_REFRESH_CONCURRENCY: int = 20  # Token refreshes in flight at once
+    INSTAGRAM_DEAD_LETTER_AFTER: int = 3  # Consecutive failures before an account is skipped until its retry
+    INSTAGRAM_DEAD_LETTER_MAX_BACKOFF_HOURS: int = 48  # Cap on the doubling retry delay of dead-lettered accounts
+    INSTAGRAM_FULL_REFRESH_HOURS: int = 168  # Re-read an account's latest media from scratch this often
+    INSTAGRAM_METRICS_REFRESH_LIMIT: int = 200  # Max due posts per account whose metrics are refreshed per run
+    POST_METRICS_RAW_RETENTION_DAYS: int = 7  # Raw metric snapshots older than this are rolled up to daily
+    SCHEDULER_API_CALLS_PER_TICK: int = 300  # Global API budget per dispatcher tick (one tick per minute)
+    SCHEDULER_MIN_POLL_MINUTES: int = 15  # Shortest poll interval, for accounts posting and engaging fast
+    SCHEDULER_MAX_POLL_HOURS: int = 24  # Longest poll interval, for dormant accounts
+    SCHEDULER_VELOCITY_SCALE: float = 100.0  # Engagement per hour on a recent post that halves the interval
+    SCHEDULER_DISPATCH_LEASE_MINUTES: int = 30  # A dispatched account becomes due again if its run never finishes
+    HASHTAG_LOOKUP_CACHE_SIZE: int = 10000  # In-process LRU entries for hashtag name → ID
+    HASHTAG_NEGATIVE_TTL_HOURS: int = 168  # Re-search a not-found hashtag after this long (keep ≥ the 7-day budget window)
+    HASHTAG_METRICS_WINDOW_HOURS: int = 168  # Sliding window for hashtag post_count/averages/growth
+    HASHTAG_HARVEST_MAX_MEDIA: int = 200  # Media read per hashtag edge (top and recent) per run
+    
+    # Spool-and-Load Ingestion
+    INGEST_SPOOL_DIR: Optional[str] = None  # Collectors append to this spool instead of writing posts directly
+    INGEST_SPOOL_SEGMENT_BYTES: int = 8 * 1024 * 1024  # Seal a spool segment at this size
+    INGEST_SPOOL_SEGMENT_SECONDS: float = 30.0  # Seal a spool segment at this age
+    INGEST_SPOOL_CLAIM_TIMEOUT: int = 600  # Seconds before an abandoned segment is requeued (at-least-once)
+    INGEST_LOAD_BATCH_SIZE: int = 20000  # Spool records per loader batch
+    
+    # Task Leases (no two runs of a beat task at once)
+    TASK_LEASE_BACKEND: str = "redis"  # "redis" (shared by all workers) or "memory" (per process, for development)
+    TASK_LEASE_TTL: int = 120  # Seconds a lease outlives its last heartbeat (heartbeats every TTL / 3)
+    TASK_LEASE_QUEUE_DELAY: int = 300  # Seconds before an overlapping "queue" task is retried
+    
+    # Data Retention
+    POST_RETENTION_DAYS: int = 90  # Default post retention
+    POST_RETENTION_DAYS_BY_MARKET: Dict[str, int] = {}  # Per-market overrides, e.g. {"germany": 30} (JSON in env)
+    RETENTION_BATCH_SIZE: int = 5000  # Posts deleted per transaction
+    RETENTION_BATCH_PAUSE: float = 0.2  # Seconds between batches, so ingestion and autovacuum keep up
     
     # Other Social Media APIs
     TIKTOK_ACCESS_TOKEN: Optional[str] = None
@@ -17,6 +17,24 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def dialect_insert(db, model):
+    """
+    Build an INSERT for the session's dialect that supports ON CONFLICT clauses
+    
+    Args:
+        db: Database session
+        model: ORM model class
+        
+    Returns:
+        PostgreSQL or SQLite insert construct for the model's table
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert(model.__table__)
+
+
 def get_db():
     """
     Dependency for getting database session
@@ -0,0 +1,14 @@
+"""
+Time Helpers
+
+The schema stores timestamps as naive UTC (DateTime without time zone).
+"""
+
+from datetime import datetime, timezone
+
+
+def naive_utc(value: datetime) -> datetime:
+    """Convert an aware timestamp to naive UTC; naive values are assumed UTC already"""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
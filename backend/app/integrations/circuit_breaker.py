@@ -0,0 +1,226 @@
+"""
+Instagram API Circuit Breakers
+
+One breaker per Graph API endpoint family (media, insights, hashtag, oauth),
+shared by every client in the process, so a degraded endpoint fails fast
+instead of making each caller wait out the HTTP timeout.
+
+States:
+- closed: requests flow; consecutive failures are counted
+- open: requests are rejected until recovery_timeout has passed
+- half_open: a single probe request is let through; success closes the
+  circuit, failure opens it again
+
+Only transient failures (network errors, timeouts, 5xx) trip a breaker;
+throttling is handled by the adaptive throttle and client errors say
+nothing about endpoint health.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from app.core.config import get_settings
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+ENDPOINT_FAMILIES = ("media", "insights", "hashtag", "oauth")
+
+
+def endpoint_family(method: str, endpoint: str, params: Optional[Dict] = None) -> str:
+    """
+    Classify a Graph API request into an endpoint family
+
+    Args:
+        method: HTTP method
+        endpoint: Endpoint relative to the API base URL (or a full URL)
+        params: Query parameters
+
+    Returns:
+        One of ENDPOINT_FAMILIES
+    """
+    path = endpoint.split("?")[0].rstrip("/")
+    last = path.rsplit("/", 1)[-1]
+    fields = (params or {}).get("fields") or ""
+
+    if last in ("access_token", "refresh_access_token") or "oauth" in path:
+        return "oauth"
+    if last in ("ig_hashtag_search", "top_media", "recent_media"):
+        return "hashtag"
+    if last == "insights" or "insights" in fields or (method.upper() == "POST" and not path):
+        return "insights"
+    return "media"
+
+
+def _percentile(ordered: List[float], percent: float) -> Optional[float]:
+    """Nearest-rank percentile of an ascending list"""
+    if not ordered:
+        return None
+    index = max(0, min(len(ordered) - 1, math.ceil(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with half-open probing and latency stats"""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        latency_window: int = 200
+    ):
+        """
+        Args:
+            name: Endpoint family name
+            failure_threshold: Consecutive failures that open the circuit
+            recovery_timeout: Seconds the circuit stays open before a probe
+            latency_window: Number of recent latencies kept for percentiles
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.consecutive_failures = 0
+        self.total_failures = 0
+        self.total_successes = 0
+        self.rejected = 0
+        self.opened_at: Optional[float] = None
+        self.probe_started_at: Optional[float] = None
+        self.latencies: deque = deque(maxlen=latency_window)
+        self._state = CLOSED
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Current state, moving open → half_open once the timeout has passed"""
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _current_state(self, now: float) -> str:
+        if self._state == OPEN and now - self.opened_at >= self.recovery_timeout:
+            self._state = HALF_OPEN
+            self.probe_started_at = None
+        return self._state
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a request may be sent
+
+        In half-open state only one probe is in flight at a time; a probe that
+        never reports back is replaced after recovery_timeout.
+        """
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and (
+                self.probe_started_at is None or now - self.probe_started_at >= self.recovery_timeout
+            ):
+                self.probe_started_at = now
+                return True
+            self.rejected += 1
+            return False
+
+    def release_probe(self, probe_started_at: Optional[float]):
+        """
+        Free the half-open probe slot of a request that ended without an outcome
+
+        Args:
+            probe_started_at: probe_started_at right after allow_request; the
+                slot is only freed if it is still that request's
+        """
+        with self._lock:
+            if self._state == HALF_OPEN and probe_started_at is not None and self.probe_started_at == probe_started_at:
+                self.probe_started_at = None
+
+    def record_success(self, latency: Optional[float] = None):
+        """Record a healthy response (closes a half-open circuit)"""
+        with self._lock:
+            if latency is not None:
+                self.latencies.append(latency)
+            self.total_successes += 1
+            self.consecutive_failures = 0
+            self._state = CLOSED
+            self.opened_at = None
+            self.probe_started_at = None
+
+    def record_failure(self, latency: Optional[float] = None):
+        """Record a transient failure (opens the circuit at the threshold)"""
+        with self._lock:
+            now = time.monotonic()
+            if latency is not None:
+                self.latencies.append(latency)
+            self.total_failures += 1
+            self.consecutive_failures += 1
+            if self._current_state(now) == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self._state = OPEN
+                self.opened_at = now
+                self.probe_started_at = None
+
+    def reset(self):
+        """Close the circuit and clear counters"""
+        with self._lock:
+            self._state = CLOSED
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self.probe_started_at = None
+
+    def status(self) -> Dict:
+        """State, counters and latency percentiles (milliseconds)"""
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            ordered = sorted(self.latencies)
+            retry_in = None
+            if state == OPEN:
+                retry_in = round(max(0.0, self.opened_at + self.recovery_timeout - now), 3)
+
+        def as_ms(value: Optional[float]) -> Optional[float]:
+            return round(value * 1000, 1) if value is not None else None
+
+        return {
+            "state": state,
+            "consecutive_failures": self.consecutive_failures,
+            "successes": self.total_successes,
+            "failures": self.total_failures,
+            "rejected": self.rejected,
+            "retry_in_seconds": retry_in,
+            "latency_ms": {
+                "samples": len(ordered),
+                "p50": as_ms(_percentile(ordered, 50)),
+                "p95": as_ms(_percentile(ordered, 95)),
+                "p99": as_ms(_percentile(ordered, 99)),
+            },
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(family: str) -> CircuitBreaker:
+    """Get the process-wide breaker for an endpoint family"""
+    breaker = _breakers.get(family)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(family)
+            if breaker is None:
+                settings = get_settings()
+                breaker = _breakers[family] = CircuitBreaker(
+                    family,
+                    failure_threshold=settings.INSTAGRAM_CIRCUIT_FAILURE_THRESHOLD,
+                    recovery_timeout=settings.INSTAGRAM_CIRCUIT_RECOVERY_TIMEOUT,
+                    latency_window=settings.INSTAGRAM_CIRCUIT_LATENCY_WINDOW,
+                )
+    return breaker
+
+
+def circuit_status() -> Dict[str, Dict]:
+    """Status of every endpoint family's breaker"""
+    return {family: get_circuit_breaker(family).status() for family in ENDPOINT_FAMILIES}
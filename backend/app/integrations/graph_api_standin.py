@@ -0,0 +1,498 @@
+"""
+Instagram Graph API Stand-in Server
+
+Local ASGI app serving the Graph API endpoints InstagramGraphAPI uses,
+from seeded synthetic data, for load and soak testing without a live token:
+
+- GET /{user_id}                         profile (and media{insights} expansion)
+- GET /{user_id}/media                   cursor-paged media, since/until
+- GET /{media_id}                        media details (ETag / 304 support)
+- GET /{media_id}/insights               media insights
+- GET /ig_hashtag_search                 hashtag name → ID
+- GET /{hashtag_id}/top_media            cursor-paged, by popularity
+- GET /{hashtag_id}/recent_media         cursor-paged, last 24 hours
+- GET /refresh_access_token, /access_token
+- POST /                                 batch requests
+
+Behaviour knobs (StandinConfig, changeable at runtime via POST /__standin/config):
+- latency_ms / latency_jitter_ms: added to every response
+- error_rate / error_kinds: random injected Graph API errors
+- quota_calls / quota_period: per-token call budget reported through
+  X-App-Usage and X-Business-Use-Case-Usage, enforced with error code 4
+
+Usage:
+    python scripts/run_graph_api_standin.py --port 8900
+    INSTAGRAM_API_BASE_URL=http://127.0.0.1:8900 celery -A app.tasks.instagram_collector worker
+
+Or in-process, without sockets:
+    app = create_standin_app(StandinConfig(users=50))
+    http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+    client = InstagramGraphAPI("standin-token-1", http_client=http_client)
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import re
+import secrets
+import time
+from collections import Counter, deque
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+
+HASHTAG_VOCABULARY = [
+    "kbeauty", "koreanskincare", "glassskin", "10stepskincare", "kbeautyhaul",
+    "skincareroutine", "koreanbeauty", "cosrx", "sheetmask", "sunscreen",
+    "hautpflege", "beautecoreenne", "韓国コスメ", "美肌", "スキンケア",
+]
+
+CAPTION_TEMPLATES = [
+    "Glass skin routine day {day} ✨",
+    "New K-Beauty haul just arrived 🛍️",
+    "Morning routine with my favourite essence ☀️",
+    "Testing a {brand} serum for {day} days",
+    "Sheet mask night with {brand} 🌙",
+]
+
+BRANDS = ["COSRX", "Innisfree", "Laneige", "Sulwhasoo", "Missha", "Klairs"]
+
+ERROR_RESPONSES = {
+    "server": (500, {"message": "An unexpected error has occurred.", "type": "OAuthException", "code": 2, "is_transient": True}),
+    "unknown": (500, {"message": "An unknown error occurred", "type": "OAuthException", "code": 1, "is_transient": True}),
+    "throttle": (400, {"message": "Application request limit reached", "type": "OAuthException", "code": 4}),
+    "user_throttle": (400, {"message": "User request limit reached", "type": "OAuthException", "code": 17}),
+    "expired": (400, {"message": "Error validating access token: Session has expired", "type": "OAuthException", "code": 190}),
+}
+
+TOKEN_LIFETIME_SECONDS = 60 * 24 * 3600
+RECENT_MEDIA_WINDOW = timedelta(hours=24)
+STANDIN_PREFIX = "__standin"
+
+
+class StandinConfig(BaseModel):
+    """Stand-in server configuration"""
+    seed: int = 42
+    users: int = 10
+    media_per_user: int = 200
+    hashtags: List[str] = HASHTAG_VOCABULARY
+
+    # Behaviour
+    latency_ms: float = 0.0
+    latency_jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    error_kinds: List[str] = ["server", "throttle"]
+    quota_calls: int = 200  # Calls per token per quota_period (Graph API: 200/hour)
+    quota_period: float = 3600.0
+    max_page_size: int = 100
+    rejected_tokens: List[str] = []  # Tokens answered with error 190
+
+
+# ========== Synthetic Data ==========
+
+def encode_cursor(offset: int) -> str:
+    """Opaque cursor for a list offset"""
+    return base64.urlsafe_b64encode(str(offset).encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    """List offset for a cursor (0 for missing or malformed cursors)"""
+    if not cursor:
+        return 0
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except ValueError:
+        return 0
+
+
+def _format_timestamp(value: datetime) -> str:
+    """Graph API timestamp format, e.g. 2024-01-15T10:00:00+0000"""
+    return value.strftime("%Y-%m-%dT%H:%M:%S+0000")
+
+
+class SyntheticGraphData:
+    """
+    Deterministic users, media and hashtags generated from a seed
+
+    Media timestamps are spread over the 30 days before `now`; each user's
+    media list is newest first, like the real media edge.
+    """
+
+    def __init__(self, config: StandinConfig, now: Optional[datetime] = None):
+        rng = random.Random(config.seed)
+        self.now = now or datetime.now(timezone.utc)
+
+        self.users: Dict[str, Dict] = {}
+        self.user_media: Dict[str, List[str]] = {}
+        self.media: Dict[str, Dict] = {}
+        self.hashtag_ids: Dict[str, str] = {}
+        self.hashtag_media: Dict[str, List[str]] = {}
+
+        for index, name in enumerate(config.hashtags):
+            hashtag_id = f"178432{index + 1:011d}"
+            self.hashtag_ids[name.lower()] = hashtag_id
+            self.hashtag_media[hashtag_id] = []
+
+        media_number = 0
+        for user_index in range(config.users):
+            user_id = f"178414{user_index + 1:011d}"
+            followers = rng.randint(5_000, 200_000)
+            self.users[user_id] = {
+                "id": user_id,
+                "username": f"kbeauty_creator_{user_index + 1}",
+                "account_type": "BUSINESS",
+                "media_count": config.media_per_user,
+            }
+
+            offsets = sorted(rng.uniform(0, 30 * 24 * 3600) for _ in range(config.media_per_user))
+            media_ids = []
+            for seconds_ago in offsets:
+                media_number += 1
+                media_id = f"179{media_number:014d}"
+                tags = rng.sample(config.hashtags, min(len(config.hashtags), rng.randint(2, 6)))
+                caption = rng.choice(CAPTION_TEMPLATES).format(
+                    day=rng.randint(1, 30), brand=rng.choice(BRANDS)
+                )
+                like_count = rng.randint(int(followers * 0.01), int(followers * 0.08))
+                self.media[media_id] = {
+                    "id": media_id,
+                    "caption": f"{caption} " + " ".join(f"#{tag}" for tag in tags),
+                    "media_type": rng.choice(["IMAGE", "IMAGE", "VIDEO", "CAROUSEL_ALBUM"]),
+                    "media_url": f"https://standin.local/media/{media_id}.jpg",
+                    "permalink": f"https://www.instagram.com/p/{media_id}/",
+                    "timestamp": _format_timestamp(self.now - timedelta(seconds=seconds_ago)),
+                    "like_count": like_count,
+                    "comments_count": rng.randint(0, max(1, like_count // 20)),
+                    "_posted_at": self.now - timedelta(seconds=seconds_ago),
+                    "_reach": rng.randint(like_count, like_count * 10 + 1),
+                }
+                media_ids.append(media_id)
+                for tag in tags:
+                    self.hashtag_media[self.hashtag_ids[tag.lower()]].append(media_id)
+            self.user_media[user_id] = media_ids
+
+        for hashtag_id, media_ids in self.hashtag_media.items():
+            media_ids.sort(key=lambda media_id: self.media[media_id]["_posted_at"], reverse=True)
+
+    def public_media(self, media_id: str, fields: Optional[List[str]]) -> Dict:
+        """Media item restricted to the requested fields"""
+        item = self.media[media_id]
+        names = fields or ["id", "caption", "media_type", "media_url", "permalink", "timestamp"]
+        return {name: item[name] for name in names if name in item and not name.startswith("_")}
+
+    def insights(self, media_id: str, metrics: List[str]) -> Dict:
+        """Insights payload for a media item"""
+        item = self.media[media_id]
+        values = {
+            "reach": item["_reach"],
+            "impressions": int(item["_reach"] * 1.4),
+            "engagement": item["like_count"] + item["comments_count"],
+            "saved": item["like_count"] // 15,
+        }
+        return {
+            "data": [
+                {"name": metric, "period": "lifetime", "values": [{"value": values.get(metric, 0)}]}
+                for metric in metrics
+            ]
+        }
+
+
+# ========== Quota Tracking ==========
+
+class QuotaTracker:
+    """Sliding-window call counter per access token"""
+
+    def __init__(self):
+        self._calls: Dict[str, deque] = {}
+
+    def record(self, token: str, limit: int, period: float, cost: int = 1) -> Tuple[float, float]:
+        """
+        Record calls for a token
+
+        Returns:
+            Tuple of (usage percent, seconds until the oldest call expires)
+        """
+        now = time.monotonic()
+        calls = self._calls.setdefault(token, deque())
+        while calls and calls[0] <= now - period:
+            calls.popleft()
+        calls.extend([now] * cost)
+        usage = len(calls) / max(limit, 1) * 100
+        regain = max(0.0, calls[0] + period - now) if usage >= 100 else 0.0
+        return usage, regain
+
+    def reset(self):
+        self._calls.clear()
+
+
+def usage_headers(usage: float, regain_seconds: float) -> Dict[str, str]:
+    """X-App-Usage / X-Business-Use-Case-Usage headers for a usage percent"""
+    percent = int(min(usage, 100))
+    return {
+        "X-App-Usage": json.dumps({"call_count": percent, "total_time": percent // 2, "total_cputime": percent // 2}),
+        "X-Business-Use-Case-Usage": json.dumps({
+            "standin": [{
+                "type": "instagram",
+                "call_count": percent,
+                "total_time": percent // 2,
+                "total_cputime": percent // 2,
+                "estimated_time_to_regain_access": int((regain_seconds + 59) // 60),
+            }]
+        }),
+    }
+
+
+# ========== Request Handling ==========
+
+class GraphAPIStandin:
+    """Routes Graph API style requests against SyntheticGraphData"""
+
+    EXPANSION_PATTERN = re.compile(r"media\.limit\((\d+)\)\{id,insights\.metric\(([^)]*)\)\}")
+
+    def __init__(self, config: StandinConfig):
+        self.config = config
+        self.data = SyntheticGraphData(config)
+        self.quota = QuotaTracker()
+        self.rng = random.Random(config.seed)
+        self.stats: Counter = Counter()
+
+    async def handle(
+        self,
+        method: str,
+        path: str,
+        params: Dict[str, str],
+        headers: Dict[str, str],
+        body: Optional[Dict] = None
+    ) -> Tuple[int, Dict, Dict[str, str]]:
+        """
+        Handle one request
+
+        Returns:
+            Tuple of (status code, JSON body, response headers)
+        """
+        config = self.config
+        if config.latency_ms or config.latency_jitter_ms:
+            delay = config.latency_ms + self.rng.uniform(0, config.latency_jitter_ms)
+            await asyncio.sleep(delay / 1000)
+
+        token = params.get("access_token", "")
+        cost = len(body.get("batch", [])) if method == "POST" and body else 1
+        usage, regain = self.quota.record(token, config.quota_calls, config.quota_period, cost)
+        response_headers = usage_headers(usage, regain)
+        self.stats["requests"] += 1
+
+        if usage > 100:
+            self.stats["quota_exceeded"] += 1
+            status, error = ERROR_RESPONSES["throttle"]
+            return status, {"error": error}, response_headers
+        if token in config.rejected_tokens:
+            self.stats["rejected_token"] += 1
+            status, error = ERROR_RESPONSES["expired"]
+            return status, {"error": error}, response_headers
+        if config.error_rate and self.rng.random() < config.error_rate:
+            kind = self.rng.choice(config.error_kinds)
+            self.stats[f"injected_{kind}"] += 1
+            status, error = ERROR_RESPONSES[kind]
+            return status, {"error": error}, response_headers
+
+        if method == "POST":
+            status, payload = self._batch(body or {}, token)
+        else:
+            status, payload = self._route(path, params)
+
+        if status == 200 and self._is_object_path(path):
+            etag = '"' + hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest() + '"'
+            response_headers["ETag"] = etag
+            if headers.get("if-none-match") == etag:
+                self.stats["not_modified"] += 1
+                return 304, {}, response_headers
+
+        self.stats[f"status_{status}"] += 1
+        return status, payload, response_headers
+
+    def _is_object_path(self, path: str) -> bool:
+        return "/" not in path and (path in self.data.users or path in self.data.media)
+
+    def _route(self, path: str, params: Dict[str, str]) -> Tuple[int, Dict]:
+        """Dispatch a GET path to its handler"""
+        parts = [part for part in path.split("/") if part]
+        if parts and re.fullmatch(r"v\d+\.\d+", parts[0]):
+            parts = parts[1:]
+        fields = params["fields"].split(",") if params.get("fields") else None
+        data = self.data
+
+        if parts == ["ig_hashtag_search"]:
+            self.stats["hashtag_search"] += 1
+            hashtag_id = data.hashtag_ids.get(params.get("q", "").lstrip("#").lower())
+            return 200, {"data": [{"id": hashtag_id}] if hashtag_id else []}
+        if parts in (["refresh_access_token"], ["access_token"]):
+            self.stats["token_refresh"] += 1
+            return 200, {
+                "access_token": f"standin-{secrets.token_hex(16)}",
+                "token_type": "bearer",
+                "expires_in": TOKEN_LIFETIME_SECONDS,
+            }
+
+        if len(parts) == 1:
+            object_id = parts[0]
+            if object_id in data.users:
+                self.stats["profile"] += 1
+                return 200, self._profile(object_id, params.get("fields", ""))
+            if object_id in data.media:
+                self.stats["media_details"] += 1
+                return 200, data.public_media(object_id, fields)
+        elif len(parts) == 2:
+            object_id, edge = parts
+            if edge == "media" and object_id in data.users:
+                self.stats["user_media"] += 1
+                media_ids = data.user_media[object_id]
+                media_ids = self._time_filter(media_ids, params)
+                return 200, self._page(path, media_ids, params, fields)
+            if edge == "insights" and object_id in data.media:
+                self.stats["insights"] += 1
+                metrics = (params.get("metric") or "engagement,impressions,reach,saved").split(",")
+                return 200, data.insights(object_id, metrics)
+            if edge in ("top_media", "recent_media") and object_id in data.hashtag_media:
+                self.stats[f"hashtag_{edge}"] += 1
+                if not params.get("user_id"):
+                    return 400, {"error": {"message": "user_id is required", "type": "OAuthException", "code": 100}}
+                media_ids = data.hashtag_media[object_id]
+                if edge == "top_media":
+                    media_ids = sorted(media_ids, key=lambda media_id: -data.media[media_id]["like_count"])
+                else:
+                    cutoff = data.now - RECENT_MEDIA_WINDOW
+                    media_ids = [m for m in media_ids if data.media[m]["_posted_at"] >= cutoff]
+                return 200, self._page(path, media_ids, params, fields)
+
+        self.stats["not_found"] += 1
+        return 400, {
+            "error": {
+                "message": f"Unsupported get request. Object with ID '{path}' does not exist",
+                "type": "GraphMethodException",
+                "code": 100,
+            }
+        }
+
+    def _profile(self, user_id: str, fields: str) -> Dict:
+        """User profile, or recent media insights for the field expansion query"""
+        expansion = self.EXPANSION_PATTERN.search(fields)
+        if expansion:
+            limit = int(expansion.group(1))
+            metrics = expansion.group(2).split(",")
+            media_ids = self.data.user_media[user_id][:limit]
+            return {
+                "id": user_id,
+                "media": {
+                    "data": [
+                        {"id": media_id, "insights": self.data.insights(media_id, metrics)}
+                        for media_id in media_ids
+                    ]
+                },
+            }
+        profile = self.data.users[user_id]
+        names = fields.split(",") if fields else list(profile)
+        return {name: profile[name] for name in names if name in profile}
+
+    def _time_filter(self, media_ids: List[str], params: Dict[str, str]) -> List[str]:
+        """Apply since/until (unix seconds) to a media list"""
+        since = params.get("since")
+        until = params.get("until")
+        if not since and not until:
+            return media_ids
+        since_at = datetime.fromtimestamp(int(since), timezone.utc) if since else None
+        until_at = datetime.fromtimestamp(int(until), timezone.utc) if until else None
+        return [
+            media_id for media_id in media_ids
+            if (since_at is None or self.data.media[media_id]["_posted_at"] >= since_at)
+            and (until_at is None or self.data.media[media_id]["_posted_at"] <= until_at)
+        ]
+
+    def _page(self, path: str, media_ids: List[str], params: Dict[str, str], fields: Optional[List[str]]) -> Dict:
+        """One cursor page of a media edge"""
+        limit = min(int(params.get("limit") or 25), self.config.max_page_size)
+        start = decode_cursor(params.get("after"))
+        end = start + limit
+        payload = {"data": [self.data.public_media(media_id, fields) for media_id in media_ids[start:end]]}
+        if media_ids[start:end]:
+            payload["paging"] = {"cursors": {"before": encode_cursor(start), "after": encode_cursor(end)}}
+            if end < len(media_ids):
+                next_params = {key: value for key, value in params.items() if key != "access_token"}
+                next_params["after"] = encode_cursor(end)
+                query = "&".join(f"{key}={value}" for key, value in next_params.items())
+                payload["paging"]["next"] = f"https://standin.local/{path.lstrip('/')}?{query}"
+        return payload
+
+    def _batch(self, body: Dict, token: str) -> Tuple[int, List]:
+        """Run batch sub-requests and wrap each like the Graph API does"""
+        self.stats["batch"] += 1
+        responses = []
+        for request in body.get("batch", []):
+            url = urlsplit(request.get("relative_url", ""))
+            params = dict(parse_qsl(url.query))
+            params.setdefault("access_token", token)
+            status, payload = self._route(url.path, params)
+            responses.append({"code": status, "body": json.dumps(payload)})
+        return 200, responses
+
+
+def create_standin_app(config: Optional[StandinConfig] = None) -> FastAPI:
+    """
+    Create the stand-in ASGI app
+
+    Args:
+        config: Data and behaviour settings (defaults if None)
+
+    Returns:
+        FastAPI app; the GraphAPIStandin instance is on app.state.standin
+    """
+    standin = GraphAPIStandin(config or StandinConfig())
+    app = FastAPI(title="Instagram Graph API Stand-in", docs_url=None, redoc_url=None)
+    app.state.standin = standin
+
+    @app.get(f"/{STANDIN_PREFIX}/stats")
+    async def get_stats():
+        """Request counters by endpoint and outcome"""
+        return dict(standin.stats)
+
+    @app.post(f"/{STANDIN_PREFIX}/config")
+    async def update_config(request: Request):
+        """Change behaviour knobs at runtime (data is not regenerated)"""
+        updates = await request.json()
+        if updates.pop("reset_quota", False):
+            standin.quota.reset()
+        standin.config = standin.config.model_copy(update=updates)
+        return standin.config.model_dump()
+
+    @app.api_route("/{path:path}", methods=["GET", "POST"])
+    async def graph_api(path: str, request: Request):
+        params = dict(request.query_params)
+        body = None
+        if request.method == "POST":
+            raw = await request.body()
+            try:
+                body = json.loads(raw) if raw else {}
+            except ValueError:
+                body = dict(parse_qsl(raw.decode()))
+            params.setdefault("access_token", body.get("access_token", ""))
+            if isinstance(body.get("batch"), str):
+                body["batch"] = json.loads(body["batch"])
+
+        status, payload, headers = await standin.handle(
+            request.method,
+            path,
+            params,
+            {key.lower(): value for key, value in request.headers.items()},
+            body
+        )
+        if status == 304:
+            return Response(status_code=304, headers=headers)
+        return JSONResponse(payload, status_code=status, headers=headers)
+
+    return app
@@ -0,0 +1,96 @@
+"""
+Shared HTTP Connection Pool
+
+Process-wide httpx.AsyncClient used by every InstagramGraphAPI instance,
+so API calls reuse keep-alive connections (multiplexed over HTTP/2 when
+the `h2` package is installed) instead of paying a TCP/TLS handshake
+per client.
+
+There is one client per event loop. Lifecycle:
+- FastAPI: opened on startup and closed on shutdown (see main.py lifespan)
+- Celery: every task of a worker process runs on one event loop (see
+  run_async in app/tasks/instagram_collector.py); its client is opened on
+  worker process init and closed on worker shutdown
+"""
+
+import asyncio
+import weakref
+from typing import Optional
+
+import httpx
+
+from app.core.config import get_settings
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+# Pooled connections belong to the event loop that opened them, so each
+# loop gets its own client; entries go away with their loop
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+# Client created outside a running loop, adopted by the first loop that asks
+_unbound_client: Optional[httpx.AsyncClient] = None
+
+
+def _create_client() -> httpx.AsyncClient:
+    """Create a pooled client from settings"""
+    settings = get_settings()
+    return httpx.AsyncClient(
+        http2=settings.INSTAGRAM_HTTP2 and HTTP2_AVAILABLE,
+        timeout=settings.INSTAGRAM_HTTP_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=settings.INSTAGRAM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.INSTAGRAM_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.INSTAGRAM_HTTP_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the running event loop's shared HTTP client, creating it if needed
+
+    Returns:
+        Shared httpx.AsyncClient
+    """
+    global _unbound_client
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    if loop is None:
+        if _unbound_client is None or _unbound_client.is_closed:
+            _unbound_client = _create_client()
+        return _unbound_client
+
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        if _unbound_client is not None and not _unbound_client.is_closed:
+            client, _unbound_client = _unbound_client, None
+        else:
+            client = _create_client()
+        _clients[loop] = client
+    return client
+
+
+async def close_http_client():
+    """
+    Close the running event loop's shared HTTP client and its pooled connections
+
+    Call it before the loop finishes (application shutdown, worker
+    shutdown, the end of an asyncio.run entry point); connections of a
+    loop that is already closed cannot be closed cleanly.
+    """
+    global _unbound_client
+
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None and not client.is_closed:
+        await client.aclose()
+    if _unbound_client is not None and not _unbound_client.is_closed:
+        await _unbound_client.aclose()
+    _unbound_client = None
@@ -9,13 +9,31 @@ Handles all interactions with Instagram Graph API including:
 """
 
 import asyncio
+import copy
+import json
 import time
-from typing import Dict, List, Optional, Any
-from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any, AsyncIterator, Tuple
+from datetime import datetime, timedelta, timezone
 import httpx
 from pydantic import BaseModel
 
 from app.core.config import get_settings
+from app.integrations.http_pool import get_http_client
+from app.integrations.rate_limiter import RateLimiter, get_rate_limit_backend, rate_limit_key
+from app.integrations.throttling import decorrelated_jitter, get_adaptive_throttle
+from app.integrations.response_cache import get_response_cache, get_single_flight, make_cache_key
+from app.integrations.circuit_breaker import (
+    ENDPOINT_FAMILIES,
+    OPEN,
+    endpoint_family,
+    get_circuit_breaker,
+)
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 
 # ========== Pydantic Models for API Responses ==========
@@ -61,63 +79,121 @@ class InstagramInsights(BaseModel):
     profile_views: int
 
 
-# ========== Rate Limiter ==========
+MEDIA_FIELDS = [
+    "id", "caption", "media_type", "media_url", "permalink",
+    "timestamp", "like_count", "comments_count"
+]
+
+HASHTAG_MEDIA_FIELDS = [
+    "id", "caption", "media_type", "media_url", "permalink",
+    "like_count", "comments_count", "timestamp"
+]
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Treat naive datetimes as UTC so they compare with API timestamps"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
 
-class RateLimiter:
+
+def _parse_media_item(item: Dict) -> InstagramMedia:
+    """Parse a raw media item from a Graph API response"""
+    if isinstance(item.get("timestamp"), str):
+        item["timestamp"] = datetime.fromisoformat(item["timestamp"].replace("Z", "+00:00"))
+    return InstagramMedia(**item)
+
+
+class MediaRecord:
     """
-    Rate limiter for Instagram API calls
+    Lightweight media record for bulk collection paths
     
-    Instagram limits: 200 calls per hour per user
+    Same attributes as InstagramMedia, built from trusted Graph API items
+    without pydantic validation.
     """
+    __slots__ = tuple(InstagramMedia.model_fields)
     
-    def __init__(self, max_calls: int = 200, period: int = 3600):
-        """
-        Args:
-            max_calls: Maximum number of calls allowed
-            period: Time period in seconds (default: 3600 = 1 hour)
-        """
-        self.max_calls = max_calls
-        self.period = period
-        self.calls: List[float] = []
-    
-    def is_allowed(self) -> bool:
-        """Check if a new API call is allowed"""
-        now = time.time()
-        
-        # Remove calls outside the time window
-        self.calls = [call_time for call_time in self.calls if call_time > now - self.period]
-        
-        # Check if we're under the limit
-        if len(self.calls) < self.max_calls:
-            self.calls.append(now)
-            return True
-        
-        return False
+    def __init__(
+        self,
+        id: str,
+        media_type: str,
+        media_url: str,
+        permalink: str,
+        timestamp: datetime,
+        caption: Optional[str] = None,
+        like_count: Optional[int] = None,
+        comments_count: Optional[int] = None,
+        impressions: Optional[int] = None,
+        reach: Optional[int] = None,
+        saved: Optional[int] = None,
+        engagement: Optional[int] = None,
+        **_ignored
+    ):
+        self.id = id
+        self.caption = caption
+        self.media_type = media_type
+        self.media_url = media_url
+        self.permalink = permalink
+        self.timestamp = timestamp
+        self.like_count = like_count
+        self.comments_count = comments_count
+        self.impressions = impressions
+        self.reach = reach
+        self.saved = saved
+        self.engagement = engagement
     
-    def time_until_next_call(self) -> float:
-        """Get seconds until next call is allowed"""
-        if len(self.calls) < self.max_calls:
-            return 0.0
-        
-        now = time.time()
-        oldest_call = min(self.calls)
-        return max(0, self.period - (now - oldest_call))
+    def model_dump(self) -> Dict:
+        """Dictionary form, matching InstagramMedia.model_dump()"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+_MEDIA_REQUIRED_FIELDS = frozenset(
+    name for name, field in InstagramMedia.model_fields.items() if field.is_required()
+)
+
+
+def _decode_media_record(item: Dict):
+    """
+    Build a MediaRecord from a trusted Graph API item
     
-    def get_remaining_calls(self) -> int:
-        """Get number of remaining calls in current window"""
-        now = time.time()
-        self.calls = [call_time for call_time in self.calls if call_time > now - self.period]
-        return max(0, self.max_calls - len(self.calls))
+    Items missing a required field fall back to the validating parser so
+    malformed data still raises.
+    """
+    if not _MEDIA_REQUIRED_FIELDS.issubset(item):
+        return _parse_media_item(item)
+    record = MediaRecord(**item)
+    if isinstance(record.timestamp, str):
+        try:
+            record.timestamp = datetime.fromisoformat(record.timestamp)
+        except ValueError:
+            record.timestamp = datetime.fromisoformat(record.timestamp.replace("Z", "+00:00"))
+    return record
+
+
+def _json_loads(content):
+    """Decode JSON with orjson when installed"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def _decode_body(response: httpx.Response) -> Any:
+    """Decode a JSON response body, using orjson on the raw bytes when available"""
+    content = getattr(response, "content", None)
+    if ORJSON_AVAILABLE and isinstance(content, (bytes, bytearray)) and content:
+        return orjson.loads(content)
+    return response.json()
 
 
 # ========== Custom Exceptions ==========
 
 class InstagramAPIError(Exception):
     """Base exception for Instagram API errors"""
-    def __init__(self, code: int, message: str, error_type: str = "APIError"):
+    def __init__(self, code: int, message: str, error_type: str = "APIError", transient: bool = False):
         self.code = code
         self.message = message
         self.error_type = error_type
+        self.transient = transient  # Safe to retry after a backoff
         super().__init__(f"Instagram API Error {code}: {message}")
 
 
@@ -139,6 +215,49 @@ class PermissionError(InstagramAPIError):
         super().__init__(200, message, "PermissionError")
 
 
+class CircuitOpenError(InstagramAPIError):
+    """Endpoint family circuit is open; request was not sent"""
+    def __init__(self, family: str):
+        self.family = family
+        super().__init__(0, f"Circuit open for {family} endpoints", "CircuitOpenError")
+
+
+# Graph API error codes: 4 app limit, 17 user limit, 32 page limit, 613 custom limit
+THROTTLING_ERROR_CODES = {4, 17, 32, 613}
+# 1 unknown error, 2 service temporarily unavailable
+TRANSIENT_ERROR_CODES = {1, 2} | THROTTLING_ERROR_CODES
+
+
+def _error_from_payload(error: Dict) -> InstagramAPIError:
+    """Map a Graph API error object to the matching exception"""
+    code = error.get("code", 0)
+    message = error.get("message", "Unknown error")
+    error_type = error.get("type", "APIError")
+    
+    # Handle specific errors
+    if code == 190:
+        exception = TokenExpiredError()
+    elif code == 4:
+        exception = RateLimitError()
+    elif code == 200:
+        exception = PermissionError(message)
+    else:
+        exception = InstagramAPIError(code, message, error_type)
+    
+    exception.transient = code in TRANSIENT_ERROR_CODES or bool(error.get("is_transient"))
+    return exception
+
+
+def _parse_insights(result: Dict) -> Dict:
+    """Flatten an insights response into {metric_name: value}"""
+    insights = {}
+    for item in result.get("data", []):
+        metric_name = item.get("name")
+        metric_value = item.get("values", [{}])[0].get("value", 0)
+        insights[metric_name] = metric_value
+    return insights
+
+
 # ========== Instagram Graph API Client ==========
 
 class InstagramGraphAPI:
@@ -151,112 +270,271 @@ class InstagramGraphAPI:
     
     BASE_URL = "https://graph.instagram.com"
     API_VERSION = "v18.0"
+    BATCH_LIMIT = 50  # Maximum sub-requests per Graph API batch call
+    DEFAULT_INSIGHT_METRICS = ["engagement", "impressions", "reach", "saved"]
     
-    def __init__(self, access_token: Optional[str] = None):
+    def __init__(
+        self,
+        access_token: Optional[str] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_rate_limit_wait: Optional[float] = None,
+        http_client: Optional[httpx.AsyncClient] = None
+    ):
         """
         Initialize Instagram API client
         
+        The client is a lightweight per-token view: HTTP connections come from
+        the process-wide pool in app.integrations.http_pool unless an explicit
+        http_client is given (which the caller then owns and closes).
+        
         Args:
             access_token: Instagram access token (if None, uses config)
+            rate_limiter: Rate limiter to use (default: shared per-token limiter)
+            max_rate_limit_wait: Seconds to wait for a free call slot before
+                raising RateLimitError (default: INSTAGRAM_RATE_LIMIT_MAX_WAIT)
+            http_client: HTTP client to use instead of the shared pool
         """
         self.settings = get_settings()
         self.access_token = access_token or getattr(self.settings, "INSTAGRAM_ACCESS_TOKEN", None)
-        self.rate_limiter = RateLimiter(max_calls=200, period=3600)
-        self.client = httpx.AsyncClient(timeout=30.0)
+        self.token_key = rate_limit_key(self.access_token)
+        self.base_url = (self.settings.INSTAGRAM_API_BASE_URL or self.BASE_URL).rstrip("/")
+        self.rate_limiter = rate_limiter or RateLimiter(
+            max_calls=self.settings.INSTAGRAM_RATE_LIMIT_MAX_CALLS,
+            period=self.settings.INSTAGRAM_RATE_LIMIT_PERIOD,
+            key=self.token_key,
+            backend=get_rate_limit_backend()
+        )
+        if max_rate_limit_wait is None:
+            max_rate_limit_wait = self.settings.INSTAGRAM_RATE_LIMIT_MAX_WAIT
+        self.max_rate_limit_wait = max_rate_limit_wait
+        self.max_retries = self.settings.INSTAGRAM_MAX_RETRIES
+        self.throttle = get_adaptive_throttle(self.token_key)
+        self.response_cache = get_response_cache()
+        self.single_flight = get_single_flight()
+        self.circuit_breakers = {family: get_circuit_breaker(family) for family in ENDPOINT_FAMILIES}
+        self._http_client = http_client
+        self.requests_sent = 0  # HTTP requests actually sent (cache hits excluded)
+        self.calls_charged = 0  # Rate limit quota those requests were charged (batch sub-requests count)
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """HTTP client used for requests (shared pool by default)"""
+        return self._http_client or get_http_client()
     
     async def close(self):
-        """Close the HTTP client"""
-        await self.client.aclose()
+        """
+        Release the client
+        
+        Pooled connections stay open for other clients; the pool itself is
+        closed by close_http_client() at application or worker shutdown.
+        """
+        self._http_client = None
     
     def _build_url(self, endpoint: str) -> str:
         """Build full API URL"""
         # Remove leading slash if present
         endpoint = endpoint.lstrip("/")
-        return f"{self.BASE_URL}/{endpoint}"
+        return f"{self.base_url}/{endpoint}"
     
     async def _make_request(
         self,
         method: str,
         endpoint: str,
         params: Optional[Dict] = None,
-        data: Optional[Dict] = None
+        data: Optional[Dict] = None,
+        cost: int = 1
     ) -> Dict:
         """
         Make HTTP request to Instagram API with rate limiting and error handling
         
+        Idempotent GET requests are retried on transient failures (network
+        errors, 429/5xx, Graph API throttling codes) with decorrelated-jitter
+        backoff, up to INSTAGRAM_MAX_RETRIES times. Concurrent identical GETs
+        for the client's own token share a single in-flight request; requests
+        that pass their own access_token (token exchange and refresh) are
+        never coalesced.
+        
         Args:
             method: HTTP method (GET, POST, etc.)
             endpoint: API endpoint
             params: Query parameters
             data: Request body data
+            cost: Number of API calls the request is charged as (batch sub-requests)
             
         Returns:
             API response as dictionary
             
         Raises:
-            RateLimitError: If rate limit exceeded
+            RateLimitError: If no call slot frees up within max_rate_limit_wait
             TokenExpiredError: If access token expired
             InstagramAPIError: For other API errors
         """
-        # Check rate limit
-        if not self.rate_limiter.is_allowed():
-            wait_time = self.rate_limiter.time_until_next_call()
-            raise RateLimitError()
+        async def fetch():
+            result, _ = await self._request(method, endpoint, params, data, cost)
+            return result
         
+        if method.upper() == "GET" and "access_token" not in (params or {}):
+            key = make_cache_key(self.token_key, endpoint, params)
+            return await self.single_flight.do(key, fetch)
+        return await fetch()
+    
+    async def _request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict],
+        data: Optional[Dict],
+        cost: int,
+        headers: Optional[Dict] = None
+    ) -> Tuple[Any, httpx.Response]:
+        """Send a request with retries, returning the parsed body and raw response"""
         # Add access token to params
-        if params is None:
-            params = {}
+        params = dict(params or {})
         if self.access_token:
-            params["access_token"] = self.access_token
+            params.setdefault("access_token", self.access_token)
         
         # Build URL
         url = self._build_url(endpoint)
+        family = endpoint_family(method, endpoint, params)
+        
+        retries = self.max_retries if method.upper() == "GET" else 0
+        backoff = decorrelated_jitter(
+            self.settings.INSTAGRAM_RETRY_BASE_DELAY,
+            self.settings.INSTAGRAM_RETRY_MAX_DELAY
+        )
+        
+        for attempt in range(retries + 1):
+            try:
+                return await self._send_request(method, url, params, data, cost, headers, family)
+            except InstagramAPIError as e:
+                if not e.transient or attempt >= retries:
+                    raise
+                await asyncio.sleep(next(backoff))
+    
+    async def _send_request(
+        self,
+        method: str,
+        url: str,
+        params: Dict,
+        data: Optional[Dict],
+        cost: int,
+        headers: Optional[Dict] = None,
+        family: str = "media"
+    ) -> Tuple[Any, httpx.Response]:
+        """
+        Send a single request, pacing it by rate limit and API usage
+        
+        Returns:
+            Tuple of (parsed body, response); the body is None for 304 Not Modified
+        """
+        # Fail fast while the endpoint family is known to be degraded
+        breaker = self.circuit_breakers[family]
+        if not breaker.allow_request():
+            raise CircuitOpenError(family)
+        probe = breaker.probe_started_at
         
-        # Make request
         try:
-            if method.upper() == "GET":
-                response = await self.client.get(url, params=params)
-            elif method.upper() == "POST":
-                response = await self.client.post(url, params=params, json=data)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
+            # Slow down as reported API usage approaches 100%
+            if not await self.throttle.wait(self.max_rate_limit_wait):
+                raise RateLimitError()
             
-            # Parse response
-            response.raise_for_status()
-            result = response.json()
-            
-            # Check for API errors in response
-            if "error" in result:
-                error = result["error"]
-                code = error.get("code", 0)
-                message = error.get("message", "Unknown error")
-                error_type = error.get("type", "APIError")
-                
-                # Handle specific errors
-                if code == 190:
-                    raise TokenExpiredError()
-                elif code == 4:
+            # Check rate limit, waiting for a slot if allowed to
+            if not await self.rate_limiter.admit(cost):
+                if not await self.rate_limiter.acquire(self.max_rate_limit_wait, cost):
                     raise RateLimitError()
-                elif code == 200:
-                    raise PermissionError(message)
-                else:
-                    raise InstagramAPIError(code, message, error_type)
-            
-            return result
             
+            # Make request
+            started = time.monotonic()
+            self.requests_sent += 1
+            self.calls_charged += cost
+            try:
+                if method.upper() == "GET":
+                    response = await self.client.get(url, params=params, headers=headers)
+                elif method.upper() == "POST":
+                    response = await self.client.post(url, params=params, json=data, headers=headers)
+                else:
+                    raise ValueError(f"Unsupported HTTP method: {method}")
+            except httpx.RequestError as e:
+                breaker.record_failure(time.monotonic() - started)
+                error = InstagramAPIError(0, f"Request failed: {str(e)}")
+                error.transient = True
+                raise error
+        except BaseException:
+            # A half-open probe that was never answered must not hold the slot
+            breaker.release_probe(probe)
+            raise
+        
+        latency = time.monotonic() - started
+        if response.status_code >= 500:
+            breaker.record_failure(latency)
+        else:
+            breaker.record_success(latency)
+        self.throttle.update(response.headers)
+        
+        if response.status_code == 304:
+            return None, response
+        
+        try:
+            # Parse response
+            response.raise_for_status()
+            result = _decode_body(response)
         except httpx.HTTPStatusError as e:
             # Handle HTTP errors
+            status_code = e.response.status_code
             try:
-                error_data = e.response.json()
-                error = error_data.get("error", {})
-                code = error.get("code", e.response.status_code)
-                message = error.get("message", str(e))
-                raise InstagramAPIError(code, message)
-            except:
-                raise InstagramAPIError(e.response.status_code, str(e))
+                error_payload = e.response.json().get("error")
+            except (ValueError, AttributeError):
+                error_payload = None
+            
+            if error_payload:
+                error = _error_from_payload(error_payload)
+            else:
+                error = InstagramAPIError(status_code, str(e))
+            error.transient = error.transient or status_code == 429 or status_code >= 500
+            self._record_throttling(error, status_code)
+            raise error
+        
+        # Check for API errors in response
+        if isinstance(result, dict) and "error" in result:
+            error = _error_from_payload(result["error"])
+            self._record_throttling(error)
+            raise error
+        
+        return result, response
+    
+    async def _cached_get(self, endpoint: str, params: Dict) -> Dict:
+        """
+        GET through the short-TTL response cache
+        
+        Fresh entries are served without a request. Stale entries are
+        revalidated with If-None-Match, so an unchanged object costs a
+        bodiless 304 instead of a full download.
+        """
+        key = make_cache_key(self.token_key, endpoint, params)
+        stats = self.response_cache.stats
+        entry = self.response_cache.get(key)
+        if entry is not None and entry.is_fresh:
+            stats.hits += 1
+            return copy.deepcopy(entry.payload)
+        stats.misses += 1
+        
+        async def revalidate():
+            headers = {"If-None-Match": entry.etag} if entry is not None and entry.etag else None
+            result, response = await self._request("GET", endpoint, params, None, 1, headers)
+            if result is None and entry is not None:
+                stats.revalidated += 1
+                self.response_cache.refresh(entry)
+                return entry.payload
+            
+            self.response_cache.put(key, result, response.headers.get("ETag"))
+            return result
         
-        except httpx.RequestError as e:
-            raise InstagramAPIError(0, f"Request failed: {str(e)}")
+        return copy.deepcopy(await self.single_flight.do(key, revalidate))
+    
+    def _record_throttling(self, error: InstagramAPIError, status_code: Optional[int] = None):
+        """Tell the adaptive throttle when the API reports throttling"""
+        if status_code == 429 or error.code in THROTTLING_ERROR_CODES:
+            self.throttle.mark_throttled()
     
     # ========== Authentication ==========
     
@@ -279,10 +557,23 @@ class InstagramGraphAPI:
             "code": code
         }
         
-        response = await self.client.post(
-            "https://api.instagram.com/oauth/access_token",
-            data=data
-        )
+        breaker = self.circuit_breakers["oauth"]
+        if not breaker.allow_request():
+            raise CircuitOpenError("oauth")
+        
+        started = time.monotonic()
+        try:
+            response = await self.client.post(
+                "https://api.instagram.com/oauth/access_token",
+                data=data
+            )
+        except httpx.RequestError:
+            breaker.record_failure(time.monotonic() - started)
+            raise
+        if response.status_code >= 500:
+            breaker.record_failure(time.monotonic() - started)
+        else:
+            breaker.record_success(time.monotonic() - started)
         response.raise_for_status()
         return response.json()
     
@@ -344,10 +635,42 @@ class InstagramGraphAPI:
             fields = ["id", "username", "account_type", "media_count"]
         
         params = {"fields": ",".join(fields)}
-        result = await self._make_request("GET", f"{user_id}", params=params)
+        result = await self._cached_get(f"{user_id}", params)
         
         return InstagramUser(**result)
     
+    async def get_user_profile_if_changed(
+        self,
+        user_id: str,
+        etag: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Tuple[Optional[InstagramUser], Optional[str]]:
+        """
+        Revalidate a user profile against an ETag persisted between runs
+        
+        Unlike get_user_profile this bypasses the in-process response cache,
+        so the ETag can come from the database.
+        
+        Args:
+            user_id: Instagram user ID
+            etag: ETag of the last profile response, if any
+            fields: List of fields to retrieve (default: id, username, account_type, media_count)
+            
+        Returns:
+            Tuple of (profile, ETag); profile is None when the API answered
+            304 Not Modified
+        """
+        if fields is None:
+            fields = ["id", "username", "account_type", "media_count"]
+        
+        params = {"fields": ",".join(fields)}
+        headers = {"If-None-Match": etag} if etag else None
+        result, response = await self._request("GET", f"{user_id}", params, None, 1, headers)
+        new_etag = response.headers.get("ETag") or etag
+        if result is None:
+            return None, new_etag
+        return InstagramUser(**result), new_etag
+    
     async def get_user_media(
         self,
         user_id: str,
@@ -378,14 +701,7 @@ class InstagramGraphAPI:
         
         result = await self._make_request("GET", f"{user_id}/media", params=params)
         
-        media_list = []
-        for item in result.get("data", []):
-            # Parse timestamp
-            if "timestamp" in item:
-                item["timestamp"] = datetime.fromisoformat(item["timestamp"].replace("Z", "+00:00"))
-            media_list.append(InstagramMedia(**item))
-        
-        return media_list
+        return [_parse_media_item(item) for item in result.get("data", [])]
     
     # ========== Media Operations ==========
     
@@ -411,13 +727,37 @@ class InstagramGraphAPI:
             ]
         
         params = {"fields": ",".join(fields)}
-        result = await self._make_request("GET", f"{media_id}", params=params)
+        result = await self._cached_get(f"{media_id}", params)
         
-        # Parse timestamp
-        if "timestamp" in result:
-            result["timestamp"] = datetime.fromisoformat(result["timestamp"].replace("Z", "+00:00"))
+        return _parse_media_item(result)
+    
+    async def get_media_metrics_batch(
+        self,
+        media_ids: List[str],
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Get current counts for many media items using Graph API batch requests
         
-        return InstagramMedia(**result)
+        Args:
+            media_ids: Instagram media IDs
+            fields: Fields to retrieve (default: like_count, comments_count)
+            
+        Returns:
+            Dictionary mapping media ID to its field dictionary, or to the
+            InstagramAPIError raised for that item
+        """
+        if fields is None:
+            fields = ["like_count", "comments_count"]
+        
+        field_param = ",".join(fields)
+        requests = [
+            {"method": "GET", "relative_url": f"{media_id}?fields={field_param}"}
+            for media_id in media_ids
+        ]
+        responses = await self.batch_request(requests)
+        
+        return dict(zip(media_ids, responses))
     
     async def get_media_insights(
         self,
@@ -435,19 +775,129 @@ class InstagramGraphAPI:
             Dictionary with insights data
         """
         if metrics is None:
-            metrics = ["engagement", "impressions", "reach", "saved"]
+            metrics = self.DEFAULT_INSIGHT_METRICS
         
         params = {"metric": ",".join(metrics)}
         result = await self._make_request("GET", f"{media_id}/insights", params=params)
         
-        # Parse insights data
-        insights = {}
-        for item in result.get("data", []):
-            metric_name = item.get("name")
-            metric_value = item.get("values", [{}])[0].get("value", 0)
-            insights[metric_name] = metric_value
+        return _parse_insights(result)
+    
+    async def get_media_insights_batch(
+        self,
+        media_ids: List[str],
+        metrics: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Get insights for many media items using Graph API batch requests
+        
+        Packs up to BATCH_LIMIT insight lookups into each HTTP call. Instagram
+        still counts every sub-request against the rate limit, so the limiter
+        is charged per media item; the saving is in round trips.
+        
+        Args:
+            media_ids: Instagram media IDs
+            metrics: List of metrics to retrieve (engagement, impressions, reach, saved)
+            
+        Returns:
+            Dictionary mapping media ID to its insights dictionary, or to the
+            InstagramAPIError raised for that item
+        """
+        if metrics is None:
+            metrics = self.DEFAULT_INSIGHT_METRICS
+        
+        metric_param = ",".join(metrics)
+        requests = [
+            {"method": "GET", "relative_url": f"{media_id}/insights?metric={metric_param}"}
+            for media_id in media_ids
+        ]
+        responses = await self.batch_request(requests)
         
-        return insights
+        return {
+            media_id: response if isinstance(response, InstagramAPIError) else _parse_insights(response)
+            for media_id, response in zip(media_ids, responses)
+        }
+    
+    async def get_user_media_insights(
+        self,
+        user_id: str,
+        limit: int = 25,
+        metrics: Optional[List[str]] = None
+    ) -> Dict[str, Dict]:
+        """
+        Get insights for a user's recent media in a single call via field expansion
+        
+        Uses `media{insights.metric(...)}` expansion, so one API call covers a
+        whole page of media. Instagram fails the whole call if any item lacks
+        insights (e.g. posted before a business account conversion); fall back
+        to get_media_insights_batch in that case.
+        
+        Args:
+            user_id: Instagram user ID
+            limit: Number of recent media items to include
+            metrics: List of metrics to retrieve (engagement, impressions, reach, saved)
+            
+        Returns:
+            Dictionary mapping media ID to its insights dictionary
+        """
+        if metrics is None:
+            metrics = self.DEFAULT_INSIGHT_METRICS
+        
+        params = {
+            "fields": f"media.limit({limit}){{id,insights.metric({','.join(metrics)})}}"
+        }
+        result = await self._make_request("GET", f"{user_id}", params=params)
+        
+        return {
+            item["id"]: _parse_insights(item.get("insights", {}))
+            for item in result.get("media", {}).get("data", [])
+        }
+    
+    # ========== Batch Requests ==========
+    
+    async def batch_request(self, requests: List[Dict]) -> List[Any]:
+        """
+        Execute Graph API sub-requests in batches of up to BATCH_LIMIT
+        
+        Args:
+            requests: Sub-requests as {"method": "GET", "relative_url": "..."}
+            
+        Returns:
+            One entry per sub-request, in order: the decoded response body,
+            or an InstagramAPIError describing that sub-request's failure
+        """
+        results: List[Any] = []
+        for start in range(0, len(requests), self.BATCH_LIMIT):
+            chunk = requests[start:start + self.BATCH_LIMIT]
+            responses = await self._make_request(
+                "POST",
+                "",
+                data={"batch": json.dumps(chunk), "include_headers": "false"},
+                cost=len(chunk)
+            )
+            
+            for index in range(len(chunk)):
+                response = responses[index] if index < len(responses) else None
+                results.append(self._parse_batch_response(response))
+        
+        return results
+    
+    @staticmethod
+    def _parse_batch_response(response: Optional[Dict]) -> Any:
+        """Decode one batch sub-response into a body dictionary or an error"""
+        if response is None:
+            # Graph API returns null for sub-requests that did not complete in time
+            return InstagramAPIError(0, "Batch sub-request timed out", "BatchTimeout")
+        
+        try:
+            body = _json_loads(response.get("body") or "{}")
+        except ValueError:
+            return InstagramAPIError(response.get("code", 0), "Invalid batch response body")
+        
+        if "error" in body:
+            return _error_from_payload(body["error"])
+        if response.get("code", 200) >= 400:
+            return InstagramAPIError(response["code"], "Batch sub-request failed")
+        return body
     
     # ========== Hashtag Operations ==========
     
@@ -455,6 +905,10 @@ class InstagramGraphAPI:
         """
         Search for a hashtag
         
+        Uncached: every call spends one of the account's 30 weekly unique
+        hashtag searches. Resolve names through
+        app.services.hashtag_resolver.HashtagResolver, which caches results.
+        
         Args:
             user_id: Instagram user ID (required for hashtag search)
             hashtag: Hashtag name (without #)
@@ -471,7 +925,8 @@ class InstagramGraphAPI:
         
         data = result.get("data", [])
         if data:
-            return InstagramHashtag(**data[0])
+            # ig_hashtag_search only returns the ID
+            return InstagramHashtag(id=data[0]["id"], name=data[0].get("name", hashtag))
         return None
     
     async def get_hashtag_top_media(
@@ -494,7 +949,7 @@ class InstagramGraphAPI:
             List of InstagramMedia objects
         """
         if fields is None:
-            fields = ["id", "caption", "media_url", "like_count", "comments_count", "timestamp"]
+            fields = HASHTAG_MEDIA_FIELDS
         
         params = {
             "user_id": user_id,
@@ -504,13 +959,7 @@ class InstagramGraphAPI:
         
         result = await self._make_request("GET", f"{hashtag_id}/top_media", params=params)
         
-        media_list = []
-        for item in result.get("data", []):
-            if "timestamp" in item:
-                item["timestamp"] = datetime.fromisoformat(item["timestamp"].replace("Z", "+00:00"))
-            media_list.append(InstagramMedia(**item))
-        
-        return media_list
+        return [_parse_media_item(item) for item in result.get("data", [])]
     
     async def get_hashtag_recent_media(
         self,
@@ -532,7 +981,7 @@ class InstagramGraphAPI:
             List of InstagramMedia objects
         """
         if fields is None:
-            fields = ["id", "caption", "media_url", "like_count", "comments_count", "timestamp"]
+            fields = HASHTAG_MEDIA_FIELDS
         
         params = {
             "user_id": user_id,
@@ -542,13 +991,200 @@ class InstagramGraphAPI:
         
         result = await self._make_request("GET", f"{hashtag_id}/recent_media", params=params)
         
-        media_list = []
-        for item in result.get("data", []):
-            if "timestamp" in item:
-                item["timestamp"] = datetime.fromisoformat(item["timestamp"].replace("Z", "+00:00"))
-            media_list.append(InstagramMedia(**item))
+        return [_parse_media_item(item) for item in result.get("data", [])]
+    
+    # ========== Streaming Pagination ==========
+    
+    async def _iter_media(
+        self,
+        endpoint: str,
+        params: Dict,
+        max_items: Optional[int] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        newest_first: bool = True,
+        fast_decode: bool = False
+    ) -> AsyncIterator[InstagramMedia]:
+        """
+        Follow `paging.cursors.after` lazily, yielding media as pages arrive
+        
+        The next page is requested as soon as the current page arrives, so
+        the network round trip overlaps with the consumer's processing. It is
+        skipped when the page's items inside the time window already reach
+        `max_items`, or the page crosses `since` on a newest-first edge.
         
-        return media_list
+        Args:
+            endpoint: Media edge endpoint (e.g. "{user_id}/media")
+            params: Query parameters for every page
+            max_items: Stop after yielding this many items
+            since: Skip media posted before this time
+            until: Skip media posted after this time
+            newest_first: Edge returns media in reverse chronological order,
+                so iteration can stop at the first item older than `since`
+            fast_decode: Yield MediaRecord objects instead of validated InstagramMedia
+        """
+        parse = _decode_media_record if fast_decode else _parse_media_item
+        since = _as_utc(since) if since else None
+        until = _as_utc(until) if until else None
+        
+        pending = asyncio.ensure_future(self._make_request("GET", endpoint, params=dict(params)))
+        yielded = 0
+        try:
+            while pending is not None:
+                result = await pending
+                pending = None
+                
+                page = []
+                exhausted = False
+                for item in result.get("data", []):
+                    media = parse(item)
+                    timestamp = _as_utc(media.timestamp)
+                    if until and timestamp > until:
+                        continue
+                    if since and timestamp < since:
+                        if newest_first:
+                            exhausted = True
+                            break
+                        continue
+                    page.append(media)
+                
+                # Prefetch the next page unless this page already satisfies the stream
+                paging = result.get("paging", {})
+                after = paging.get("cursors", {}).get("after")
+                satisfied = exhausted or (max_items and yielded + len(page) >= max_items)
+                if paging.get("next") and after and not satisfied:
+                    next_params = {**params, "after": after}
+                    pending = asyncio.ensure_future(self._make_request("GET", endpoint, params=next_params))
+                
+                for media in page:
+                    yield media
+                    yielded += 1
+                    if max_items and yielded >= max_items:
+                        return
+        finally:
+            if pending is not None:
+                # Only drops this stream's wait; a request coalesced with other callers keeps running
+                pending.cancel()
+                if pending.done() and not pending.cancelled():
+                    pending.exception()
+    
+    def iter_user_media(
+        self,
+        user_id: str,
+        page_size: int = 50,
+        max_items: Optional[int] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        fields: Optional[List[str]] = None,
+        fast_decode: bool = False
+    ) -> AsyncIterator[InstagramMedia]:
+        """
+        Stream all of a user's media, newest first, following pagination cursors
+        
+        Args:
+            user_id: Instagram user ID
+            page_size: Media items requested per page
+            max_items: Maximum number of media items to yield
+            since: Only yield media posted at or after this time
+            until: Only yield media posted at or before this time
+            fields: List of fields to retrieve
+            fast_decode: Yield lightweight MediaRecord objects (no validation)
+                for bulk collection
+            
+        Returns:
+            Async iterator of InstagramMedia objects
+        """
+        params = {
+            "fields": ",".join(fields or MEDIA_FIELDS),
+            "limit": page_size
+        }
+        # The user media edge supports time-based paging natively
+        if since:
+            params["since"] = int(_as_utc(since).timestamp())
+        if until:
+            params["until"] = int(_as_utc(until).timestamp())
+        
+        return self._iter_media(
+            f"{user_id}/media", params, max_items, since, until, fast_decode=fast_decode
+        )
+    
+    def iter_hashtag_top_media(
+        self,
+        hashtag_id: str,
+        user_id: str,
+        page_size: int = 50,
+        max_items: Optional[int] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        fields: Optional[List[str]] = None,
+        fast_decode: bool = False
+    ) -> AsyncIterator[InstagramMedia]:
+        """
+        Stream top media for a hashtag, following pagination cursors
+        
+        Top media is ordered by popularity, so `since`/`until` filter items
+        without ending the stream early.
+        
+        Args:
+            hashtag_id: Instagram hashtag ID
+            user_id: Instagram user ID (required)
+            page_size: Media items requested per page
+            max_items: Maximum number of media items to yield
+            since: Only yield media posted at or after this time
+            until: Only yield media posted at or before this time
+            fields: List of fields to retrieve
+            fast_decode: Yield lightweight MediaRecord objects (no validation)
+                for bulk collection
+            
+        Returns:
+            Async iterator of InstagramMedia objects
+        """
+        params = {
+            "user_id": user_id,
+            "fields": ",".join(fields or HASHTAG_MEDIA_FIELDS),
+            "limit": page_size
+        }
+        return self._iter_media(
+            f"{hashtag_id}/top_media", params, max_items, since, until,
+            newest_first=False, fast_decode=fast_decode
+        )
+    
+    def iter_hashtag_recent_media(
+        self,
+        hashtag_id: str,
+        user_id: str,
+        page_size: int = 50,
+        max_items: Optional[int] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        fields: Optional[List[str]] = None,
+        fast_decode: bool = False
+    ) -> AsyncIterator[InstagramMedia]:
+        """
+        Stream recent media for a hashtag (last 24 hours), newest first
+        
+        Args:
+            hashtag_id: Instagram hashtag ID
+            user_id: Instagram user ID (required)
+            page_size: Media items requested per page
+            max_items: Maximum number of media items to yield
+            since: Only yield media posted at or after this time
+            until: Only yield media posted at or before this time
+            fields: List of fields to retrieve
+            fast_decode: Yield lightweight MediaRecord objects (no validation)
+                for bulk collection
+            
+        Returns:
+            Async iterator of InstagramMedia objects
+        """
+        params = {
+            "user_id": user_id,
+            "fields": ",".join(fields or HASHTAG_MEDIA_FIELDS),
+            "limit": page_size
+        }
+        return self._iter_media(
+            f"{hashtag_id}/recent_media", params, max_items, since, until, fast_decode=fast_decode
+        )
     
     # ========== Utility Methods ==========
     
@@ -557,12 +1193,34 @@ class InstagramGraphAPI:
         Get current rate limit status
         
         Returns:
-            Dictionary with remaining calls and time info
+            Dictionary with remaining calls, time info and adaptive pacing state
         """
         return {
             "remaining_calls": self.rate_limiter.get_remaining_calls(),
             "max_calls_per_hour": self.rate_limiter.max_calls,
-            "time_until_reset": self.rate_limiter.time_until_next_call()
+            "time_until_reset": self.rate_limiter.time_until_next_call(),
+            "pacing": self.throttle.status()
+        }
+    
+    def is_available(self, family: str) -> bool:
+        """
+        Check whether an endpoint family's circuit lets requests through
+        
+        Args:
+            family: Endpoint family (media, insights, hashtag, oauth)
+        """
+        return self.circuit_breakers[family].state != OPEN
+    
+    def get_cache_stats(self) -> Dict:
+        """
+        Get response cache and request coalescing counters (process-wide)
+        
+        Returns:
+            Dictionary with hits, misses, revalidated, coalesced and hit_rate
+        """
+        return {
+            **self.response_cache.stats.as_dict(),
+            "entries": len(self.response_cache)
         }
 
 
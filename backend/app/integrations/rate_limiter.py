@@ -0,0 +1,254 @@
+"""
+Instagram API Rate Limiting
+
+Sliding-window rate limiter with pluggable storage backends:
+- In-memory (deque per key, shared by every client in the process)
+- Redis (sorted set + Lua script, shared by every Celery worker and API process)
+
+Limits are keyed per access token, because Instagram enforces its
+200 calls/hour budget per token rather than per client instance.
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from app.core.config import get_settings
+
+
+# ========== Backends ==========
+
+class RateLimitBackend(ABC):
+    """
+    Storage backend for sliding-window call logs
+
+    Backends that do network I/O set `blocking`, so async callers run their
+    calls in a worker thread instead of on the event loop.
+    """
+
+    blocking = False
+
+    @abstractmethod
+    def try_acquire(self, key: str, max_calls: int, period: float, cost: int = 1) -> bool:
+        """Record `cost` calls for key if the window has room, return whether they were admitted"""
+
+    @abstractmethod
+    def count(self, key: str, period: float) -> int:
+        """Number of calls for key inside the current window"""
+
+    @abstractmethod
+    def oldest(self, key: str, period: float) -> Optional[float]:
+        """Timestamp of the oldest call still inside the window"""
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """
+    Process-local backend
+
+    Each key holds a deque of call timestamps in arrival order, so expired
+    calls are popped from the left and admission is amortized O(1).
+    """
+
+    def __init__(self):
+        self._windows: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def _window(self, key: str, period: float, now: float) -> Deque[float]:
+        window = self._windows.get(key)
+        if window is None:
+            window = self._windows[key] = deque()
+        cutoff = now - period
+        while window and window[0] <= cutoff:
+            window.popleft()
+        return window
+
+    def try_acquire(self, key: str, max_calls: int, period: float, cost: int = 1) -> bool:
+        now = time.time()
+        with self._lock:
+            window = self._window(key, period, now)
+            if len(window) + cost <= max_calls:
+                window.extend([now] * cost)
+                return True
+            return False
+
+    def count(self, key: str, period: float) -> int:
+        with self._lock:
+            return len(self._window(key, period, time.time()))
+
+    def oldest(self, key: str, period: float) -> Optional[float]:
+        with self._lock:
+            window = self._window(key, period, time.time())
+            return window[0] if window else None
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """
+    Redis backend shared across processes
+
+    Each key is a sorted set of call ids scored by timestamp. Eviction,
+    counting and admission run in a single Lua script so concurrent
+    workers cannot overshoot the limit.
+    """
+
+    blocking = True
+
+    ACQUIRE_SCRIPT = """
+    local key = KEYS[1]
+    local now = tonumber(ARGV[1])
+    local period = tonumber(ARGV[2])
+    local max_calls = tonumber(ARGV[3])
+    local cost = tonumber(ARGV[5])
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - period)
+    if redis.call('ZCARD', key) + cost <= max_calls then
+        for i = 1, cost do
+            redis.call('ZADD', key, now, ARGV[4] .. ':' .. i)
+        end
+        redis.call('PEXPIRE', key, math.ceil(period * 1000))
+        return 1
+    end
+    return 0
+    """
+
+    def __init__(self, redis_url: str, prefix: str = "instagram:ratelimit:"):
+        import redis
+
+        self.redis = redis.Redis.from_url(redis_url)
+        self.prefix = prefix
+        self._acquire = self.redis.register_script(self.ACQUIRE_SCRIPT)
+
+    def try_acquire(self, key: str, max_calls: int, period: float, cost: int = 1) -> bool:
+        now = time.time()
+        member = f"{now:.6f}:{uuid.uuid4().hex}"
+        result = self._acquire(keys=[self.prefix + key], args=[now, period, max_calls, member, cost])
+        return bool(int(result))
+
+    def count(self, key: str, period: float) -> int:
+        now = time.time()
+        return int(self.redis.zcount(self.prefix + key, f"({now - period}", "+inf"))
+
+    def oldest(self, key: str, period: float) -> Optional[float]:
+        now = time.time()
+        entries = self.redis.zrangebyscore(
+            self.prefix + key, f"({now - period}", "+inf", start=0, num=1, withscores=True
+        )
+        return float(entries[0][1]) if entries else None
+
+
+_shared_backend: Optional[RateLimitBackend] = None
+
+
+def get_rate_limit_backend() -> RateLimitBackend:
+    """
+    Get the process-wide rate limit backend configured by INSTAGRAM_RATE_LIMIT_BACKEND
+
+    Returns:
+        RedisRateLimitBackend for "redis", InMemoryRateLimitBackend otherwise
+    """
+    global _shared_backend
+    if _shared_backend is None:
+        settings = get_settings()
+        if settings.INSTAGRAM_RATE_LIMIT_BACKEND == "redis":
+            _shared_backend = RedisRateLimitBackend(settings.REDIS_URL)
+        else:
+            _shared_backend = InMemoryRateLimitBackend()
+    return _shared_backend
+
+
+def rate_limit_key(access_token: Optional[str]) -> str:
+    """Build a rate limit key for an access token without storing the token itself"""
+    if not access_token:
+        return "anonymous"
+    return hashlib.sha256(access_token.encode("utf-8")).hexdigest()[:32]
+
+
+# ========== Rate Limiter ==========
+
+class RateLimiter:
+    """
+    Rate limiter for Instagram API calls
+
+    Instagram limits: 200 calls per hour per user
+    """
+
+    def __init__(
+        self,
+        max_calls: int = 200,
+        period: int = 3600,
+        key: str = "default",
+        backend: Optional[RateLimitBackend] = None
+    ):
+        """
+        Args:
+            max_calls: Maximum number of calls allowed
+            period: Time period in seconds (default: 3600 = 1 hour)
+            key: Budget key (usually derived from the access token)
+            backend: Storage backend (default: a private in-memory backend)
+        """
+        self.max_calls = max_calls
+        self.period = period
+        self.key = key
+        self.backend = backend or InMemoryRateLimitBackend()
+
+    def is_allowed(self, cost: int = 1) -> bool:
+        """
+        Check if new API calls are allowed (and record them if so)
+
+        Args:
+            cost: Number of calls to charge (e.g. sub-requests in a batch)
+        """
+        return self.backend.try_acquire(self.key, self.max_calls, self.period, cost)
+
+    async def admit(self, cost: int = 1) -> bool:
+        """is_allowed for async callers, without blocking the event loop on the backend"""
+        return await self._off_loop(self.is_allowed, cost)
+
+    async def _off_loop(self, call, *args):
+        if self.backend.blocking:
+            return await asyncio.to_thread(call, *args)
+        return call(*args)
+
+    def time_until_next_call(self) -> float:
+        """Get seconds until next call is allowed"""
+        if self.get_remaining_calls() > 0:
+            return 0.0
+
+        oldest_call = self.backend.oldest(self.key, self.period)
+        if oldest_call is None:
+            return 0.0
+        return max(0.0, self.period - (time.time() - oldest_call))
+
+    def get_remaining_calls(self) -> int:
+        """Get number of remaining calls in current window"""
+        return max(0, self.max_calls - self.backend.count(self.key, self.period))
+
+    async def acquire(self, max_wait: float = 0.0, cost: int = 1) -> bool:
+        """
+        Wait for a call slot
+
+        Args:
+            max_wait: Maximum seconds to wait for a slot
+            cost: Number of calls to charge
+
+        Returns:
+            True if a slot was acquired, False if it would take longer than max_wait
+        """
+        if cost > self.max_calls:
+            return False
+
+        deadline = time.monotonic() + max_wait
+        while not await self.admit(cost):
+            wait_time = await self._off_loop(self.time_until_next_call)
+            if wait_time <= 0:
+                # Some slots are free but not `cost` of them; slots free up
+                # roughly every period / max_calls seconds on average
+                wait_time = self.period / self.max_calls
+            if time.monotonic() + wait_time > deadline:
+                return False
+            # Another worker may take the freed slot first, so re-check after waking
+            await asyncio.sleep(wait_time)
+        return True
@@ -0,0 +1,192 @@
+"""
+Instagram API Response Caching
+
+- SingleFlight: concurrent identical GETs share one in-flight request
+- ResponseCache: short-TTL cache with ETag revalidation for read-mostly
+  objects (user profiles, media details)
+
+Both are process-wide and keyed by (token key, endpoint, params), so
+different client views for the same token share results while tokens
+never see each other's responses.
+"""
+
+import asyncio
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from app.core.config import get_settings
+
+
+def make_cache_key(token_key: str, endpoint: str, params: Optional[Dict]) -> Tuple:
+    """Build a cache key, leaving the access token itself out"""
+    items = tuple(sorted(
+        (name, str(value)) for name, value in (params or {}).items() if name != "access_token"
+    ))
+    return (token_key, endpoint.lstrip("/"), items)
+
+
+class CacheStats:
+    """Hit/miss counters for the response cache and single-flight"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.coalesced = 0
+
+    def as_dict(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "coalesced": self.coalesced,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class _Flight:
+    """Shared call of a SingleFlight key and the number of callers awaiting it"""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Share one in-flight call between concurrent callers with the same key
+
+    The call runs in its own task, so a caller that is cancelled (say, a
+    paginator dropping its prefetch) stops waiting without cancelling the
+    call for the others; the call is only cancelled once nobody waits.
+    """
+
+    def __init__(self, stats: CacheStats):
+        self.stats = stats
+        self._calls: Dict[Hashable, _Flight] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn, or wait for the identical call already in flight
+
+        Followers receive a deep copy of the leader's result so callers that
+        mutate the payload do not affect each other.
+        """
+        loop = asyncio.get_running_loop()
+        flight = self._calls.get(key)
+        leader = flight is None or flight.task.get_loop() is not loop
+        if leader:
+            flight = _Flight(loop.create_task(fn()))
+            self._calls[key] = flight
+            flight.task.add_done_callback(lambda _task: self._finish(key, flight))
+        else:
+            self.stats.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            result = await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                flight.task.cancel()
+                self._forget(key, flight)  # Later callers start a new call
+        return result if leader else copy.deepcopy(result)
+
+    def _forget(self, key: Hashable, flight: _Flight):
+        if self._calls.get(key) is flight:
+            del self._calls[key]
+
+    def _finish(self, key: Hashable, flight: _Flight):
+        self._forget(key, flight)
+        if not flight.task.cancelled():
+            flight.task.exception()  # Mark retrieved when nobody else is waiting
+
+
+class CacheEntry:
+    """Cached payload with its expiry and validator"""
+
+    __slots__ = ("payload", "etag", "expires_at")
+
+    def __init__(self, payload: Any, etag: Optional[str], expires_at: float):
+        self.payload = payload
+        self.etag = etag
+        self.expires_at = expires_at
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.monotonic() < self.expires_at
+
+
+class ResponseCache:
+    """
+    TTL response cache bounded by LRU eviction
+
+    Expired entries are kept until evicted so their ETag can be used to
+    revalidate with If-None-Match instead of downloading the body again.
+    """
+
+    def __init__(self, ttl: float = 60.0, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        """Get an entry (fresh or stale) without updating hit counters"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Hashable, payload: Any, etag: Optional[str] = None) -> CacheEntry:
+        """Store a payload for ttl seconds"""
+        entry = CacheEntry(payload, etag, time.monotonic() + self.ttl)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def refresh(self, entry: CacheEntry):
+        """Extend a revalidated entry for another ttl seconds"""
+        entry.expires_at = time.monotonic() + self.ttl
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_response_cache: Optional[ResponseCache] = None
+_single_flight: Optional[SingleFlight] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Get the process-wide response cache"""
+    global _response_cache
+    if _response_cache is None:
+        settings = get_settings()
+        _response_cache = ResponseCache(
+            ttl=settings.INSTAGRAM_RESPONSE_CACHE_TTL,
+            maxsize=settings.INSTAGRAM_RESPONSE_CACHE_SIZE,
+        )
+    return _response_cache
+
+
+def get_single_flight() -> SingleFlight:
+    """Get the process-wide single-flight group (shares the cache's counters)"""
+    global _single_flight
+    if _single_flight is None:
+        _single_flight = SingleFlight(get_response_cache().stats)
+    return _single_flight
@@ -0,0 +1,203 @@
+"""
+Instagram API Adaptive Throttling
+
+Paces requests using the usage headers the Graph API returns on every
+response, and provides decorrelated-jitter backoff for retries.
+
+Headers:
+- X-App-Usage: {"call_count": 28, "total_time": 25, "total_cputime": 25}
+- X-Business-Use-Case-Usage: {"<business_id>": [{"type": "instagram",
+  "call_count": 97, "total_time": 10, "total_cputime": 10,
+  "estimated_time_to_regain_access": 5}]}
+
+Values are percentages of the allowed usage. Below the soft limit no delay
+is added; between the soft limit and 100% the delay grows quadratically;
+at 100% requests are held until the estimated time to regain access.
+"""
+
+import asyncio
+import json
+import random
+import time
+from typing import Dict, Iterator, Mapping, Optional
+
+from app.core.config import get_settings
+
+
+USAGE_METRICS = ("call_count", "total_time", "total_cputime")
+
+
+def _load_header(headers: Mapping, name: str):
+    value = headers.get(name)
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        return json.loads(value)
+    except ValueError:
+        return None
+
+
+def parse_usage_headers(headers: Mapping) -> Optional[Dict]:
+    """
+    Parse Graph API usage headers
+
+    Args:
+        headers: Response headers
+
+    Returns:
+        Dictionary with app_usage, business_usage (highest metric, percent)
+        and regain_access_minutes, or None if no usage headers are present
+    """
+    app_header = _load_header(headers, "X-App-Usage")
+    business_header = _load_header(headers, "X-Business-Use-Case-Usage")
+    if app_header is None and business_header is None:
+        return None
+
+    app_usage = 0.0
+    if isinstance(app_header, dict):
+        app_usage = max(float(app_header.get(metric, 0) or 0) for metric in USAGE_METRICS)
+
+    business_usage = 0.0
+    regain_minutes = 0.0
+    if isinstance(business_header, dict):
+        for entries in business_header.values():
+            for entry in entries or []:
+                usage = max(float(entry.get(metric, 0) or 0) for metric in USAGE_METRICS)
+                business_usage = max(business_usage, usage)
+                regain_minutes = max(
+                    regain_minutes, float(entry.get("estimated_time_to_regain_access", 0) or 0)
+                )
+
+    return {
+        "app_usage": app_usage,
+        "business_usage": business_usage,
+        "regain_access_minutes": regain_minutes,
+    }
+
+
+class AdaptiveThrottle:
+    """
+    Request pacer driven by Graph API usage headers
+
+    Shared by every client using the same access token in the process.
+    """
+
+    def __init__(self, soft_limit: float = 75.0, max_delay: float = 10.0):
+        """
+        Args:
+            soft_limit: Usage percent above which requests are slowed down
+            max_delay: Delay in seconds added just below 100% usage
+        """
+        self.soft_limit = soft_limit
+        self.max_delay = max_delay
+        self.app_usage = 0.0
+        self.business_usage = 0.0
+        self.blocked_until = 0.0
+        self.updated_at: Optional[float] = None
+
+    @property
+    def usage_percent(self) -> float:
+        """Highest reported usage across app and business use case limits"""
+        return max(self.app_usage, self.business_usage)
+
+    def update(self, headers: Mapping):
+        """Record usage from response headers"""
+        usage = parse_usage_headers(headers)
+        if usage is None:
+            return
+
+        self.app_usage = usage["app_usage"]
+        self.business_usage = usage["business_usage"]
+        self.updated_at = time.time()
+
+        if self.usage_percent >= 100:
+            regain_seconds = usage["regain_access_minutes"] * 60 or self.max_delay
+            self.blocked_until = self.updated_at + regain_seconds
+
+    def mark_throttled(self, retry_after: Optional[float] = None):
+        """Record a throttling error from the API"""
+        self.updated_at = time.time()
+        self.app_usage = max(self.app_usage, 100.0)
+        self.blocked_until = max(self.blocked_until, self.updated_at + (retry_after or self.max_delay))
+
+    def current_delay(self) -> float:
+        """Seconds to wait before the next request"""
+        now = time.time()
+        if self.blocked_until > now:
+            return self.blocked_until - now
+
+        usage = self.usage_percent
+        if usage >= 100:
+            # Block expired; allow a probe request at the slowest pace
+            return self.max_delay
+        if usage <= self.soft_limit:
+            return 0.0
+        pressure = (usage - self.soft_limit) / (100 - self.soft_limit)
+        return self.max_delay * pressure ** 2
+
+    async def wait(self, max_wait: Optional[float] = None) -> bool:
+        """
+        Sleep for the current pacing delay
+
+        Pacing delays up to max_delay are always honoured; longer blocks
+        (usage at 100%) are only waited out if they fit within max_wait.
+
+        Args:
+            max_wait: Give up instead of waiting out a block longer than this
+
+        Returns:
+            True once the request may proceed, False if the block exceeds max_wait
+        """
+        delay = self.current_delay()
+        if max_wait is not None and delay > max(max_wait, self.max_delay):
+            return False
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return True
+
+    def status(self) -> Dict:
+        """Current pacing state"""
+        return {
+            "usage_percent": self.usage_percent,
+            "app_usage": self.app_usage,
+            "business_usage": self.business_usage,
+            "delay_seconds": round(self.current_delay(), 3),
+            "blocked_for": round(max(0.0, self.blocked_until - time.time()), 3),
+            "updated_at": self.updated_at,
+        }
+
+
+_throttles: Dict[str, AdaptiveThrottle] = {}
+
+
+def get_adaptive_throttle(key: str) -> AdaptiveThrottle:
+    """
+    Get the process-wide throttle for a rate limit key
+
+    Args:
+        key: Rate limit key (see rate_limiter.rate_limit_key)
+    """
+    throttle = _throttles.get(key)
+    if throttle is None:
+        settings = get_settings()
+        throttle = _throttles[key] = AdaptiveThrottle(
+            soft_limit=settings.INSTAGRAM_THROTTLE_SOFT_LIMIT,
+            max_delay=settings.INSTAGRAM_THROTTLE_MAX_DELAY,
+        )
+    return throttle
+
+
+def decorrelated_jitter(base: float, cap: float) -> Iterator[float]:
+    """
+    Yield retry delays using decorrelated jitter backoff
+
+    Each delay is drawn uniformly from [base, previous * 3], capped at `cap`.
+
+    Args:
+        base: Minimum delay in seconds
+        cap: Maximum delay in seconds
+    """
+    delay = base
+    while True:
+        delay = min(cap, random.uniform(base, delay * 3))
+        yield delay
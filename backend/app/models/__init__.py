@@ -4,6 +4,13 @@ from app.models.analysis import Analysis
 from app.models.instagram_post import InstagramPost
 from app.models.instagram_hashtag import InstagramHashtag
 from app.models.instagram_influencer import InstagramInfluencer
+from app.models.instagram_hashtag_lookup import InstagramHashtagLookup
+from app.models.instagram_collection_state import InstagramCollectionState
+from app.models.instagram_hashtag_media import InstagramHashtagMedia
+from app.models.instagram_post_metric import InstagramPostMetric
+from app.models.instagram_collection_run import InstagramCollectionRun, InstagramCollectionRunAccount
+from app.models.instagram_collection_failure import InstagramCollectionFailure
+from app.models.post_hashtag import HashtagName, PostHashtag
 
 __all__ = [
     "User",
@@ -12,4 +19,13 @@ __all__ = [
     "InstagramPost",
     "InstagramHashtag",
     "InstagramInfluencer",
+    "InstagramHashtagLookup",
+    "InstagramCollectionState",
+    "InstagramHashtagMedia",
+    "InstagramPostMetric",
+    "InstagramCollectionRun",
+    "InstagramCollectionRunAccount",
+    "InstagramCollectionFailure",
+    "HashtagName",
+    "PostHashtag",
 ]
@@ -0,0 +1,41 @@
+"""
+Instagram Collection Failure Model
+
+Dead-letter table for accounts whose collection keeps failing.
+"""
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from datetime import datetime
+
+from app.core.database import Base
+
+
+class InstagramCollectionFailure(Base):
+    """Instagram Collection Failure Model
+    
+    One row per account whose last collection failed; removed on the next
+    success. After INSTAGRAM_DEAD_LETTER_AFTER consecutive failures the
+    account is dead-lettered: it is left out of runs and the polling queue
+    until next_retry_at, which backs off per error class.
+    """
+    __tablename__ = "instagram_collection_failures"
+
+    # Primary Key
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), unique=True, index=True, nullable=False)
+    
+    # Classification
+    error_class = Column(String(16), nullable=False)  # auth, rate_limited, permission, timeout, transient, api, internal
+    error_code = Column(Integer, nullable=True)  # Graph API error code
+    last_error = Column(Text, nullable=True)
+    
+    # Retry Backoff
+    failure_count = Column(Integer, nullable=False, default=1)  # Consecutive failures
+    next_retry_at = Column(DateTime, nullable=True, index=True)
+    
+    # Timestamps
+    first_failed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_failed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f"<InstagramCollectionFailure(user_id={self.user_id}, error_class={self.error_class}, failure_count={self.failure_count})>"
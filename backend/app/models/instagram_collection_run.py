@@ -0,0 +1,71 @@
+"""
+Instagram Collection Run Models
+
+Checkpoints of collection runs, so an interrupted run resumes with the
+accounts it had not finished.
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from datetime import datetime
+
+from app.core.database import Base
+
+
+class InstagramCollectionRun(Base):
+    """Instagram Collection Run Model
+    
+    One row per collect_instagram_posts sweep or dispatch_due_collections
+    tick. Shards touch updated_at when they check in, so a run that stops
+    checking in is known to be dead.
+    """
+    __tablename__ = "instagram_collection_runs"
+
+    # Primary Key
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # Progress
+    kind = Column(String(16), nullable=False, default="sweep")  # sweep, dispatch
+    status = Column(String(16), nullable=False, default="running")  # running, completed
+    total_accounts = Column(Integer, nullable=False, default=0)
+    resumed_count = Column(Integer, nullable=False, default=0)  # Times the run was picked up again
+    
+    # Timestamps
+    started_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('idx_collection_runs_status_started', 'status', 'started_at'),
+        Index('idx_collection_runs_kind_status', 'kind', 'status'),
+    )
+    
+    def __repr__(self):
+        return f"<InstagramCollectionRun(id={self.id}, status={self.status})>"
+
+
+class InstagramCollectionRunAccount(Base):
+    """Instagram Collection Run Account Model
+    
+    Checkpoint of one account within a run: pending until its shard reports
+    it, then done, failed or skipped (no longer active). Within an account the collection state's
+    high-water mark is the cursor, so a re-collected account only reads
+    what it had not stored yet.
+    """
+    __tablename__ = "instagram_collection_run_accounts"
+
+    # Primary Key
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(Integer, ForeignKey("instagram_collection_runs.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    
+    # Checkpoint
+    status = Column(String(16), nullable=False, default="pending")  # pending, done, failed, skipped
+    finished_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        Index('idx_collection_run_accounts_run_user', 'run_id', 'user_id', unique=True),
+        Index('idx_collection_run_accounts_run_status', 'run_id', 'status'),
+    )
+    
+    def __repr__(self):
+        return f"<InstagramCollectionRunAccount(run_id={self.run_id}, user_id={self.user_id}, status={self.status})>"
@@ -0,0 +1,54 @@
+"""
+Instagram Collection State Model
+
+Per-account high-water marks for incremental collection and the
+account's place in the polling queue.
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey
+from datetime import datetime
+
+from app.core.database import Base
+
+
+class InstagramCollectionState(Base):
+    """Instagram Collection State Model
+    
+    One row per connected account. The collector only asks for media newer
+    than the high-water mark, revalidates the profile with its ETag, and
+    periodically does a full refresh to pick up edits and deletions.
+    """
+    __tablename__ = "instagram_collection_states"
+
+    # Primary Key
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), unique=True, index=True, nullable=False)
+    instagram_user_id = Column(String, nullable=True)
+    
+    # High-Water Mark
+    last_media_id = Column(String, nullable=True)  # Newest media ID seen
+    last_media_timestamp = Column(DateTime, nullable=True)  # Its timestamp (naive UTC)
+    
+    # Profile Revalidation
+    profile_etag = Column(String, nullable=True)  # ETag of the last profile response
+    username = Column(String, nullable=True)  # Profile fields reused on 304 Not Modified
+    account_type = Column(String, nullable=True)
+    media_count = Column(Integer, nullable=True)
+    
+    # Run Bookkeeping
+    last_full_refresh_at = Column(DateTime, nullable=True)
+    last_collected_at = Column(DateTime, nullable=True)
+    
+    # Polling Schedule (next_due_at is the scheduler's priority queue key)
+    next_due_at = Column(DateTime, nullable=True, index=True)
+    poll_interval_seconds = Column(Integer, nullable=True)
+    posts_per_day = Column(Float, nullable=True)  # Observed over the last 30 days
+    engagement_velocity = Column(Float, nullable=True)  # Fastest recent post, engagement per hour
+    last_api_calls = Column(Integer, nullable=True)  # Rate limit quota the last run was charged
+    
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<InstagramCollectionState(user_id={self.user_id}, last_media_id={self.last_media_id})>"
@@ -10,6 +10,28 @@ from datetime import datetime
 from app.core.database import Base
 
 
+TRENDING_THRESHOLD = 60.0  # trend_score at or above which a hashtag is trending
+
+
+def compute_trend_score(growth_rate: float, velocity: float, avg_engagement: float, post_count: int) -> float:
+    """
+    Composite trend score (0-100)
+    
+    Formula:
+    - Growth rate: 40%
+    - Velocity: 30%
+    - Engagement: 20%
+    - Post count: 10%
+    """
+    # Normalize metrics to 0-100 scale
+    growth_component = min(abs(growth_rate or 0.0), 100) * 0.4
+    velocity_component = min((velocity or 0.0) / 10, 100) * 0.3  # Assuming max 1000 posts/hour
+    engagement_component = min(avg_engagement or 0.0, 100) * 0.2
+    volume_component = min((post_count or 0) / 1000, 100) * 0.1  # Assuming max 100k posts
+    
+    return growth_component + velocity_component + engagement_component + volume_component
+
+
 class InstagramHashtag(Base):
     """Instagram Hashtag Model
     
@@ -72,27 +94,13 @@ class InstagramHashtag(Base):
         return f"#{self.name}"
     
     def calculate_trend_score(self) -> float:
-        """
-        Calculate composite trend score (0-100)
-        
-        Formula:
-        - Growth rate: 40%
-        - Velocity: 30%
-        - Engagement: 20%
-        - Post count: 10%
-        """
-        # Normalize metrics to 0-100 scale
-        growth_component = min(abs(self.growth_rate), 100) * 0.4
-        velocity_component = min(self.velocity / 10, 100) * 0.3  # Assuming max 1000 posts/hour
-        engagement_component = min(self.avg_engagement, 100) * 0.2
-        volume_component = min(self.post_count / 1000, 100) * 0.1  # Assuming max 100k posts
-        
-        return growth_component + velocity_component + engagement_component + volume_component
+        """Calculate composite trend score (0-100), see compute_trend_score"""
+        return compute_trend_score(self.growth_rate, self.velocity, self.avg_engagement, self.post_count)
     
     def update_trend_status(self):
         """Update is_trending flag based on trend_score"""
         self.trend_score = self.calculate_trend_score()
-        self.is_trending = self.trend_score >= 60.0  # Threshold for trending
+        self.is_trending = self.trend_score >= TRENDING_THRESHOLD
         
         if self.is_trending and not self.peak_trend_date:
             self.peak_trend_date = datetime.utcnow()
@@ -0,0 +1,40 @@
+"""
+Instagram Hashtag Lookup Model
+
+Persistent cache of hashtag name → Instagram hashtag ID resolutions.
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from datetime import datetime
+
+from app.core.database import Base
+
+
+class InstagramHashtagLookup(Base):
+    """Instagram Hashtag Lookup Model
+    
+    Caches ig_hashtag_search results. The endpoint only allows 30 unique
+    hashtags per account per 7 days and a hashtag's ID never changes, so
+    every found name is resolved through the API at most once. Not-found
+    rows are searched again after HASHTAG_NEGATIVE_TTL_HOURS. Each row also
+    records which account spent its weekly budget on the lookup.
+    """
+    __tablename__ = "instagram_hashtag_lookups"
+
+    # Primary Key
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # Lookup
+    name = Column(String, unique=True, index=True, nullable=False)  # Normalized name ("kbeauty")
+    external_id = Column(String, nullable=True)  # Instagram hashtag ID (None if not found)
+    
+    # Budget Tracking
+    resolved_by = Column(String, nullable=True)  # Instagram user ID that ran the search
+    resolved_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        Index('idx_hashtag_lookup_resolved_by_at', 'resolved_by', 'resolved_at'),
+    )
+    
+    def __repr__(self):
+        return f"<InstagramHashtagLookup(name={self.name}, external_id={self.external_id})>"
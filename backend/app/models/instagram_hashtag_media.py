@@ -0,0 +1,40 @@
+"""
+Instagram Hashtag Media Model
+
+Sliding window of media observed on tracked hashtags' top/recent edges.
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from datetime import datetime
+
+from app.core.database import Base
+
+
+class InstagramHashtagMedia(Base):
+    """Instagram Hashtag Media Model
+    
+    One row per (hashtag, media) pair seen by the hashtag harvester. Rows
+    older than two metric windows are pruned, so hashtag metrics are
+    aggregated from this small table instead of rescanning posts.
+    """
+    __tablename__ = "instagram_hashtag_media"
+
+    # Primary Key
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # Observation
+    hashtag_name = Column(String, nullable=False)  # Normalized name, e.g. "kbeauty"
+    media_id = Column(String, nullable=False)  # Instagram media ID
+    posted_at = Column(DateTime, nullable=False)  # Media timestamp (naive UTC)
+    like_count = Column(Integer, default=0)
+    comment_count = Column(Integer, default=0)
+    observed_at = Column(DateTime, default=datetime.utcnow, nullable=False)  # Last time the media was seen
+    
+    __table_args__ = (
+        Index('idx_hashtag_media_name_media', 'hashtag_name', 'media_id', unique=True),
+        Index('idx_hashtag_media_name_posted', 'hashtag_name', 'posted_at'),
+        Index('idx_hashtag_media_posted_at', 'posted_at'),
+    )
+    
+    def __repr__(self):
+        return f"<InstagramHashtagMedia(hashtag_name={self.hashtag_name}, media_id={self.media_id})>"
@@ -4,7 +4,7 @@ Instagram Post Model
 Stores Instagram post data for market trend analysis.
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float, JSON, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, JSON, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -49,6 +49,7 @@ class InstagramPost(Base):
     
     # Calculated Metrics
     engagement_rate = Column(Float, default=0.0)  # (likes + comments) / followers * 100
+    metrics_refreshed_at = Column(DateTime, nullable=True)  # Last like/comment count refresh
     
     # Analysis Fields
     hashtags = Column(JSON, default=list)  # ["kbeauty", "skincare", "koreanbeauty"]
@@ -74,6 +75,10 @@ class InstagramPost(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        Index('idx_instagram_posts_user_timestamp', 'user_id', 'timestamp'),  # Metric refresh lookups
+    )
+    
     def __repr__(self):
         return f"<InstagramPost(id={self.id}, external_id={self.external_id}, username={self.username})>"
     
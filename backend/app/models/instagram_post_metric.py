@@ -0,0 +1,42 @@
+"""
+Instagram Post Metric Model
+
+Append-only like/comment count snapshots of collected posts.
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+
+from app.core.database import Base
+
+
+class InstagramPostMetric(Base):
+    """Instagram Post Metric Model
+    
+    One row per post per collection pass that fetched its counts. Raw
+    snapshots older than POST_METRICS_RAW_RETENTION_DAYS are rolled up to
+    one "daily" row per post per day.
+    """
+    __tablename__ = "instagram_post_metrics"
+
+    # Primary Key
+    id = Column(Integer, primary_key=True)
+    post_id = Column(Integer, ForeignKey("instagram_posts.id", ondelete="CASCADE"), nullable=False)
+    
+    # Snapshot
+    captured_at = Column(DateTime, nullable=False)  # Collection time (naive UTC)
+    like_count = Column(Integer, nullable=False, default=0)
+    comment_count = Column(Integer, nullable=False, default=0)
+    resolution = Column(String(8), nullable=False, default="raw")  # "raw" or "daily"
+    
+    __table_args__ = (
+        Index('idx_post_metrics_post_captured', 'post_id', 'captured_at'),
+        Index('idx_post_metrics_resolution_captured', 'resolution', 'captured_at'),
+    )
+    
+    @property
+    def engagement(self) -> int:
+        """Total engagement (likes + comments)"""
+        return (self.like_count or 0) + (self.comment_count or 0)
+    
+    def __repr__(self):
+        return f"<InstagramPostMetric(post_id={self.post_id}, captured_at={self.captured_at})>"
@@ -0,0 +1,47 @@
+"""
+Post Hashtag Models
+
+Normalized hashtag index of collected posts: interned hashtag names and
+the post ↔ hashtag association that hashtag filters join on.
+"""
+
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+
+from app.core.database import Base
+
+
+class HashtagName(Base):
+    """Hashtag Name Model
+    
+    One row per distinct normalized hashtag (see normalize_hashtag), so
+    posts reference a hashtag by integer ID. Unlike instagram_hashtags
+    this is not per market and carries no metrics.
+    """
+    __tablename__ = "hashtag_names"
+
+    # Primary Key
+    id = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, index=True, nullable=False)  # "kbeauty" (normalized)
+    
+    def __repr__(self):
+        return f"<HashtagName(id={self.id}, name={self.name})>"
+
+
+class PostHashtag(Base):
+    """Post Hashtag Model
+    
+    Mirrors instagram_posts.hashtags as rows. The primary key serves
+    per-post lookups and deletes; idx_post_hashtags_hashtag_post serves
+    "posts with this hashtag".
+    """
+    __tablename__ = "post_hashtags"
+
+    post_id = Column(Integer, ForeignKey("instagram_posts.id", ondelete="CASCADE"), primary_key=True)
+    hashtag_id = Column(Integer, ForeignKey("hashtag_names.id"), primary_key=True)
+    
+    __table_args__ = (
+        Index('idx_post_hashtags_hashtag_post', 'hashtag_id', 'post_id'),
+    )
+    
+    def __repr__(self):
+        return f"<PostHashtag(post_id={self.post_id}, hashtag_id={self.hashtag_id})>"
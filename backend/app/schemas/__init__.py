@@ -14,6 +14,7 @@ from app.schemas.instagram import (
     InstagramInfluencerResponse,
     MarketInsightsResponse,
     PostAnalyticsResponse,
+    PostMetricSeriesResponse,
 )
 
 __all__ = [
@@ -29,4 +30,5 @@ __all__ = [
     "InstagramInfluencerResponse",
     "MarketInsightsResponse",
     "PostAnalyticsResponse",
+    "PostMetricSeriesResponse",
 ]
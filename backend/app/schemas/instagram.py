@@ -47,6 +47,25 @@ class InstagramPostResponse(InstagramPostBase):
         from_attributes = True
 
 
+class PostMetricPoint(BaseModel):
+    """One post metric snapshot with its engagement trajectory"""
+    captured_at: datetime
+    like_count: int
+    comment_count: int
+    engagement: int
+    velocity: Optional[float] = None  # Engagement gained per hour
+    acceleration: Optional[float] = None  # Velocity change per hour
+
+
+class PostMetricSeriesResponse(BaseModel):
+    """Post metric time series response schema"""
+    post_id: int
+    external_id: str
+    points: List[PostMetricPoint]
+    velocity: Optional[float] = None  # Latest velocity
+    acceleration: Optional[float] = None  # Latest acceleration
+
+
 class PostAnalyticsResponse(BaseModel):
     """Post analytics response schema"""
     total_posts: int
@@ -1,3 +1,4 @@
 from app.services.instagram_service import InstagramService
+from app.services.hashtag_resolver import HashtagResolver
 
-__all__ = ["InstagramService"]
+__all__ = ["InstagramService", "HashtagResolver"]
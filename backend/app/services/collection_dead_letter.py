@@ -0,0 +1,154 @@
+"""
+Collection Dead Letters
+
+Per-account failure bookkeeping for the collector, so failing accounts
+stop slowing healthy ones:
+
+- every failed collection is classified and counted in
+  instagram_collection_failures; a success removes the row
+- after INSTAGRAM_DEAD_LETTER_AFTER consecutive failures the account is
+  dead-lettered: runs and the polling queue skip it until next_retry_at
+- the retry delay doubles with every failure from a per-class base,
+  capped at INSTAGRAM_DEAD_LETTER_MAX_BACKOFF_HOURS
+
+Error classes:
+- auth: token expired or revoked (code 190)
+- rate_limited: app/user/page throttling (codes 4, 17, 32, 613)
+- permission: missing permission or unsupported account (codes 10, 200)
+- timeout: the shard deadline cancelled the account
+- transient: other retryable API errors (5xx, network)
+- api: other Graph API errors
+- internal: errors raised by our own code
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, exists, not_
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.database import dialect_insert
+from app.models.instagram_collection_failure import InstagramCollectionFailure
+
+
+FAILED_STATUSES = ("api_error", "token_expired", "timeout", "error")
+
+RATE_LIMIT_CODES = (4, 17, 32, 613)
+PERMISSION_CODES = (10, 200)
+
+# Retry delay after the first failure, per error class
+RETRY_BASE = {
+    "auth": timedelta(hours=6),
+    "rate_limited": timedelta(minutes=30),
+    "permission": timedelta(hours=6),
+    "timeout": timedelta(minutes=15),
+    "transient": timedelta(minutes=15),
+    "api": timedelta(hours=1),
+    "internal": timedelta(hours=1),
+}
+
+
+def classify_failure(result: Dict) -> str:
+    """Error class of a failed per-user collection result"""
+    status = result.get("status")
+    code = result.get("error_code")
+    if status == "token_expired" or code == 190:
+        return "auth"
+    if status == "timeout":
+        return "timeout"
+    if status == "error":
+        return "internal"
+    if code in RATE_LIMIT_CODES:
+        return "rate_limited"
+    if code in PERMISSION_CODES:
+        return "permission"
+    if result.get("transient"):
+        return "transient"
+    return "api"
+
+
+def retry_backoff(error_class: str, failure_count: int, max_backoff: Optional[timedelta] = None) -> timedelta:
+    """Delay before a dead-lettered account is retried (doubles per consecutive failure)"""
+    max_backoff = max_backoff or timedelta(hours=get_settings().INSTAGRAM_DEAD_LETTER_MAX_BACKOFF_HOURS)
+    base = RETRY_BASE.get(error_class, RETRY_BASE["api"])
+    return min(base * 2 ** max(failure_count - 1, 0), max_backoff)
+
+
+def not_dead_lettered(user_id_column, now: Optional[datetime] = None):
+    """
+    Filter clause excluding accounts that are dead-lettered and not yet due for a retry
+
+    Args:
+        user_id_column: Column holding users.id in the outer query
+        now: Current time (default: utcnow)
+    """
+    now = now or datetime.utcnow()
+    failure = InstagramCollectionFailure
+    return not_(exists().where(and_(
+        failure.user_id == user_id_column,
+        failure.failure_count >= get_settings().INSTAGRAM_DEAD_LETTER_AFTER,
+        failure.next_retry_at > now
+    )))
+
+
+def record_collection_outcomes(db: Session, results: List[Dict], now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Clear successful accounts and record failed ones with their class and next retry
+
+    Args:
+        db: Database session (committed on success)
+        results: Per-user results from collect_user_instagram_data
+        now: Failure time (default: utcnow)
+
+    Returns:
+        Dictionary with cleared, failed and dead_lettered counts
+    """
+    now = now or datetime.utcnow()
+    failure = InstagramCollectionFailure
+    threshold = get_settings().INSTAGRAM_DEAD_LETTER_AFTER
+    summary = {"cleared": 0, "failed": 0, "dead_lettered": 0}
+
+    succeeded = [result["user_id"] for result in results if result["status"] == "ok"]
+    if succeeded:
+        summary["cleared"] = db.query(failure).filter(
+            failure.user_id.in_(succeeded)
+        ).delete(synchronize_session=False)
+
+    failed = {result["user_id"]: result for result in results if result["status"] in FAILED_STATUSES}
+    if failed:
+        previous = dict(db.query(failure.user_id, failure.failure_count).filter(
+            failure.user_id.in_(list(failed))
+        ).all())
+        rows = []
+        for user_id, result in failed.items():
+            error_class = classify_failure(result)
+            count = previous.get(user_id, 0) + 1
+            rows.append({
+                "user_id": user_id,
+                "error_class": error_class,
+                "error_code": result.get("error_code"),
+                "last_error": result.get("error"),
+                "failure_count": count,
+                "next_retry_at": now + retry_backoff(error_class, count),
+                "first_failed_at": now,
+                "last_failed_at": now,
+            })
+            if count == threshold:
+                summary["dead_lettered"] += 1
+                print(f"☠️  User {user_id} dead-lettered after {count} failures ({error_class})")
+
+        statement = dialect_insert(db, failure).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=["user_id"],
+            set_={
+                column: getattr(statement.excluded, column)
+                for column in ("error_class", "error_code", "last_error", "failure_count",
+                               "next_retry_at", "last_failed_at")
+            }
+        )
+        db.execute(statement)
+        summary["failed"] = len(rows)
+
+    db.commit()
+    return summary
@@ -0,0 +1,222 @@
+"""
+Collection Run Checkpoints
+
+Persists which accounts of a collection run are done, so a run that
+crashes or hits the time limit resumes where it stopped instead of
+starting from scratch:
+
+- start_or_resume_run: a manual full sweep picks up the open sweep run
+  if no shard has checked in for the stale period (its shards are all
+  dead), else starts a new run with one pending checkpoint per account;
+  pending accounts that are no longer active are marked skipped
+- start_run: a dispatcher tick starts a run for the accounts it popped
+- resume_stale_runs: the dispatcher picks up its own stale runs, which
+  may be many at once (one per tick)
+- checkpoint_accounts: a shard marks its accounts done/failed/skipped when it ends
+- finish_run: the chord callback closes the run
+
+Within an account the collection state's high-water mark is the cursor,
+so accounts that finished inside a crashed shard are re-read cheaply.
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import bindparam, func, insert, update
+from sqlalchemy.orm import Session
+
+from app.models.instagram_collection_run import InstagramCollectionRun, InstagramCollectionRunAccount
+
+
+RUN_RUNNING = "running"
+RUN_COMPLETED = "completed"
+
+RUN_KIND_SWEEP = "sweep"
+RUN_KIND_DISPATCH = "dispatch"
+
+ACCOUNT_PENDING = "pending"
+ACCOUNT_DONE = "done"
+ACCOUNT_FAILED = "failed"
+ACCOUNT_SKIPPED = "skipped"
+
+
+def _pending_user_ids(db: Session, run_id: int) -> List[int]:
+    account = InstagramCollectionRunAccount
+    return [user_id for (user_id,) in db.query(account.user_id).filter(
+        account.run_id == run_id,
+        account.status == ACCOUNT_PENDING
+    ).order_by(account.id).all()]
+
+
+def start_run(db: Session, user_ids: List[int], kind: str = RUN_KIND_DISPATCH, now: Optional[datetime] = None) -> int:
+    """
+    Start a run with one pending checkpoint per account
+
+    Args:
+        db: Database session (committed on success)
+        user_ids: Accounts the run collects
+        kind: RUN_KIND_SWEEP or RUN_KIND_DISPATCH
+        now: Current time (default: utcnow)
+
+    Returns:
+        ID of the new run
+    """
+    now = now or datetime.utcnow()
+    run = InstagramCollectionRun(
+        kind=kind, status=RUN_RUNNING, total_accounts=len(user_ids), started_at=now, updated_at=now
+    )
+    db.add(run)
+    db.flush()
+    if user_ids:
+        db.execute(insert(InstagramCollectionRunAccount.__table__), [
+            {"run_id": run.id, "user_id": user_id, "status": ACCOUNT_PENDING} for user_id in user_ids
+        ])
+    db.commit()
+    return run.id
+
+
+def start_or_resume_run(
+    db: Session,
+    user_ids: List[int],
+    stale_after: timedelta,
+    now: Optional[datetime] = None
+) -> Dict:
+    """
+    Resume the open sweep run if it is stale, otherwise start a new one
+
+    Pending accounts of a resumed run that are no longer in user_ids (lost
+    their connection, or are dead-lettered) are marked skipped, so the run
+    does not wait for them forever.
+
+    Args:
+        db: Database session (committed on success)
+        user_ids: Accounts eligible for collection now
+        stale_after: Time without a shard check-in after which an open run is dead
+        now: Current time (default: utcnow)
+
+    Returns:
+        Dictionary with run_id, user_ids to dispatch, and whether the run
+        was resumed or is still in progress elsewhere (nothing to dispatch)
+    """
+    now = now or datetime.utcnow()
+    run = db.query(InstagramCollectionRun).filter(
+        InstagramCollectionRun.kind == RUN_KIND_SWEEP,
+        InstagramCollectionRun.status == RUN_RUNNING
+    ).order_by(InstagramCollectionRun.started_at.desc()).first()
+
+    if run is not None and now - run.updated_at < stale_after:
+        return {"run_id": run.id, "user_ids": [], "resumed": False, "in_progress": True}
+
+    if run is not None:
+        pending = set(_pending_user_ids(db, run.id))
+        active = set(user_ids)
+        inactive = [user_id for user_id in pending if user_id not in active]
+        if inactive:
+            account = InstagramCollectionRunAccount
+            db.query(account).filter(account.run_id == run.id, account.user_id.in_(inactive)).update(
+                {account.status: ACCOUNT_SKIPPED, account.finished_at: now}, synchronize_session=False
+            )
+        run.resumed_count += 1
+        run.updated_at = now
+        db.commit()
+        return {
+            "run_id": run.id,
+            "user_ids": [user_id for user_id in user_ids if user_id in pending],
+            "resumed": True,
+            "in_progress": False,
+        }
+
+    run_id = start_run(db, user_ids, RUN_KIND_SWEEP, now)
+    return {"run_id": run_id, "user_ids": list(user_ids), "resumed": False, "in_progress": False}
+
+
+def resume_stale_runs(db: Session, kind: str, stale_after: timedelta, now: Optional[datetime] = None) -> List[Dict]:
+    """
+    Pick up every open run of a kind that stopped checking in
+
+    Args:
+        db: Database session (committed on success)
+        kind: Run kind to resume
+        stale_after: Time without a shard check-in after which an open run is dead
+        now: Current time (default: utcnow)
+
+    Returns:
+        List of dictionaries with run_id and the pending user_ids to dispatch
+        again (empty when every shard checkpointed but the callback died)
+    """
+    now = now or datetime.utcnow()
+    runs = db.query(InstagramCollectionRun).filter(
+        InstagramCollectionRun.kind == kind,
+        InstagramCollectionRun.status == RUN_RUNNING,
+        InstagramCollectionRun.updated_at < now - stale_after
+    ).order_by(InstagramCollectionRun.started_at).all()
+
+    resumed = []
+    for run in runs:
+        resumed.append({"run_id": run.id, "user_ids": _pending_user_ids(db, run.id)})
+        run.resumed_count += 1
+        run.updated_at = now
+    db.commit()
+    return resumed
+
+
+def touch_run(db: Session, run_id: int, now: Optional[datetime] = None) -> None:
+    """Record a shard check-in on the run (keeps it from being resumed)"""
+    db.query(InstagramCollectionRun).filter(InstagramCollectionRun.id == run_id).update(
+        {InstagramCollectionRun.updated_at: now or datetime.utcnow()}, synchronize_session=False
+    )
+    db.commit()
+
+
+def checkpoint_accounts(db: Session, run_id: int, results: List[Dict], now: Optional[datetime] = None) -> int:
+    """
+    Mark a shard's accounts done, failed or skipped in one executemany UPDATE
+
+    Args:
+        db: Database session (committed on success)
+        run_id: Run the shard belongs to
+        results: Per-user results of the shard
+        now: Checkpoint time (default: utcnow)
+
+    Returns:
+        Number of accounts checkpointed
+    """
+    now = now or datetime.utcnow()
+    statuses = {"ok": ACCOUNT_DONE, "skipped": ACCOUNT_SKIPPED}
+    params = [
+        {"b_user_id": result["user_id"], "b_status": statuses.get(result["status"], ACCOUNT_FAILED)}
+        for result in results
+    ]
+    if params:
+        table = InstagramCollectionRunAccount.__table__
+        statement = (
+            update(table)
+            .where(table.c.run_id == run_id, table.c.user_id == bindparam("b_user_id"))
+            .values(status=bindparam("b_status"), finished_at=now)
+        )
+        db.execute(statement, params)
+    touch_run(db, run_id, now)
+    return len(params)
+
+
+def finish_run(db: Session, run_id: int, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Close a run and count its checkpoints
+
+    Returns:
+        Mapping of checkpoint status to account count
+    """
+    now = now or datetime.utcnow()
+    db.query(InstagramCollectionRun).filter(InstagramCollectionRun.id == run_id).update(
+        {InstagramCollectionRun.status: RUN_COMPLETED, InstagramCollectionRun.finished_at: now,
+         InstagramCollectionRun.updated_at: now},
+        synchronize_session=False
+    )
+    account = InstagramCollectionRunAccount
+    counts = {status: 0 for status in (ACCOUNT_PENDING, ACCOUNT_DONE, ACCOUNT_FAILED, ACCOUNT_SKIPPED)}
+    for status, count in db.query(account.status, func.count(account.id)).filter(
+        account.run_id == run_id
+    ).group_by(account.status).all():
+        counts[status] = count
+    db.commit()
+    return counts
@@ -0,0 +1,252 @@
+"""
+Incremental Collection State
+
+Per-account high-water marks and the metric refresh schedule used by the
+collector. An account is read from scratch only on its first run and every
+INSTAGRAM_FULL_REFRESH_HOURS; in between the collector asks only for media
+newer than the mark, revalidates the profile with its stored ETag, and
+refreshes like/comment counts of posts whose refresh is due.
+
+Refresh schedule (by post age):
+- under 48 hours: every hour
+- under 7 days: every 12 hours
+- under 30 days: every 3 days
+- older: never (counts have settled)
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.timeutils import naive_utc
+from app.models.instagram_collection_state import InstagramCollectionState
+from app.models.instagram_post import InstagramPost
+from app.services.polling_scheduler import schedule_next_poll
+
+
+# (maximum post age, refresh interval), youngest first
+REFRESH_SCHEDULE = (
+    (timedelta(hours=48), timedelta(hours=1)),
+    (timedelta(days=7), timedelta(hours=12)),
+    (timedelta(days=30), timedelta(days=3)),
+)
+
+
+def refresh_interval(age: timedelta) -> Optional[timedelta]:
+    """Metric refresh interval for a post of this age (None: never refresh)"""
+    for max_age, interval in REFRESH_SCHEDULE:
+        if age < max_age:
+            return interval
+    return None
+
+
+def metrics_refresh_due(
+    posted_at: datetime,
+    refreshed_at: Optional[datetime],
+    now: Optional[datetime] = None
+) -> bool:
+    """
+    Check whether a post's metrics should be refreshed
+
+    Args:
+        posted_at: When the post was published (naive UTC)
+        refreshed_at: When its metrics were last fetched (naive UTC)
+        now: Current time (default: utcnow)
+
+    Returns:
+        True if the post is within the schedule and its interval has passed
+    """
+    now = now or datetime.utcnow()
+    interval = refresh_interval(now - posted_at)
+    if interval is None:
+        return False
+    return refreshed_at is None or now - refreshed_at >= interval
+
+
+def metrics_refresh_due_clause(now: datetime):
+    """SQL equivalent of metrics_refresh_due for instagram_posts"""
+    buckets = []
+    younger_than = now
+    for max_age, interval in REFRESH_SCHEDULE:
+        buckets.append(and_(
+            InstagramPost.timestamp > now - max_age,
+            InstagramPost.timestamp <= younger_than,
+            or_(
+                InstagramPost.metrics_refreshed_at.is_(None),
+                InstagramPost.metrics_refreshed_at <= now - interval,
+            ),
+        ))
+        younger_than = now - max_age
+    return or_(*buckets)
+
+
+def due_media_ids(
+    db: Session,
+    instagram_user_id: str,
+    now: Optional[datetime] = None,
+    limit: Optional[int] = None
+) -> List[str]:
+    """
+    External IDs of an account's posts whose metric refresh is due, newest first
+
+    Args:
+        db: Database session
+        instagram_user_id: Author's Instagram user ID
+        now: Current time (default: utcnow)
+        limit: Maximum number of IDs returned
+
+    Returns:
+        List of media IDs
+    """
+    now = now or datetime.utcnow()
+    query = db.query(InstagramPost.external_id).filter(
+        InstagramPost.user_id == instagram_user_id,
+        metrics_refresh_due_clause(now)
+    ).order_by(InstagramPost.timestamp.desc())
+    if limit:
+        query = query.limit(limit)
+    return [external_id for (external_id,) in query.all()]
+
+
+def plan_collection(db: Session, user, now: Optional[datetime] = None) -> Dict:
+    """
+    Decide what one account's collection run has to fetch
+
+    Args:
+        db: Database session
+        user: User with an Instagram connection
+        now: Current time (default: utcnow)
+
+    Returns:
+        Dictionary with full_refresh, since, last_media_id, profile_etag,
+        cached profile fields and refresh_media_ids
+    """
+    settings = get_settings()
+    now = now or datetime.utcnow()
+    state = db.query(InstagramCollectionState).filter(
+        InstagramCollectionState.user_id == user.id
+    ).first()
+
+    full_refresh = (
+        state is None
+        or state.last_media_timestamp is None
+        or state.last_full_refresh_at is None
+        or now - state.last_full_refresh_at >= timedelta(hours=settings.INSTAGRAM_FULL_REFRESH_HOURS)
+    )
+    if full_refresh:
+        return {
+            "full_refresh": True,
+            "since": None,
+            "last_media_id": None,
+            "profile_etag": None,
+            "profile": None,
+            "refresh_media_ids": [],
+        }
+
+    profile = None
+    if state.username and state.account_type and state.media_count is not None:
+        profile = {
+            "id": state.instagram_user_id or user.instagram_user_id,
+            "username": state.username,
+            "account_type": state.account_type,
+            "media_count": state.media_count,
+        }
+    return {
+        "full_refresh": False,
+        "since": state.last_media_timestamp,
+        "last_media_id": state.last_media_id,
+        # Without cached profile fields a 304 would leave nothing to use
+        "profile_etag": state.profile_etag if profile else None,
+        "profile": profile,
+        "refresh_media_ids": due_media_ids(
+            db, user.instagram_user_id, now, settings.INSTAGRAM_METRICS_REFRESH_LIMIT
+        ),
+    }
+
+
+def _advance_mark(state: InstagramCollectionState, media_id: str, media_at: datetime):
+    if state.last_media_timestamp is None or media_at >= state.last_media_timestamp:
+        state.last_media_id = media_id
+        state.last_media_timestamp = media_at
+
+
+def advance_collection_mark(db: Session, user_id: int, media_id: str, media_at: datetime) -> InstagramCollectionState:
+    """
+    Move an account's high-water mark forward to a stored media item (never back)
+
+    Used by the spool loader once the posts up to the mark are committed.
+
+    Args:
+        db: Database session (not committed, so the mark commits with the posts)
+        user_id: User the mark belongs to
+        media_id: Newest media ID the run fetched
+        media_at: Its timestamp (naive UTC)
+
+    Returns:
+        Collection state
+    """
+    state = db.query(InstagramCollectionState).filter(
+        InstagramCollectionState.user_id == user_id
+    ).first()
+    if state is None:
+        state = InstagramCollectionState(user_id=user_id)
+        db.add(state)
+    _advance_mark(state, media_id, media_at)
+    return state
+
+
+def save_collection_state(
+    db: Session,
+    user,
+    plan: Dict,
+    instagram_user,
+    profile_etag: Optional[str],
+    media_items: List,
+    now: Optional[datetime] = None,
+    api_calls: Optional[int] = None
+) -> InstagramCollectionState:
+    """
+    Advance an account's high-water mark and schedule its next poll after a successful run
+
+    Args:
+        db: Database session (committed on success)
+        user: User the run belongs to
+        plan: Plan returned by plan_collection
+        instagram_user: Profile used for the run
+        profile_etag: ETag of the profile response
+        media_items: Media fetched in the run and already stored (empty
+            leaves the mark to the spool loader)
+        now: Current time (default: utcnow)
+        api_calls: Rate limit quota the run was charged (cost estimate for the scheduler)
+
+    Returns:
+        Updated collection state
+    """
+    now = now or datetime.utcnow()
+    state = db.query(InstagramCollectionState).filter(
+        InstagramCollectionState.user_id == user.id
+    ).first()
+    if state is None:
+        state = InstagramCollectionState(user_id=user.id)
+        db.add(state)
+
+    if media_items:
+        newest = max(media_items, key=lambda media: naive_utc(media.timestamp))
+        _advance_mark(state, newest.id, naive_utc(newest.timestamp))
+
+    state.instagram_user_id = user.instagram_user_id
+    state.username = instagram_user.username
+    state.account_type = instagram_user.account_type
+    state.media_count = instagram_user.media_count
+    if profile_etag:
+        state.profile_etag = profile_etag
+    if plan["full_refresh"]:
+        state.last_full_refresh_at = now
+    state.last_collected_at = now
+    schedule_next_poll(db, state, api_calls, now)
+
+    db.commit()
+    return state
@@ -0,0 +1,311 @@
+"""
+Hashtag Harvester Service
+
+Populates InstagramHashtag metrics from live hashtag media:
+
+1. Resolve tracked hashtag names to Instagram IDs (HashtagResolver)
+2. Stream each hashtag's recent and top media, one account per hashtag
+3. Upsert what was seen into the instagram_hashtag_media window table and
+   prune rows older than two windows
+4. Aggregate the window per hashtag in one GROUP BY query
+5. Write metrics and trend scores back with one executemany UPDATE
+
+Metrics (window = HASHTAG_METRICS_WINDOW_HOURS):
+- post_count: media posted in the current window
+- avg_likes / avg_comments: averages over the current window
+- velocity: media posted in the last 24 hours, per hour
+- growth_rate: % change of post_count against the previous window
+
+avg_engagement is left as is: hashtag media carries no follower counts,
+so an engagement rate cannot be derived from it.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import bindparam, case, func, update
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.database import dialect_insert
+from app.core.timeutils import naive_utc
+from app.integrations.instagram_api import InstagramGraphAPI, InstagramAPIError
+from app.models.instagram_hashtag import InstagramHashtag, TRENDING_THRESHOLD, compute_trend_score
+from app.models.instagram_hashtag_media import InstagramHashtagMedia
+from app.models.user import User
+from app.services.hashtag_resolver import HashtagResolver, normalize_hashtag
+
+
+VELOCITY_WINDOW = timedelta(hours=24)  # recent_media only covers the last 24 hours
+OBSERVATION_CHUNK_SIZE = 500
+
+
+def observation_rows(hashtag_name: str, media_items: List, observed_at: datetime) -> List[Dict]:
+    """Window table rows for media seen on a hashtag (deduplicated by media ID)"""
+    rows: Dict[str, Dict] = {}
+    for media in media_items:
+        rows[media.id] = {
+            "hashtag_name": hashtag_name,
+            "media_id": media.id,
+            "posted_at": naive_utc(media.timestamp),
+            "like_count": media.like_count or 0,
+            "comment_count": media.comments_count or 0,
+            "observed_at": observed_at,
+        }
+    return list(rows.values())
+
+
+def upsert_observations(db: Session, rows: List[Dict], chunk_size: int = OBSERVATION_CHUNK_SIZE) -> int:
+    """
+    Insert new observations and refresh counts of media seen before
+
+    Args:
+        db: Database session (committed on success)
+        rows: Rows from observation_rows
+
+    Returns:
+        Number of rows written
+    """
+    for start in range(0, len(rows), chunk_size):
+        statement = dialect_insert(db, InstagramHashtagMedia).values(rows[start:start + chunk_size])
+        statement = statement.on_conflict_do_update(
+            index_elements=["hashtag_name", "media_id"],
+            set_={
+                "like_count": statement.excluded.like_count,
+                "comment_count": statement.excluded.comment_count,
+                "observed_at": statement.excluded.observed_at,
+            }
+        )
+        db.execute(statement)
+    db.commit()
+    return len(rows)
+
+
+def prune_observations(db: Session, before: datetime) -> int:
+    """Delete observations of media posted before a cutoff"""
+    deleted = db.query(InstagramHashtagMedia).filter(
+        InstagramHashtagMedia.posted_at < before
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+
+def compute_window_metrics(
+    db: Session,
+    names: List[str],
+    now: Optional[datetime] = None,
+    window: Optional[timedelta] = None
+) -> Dict[str, Dict]:
+    """
+    Aggregate the observation window per hashtag in one query
+
+    Args:
+        db: Database session
+        names: Normalized hashtag names
+        now: End of the window (default: utcnow)
+        window: Window length (default: HASHTAG_METRICS_WINDOW_HOURS)
+
+    Returns:
+        Mapping of name to post_count, avg_likes, avg_comments, velocity and
+        growth_rate; names without observations are left out
+    """
+    now = now or datetime.utcnow()
+    window = window or timedelta(hours=get_settings().HASHTAG_METRICS_WINDOW_HOURS)
+    current_start = now - window
+    previous_start = now - 2 * window
+    media = InstagramHashtagMedia
+
+    in_current = media.posted_at >= current_start
+    rows = db.query(
+        media.hashtag_name,
+        func.sum(case((in_current, 1), else_=0)),
+        func.sum(case((media.posted_at < current_start, 1), else_=0)),
+        func.sum(case((media.posted_at >= now - VELOCITY_WINDOW, 1), else_=0)),
+        func.sum(case((in_current, media.like_count), else_=0)),
+        func.sum(case((in_current, media.comment_count), else_=0)),
+    ).filter(
+        media.hashtag_name.in_(names),
+        media.posted_at >= previous_start,
+        media.posted_at <= now
+    ).group_by(media.hashtag_name).all()
+
+    metrics = {}
+    for name, current, previous, last_day, likes, comments in rows:
+        current, previous = current or 0, previous or 0
+        metrics[name] = {
+            "post_count": current,
+            "avg_likes": round((likes or 0) / current, 2) if current else 0.0,
+            "avg_comments": round((comments or 0) / current, 2) if current else 0.0,
+            "velocity": round((last_day or 0) / (VELOCITY_WINDOW.total_seconds() / 3600), 2),
+            "growth_rate": round((current - previous) / previous * 100, 2) if previous else 0.0,
+        }
+    return metrics
+
+
+def write_hashtag_metrics(
+    db: Session,
+    hashtags: List,
+    metrics: Dict[str, Dict],
+    now: Optional[datetime] = None
+) -> int:
+    """
+    Write window metrics and trend scores to tracked hashtags in one executemany UPDATE
+
+    Args:
+        db: Database session (committed on success)
+        hashtags: Rows with id, name, avg_engagement and peak_trend_date
+        metrics: Result of compute_window_metrics
+        now: Tracking time (default: utcnow)
+
+    Returns:
+        Number of hashtag rows updated
+    """
+    now = now or datetime.utcnow()
+    params = []
+    for hashtag in hashtags:
+        values = metrics.get(normalize_hashtag(hashtag.name))
+        if values is None:
+            continue
+        trend_score = compute_trend_score(
+            values["growth_rate"], values["velocity"], hashtag.avg_engagement, values["post_count"]
+        )
+        is_trending = trend_score >= TRENDING_THRESHOLD
+        params.append({
+            "b_id": hashtag.id,
+            "b_post_count": values["post_count"],
+            "b_avg_likes": values["avg_likes"],
+            "b_avg_comments": values["avg_comments"],
+            "b_velocity": values["velocity"],
+            "b_growth_rate": values["growth_rate"],
+            "b_trend_score": round(trend_score, 2),
+            "b_is_trending": is_trending,
+            "b_peak_trend_date": hashtag.peak_trend_date or (now if is_trending else None),
+        })
+    if not params:
+        return 0
+
+    table = InstagramHashtag.__table__
+    statement = (
+        update(table)
+        .where(table.c.id == bindparam("b_id"))
+        .values(
+            post_count=bindparam("b_post_count"),
+            avg_likes=bindparam("b_avg_likes"),
+            avg_comments=bindparam("b_avg_comments"),
+            velocity=bindparam("b_velocity"),
+            growth_rate=bindparam("b_growth_rate"),
+            trend_score=bindparam("b_trend_score"),
+            is_trending=bindparam("b_is_trending"),
+            peak_trend_date=bindparam("b_peak_trend_date"),
+            tracked_at=now,
+            data_source="instagram_api",
+            updated_at=now,
+        )
+    )
+    db.execute(statement, params)
+    db.commit()
+    return len(params)
+
+
+class HashtagHarvester:
+    """Harvest media for tracked hashtags and refresh their metrics"""
+
+    def __init__(self, db: Session, concurrency: Optional[int] = None, max_media: Optional[int] = None):
+        """
+        Args:
+            db: Database session
+            concurrency: Hashtags fetched at once (default: INSTAGRAM_COLLECT_CONCURRENCY)
+            max_media: Media read per hashtag edge (default: HASHTAG_HARVEST_MAX_MEDIA)
+        """
+        settings = get_settings()
+        self.db = db
+        self.concurrency = concurrency or settings.INSTAGRAM_COLLECT_CONCURRENCY
+        self.max_media = max_media or settings.HASHTAG_HARVEST_MAX_MEDIA
+        self.window = timedelta(hours=settings.HASHTAG_METRICS_WINDOW_HOURS)
+
+    def tracked_hashtags(self) -> List:
+        """Tracked hashtag rows (only the columns the pipeline needs)"""
+        return self.db.query(
+            InstagramHashtag.id,
+            InstagramHashtag.name,
+            InstagramHashtag.avg_engagement,
+            InstagramHashtag.peak_trend_date
+        ).all()
+
+    async def fetch_hashtag_media(self, hashtag_id: str, account: User) -> List:
+        """Stream a hashtag's recent and top media with one account's token"""
+        client = InstagramGraphAPI(account.instagram_access_token)
+        try:
+            recent = [
+                media async for media in client.iter_hashtag_recent_media(
+                    hashtag_id, account.instagram_user_id, max_items=self.max_media, fast_decode=True
+                )
+            ]
+            top = [
+                media async for media in client.iter_hashtag_top_media(
+                    hashtag_id, account.instagram_user_id, max_items=self.max_media, fast_decode=True
+                )
+            ]
+            return recent + top
+        finally:
+            await client.close()
+
+    async def run(self, accounts: List[User], now: Optional[datetime] = None) -> Dict:
+        """
+        Run the pipeline once
+
+        Args:
+            accounts: Users with Instagram connections (lookups and media reads
+                are spread across them)
+            now: Current time (default: utcnow)
+
+        Returns:
+            Run summary with counts per stage
+        """
+        now = now or datetime.utcnow()
+        summary = {"tracked": 0, "resolved": 0, "fetched": 0, "failed": 0, "observations": 0,
+                   "pruned": 0, "updated": 0}
+
+        hashtags = self.tracked_hashtags()
+        names = list(dict.fromkeys(normalize_hashtag(hashtag.name) for hashtag in hashtags))
+        summary["tracked"] = len(names)
+        accounts = [
+            account for account in accounts
+            if account.instagram_user_id and account.instagram_access_token
+        ]
+        if not names or not accounts:
+            return summary
+
+        resolved = await HashtagResolver(self.db).resolve_many(names, accounts)
+        targets = [(name, external_id) for name, external_id in resolved.items() if external_id]
+        summary["resolved"] = len(targets)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(index: int, name: str, hashtag_id: str):
+            async with semaphore:
+                try:
+                    return name, await self.fetch_hashtag_media(hashtag_id, accounts[index % len(accounts)])
+                except InstagramAPIError as e:
+                    print(f"❌ Hashtag #{name} - Instagram API Error: {e.message}")
+                    return name, None
+
+        results = await asyncio.gather(*[
+            fetch(index, name, hashtag_id) for index, (name, hashtag_id) in enumerate(targets)
+        ])
+
+        rows = []
+        for name, media_items in results:
+            if media_items is None:
+                summary["failed"] += 1
+                continue
+            summary["fetched"] += 1
+            rows.extend(observation_rows(name, media_items, now))
+
+        summary["observations"] = upsert_observations(self.db, rows)
+        summary["pruned"] = prune_observations(self.db, now - 2 * self.window)
+
+        metrics = compute_window_metrics(self.db, [name for name, _ in targets], now, self.window)
+        summary["updated"] = write_hashtag_metrics(self.db, hashtags, metrics, now)
+        return summary
@@ -0,0 +1,289 @@
+"""
+Hashtag Resolver Service
+
+Resolves hashtag names to Instagram hashtag IDs with a two-level cache
+(in-process LRU + instagram_hashtag_lookups table) in front of
+ig_hashtag_search, and spreads new lookups across connected accounts'
+weekly search budgets (30 unique hashtags per account per 7 days).
+"""
+
+import asyncio
+import heapq
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.database import dialect_insert
+from app.integrations.instagram_api import InstagramGraphAPI, InstagramAPIError
+from app.models.instagram_hashtag_lookup import InstagramHashtagLookup
+from app.models.user import User
+
+
+HASHTAG_SEARCH_WEEKLY_LIMIT = 30
+HASHTAG_SEARCH_WINDOW = timedelta(days=7)
+
+_MISSING = object()
+
+
+def normalize_hashtag(name: str) -> str:
+    """Normalize a hashtag name: Unicode NFKC, no leading #, lowercase"""
+    return unicodedata.normalize("NFKC", name).strip().lstrip("#").strip().lower()
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache with optional per-entry expiry"""
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Tuple[Optional[str], Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            value, expires_at = self._data[key]
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Optional[str], ttl: Optional[float] = None):
+        """Store a value, dropping it after ttl seconds if given"""
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl if ttl is not None else None)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_lookup_cache: Optional[LRUCache] = None
+
+
+def get_lookup_cache() -> LRUCache:
+    """Get the process-wide hashtag lookup LRU"""
+    global _lookup_cache
+    if _lookup_cache is None:
+        _lookup_cache = LRUCache(maxsize=get_settings().HASHTAG_LOOKUP_CACHE_SIZE)
+    return _lookup_cache
+
+
+def plan_hashtag_lookups(
+    hashtags: List[str],
+    remaining_budget: Dict[str, int]
+) -> Tuple[Dict[str, List[str]], List[str]]:
+    """
+    Assign hashtag lookups to accounts, always using the account with the
+    most weekly budget left so usage stays balanced
+
+    Args:
+        hashtags: Normalized hashtag names that need a network lookup
+        remaining_budget: Searches left this week per Instagram user ID
+
+    Returns:
+        Tuple of (hashtags per Instagram user ID, hashtags deferred for lack of budget)
+    """
+    heap = [(-budget, account_id) for account_id, budget in remaining_budget.items() if budget > 0]
+    heapq.heapify(heap)
+
+    plan: Dict[str, List[str]] = {}
+    deferred: List[str] = []
+    for hashtag in hashtags:
+        if not heap:
+            deferred.append(hashtag)
+            continue
+        negative_budget, account_id = heapq.heappop(heap)
+        plan.setdefault(account_id, []).append(hashtag)
+        if negative_budget + 1 < 0:
+            heapq.heappush(heap, (negative_budget + 1, account_id))
+
+    return plan, deferred
+
+
+class HashtagResolver:
+    """
+    Resolve hashtag names to Instagram hashtag IDs
+
+    Lookup order: in-process LRU → database → ig_hashtag_search.
+    Not-found results are cached too, since they also consume budget, but
+    only for HASHTAG_NEGATIVE_TTL_HOURS so a hashtag that starts being used
+    later is looked up again.
+    """
+
+    def __init__(self, db: Session):
+        """
+        Args:
+            db: Database session
+        """
+        self.db = db
+        self.cache = get_lookup_cache()
+        self.negative_ttl = timedelta(hours=get_settings().HASHTAG_NEGATIVE_TTL_HOURS)
+
+    def _cache_put(self, name: str, external_id: Optional[str], resolved_at: datetime):
+        """Put a resolution in the LRU, expiring not-found results with the negative TTL"""
+        if external_id is not None:
+            self.cache.put(name, external_id)
+            return
+        remaining = (resolved_at + self.negative_ttl - datetime.utcnow()).total_seconds()
+        if remaining > 0:
+            self.cache.put(name, None, ttl=remaining)
+
+    def get_cached(self, names: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Look up normalized names in the LRU, then in one database query
+
+        Returns:
+            Mapping for names that are cached (value None = hashtag not found).
+            Not-found results older than the negative TTL count as uncached.
+        """
+        found: Dict[str, Optional[str]] = {}
+        misses = []
+        for name in names:
+            value = self.cache.get(name, _MISSING)
+            if value is _MISSING:
+                misses.append(name)
+            else:
+                found[name] = value
+
+        if misses:
+            negative_since = datetime.utcnow() - self.negative_ttl
+            rows = self.db.query(
+                InstagramHashtagLookup.name,
+                InstagramHashtagLookup.external_id,
+                InstagramHashtagLookup.resolved_at
+            ).filter(InstagramHashtagLookup.name.in_(misses)).all()
+            for name, external_id, resolved_at in rows:
+                if external_id is None and resolved_at < negative_since:
+                    continue
+                self._cache_put(name, external_id, resolved_at)
+                found[name] = external_id
+
+        return found
+
+    def remaining_budgets(self, account_ids: List[str]) -> Dict[str, int]:
+        """Searches left in the current 7-day window per Instagram user ID"""
+        since = datetime.utcnow() - HASHTAG_SEARCH_WINDOW
+        used = dict(
+            self.db.query(InstagramHashtagLookup.resolved_by, func.count(InstagramHashtagLookup.id))
+            .filter(
+                InstagramHashtagLookup.resolved_by.in_(account_ids),
+                InstagramHashtagLookup.resolved_at >= since
+            )
+            .group_by(InstagramHashtagLookup.resolved_by)
+            .all()
+        )
+        return {
+            account_id: max(0, HASHTAG_SEARCH_WEEKLY_LIMIT - used.get(account_id, 0))
+            for account_id in account_ids
+        }
+
+    async def resolve(self, hashtag: str, account: User) -> Optional[str]:
+        """
+        Resolve a single hashtag
+
+        Args:
+            hashtag: Hashtag name (with or without #)
+            account: User whose Instagram connection runs the search if needed
+
+        Returns:
+            Instagram hashtag ID, or None if not found or out of budget
+        """
+        name = normalize_hashtag(hashtag)
+        return (await self.resolve_many([name], [account])).get(name)
+
+    async def resolve_many(
+        self,
+        hashtags: List[str],
+        accounts: List[User]
+    ) -> Dict[str, Optional[str]]:
+        """
+        Resolve many hashtags, spreading network lookups across accounts
+
+        Args:
+            hashtags: Hashtag names (with or without #)
+            accounts: Users with Instagram connections whose budgets may be used
+
+        Returns:
+            Mapping of normalized name to Instagram hashtag ID (None if not found).
+            Names that could not be looked up this week are left out.
+        """
+        names = list(dict.fromkeys(normalize_hashtag(tag) for tag in hashtags if tag))
+        resolved = self.get_cached(names)
+
+        pending = [name for name in names if name not in resolved]
+        if not pending:
+            return resolved
+
+        accounts_by_id = {
+            account.instagram_user_id: account
+            for account in accounts
+            if account.instagram_user_id and account.instagram_access_token
+        }
+        plan, deferred = plan_hashtag_lookups(pending, self.remaining_budgets(list(accounts_by_id)))
+        if deferred:
+            print(f"⚠️  Hashtag search budget exhausted, deferred {len(deferred)} hashtags")
+
+        results = await asyncio.gather(*[
+            self._search(accounts_by_id[account_id], account_names)
+            for account_id, account_names in plan.items()
+        ])
+
+        rows = []
+        for account_id, account_results in zip(plan, results):
+            for name, external_id in account_results.items():
+                resolved_at = datetime.utcnow()
+                rows.append({
+                    "name": name,
+                    "external_id": external_id,
+                    "resolved_by": account_id,
+                    "resolved_at": resolved_at,
+                })
+                self._cache_put(name, external_id, resolved_at)
+                resolved[name] = external_id
+
+        if rows:
+            # Expired not-found rows are replaced; resolved IDs never change
+            statement = dialect_insert(self.db, InstagramHashtagLookup).values(rows)
+            self.db.execute(statement.on_conflict_do_update(
+                index_elements=["name"],
+                set_={
+                    "external_id": statement.excluded.external_id,
+                    "resolved_by": statement.excluded.resolved_by,
+                    "resolved_at": statement.excluded.resolved_at,
+                },
+                where=InstagramHashtagLookup.external_id.is_(None)
+            ))
+            self.db.commit()
+
+        return resolved
+
+    async def _search(self, account: User, names: List[str]) -> Dict[str, Optional[str]]:
+        """Run ig_hashtag_search for names with one account's token"""
+        client = InstagramGraphAPI(account.instagram_access_token)
+        results: Dict[str, Optional[str]] = {}
+        try:
+            for name in names:
+                try:
+                    hashtag = await client.search_hashtag(account.instagram_user_id, name)
+                except InstagramAPIError as e:
+                    print(f"❌ Hashtag lookup failed for #{name}: {e.message}")
+                    continue
+                results[name] = hashtag.id if hashtag else None
+        finally:
+            await client.close()
+        return results
@@ -0,0 +1,95 @@
+"""
+Hashtag Trend Recomputation
+
+Recomputes trend_score / is_trending / peak_trend_date for every hashtag
+with set-based UPDATE statements, chunked by primary key range, instead
+of loading each InstagramHashtag into the ORM.
+
+trend_score_expression() is the SQL form of compute_trend_score() in
+app.models.instagram_hashtag, which stays the reference implementation.
+Only CASE, ABS and COALESCE are used, so the same statement runs on
+PostgreSQL and SQLite.
+"""
+
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import case, func, update
+from sqlalchemy.orm import Session
+
+from app.models.instagram_hashtag import InstagramHashtag, TRENDING_THRESHOLD
+
+
+TREND_UPDATE_CHUNK_SIZE = 50_000  # Rows per UPDATE (bounds lock time and WAL per transaction)
+
+
+def _capped(value, cap: float = 100.0):
+    """SQL min(value, cap)"""
+    return case((value > cap, cap), else_=value)
+
+
+def trend_score_expression(table=None):
+    """
+    SQL expression equal to compute_trend_score for a row of instagram_hashtags
+
+    Args:
+        table: Table (or alias) to read the columns from (default: instagram_hashtags)
+    """
+    columns = (table if table is not None else InstagramHashtag.__table__).c
+    growth = func.abs(func.coalesce(columns.growth_rate, 0.0))
+    velocity = func.coalesce(columns.velocity, 0.0) / 10.0
+    engagement = func.coalesce(columns.avg_engagement, 0.0)
+    # 1000.0 keeps the division in floating point on both dialects
+    volume = func.coalesce(columns.post_count, 0) / 1000.0
+
+    return (
+        _capped(growth) * 0.4
+        + _capped(velocity) * 0.3
+        + _capped(engagement) * 0.2
+        + _capped(volume) * 0.1
+    )
+
+
+def recompute_trend_scores(
+    db: Session,
+    chunk_size: int = TREND_UPDATE_CHUNK_SIZE,
+    now: Optional[datetime] = None
+) -> Dict[str, int]:
+    """
+    Recompute trend status for every hashtag, one id range per statement
+
+    Args:
+        db: Database session (committed after each chunk)
+        chunk_size: Width of each id range
+        now: peak_trend_date for hashtags that start trending (default: utcnow)
+
+    Returns:
+        Dictionary with rows updated and chunks executed
+    """
+    now = now or datetime.utcnow()
+    table = InstagramHashtag.__table__
+    low, high = db.query(func.min(table.c.id), func.max(table.c.id)).one()
+    summary = {"updated": 0, "chunks": 0}
+    if low is None:
+        return summary
+
+    # SET expressions see the row's old values, so each one repeats the score
+    score = trend_score_expression()
+    trending = score >= TRENDING_THRESHOLD
+    for start in range(low, high + 1, chunk_size):
+        statement = (
+            update(table)
+            .where(table.c.id >= start, table.c.id < start + chunk_size)
+            .values(
+                trend_score=score,
+                is_trending=trending,
+                peak_trend_date=case(
+                    (trending & table.c.peak_trend_date.is_(None), now),
+                    else_=table.c.peak_trend_date
+                ),
+            )
+        )
+        summary["updated"] += db.execute(statement).rowcount
+        summary["chunks"] += 1
+        db.commit()
+    return summary
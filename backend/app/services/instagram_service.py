@@ -16,6 +16,13 @@ from app.models.instagram_hashtag import InstagramHashtag
 from app.models.instagram_influencer import InstagramInfluencer
 from app.core.config import get_settings
 from app.integrations.instagram_api import InstagramGraphAPI, InstagramAPIError
+from app.services.post_analytics import aggregate_post_engagement, empty_engagement_summary
+from app.services.post_hashtags import filter_by_hashtag, index_post_hashtags
+from app.services.post_ingest import upsert_posts
+
+
+# search_posts order: most engaging first, ties by ID so limits are repeatable
+SEARCH_ORDER = (InstagramPost.engagement_rate.desc(), InstagramPost.id)
 
 
 class InstagramService:
@@ -47,6 +54,28 @@ class InstagramService:
     
     # ========== POST OPERATIONS ==========
     
+    def _search_query(
+        self,
+        market: str,
+        hashtag: Optional[str] = None,
+        category: Optional[str] = None,
+        min_engagement: Optional[float] = None
+    ):
+        """Unordered query for posts matching search_posts filters"""
+        query = self.db.query(InstagramPost).filter(InstagramPost.market == market)
+        
+        if hashtag:
+            # Index join through post_hashtags
+            query = filter_by_hashtag(query, hashtag)
+        
+        if category:
+            query = query.filter(InstagramPost.category == category)
+        
+        if min_engagement:
+            query = query.filter(InstagramPost.engagement_rate >= min_engagement)
+        
+        return query
+    
     async def search_posts(
         self,
         market: str,
@@ -71,25 +100,18 @@ class InstagramService:
             List of InstagramPost objects
         """
         # Always query from database first (caching layer)
-        query = self.db.query(InstagramPost).filter(InstagramPost.market == market)
-        
-        if hashtag:
-            # Search for hashtag in JSON array
-            query = query.filter(InstagramPost.hashtags.contains([hashtag]))
-        
-        if category:
-            query = query.filter(InstagramPost.category == category)
-        
-        if min_engagement:
-            query = query.filter(InstagramPost.engagement_rate >= min_engagement)
+        query = self._search_query(market, hashtag, category, min_engagement)
         
         # Order by engagement rate (most engaging first)
-        query = query.order_by(InstagramPost.engagement_rate.desc())
-        
-        db_posts = query.limit(limit).all()
+        db_posts = query.order_by(*SEARCH_ORDER).limit(limit).all()
         
         # If using real API and no recent cached data, fetch from API
         if self.use_real_api and self.api_client and len(db_posts) < limit:
+            family = "hashtag" if hashtag else "media"
+            if not self.api_client.is_available(family):
+                # Circuit open: serve cached data instead of waiting on a degraded API
+                print(f"⚠️  Instagram {family} circuit open, serving {len(db_posts)} cached posts")
+                return db_posts
             try:
                 # Note: Real implementation would fetch from API here
                 # For now, return cached data
@@ -108,32 +130,32 @@ class InstagramService:
         """Create new Instagram post record"""
         post = InstagramPost(**post_data)
         self.db.add(post)
+        self.db.flush()
+        index_post_hashtags(self.db, {post.external_id: post.hashtags})
         self.db.commit()
         self.db.refresh(post)
         return post
     
-    async def bulk_create_posts(self, posts_data: List[dict]) -> List[InstagramPost]:
-        """Bulk create Instagram posts (for mock data import)"""
-        posts = [InstagramPost(**data) for data in posts_data]
-        self.db.add_all(posts)
-        self.db.commit()
-        return posts
+    async def bulk_create_posts(self, posts_data: List[dict]) -> Dict[str, int]:
+        """
+        Bulk create or update Instagram posts by external_id
+        
+        Returns:
+            Dictionary with inserted and updated counts
+        """
+        return upsert_posts(self.db, posts_data)
     
     async def analyze_post_engagement(self, posts: List[InstagramPost]) -> Dict:
         """
-        Analyze engagement patterns across posts
+        Analyze engagement patterns across posts already loaded
+        
+        Posts still in the database are summarized without loading them
+        by analyze_matching_posts (same output, aggregated in SQL).
         
         Returns aggregated metrics and insights
         """
         if not posts:
-            return {
-                "total_posts": 0,
-                "avg_engagement_rate": 0.0,
-                "total_likes": 0,
-                "total_comments": 0,
-                "top_hashtags": [],
-                "peak_posting_times": []
-            }
+            return empty_engagement_summary()
         
         total_likes = sum(post.like_count or 0 for post in posts)
         total_comments = sum(post.comment_count or 0 for post in posts)
@@ -171,6 +193,23 @@ class InstagramService:
             "avg_comments_per_post": round(total_comments / len(posts), 2)
         }
     
+    async def analyze_matching_posts(
+        self,
+        market: str,
+        hashtag: Optional[str] = None,
+        category: Optional[str] = None,
+        limit: int = 100
+    ) -> Dict:
+        """
+        Analyze engagement of the posts search_posts would return
+        
+        Aggregated in the database (see app.services.post_analytics);
+        equal to analyze_post_engagement(await search_posts(...)).
+        """
+        return aggregate_post_engagement(
+            self.db, self._search_query(market, hashtag, category), order_by=SEARCH_ORDER, limit=limit
+        )
+    
     # ========== HASHTAG OPERATIONS ==========
     
     async def get_trending_hashtags(
@@ -389,7 +428,7 @@ class InstagramService:
         return {
             "success": True,
             "imported": {
-                "posts": len(posts),
+                "posts": posts["inserted"] + posts["updated"],
                 "hashtags": len(hashtags),
                 "influencers": len(influencers)
             }
@@ -403,14 +442,14 @@ class InstagramService:
         
         Returns aggregated analytics for a specific market
         """
-        # Get recent posts (last 30 days)
+        # Recent posts (last 30 days), aggregated in the database
         thirty_days_ago = datetime.utcnow() - timedelta(days=30)
         recent_posts = self.db.query(InstagramPost).filter(
             and_(
                 InstagramPost.market == market,
                 InstagramPost.timestamp >= thirty_days_ago
             )
-        ).all()
+        )
         
         # Get trending hashtags
         trending_hashtags = await self.get_trending_hashtags(market, limit=10)
@@ -419,7 +458,7 @@ class InstagramService:
         top_influencers = await self.find_influencers(market, limit=10)
         
         # Analyze posts
-        post_analytics = await self.analyze_post_engagement(recent_posts)
+        post_analytics = aggregate_post_engagement(self.db, recent_posts)
         
         return {
             "market": market,
@@ -0,0 +1,213 @@
+"""
+Activity-Adaptive Polling Scheduler
+
+Every connected account has a next-due time on its collection state;
+instagram_collection_states.next_due_at (indexed) is the priority queue.
+A dispatcher tick pops due accounts in next-due order, soonest first,
+while their estimated API cost fits the global per-tick budget, and
+leases them so they are not dispatched twice. Each finished collection
+reschedules its account from observed activity:
+
+- posting frequency: posts per day over the last 30 days; an account
+  is polled about twice per expected posting interval
+- engagement velocity: the fastest engagement gain per hour among the
+  account's posts from the last 48 hours shortens the interval further,
+  so early engagement on fresh posts is caught
+
+Intervals are clamped to [SCHEDULER_MIN_POLL_MINUTES, SCHEDULER_MAX_POLL_HOURS].
+Accounts that were never collected are due immediately; dead-lettered
+accounts wait for their retry (see app.services.collection_dead_letter).
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models.instagram_collection_state import InstagramCollectionState
+from app.models.instagram_post import InstagramPost
+from app.models.user import User
+from app.services.collection_dead_letter import not_dead_lettered
+from app.services.post_metrics import get_engagement_velocity
+
+
+ACTIVITY_WINDOW = timedelta(days=30)
+VELOCITY_WINDOW = timedelta(hours=48)
+MIN_POSTS_PER_DAY = 1 / 30  # Dormant accounts are treated as posting monthly
+DEFAULT_POLL_COST = 3  # Profile revalidation, one media page, one metrics batch
+
+
+def compute_poll_interval(
+    posts_per_day: float,
+    velocity: float = 0.0,
+    min_interval: Optional[timedelta] = None,
+    max_interval: Optional[timedelta] = None,
+    velocity_scale: Optional[float] = None
+) -> timedelta:
+    """
+    Poll interval for an account's observed activity
+
+    Args:
+        posts_per_day: Posting frequency
+        velocity: Highest engagement gain per hour among recent posts
+        min_interval: Lower clamp (default: SCHEDULER_MIN_POLL_MINUTES)
+        max_interval: Upper clamp (default: SCHEDULER_MAX_POLL_HOURS)
+        velocity_scale: Velocity that halves the interval (default: SCHEDULER_VELOCITY_SCALE)
+
+    Returns:
+        Time until the account should be polled again
+    """
+    settings = get_settings()
+    min_interval = min_interval or timedelta(minutes=settings.SCHEDULER_MIN_POLL_MINUTES)
+    max_interval = max_interval or timedelta(hours=settings.SCHEDULER_MAX_POLL_HOURS)
+    velocity_scale = velocity_scale or settings.SCHEDULER_VELOCITY_SCALE
+
+    posting_interval = 86400 / max(posts_per_day or 0.0, MIN_POSTS_PER_DAY)
+    seconds = posting_interval / 2 / (1 + max(velocity or 0.0, 0.0) / velocity_scale)
+    seconds = min(max(seconds, min_interval.total_seconds()), max_interval.total_seconds())
+    return timedelta(seconds=round(seconds))
+
+
+def observed_activity(db: Session, instagram_user_id: str, now: Optional[datetime] = None) -> Tuple[float, float]:
+    """
+    Posting frequency and recent engagement velocity of an account
+
+    Returns:
+        Tuple of (posts per day over ACTIVITY_WINDOW, highest latest
+        velocity among posts from the last VELOCITY_WINDOW)
+    """
+    now = now or datetime.utcnow()
+    posts = db.query(func.count(InstagramPost.id)).filter(
+        InstagramPost.user_id == instagram_user_id,
+        InstagramPost.timestamp >= now - ACTIVITY_WINDOW
+    ).scalar() or 0
+
+    recent_ids = [post_id for (post_id,) in db.query(InstagramPost.id).filter(
+        InstagramPost.user_id == instagram_user_id,
+        InstagramPost.timestamp >= now - VELOCITY_WINDOW
+    ).all()]
+    velocities = get_engagement_velocity(db, recent_ids, since=now - VELOCITY_WINDOW)
+    velocity = max((point["velocity"] or 0.0 for point in velocities.values()), default=0.0)
+
+    return posts / ACTIVITY_WINDOW.days, velocity
+
+
+def schedule_next_poll(
+    db: Session,
+    state: InstagramCollectionState,
+    api_calls: Optional[int] = None,
+    now: Optional[datetime] = None
+) -> datetime:
+    """
+    Set an account's next-due time from its observed activity (not committed)
+
+    Args:
+        db: Database session
+        state: Account's collection state (instagram_user_id set)
+        api_calls: Rate limit quota the finished collection was charged (cost estimate for the next one)
+        now: Current time (default: utcnow)
+
+    Returns:
+        The new next-due time
+    """
+    now = now or datetime.utcnow()
+    posts_per_day, velocity = observed_activity(db, state.instagram_user_id, now)
+    interval = compute_poll_interval(posts_per_day, velocity)
+
+    state.posts_per_day = round(posts_per_day, 3)
+    state.engagement_velocity = round(velocity, 3)
+    state.poll_interval_seconds = int(interval.total_seconds())
+    state.next_due_at = now + interval
+    if api_calls:
+        state.last_api_calls = api_calls
+    return state.next_due_at
+
+
+def due_accounts(db: Session, now: Optional[datetime] = None, limit: int = 1000) -> List[Tuple[int, int]]:
+    """
+    Active accounts that are due, never-collected accounts first, then by next-due time
+
+    Returns:
+        List of (user ID, estimated API calls)
+    """
+    now = now or datetime.utcnow()
+    state = InstagramCollectionState
+    rows = db.query(User.id, state.last_api_calls).outerjoin(
+        state, state.user_id == User.id
+    ).filter(
+        User.instagram_access_token.isnot(None),
+        User.instagram_token_expires_at > now,
+        User.is_active == True,
+        or_(state.next_due_at.is_(None), state.next_due_at <= now),
+        not_dead_lettered(User.id, now)
+    ).order_by(
+        state.next_due_at.isnot(None), state.next_due_at, User.id
+    ).limit(limit).all()
+    return [(user_id, api_calls or DEFAULT_POLL_COST) for user_id, api_calls in rows]
+
+
+def take_within_budget(candidates: List[Tuple[int, int]], budget: int) -> List[int]:
+    """
+    Pop accounts in queue order while their estimated cost fits the budget
+
+    Stops at the first account that does not fit, so the head of the queue
+    is never starved by cheaper accounts behind it. The head is always
+    taken, even if its estimate exceeds the whole budget; otherwise it
+    would block the queue on every tick.
+    """
+    selected = []
+    remaining = budget
+    for user_id, cost in candidates:
+        if cost > remaining and selected:
+            break
+        selected.append(user_id)
+        remaining -= cost
+    return selected
+
+
+def lease_accounts(db: Session, user_ids: List[int], now: Optional[datetime] = None) -> None:
+    """
+    Push dispatched accounts' next-due time out by the dispatch lease
+
+    The finished collection reschedules the account; if it fails, the
+    account becomes due again once the lease expires.
+    """
+    if not user_ids:
+        return
+    now = now or datetime.utcnow()
+    lease_until = now + timedelta(minutes=get_settings().SCHEDULER_DISPATCH_LEASE_MINUTES)
+    state = InstagramCollectionState
+
+    existing = {user_id for (user_id,) in db.query(state.user_id).filter(state.user_id.in_(user_ids)).all()}
+    db.query(state).filter(state.user_id.in_(existing)).update(
+        {state.next_due_at: lease_until}, synchronize_session=False
+    )
+    db.add_all([state(user_id=user_id, next_due_at=lease_until) for user_id in user_ids if user_id not in existing])
+    db.commit()
+
+
+def pop_due_accounts(db: Session, budget: int, now: Optional[datetime] = None) -> Dict:
+    """
+    One dispatcher tick: select due accounts within the API budget and lease them
+
+    Args:
+        db: Database session
+        budget: API calls this tick may spend
+        now: Current time (default: utcnow)
+
+    Returns:
+        Dictionary with dispatched user IDs, accounts left due and budget used
+    """
+    now = now or datetime.utcnow()
+    candidates = due_accounts(db, now)
+    selected = take_within_budget(candidates, budget)
+    lease_accounts(db, selected, now)
+    costs = dict(candidates)
+    return {
+        "user_ids": selected,
+        "due": len(candidates),
+        "deferred": len(candidates) - len(selected),
+        "budget_used": sum(costs[user_id] for user_id in selected),
+    }
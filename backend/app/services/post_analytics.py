@@ -0,0 +1,130 @@
+"""
+Post Engagement Aggregation
+
+Computes the engagement summary of InstagramService.analyze_post_engagement
+(totals, averages, top hashtags, peak posting hours) in the database with
+GROUP BY queries, instead of loading every post and looping in Python.
+Only the summary rows leave the database.
+
+The result is identical to the Python path over the same posts in the
+same order, ties included: the Python path ranks equal counts by first
+appearance, so each query carries the post's position in the ordering
+and ranks ties by the earliest one.
+
+Hashtags are the raw hashtags column unnested per post (json_each on
+SQLite, json_array_elements_text on PostgreSQL), as the Python path
+counts them - not the normalized post_hashtags index.
+"""
+
+from typing import Dict, Optional, Sequence
+
+from sqlalchemy import case, extract, func, select, true
+from sqlalchemy.orm import Query, Session
+
+from app.models.instagram_post import InstagramPost
+
+
+TOP_HASHTAGS = 10
+PEAK_HOURS = 3
+
+# Orders (position, element index) pairs as one integer; a caption never has this many hashtags
+_HASHTAG_INDEX_STRIDE = 4096
+
+
+def empty_engagement_summary() -> Dict:
+    """Summary of no posts"""
+    return {
+        "total_posts": 0,
+        "avg_engagement_rate": 0.0,
+        "total_likes": 0,
+        "total_comments": 0,
+        "top_hashtags": [],
+        "peak_posting_times": []
+    }
+
+
+def _hashtag_elements(db: Session, hashtags_column):
+    """
+    Table-valued unnest of a JSON array column: (value, index) per element
+
+    Anything but an array (SQL NULL, JSON null) unnests to no rows, like
+    `post.hashtags or []`.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        array = case((func.json_typeof(hashtags_column) == "array", hashtags_column))
+        elements = func.json_array_elements_text(array).table_valued(
+            "value", with_ordinality="ordinality"
+        ).lateral()
+        return elements, elements.c.value, elements.c.ordinality
+    array = case((func.json_type(hashtags_column) == "array", hashtags_column))
+    elements = func.json_each(array).table_valued("value", "key")
+    return elements, elements.c.value, elements.c.key
+
+
+def aggregate_post_engagement(
+    db: Session,
+    query: Query,
+    order_by: Sequence = (InstagramPost.id,),
+    limit: Optional[int] = None
+) -> Dict:
+    """
+    Engagement summary of the posts a query selects, aggregated in SQL
+
+    Args:
+        db: Database session
+        query: Query over InstagramPost with filters (and joins), unordered
+        order_by: Order of the posts, ending in a unique column (decides
+            which posts `limit` keeps and how equal counts are ranked)
+        limit: Only summarize the first posts in that order
+
+    Returns:
+        Same dictionary as InstagramService.analyze_post_engagement
+    """
+    posts = query.with_entities(
+        InstagramPost.like_count,
+        InstagramPost.comment_count,
+        InstagramPost.engagement_rate,
+        InstagramPost.timestamp,
+        InstagramPost.hashtags,
+        func.row_number().over(order_by=order_by).label("position"),
+    ).order_by(*order_by).limit(limit).subquery("posts")
+
+    total_posts, total_likes, total_comments, engagement_sum = db.execute(select(
+        func.count(),
+        func.coalesce(func.sum(func.coalesce(posts.c.like_count, 0)), 0),
+        func.coalesce(func.sum(func.coalesce(posts.c.comment_count, 0)), 0),
+        func.coalesce(func.sum(func.coalesce(posts.c.engagement_rate, 0.0)), 0.0),
+    ).select_from(posts)).one()
+    if not total_posts:
+        return empty_engagement_summary()
+
+    elements, hashtag, index = _hashtag_elements(db, posts.c.hashtags)
+    count = func.count().label("count")
+    top_hashtags = db.execute(
+        select(hashtag, count)
+        .select_from(posts)
+        .join(elements, true())
+        .group_by(hashtag)
+        .order_by(count.desc(), func.min(posts.c.position * _HASHTAG_INDEX_STRIDE + index))
+        .limit(TOP_HASHTAGS)
+    ).all()
+
+    hour = extract("hour", posts.c.timestamp)
+    peak_hours = db.execute(
+        select(hour, count)
+        .where(posts.c.timestamp.isnot(None))
+        .group_by(hour)
+        .order_by(count.desc(), func.min(posts.c.position))
+        .limit(PEAK_HOURS)
+    ).all()
+
+    return {
+        "total_posts": total_posts,
+        "avg_engagement_rate": round(engagement_sum / total_posts, 2),
+        "total_likes": total_likes,
+        "total_comments": total_comments,
+        "top_hashtags": [{"hashtag": tag, "count": tag_count} for tag, tag_count in top_hashtags],
+        "peak_posting_times": [f"{int(peak_hour):02d}:00" for peak_hour, _ in peak_hours],
+        "avg_likes_per_post": round(total_likes / total_posts, 2),
+        "avg_comments_per_post": round(total_comments / total_posts, 2)
+    }
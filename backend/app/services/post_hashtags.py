@@ -0,0 +1,125 @@
+"""
+Post Hashtag Index
+
+Keeps post_hashtags in step with instagram_posts.hashtags so hashtag
+filters are an index join instead of a JSON containment test (which no
+index serves, so every hashtag search scanned instagram_posts):
+
+- Names are normalized (normalize_hashtag) and interned in hashtag_names;
+  a filter for "#KBeauty" matches posts tagged "kbeauty"
+- Posts are indexed when first written, and re-indexed when an upsert
+  overwrites their hashtags column
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Query, Session
+
+from app.core.database import dialect_insert
+from app.models.instagram_post import InstagramPost
+from app.models.post_hashtag import HashtagName, PostHashtag
+from app.services.hashtag_resolver import normalize_hashtag
+
+
+INDEX_CHUNK_SIZE = 500  # Values per IN (...) lookup
+
+
+def _chunks(values: List, size: int = INDEX_CHUNK_SIZE):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def intern_hashtags(db: Session, names: Iterable[str]) -> Dict[str, int]:
+    """
+    IDs of hashtag names, creating the ones not seen before
+
+    Args:
+        db: Database session (not committed)
+        names: Normalized hashtag names
+
+    Returns:
+        Mapping of name to hashtag_names.id
+    """
+    wanted = sorted(set(names))
+    ids: Dict[str, int] = {}
+    for chunk in _chunks(wanted):
+        ids.update(db.execute(
+            select(HashtagName.name, HashtagName.id).where(HashtagName.name.in_(chunk))
+        ).all())
+
+    missing = [name for name in wanted if name not in ids]
+    if missing:
+        # Another loader may intern the same names concurrently
+        statement = dialect_insert(db, HashtagName).on_conflict_do_nothing(index_elements=["name"])
+        db.execute(statement, [{"name": name} for name in missing])
+        for chunk in _chunks(missing):
+            ids.update(db.execute(
+                select(HashtagName.name, HashtagName.id).where(HashtagName.name.in_(chunk))
+            ).all())
+    return ids
+
+
+def index_post_hashtags(db: Session, hashtags: Dict[str, Optional[List[str]]], replace: bool = False) -> int:
+    """
+    Write post_hashtags rows for posts by external_id
+
+    Args:
+        db: Database session (not committed, so the caller's post write and
+            the index commit together)
+        hashtags: Mapping of external_id to the post's hashtags column
+        replace: Rewrite rows of posts already indexed (their hashtags were
+            overwritten); otherwise only posts without rows are indexed
+
+    Returns:
+        Number of post_hashtags rows written
+    """
+    post_ids: Dict[str, int] = {}
+    for chunk in _chunks(list(hashtags)):
+        post_ids.update(db.execute(
+            select(InstagramPost.external_id, InstagramPost.id).where(InstagramPost.external_id.in_(chunk))
+        ).all())
+    if not post_ids:
+        return 0
+
+    table = PostHashtag.__table__
+    for chunk in _chunks(list(post_ids.values())):
+        if replace:
+            db.execute(table.delete().where(table.c.post_id.in_(chunk)))
+        else:
+            indexed = set(db.execute(select(table.c.post_id).where(table.c.post_id.in_(chunk))).scalars())
+            post_ids = {external_id: post_id for external_id, post_id in post_ids.items() if post_id not in indexed}
+
+    names_by_post = {
+        post_id: {normalize_hashtag(name) for name in hashtags[external_id] or [] if name} - {""}
+        for external_id, post_id in post_ids.items()
+    }
+    ids = intern_hashtags(db, (name for names in names_by_post.values() for name in names))
+    rows = [
+        {"post_id": post_id, "hashtag_id": ids[name]}
+        for post_id, names in names_by_post.items()
+        for name in names
+    ]
+    if rows:
+        statement = dialect_insert(db, PostHashtag).on_conflict_do_nothing(index_elements=["post_id", "hashtag_id"])
+        db.execute(statement, rows)
+    return len(rows)
+
+
+def filter_by_hashtag(query: Query, hashtag: str) -> Query:
+    """
+    Restrict a query over InstagramPost to posts tagged with a hashtag
+
+    Args:
+        query: Query selecting InstagramPost
+        hashtag: Hashtag name (with or without #, any case)
+
+    Returns:
+        Query joined through post_hashtags
+    """
+    return (
+        query
+        .join(PostHashtag, PostHashtag.post_id == InstagramPost.id)
+        .join(HashtagName, HashtagName.id == PostHashtag.hashtag_id)
+        .filter(HashtagName.name == normalize_hashtag(hashtag))
+    )
@@ -0,0 +1,226 @@
+"""
+Post Ingestion
+
+Bulk upsert of Instagram posts keyed by external_id: one
+INSERT ... ON CONFLICT (external_id) DO UPDATE per chunk instead of a
+SELECT and an INSERT/UPDATE per post. The post_hashtags index is written
+in the same transaction (see app.services.post_hashtags).
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import bindparam, literal_column, update
+from sqlalchemy.orm import Session
+
+from app.core.database import dialect_insert
+from app.core.timeutils import naive_utc
+from app.models.instagram_post import InstagramPost
+from app.services.post_hashtags import index_post_hashtags
+
+
+UPSERT_CHUNK_SIZE = 500  # Rows per statement (stays under bind parameter limits)
+
+# Columns refreshed when a collected post already exists
+POST_METRIC_COLUMNS = ("like_count", "comment_count", "engagement_rate", "metrics_refreshed_at")
+
+# Columns never overwritten on conflict
+_IMMUTABLE_COLUMNS = {"id", "external_id", "created_at"}
+
+
+def extract_hashtags(caption: str) -> List[str]:
+    """Extract hashtags from caption text"""
+    words = caption.split()
+    hashtags = [word[1:] for word in words if word.startswith('#')]
+    return hashtags[:10]  # Limit to 10 hashtags
+
+
+def calculate_engagement_rate(likes: int, comments: int, followers: int) -> float:
+    """Calculate engagement rate"""
+    if followers == 0:
+        return 0.0
+    engagement = ((likes + comments) / followers) * 100
+    return round(engagement, 2)
+
+
+def media_to_post_row(
+    media,
+    username: str,
+    instagram_user_id: Optional[str],
+    follower_basis: int,
+    market: str = "unknown",
+    category: str = "beauty"
+) -> Dict:
+    """
+    Normalize a collected media item into an instagram_posts row
+
+    Args:
+        media: InstagramMedia or MediaRecord
+        username: Author's Instagram username
+        instagram_user_id: Author's Instagram user ID
+        follower_basis: Denominator for the engagement rate
+        market: Target market
+        category: Post category
+
+    Returns:
+        Column values for upsert_posts
+    """
+    like_count = media.like_count or 0
+    comment_count = media.comments_count or 0
+    caption = media.caption or ""
+    return {
+        "external_id": media.id,
+        "username": username,
+        "user_id": instagram_user_id,
+        "caption": caption,
+        "media_type": media.media_type,
+        "media_url": media.media_url,
+        "permalink": media.permalink,
+        "like_count": like_count,
+        "comment_count": comment_count,
+        "timestamp": naive_utc(media.timestamp),
+        "hashtags": extract_hashtags(caption),
+        "market": market,
+        "category": category,
+        "engagement_rate": calculate_engagement_rate(like_count, comment_count, follower_basis or 1),
+        "metrics_refreshed_at": datetime.utcnow(),
+    }
+
+
+def _column_default(column):
+    """Python-side default for a column missing from some rows"""
+    default = column.default
+    if default is None:
+        return None
+    if default.is_callable:
+        return default.arg({})
+    return default.arg
+
+
+def _normalize_rows(rows: Iterable[Dict]) -> List[Dict]:
+    """
+    Deduplicate by external_id (last wins) and give every row the same keys
+
+    A multi-row VALUES clause needs identical keys, and PostgreSQL rejects
+    an upsert that touches the same row twice.
+    """
+    by_external_id: Dict[str, Dict] = {}
+    for row in rows:
+        by_external_id[row["external_id"]] = row
+
+    keys = set()
+    for row in by_external_id.values():
+        keys.update(row)
+
+    columns = InstagramPost.__table__.columns
+    defaults = {key: _column_default(columns[key]) for key in keys if key in columns}
+    normalized = []
+    for row in by_external_id.values():
+        normalized.append({key: row[key] if key in row else defaults[key] for key in defaults})
+    return normalized
+
+
+def upsert_posts(
+    db: Session,
+    rows: Iterable[Dict],
+    update_columns: Optional[Sequence[str]] = None,
+    chunk_size: int = UPSERT_CHUNK_SIZE
+) -> Dict[str, int]:
+    """
+    Insert or update posts by external_id in bulk
+
+    Args:
+        db: Database session (committed on success)
+        rows: instagram_posts column values, each with external_id
+        update_columns: Columns overwritten for existing posts
+            (default: every provided column except id/external_id/created_at)
+        chunk_size: Rows per INSERT statement
+
+    Returns:
+        Dictionary with inserted and updated counts
+    """
+    normalized = _normalize_rows(rows)
+    if not normalized:
+        return {"inserted": 0, "updated": 0}
+
+    if update_columns is None:
+        update_columns = [key for key in normalized[0] if key not in _IMMUTABLE_COLUMNS]
+    is_postgres = db.get_bind().dialect.name == "postgresql"
+
+    inserted = 0
+    for start in range(0, len(normalized), chunk_size):
+        chunk = normalized[start:start + chunk_size]
+        statement = dialect_insert(db, InstagramPost).values(chunk)
+        set_ = {column: statement.excluded[column] for column in update_columns}
+        set_["updated_at"] = datetime.utcnow()
+        statement = statement.on_conflict_do_update(index_elements=["external_id"], set_=set_)
+
+        if is_postgres:
+            # xmax is 0 for freshly inserted tuples and non-zero for updated ones
+            flags = db.execute(statement.returning(literal_column("(xmax = 0)"))).scalars().all()
+            inserted += sum(1 for flag in flags if flag)
+        else:
+            existing = db.query(InstagramPost.external_id).filter(
+                InstagramPost.external_id.in_([row["external_id"] for row in chunk])
+            ).count()
+            db.execute(statement)
+            inserted += len(chunk) - existing
+
+    if "hashtags" in normalized[0]:
+        index_post_hashtags(
+            db,
+            {row["external_id"]: row["hashtags"] for row in normalized},
+            replace="hashtags" in update_columns
+        )
+    db.commit()
+    return {"inserted": inserted, "updated": len(normalized) - inserted}
+
+
+def refresh_post_metrics(
+    db: Session,
+    metrics: Dict[str, Dict],
+    follower_basis: int,
+    refreshed_at: Optional[datetime] = None
+) -> int:
+    """
+    Update like/comment counts of existing posts in one executemany UPDATE
+    
+    Args:
+        db: Database session (committed on success)
+        metrics: Mapping of external_id to {"like_count", "comments_count"}
+        follower_basis: Denominator for the engagement rate
+        refreshed_at: Refresh time recorded on each post (default: now)
+        
+    Returns:
+        Number of posts sent for update
+    """
+    if not metrics:
+        return 0
+    
+    refreshed_at = refreshed_at or datetime.utcnow()
+    params = []
+    for external_id, values in metrics.items():
+        like_count = values.get("like_count") or 0
+        comment_count = values.get("comments_count") or 0
+        params.append({
+            "b_external_id": external_id,
+            "b_like_count": like_count,
+            "b_comment_count": comment_count,
+            "b_engagement_rate": calculate_engagement_rate(like_count, comment_count, follower_basis or 1),
+        })
+    
+    table = InstagramPost.__table__
+    statement = (
+        update(table)
+        .where(table.c.external_id == bindparam("b_external_id"))
+        .values(
+            like_count=bindparam("b_like_count"),
+            comment_count=bindparam("b_comment_count"),
+            engagement_rate=bindparam("b_engagement_rate"),
+            metrics_refreshed_at=refreshed_at,
+            updated_at=refreshed_at,
+        )
+    )
+    db.execute(statement, params)
+    db.commit()
+    return len(params)
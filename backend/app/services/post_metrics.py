@@ -0,0 +1,217 @@
+"""
+Post Metric Time Series
+
+Append-only like/comment snapshots in instagram_post_metrics, so a post's
+engagement trajectory survives the in-place updates of instagram_posts.
+
+- record_metric_snapshots: bulk append, once per collection pass
+- get_post_metric_series / get_engagement_velocity: engagement, velocity
+  (engagement per hour) and acceleration (velocity change per hour)
+- rollup_post_metrics: downsample raw snapshots older than the raw
+  retention to one "daily" row per post per day
+"""
+
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.models.instagram_post import InstagramPost
+from app.models.instagram_post_metric import InstagramPostMetric
+
+
+RESOLUTION_RAW = "raw"
+RESOLUTION_DAILY = "daily"
+
+SNAPSHOT_CHUNK_SIZE = 500
+
+
+def record_metric_snapshots(
+    db: Session,
+    counts: Dict[str, Dict],
+    captured_at: Optional[datetime] = None,
+    chunk_size: int = SNAPSHOT_CHUNK_SIZE
+) -> int:
+    """
+    Append one snapshot per post in bulk
+
+    Args:
+        db: Database session (committed on success)
+        counts: Mapping of external_id to {"like_count", "comment_count"}
+        captured_at: Snapshot time (default: utcnow)
+        chunk_size: External IDs resolved per query
+
+    Returns:
+        Number of snapshots written (posts not in instagram_posts are skipped)
+    """
+    if not counts:
+        return 0
+
+    captured_at = captured_at or datetime.utcnow()
+    external_ids = list(counts)
+    rows = []
+    for start in range(0, len(external_ids), chunk_size):
+        chunk = external_ids[start:start + chunk_size]
+        ids = db.query(InstagramPost.id, InstagramPost.external_id).filter(
+            InstagramPost.external_id.in_(chunk)
+        ).all()
+        for post_id, external_id in ids:
+            values = counts[external_id]
+            rows.append({
+                "post_id": post_id,
+                "captured_at": captured_at,
+                "like_count": values.get("like_count") or 0,
+                "comment_count": values.get("comment_count") or 0,
+                "resolution": RESOLUTION_RAW,
+            })
+
+    if rows:
+        db.execute(insert(InstagramPostMetric.__table__), rows)
+    db.commit()
+    return len(rows)
+
+
+def engagement_trajectory(snapshots: Iterable[Tuple[datetime, int, int]]) -> List[Dict]:
+    """
+    Engagement, velocity and acceleration for time-ordered snapshots
+
+    Args:
+        snapshots: (captured_at, like_count, comment_count) in ascending time
+
+    Returns:
+        One point per snapshot; velocity is engagement gained per hour since
+        the previous snapshot, acceleration the velocity change per hour
+        (None where there is not enough history)
+    """
+    points: List[Dict] = []
+    for captured_at, like_count, comment_count in snapshots:
+        engagement = (like_count or 0) + (comment_count or 0)
+        velocity = acceleration = None
+        if points:
+            previous = points[-1]
+            hours = (captured_at - previous["captured_at"]).total_seconds() / 3600
+            if hours > 0:
+                velocity = round((engagement - previous["engagement"]) / hours, 3)
+                if previous["velocity"] is not None:
+                    acceleration = round((velocity - previous["velocity"]) / hours, 3)
+        points.append({
+            "captured_at": captured_at,
+            "like_count": like_count or 0,
+            "comment_count": comment_count or 0,
+            "engagement": engagement,
+            "velocity": velocity,
+            "acceleration": acceleration,
+        })
+    return points
+
+
+def _snapshot_query(db: Session, post_ids: Sequence[int], since: Optional[datetime]):
+    metric = InstagramPostMetric
+    query = db.query(
+        metric.post_id, metric.captured_at, metric.like_count, metric.comment_count
+    ).filter(metric.post_id.in_(post_ids))
+    if since is not None:
+        query = query.filter(metric.captured_at >= since)
+    return query.order_by(metric.post_id, metric.captured_at)
+
+
+def get_post_metric_series(db: Session, post_id: int, since: Optional[datetime] = None) -> List[Dict]:
+    """
+    A post's snapshot series with velocity and acceleration
+
+    Args:
+        db: Database session
+        post_id: instagram_posts.id
+        since: Only snapshots captured at or after this time
+
+    Returns:
+        Points from engagement_trajectory, oldest first
+    """
+    rows = _snapshot_query(db, [post_id], since).all()
+    return engagement_trajectory((row[1], row[2], row[3]) for row in rows)
+
+
+def get_engagement_velocity(
+    db: Session,
+    post_ids: Sequence[int],
+    since: Optional[datetime] = None
+) -> Dict[int, Dict]:
+    """
+    Latest engagement velocity and acceleration for many posts in one query
+
+    Args:
+        db: Database session
+        post_ids: instagram_posts.id values
+        since: Only consider snapshots captured at or after this time
+
+    Returns:
+        Mapping of post ID to its latest point plus the snapshot count;
+        posts without snapshots are left out
+    """
+    if not post_ids:
+        return {}
+
+    result = {}
+    rows = _snapshot_query(db, post_ids, since).all()
+    for post_id, group in groupby(rows, key=lambda row: row[0]):
+        points = engagement_trajectory((row[1], row[2], row[3]) for row in group)
+        result[post_id] = {"post_id": post_id, "snapshots": len(points), **points[-1]}
+    return result
+
+
+def rollup_post_metrics(db: Session, before: datetime) -> Dict[str, int]:
+    """
+    Downsample raw snapshots captured before a cutoff to one row per post per day
+
+    Each daily row keeps the day's last capture time and highest counts.
+    Days are processed oldest first, one transaction each, so a backlog is
+    worked off in bounded steps.
+
+    Args:
+        db: Database session (committed per day)
+        before: Cutoff, rounded down to midnight so only whole days roll up
+
+    Returns:
+        Dictionary with days, daily rows written and raw rows deleted
+    """
+    metric = InstagramPostMetric
+    cutoff = before.replace(hour=0, minute=0, second=0, microsecond=0)
+    summary = {"days": 0, "rolled_up": 0, "deleted": 0}
+
+    while True:
+        first = db.query(func.min(metric.captured_at)).filter(
+            metric.resolution == RESOLUTION_RAW,
+            metric.captured_at < cutoff
+        ).scalar()
+        if first is None:
+            break
+
+        day_start = first.replace(hour=0, minute=0, second=0, microsecond=0)
+        day_end = min(day_start + timedelta(days=1), cutoff)
+        in_day = (
+            metric.resolution == RESOLUTION_RAW,
+            metric.captured_at >= day_start,
+            metric.captured_at < day_end,
+        )
+
+        daily = select(
+            metric.post_id,
+            func.max(metric.captured_at),
+            func.max(metric.like_count),
+            func.max(metric.comment_count),
+            literal(RESOLUTION_DAILY),
+        ).where(*in_day).group_by(metric.post_id)
+        written = db.execute(
+            insert(metric.__table__).from_select(
+                ["post_id", "captured_at", "like_count", "comment_count", "resolution"], daily
+            )
+        ).rowcount
+        deleted = db.query(metric).filter(*in_day).delete(synchronize_session=False)
+        db.commit()
+
+        summary["days"] += 1
+        summary["rolled_up"] += written
+        summary["deleted"] += deleted
+    return summary
@@ -0,0 +1,544 @@
+"""
+Post Spool (spool-and-load ingestion)
+
+Decouples API fetching from database writes. Collectors append normalized
+records to an append-only JSONL segment spool on local disk; a separate
+loader drains sealed segments in large batches. Either side scales on its
+own: more collection shards append to more segments, and loaders can run
+side by side because segments are claimed by atomic rename.
+
+Segment lifecycle (file suffix):
+- .open: being appended to by one writer process
+- .jsonl: sealed (fsynced, complete) and ready to load
+- .loading: claimed by a loader; deleted once its batch is committed
+
+Delivery is at least once: a loader that dies leaves .loading segments,
+and a writer that dies leaves .open segments; both are put back into the
+queue after INGEST_SPOOL_CLAIM_TIMEOUT (keep it well above
+INGEST_SPOOL_SEGMENT_SECONDS) and loaded again. A writer holds an
+exclusive lock on its .open segment until it seals it, so a slow writer
+that is still alive never has its segment taken away. Replays are harmless because
+- posts are upserted on external_id (COPY into a staging table, then one
+  INSERT ... SELECT ... ON CONFLICT on PostgreSQL)
+- post rows and metric refreshes only overwrite counts captured earlier
+- metric snapshots replace those with the same post and capture time
+- post_hashtags rows are only written for posts not indexed yet
+- high-water marks only move forward
+
+An account's high-water mark travels in the segment with its posts and
+is committed with them, so posts in a lost or unloadable segment are
+fetched again by the account's next incremental run.
+
+Record kinds (one JSON object per line):
+- post: {"kind": "post", "captured_at", "row": instagram_posts values}
+- metrics: {"kind": "metrics", "captured_at", "external_id", "like_count",
+  "comment_count", "engagement_rate"}
+- mark: {"kind": "mark", "captured_at", "user_id", "last_media_id",
+  "last_media_timestamp"}
+"""
+
+import csv
+import fcntl
+import io
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import bindparam, insert, or_, text, tuple_, update
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.database import dialect_insert
+from app.models.instagram_post import InstagramPost
+from app.models.instagram_post_metric import InstagramPostMetric
+from app.services.collection_state import advance_collection_mark
+from app.services.post_hashtags import index_post_hashtags
+from app.services.post_ingest import POST_METRIC_COLUMNS, _normalize_rows
+from app.services.post_metrics import RESOLUTION_RAW, SNAPSHOT_CHUNK_SIZE
+
+
+OPEN_SUFFIX = ".open"
+SEALED_SUFFIX = ".jsonl"
+LOADING_SUFFIX = ".loading"
+
+_DATETIME_FIELDS = ("timestamp", "metrics_refreshed_at", "created_at", "updated_at")
+
+_COPY_NULL = r"\N"
+_STAGE_TABLE = "instagram_posts_spool_stage"
+
+
+# ========== Records ==========
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot spool {type(value).__name__}")
+
+
+def post_record(row: Dict, captured_at: datetime) -> Dict:
+    """Spool record for an instagram_posts row from media_to_post_row"""
+    return {"kind": "post", "captured_at": captured_at, "row": row}
+
+
+def metrics_record(
+    external_id: str,
+    like_count: int,
+    comment_count: int,
+    engagement_rate: float,
+    captured_at: datetime
+) -> Dict:
+    """Spool record for refreshed counts of an existing post"""
+    return {
+        "kind": "metrics",
+        "captured_at": captured_at,
+        "external_id": external_id,
+        "like_count": like_count,
+        "comment_count": comment_count,
+        "engagement_rate": engagement_rate,
+    }
+
+
+def mark_record(user_id: int, media_id: str, media_at: datetime, captured_at: datetime) -> Dict:
+    """Spool record for an account's high-water mark after the posts before it"""
+    return {
+        "kind": "mark",
+        "captured_at": captured_at,
+        "user_id": user_id,
+        "last_media_id": media_id,
+        "last_media_timestamp": media_at,
+    }
+
+
+def decode_record(line: str) -> Dict:
+    """Parse one spool line back into a record with datetimes restored"""
+    record = json.loads(line)
+    record["captured_at"] = datetime.fromisoformat(record["captured_at"])
+    if record["kind"] == "mark":
+        record["last_media_timestamp"] = datetime.fromisoformat(record["last_media_timestamp"])
+    row = record.get("row")
+    if row:
+        for field in _DATETIME_FIELDS:
+            if row.get(field):
+                row[field] = datetime.fromisoformat(row[field])
+    return record
+
+
+# ========== Writer ==========
+
+class SpoolWriter:
+    """
+    Append-only segment writer, one open segment per process
+
+    Thread-safe: collection runs save from worker threads. Each append is
+    flushed; a segment is fsynced and sealed once it reaches the size or age
+    limit, or when seal() is called (end of a shard, worker shutdown).
+    """
+
+    def __init__(self, directory: str, segment_bytes: Optional[int] = None, segment_seconds: Optional[float] = None):
+        """
+        Args:
+            directory: Spool directory (created if missing)
+            segment_bytes: Seal a segment at this size (default: INGEST_SPOOL_SEGMENT_BYTES)
+            segment_seconds: Seal a segment at this age (default: INGEST_SPOOL_SEGMENT_SECONDS)
+        """
+        settings = get_settings()
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes or settings.INGEST_SPOOL_SEGMENT_BYTES
+        self.segment_seconds = segment_seconds or settings.INGEST_SPOOL_SEGMENT_SECONDS
+        self._lock = threading.Lock()
+        self._file = None
+        self._path: Optional[Path] = None
+        self._opened_at = 0.0
+        self.records_written = 0
+        self.segments_sealed = 0
+
+    def append(self, records: Iterable[Dict]) -> int:
+        """
+        Append records to the open segment
+
+        Returns:
+            Number of records appended
+        """
+        lines = [json.dumps(record, default=_encode, separators=(",", ":")) + "\n" for record in records]
+        if not lines:
+            return 0
+        with self._lock:
+            if self._file is None:
+                self._open()
+            self._file.write("".join(lines))
+            self._file.flush()
+            self.records_written += len(lines)
+            if self._file.tell() >= self.segment_bytes or time.monotonic() - self._opened_at >= self.segment_seconds:
+                self._seal()
+        return len(lines)
+
+    def seal(self) -> Optional[Path]:
+        """Seal the open segment so loaders can pick it up"""
+        with self._lock:
+            return self._seal()
+
+    def _open(self):
+        name = f"{time.time_ns():020d}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._path = self.directory / f"{name}{OPEN_SUFFIX}"
+        self._file = open(self._path, "a", encoding="utf-8")
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)  # Released when the file is closed or the process dies
+        self._opened_at = time.monotonic()
+
+    def _seal(self) -> Optional[Path]:
+        if self._file is None:
+            return None
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        sealed = self._path.with_suffix(SEALED_SUFFIX)
+        try:
+            os.rename(self._path, sealed)
+        except FileNotFoundError:
+            pass  # Already requeued by recover_segments; its content is loaded from there
+        self._file = self._path = None
+        self.segments_sealed += 1
+        return sealed
+
+
+_writer: Optional[SpoolWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_spool_writer(directory: Optional[str]) -> Optional[SpoolWriter]:
+    """This process's spool writer for a directory, or None when spooling is off (no directory)"""
+    global _writer
+    if not directory:
+        return None
+    with _writer_lock:
+        if _writer is None or _writer.directory != Path(directory):
+            _writer = SpoolWriter(directory)
+        return _writer
+
+
+def seal_spool():
+    """Seal this process's open segment, if any"""
+    if _writer is not None:
+        _writer.seal()
+
+
+# ========== Segments ==========
+
+def _writer_alive(path: Path) -> bool:
+    """Check whether the writer of an .open segment still holds its lock"""
+    with open(path, "rb") as segment:
+        try:
+            fcntl.flock(segment.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+    return False
+
+
+def recover_segments(directory: str, older_than: float, now: Optional[float] = None) -> int:
+    """
+    Requeue segments abandoned by a dead loader (.loading) or writer (.open)
+
+    An .open segment is only requeued once its writer's lock is free, so
+    appends of a writer that is slow but alive are not lost.
+
+    Args:
+        directory: Spool directory
+        older_than: Seconds since last modification before a segment counts as abandoned
+        now: Current Unix time (default: time.time())
+
+    Returns:
+        Number of segments requeued
+    """
+    now = now or time.time()
+    requeued = 0
+    for path in Path(directory).glob("*"):
+        if path.suffix not in (OPEN_SUFFIX, LOADING_SUFFIX):
+            continue
+        try:
+            if now - path.stat().st_mtime < older_than:
+                continue
+            if path.suffix == OPEN_SUFFIX and _writer_alive(path):
+                continue
+            os.rename(path, path.with_suffix(SEALED_SUFFIX))
+            requeued += 1
+        except FileNotFoundError:
+            continue  # Sealed, loaded or requeued meanwhile
+    return requeued
+
+
+def claim_segment(directory: str) -> Optional[Path]:
+    """Claim the oldest sealed segment (None when the spool is drained)"""
+    for path in sorted(Path(directory).glob(f"*{SEALED_SUFFIX}")):
+        claimed = path.with_suffix(LOADING_SUFFIX)
+        try:
+            # Restart the abandonment clock, which rename would carry over
+            os.utime(path)
+            os.rename(path, claimed)
+        except FileNotFoundError:
+            continue  # Another loader claimed it first
+        return claimed
+    return None
+
+
+def read_segment(path: Path) -> List[Dict]:
+    """
+    Records of a segment
+
+    A torn last line (writer crashed mid-append) is skipped.
+    """
+    records = []
+    with open(path, encoding="utf-8") as segment:
+        for number, line in enumerate(segment, start=1):
+            try:
+                records.append(decode_record(line))
+            except (ValueError, KeyError):
+                print(f"⚠️  Skipping unreadable spool line {path.name}:{number}")
+    return records
+
+
+# ========== Loader ==========
+
+def _copy_value(value):
+    if value is None:
+        return _COPY_NULL
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+
+def _copy_posts(db: Session, rows: List[Dict]) -> int:
+    """Upsert rows via COPY into a staging table and one INSERT ... SELECT (PostgreSQL)"""
+    columns = list(rows[0])
+    column_list = ", ".join(columns)
+    db.execute(text(
+        f"CREATE TEMP TABLE {_STAGE_TABLE} ON COMMIT DROP AS "
+        f"SELECT {column_list} FROM instagram_posts WITH NO DATA"
+    ))
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(row[column]) for column in columns])
+    buffer.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {_STAGE_TABLE} ({column_list}) FROM STDIN WITH (FORMAT csv, NULL '{_COPY_NULL}')", buffer
+        )
+    finally:
+        cursor.close()
+
+    assignments = ", ".join(f"{column} = EXCLUDED.{column}" for column in POST_METRIC_COLUMNS)
+    return db.execute(text(
+        f"INSERT INTO instagram_posts ({column_list}) SELECT {column_list} FROM {_STAGE_TABLE} "
+        f"ON CONFLICT (external_id) DO UPDATE SET {assignments}, updated_at = now() "
+        f"WHERE instagram_posts.metrics_refreshed_at IS NULL "
+        f"OR instagram_posts.metrics_refreshed_at <= EXCLUDED.metrics_refreshed_at"
+    )).rowcount
+
+
+def _insert_posts(db: Session, rows: List[Dict]) -> int:
+    """Upsert rows with one executemany INSERT ... ON CONFLICT (other dialects)"""
+    table = InstagramPost.__table__
+    statement = dialect_insert(db, InstagramPost)
+    set_ = {column: statement.excluded[column] for column in POST_METRIC_COLUMNS}
+    set_["updated_at"] = datetime.utcnow()
+    statement = statement.on_conflict_do_update(
+        index_elements=["external_id"],
+        set_=set_,
+        where=or_(
+            table.c.metrics_refreshed_at.is_(None),
+            table.c.metrics_refreshed_at <= statement.excluded.metrics_refreshed_at
+        )
+    )
+    db.execute(statement, rows)
+    return len(rows)
+
+
+def _apply_metrics(db: Session, records: List[Dict]) -> int:
+    """Refresh counts of existing posts in one executemany UPDATE (newest capture wins)"""
+    latest: Dict[str, Dict] = {}
+    for record in records:
+        previous = latest.get(record["external_id"])
+        if previous is None or record["captured_at"] >= previous["captured_at"]:
+            latest[record["external_id"]] = record
+    if not latest:
+        return 0
+
+    table = InstagramPost.__table__
+    statement = (
+        update(table)
+        .where(
+            table.c.external_id == bindparam("b_external_id"),
+            or_(
+                table.c.metrics_refreshed_at.is_(None),
+                table.c.metrics_refreshed_at <= bindparam("b_captured_at")
+            )
+        )
+        .values(
+            like_count=bindparam("b_like_count"),
+            comment_count=bindparam("b_comment_count"),
+            engagement_rate=bindparam("b_engagement_rate"),
+            metrics_refreshed_at=bindparam("b_captured_at"),
+            updated_at=bindparam("b_captured_at"),
+        )
+    )
+    db.execute(statement, [
+        {
+            "b_external_id": record["external_id"],
+            "b_like_count": record["like_count"],
+            "b_comment_count": record["comment_count"],
+            "b_engagement_rate": record["engagement_rate"],
+            "b_captured_at": record["captured_at"],
+        }
+        for record in latest.values()
+    ])
+    return len(latest)
+
+
+def _advance_marks(db: Session, records: List[Dict]) -> int:
+    """Move each account's high-water mark to the newest one in the batch"""
+    newest: Dict[int, Dict] = {}
+    for record in records:
+        previous = newest.get(record["user_id"])
+        if previous is None or record["last_media_timestamp"] >= previous["last_media_timestamp"]:
+            newest[record["user_id"]] = record
+    for record in newest.values():
+        advance_collection_mark(db, record["user_id"], record["last_media_id"], record["last_media_timestamp"])
+    return len(newest)
+
+
+def _record_snapshots(db: Session, records: List[Dict], chunk_size: int = SNAPSHOT_CHUNK_SIZE) -> int:
+    """Snapshot every loaded count, replacing snapshots a replay already wrote"""
+    counts: Dict[tuple, Dict] = {}
+    for record in records:
+        values = record.get("row") or record
+        counts[(values["external_id"], record["captured_at"])] = values
+
+    external_ids = list({external_id for external_id, _ in counts})
+    post_ids: Dict[str, int] = {}
+    for start in range(0, len(external_ids), chunk_size):
+        post_ids.update((external_id, post_id) for post_id, external_id in db.query(
+            InstagramPost.id, InstagramPost.external_id
+        ).filter(InstagramPost.external_id.in_(external_ids[start:start + chunk_size])).all())
+
+    rows = [
+        {
+            "post_id": post_ids[external_id],
+            "captured_at": captured_at,
+            "like_count": values["like_count"] or 0,
+            "comment_count": values["comment_count"] or 0,
+            "resolution": RESOLUTION_RAW,
+        }
+        for (external_id, captured_at), values in counts.items()
+        if external_id in post_ids
+    ]
+    metric = InstagramPostMetric
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        db.query(metric).filter(
+            tuple_(metric.post_id, metric.captured_at).in_([(row["post_id"], row["captured_at"]) for row in chunk])
+        ).delete(synchronize_session=False)
+    if rows:
+        db.execute(insert(metric.__table__), rows)
+    db.commit()
+    return len(rows)
+
+
+def load_records(db: Session, records: List[Dict]) -> Dict[str, int]:
+    """
+    Load one batch of spool records
+
+    Posts, their hashtag index rows, metric refreshes and high-water marks
+    are committed together, then snapshots are written. Every step is idempotent, so a
+    batch may be loaded again.
+
+    Returns:
+        Dictionary with posts, hashtags, metrics, marks and snapshots written
+    """
+    posts = [record for record in records if record["kind"] == "post"]
+    metrics = [record for record in records if record["kind"] == "metrics"]
+    marks = [record for record in records if record["kind"] == "mark"]
+    summary = {"posts": 0, "hashtags": 0, "metrics": 0, "marks": 0, "snapshots": 0}
+
+    # _normalize_rows keeps the last row per external_id; order by capture time first
+    rows = _normalize_rows(record["row"] for record in sorted(posts, key=lambda record: record["captured_at"]))
+    if rows:
+        if db.get_bind().dialect.name == "postgresql":
+            summary["posts"] = _copy_posts(db, rows)
+        else:
+            summary["posts"] = _insert_posts(db, rows)
+        # Conflicts only refresh counts, so only new posts need indexing
+        summary["hashtags"] = index_post_hashtags(
+            db, {row["external_id"]: row.get("hashtags") for row in rows}
+        )
+    summary["metrics"] = _apply_metrics(db, metrics)
+    summary["marks"] = _advance_marks(db, marks)
+    db.commit()
+
+    summary["snapshots"] = _record_snapshots(db, posts + metrics)
+    return summary
+
+
+def drain_spool(
+    db: Session,
+    directory: str,
+    batch_size: Optional[int] = None,
+    max_seconds: Optional[float] = None
+) -> Dict:
+    """
+    Load sealed segments in batches until the spool is drained
+
+    Segments are claimed until a batch holds at least `batch_size` records,
+    loaded in one batch, then deleted.
+
+    Args:
+        db: Database session (committed per batch)
+        directory: Spool directory
+        batch_size: Records per batch (default: INGEST_LOAD_BATCH_SIZE)
+        max_seconds: Stop claiming new batches after this long
+
+    Returns:
+        Dictionary with batches, segments, records, posts, hashtags, metrics,
+        marks, snapshots, requeued and seconds
+    """
+    settings = get_settings()
+    batch_size = batch_size or settings.INGEST_LOAD_BATCH_SIZE
+    started = time.perf_counter()
+    summary = {
+        "batches": 0, "segments": 0, "records": 0, "posts": 0, "hashtags": 0, "metrics": 0, "marks": 0,
+        "snapshots": 0
+    }
+    summary["requeued"] = recover_segments(directory, settings.INGEST_SPOOL_CLAIM_TIMEOUT)
+
+    while max_seconds is None or time.perf_counter() - started < max_seconds:
+        claimed: List[Path] = []
+        records: List[Dict] = []
+        while len(records) < batch_size:
+            segment = claim_segment(directory)
+            if segment is None:
+                break
+            claimed.append(segment)
+            records.extend(read_segment(segment))
+        if not claimed:
+            break
+
+        loaded = load_records(db, records) if records else {}
+        for segment in claimed:
+            segment.unlink()
+
+        summary["batches"] += 1
+        summary["segments"] += len(claimed)
+        summary["records"] += len(records)
+        for key, value in loaded.items():
+            summary[key] += value
+
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+    return summary
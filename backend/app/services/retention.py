@@ -0,0 +1,264 @@
+"""
+Post Retention
+
+Deletes posts past their market's retention period without long-running
+statements:
+
+- Monthly partitions of instagram_posts (PostgreSQL declarative
+  partitioning, when set up) that are past every market's cutoff are
+  detached and dropped whole
+- The remaining expired posts are deleted in batches of
+  RETENTION_BATCH_SIZE, one short transaction each, with a pause between
+  batches so ingestion and autovacuum keep up
+
+Retention is POST_RETENTION_DAYS, overridden per market by
+POST_RETENTION_DAYS_BY_MARKET. Metric snapshots and post_hashtags rows
+of deleted posts are removed with them.
+"""
+
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models.instagram_post import InstagramPost
+from app.models.instagram_post_metric import InstagramPostMetric
+from app.models.post_hashtag import PostHashtag
+
+
+DEFAULT_MARKET = "*"  # Cutoff key for markets without an override
+
+_BOUND_PATTERN = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+def retention_cutoffs(
+    now: datetime,
+    default_days: int,
+    days_by_market: Optional[Dict[str, int]] = None
+) -> Dict[str, datetime]:
+    """
+    Cutoff per market (posts older than their cutoff expire)
+
+    Returns:
+        Mapping of market to cutoff, with DEFAULT_MARKET for every other market
+    """
+    cutoffs = {DEFAULT_MARKET: now - timedelta(days=default_days)}
+    for market, days in (days_by_market or {}).items():
+        cutoffs[market] = now - timedelta(days=days)
+    return cutoffs
+
+
+def parse_partition_bounds(expression: str) -> Optional[Tuple[datetime, datetime]]:
+    """
+    Range bounds of a partition from pg_get_expr(relpartbound)
+
+    e.g. "FOR VALUES FROM ('2024-01-01 00:00:00') TO ('2024-02-01 00:00:00')"
+
+    Returns:
+        (lower, upper) or None for default/non-range partitions
+    """
+    match = _BOUND_PATTERN.search(expression or "")
+    if not match:
+        return None
+    try:
+        return tuple(datetime.fromisoformat(value.split("+")[0]) for value in match.groups())
+    except ValueError:
+        return None
+
+
+def list_post_partitions(db: Session) -> List[Tuple[str, datetime, datetime]]:
+    """
+    Range partitions of instagram_posts, oldest first
+
+    Returns:
+        (partition name, lower bound, upper bound); empty unless the table
+        is partitioned on PostgreSQL
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return []
+
+    rows = db.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+        "FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table"
+    ), {"table": InstagramPost.__tablename__}).all()
+
+    partitions = []
+    for name, expression in rows:
+        bounds = parse_partition_bounds(expression)
+        if bounds:
+            partitions.append((name, *bounds))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def _pause(seconds: float):
+    if seconds > 0:
+        time.sleep(seconds)
+
+
+def _delete_partition_references(
+    db: Session,
+    table: str,
+    key: Tuple[str, ...],
+    partition: str,
+    batch_size: int,
+    pause: float
+) -> int:
+    """Delete rows of `table` referencing a partition's posts in batches, identified by their `key` columns"""
+    deleted_total = 0
+    while True:
+        deleted = db.execute(text(
+            f"DELETE FROM {table} WHERE ({', '.join(key)}) IN ("
+            f"SELECT {', '.join('r.' + column for column in key)} "
+            f"FROM {table} r JOIN {partition} p ON r.post_id = p.id LIMIT :limit)"
+        ), {"limit": batch_size}).rowcount
+        db.commit()
+        deleted_total += deleted
+        if deleted < batch_size:
+            return deleted_total
+        _pause(pause)
+
+
+def drop_expired_partitions(
+    db: Session,
+    cutoff: datetime,
+    batch_size: int,
+    pause: float = 0.0
+) -> Tuple[List[str], int, int]:
+    """
+    Detach and drop partitions whose upper bound is at or before the cutoff
+
+    Snapshots and post_hashtags rows referencing the partition's posts are
+    deleted in batches first, since dropping a partition does not fire
+    ON DELETE CASCADE.
+
+    Returns:
+        Tuple of (dropped partition names, snapshots deleted, post_hashtags rows deleted)
+    """
+    dropped = []
+    snapshots = 0
+    hashtag_rows = 0
+    for name, _, upper in list_post_partitions(db):
+        if upper > cutoff:
+            break
+
+        quoted = db.get_bind().dialect.identifier_preparer.quote(name)
+        snapshots += _delete_partition_references(
+            db, "instagram_post_metrics", ("id",), quoted, batch_size, pause
+        )
+        hashtag_rows += _delete_partition_references(
+            db, "post_hashtags", ("post_id", "hashtag_id"), quoted, batch_size, pause
+        )
+
+        db.execute(text(f"ALTER TABLE instagram_posts DETACH PARTITION {quoted}"))
+        db.execute(text(f"DROP TABLE {quoted}"))
+        db.commit()
+        dropped.append(name)
+        print(f"🗑️  Dropped partition {name} (posts before {upper.date()})")
+    return dropped, snapshots, hashtag_rows
+
+
+def delete_expired_posts(
+    db: Session,
+    cutoffs: Dict[str, datetime],
+    batch_size: int,
+    pause: float = 0.0,
+    progress: Optional[Callable[[Dict], None]] = None
+) -> Dict:
+    """
+    Delete expired posts in bounded batches, market by market
+
+    Args:
+        db: Database session (committed per batch)
+        cutoffs: Result of retention_cutoffs
+        batch_size: Posts deleted per transaction
+        pause: Seconds to sleep between batches
+        progress: Called with the running totals after every batch
+
+    Returns:
+        Dictionary with deleted_posts, deleted_by_market, deleted_snapshots,
+        deleted_post_hashtags and batches
+    """
+    summary = {
+        "deleted_posts": 0, "deleted_by_market": {}, "deleted_snapshots": 0, "deleted_post_hashtags": 0, "batches": 0
+    }
+    overrides = [market for market in cutoffs if market != DEFAULT_MARKET]
+
+    for market, cutoff in cutoffs.items():
+        if market == DEFAULT_MARKET:
+            condition = [InstagramPost.timestamp < cutoff]
+            if overrides:
+                condition.append(InstagramPost.market.notin_(overrides))
+        else:
+            condition = [InstagramPost.market == market, InstagramPost.timestamp < cutoff]
+
+        deleted_for_market = 0
+        while True:
+            ids = db.execute(select(InstagramPost.id).where(*condition).limit(batch_size)).scalars().all()
+            if not ids:
+                break
+
+            summary["deleted_snapshots"] += db.query(InstagramPostMetric).filter(
+                InstagramPostMetric.post_id.in_(ids)
+            ).delete(synchronize_session=False)
+            summary["deleted_post_hashtags"] += db.query(PostHashtag).filter(
+                PostHashtag.post_id.in_(ids)
+            ).delete(synchronize_session=False)
+            deleted = db.query(InstagramPost).filter(
+                InstagramPost.id.in_(ids)
+            ).delete(synchronize_session=False)
+            db.commit()
+
+            deleted_for_market += deleted
+            summary["deleted_posts"] += deleted
+            summary["batches"] += 1
+            summary["deleted_by_market"][market] = deleted_for_market
+            if progress:
+                progress({**summary, "market": market})
+            if len(ids) < batch_size:
+                break
+            _pause(pause)
+
+    return summary
+
+
+def apply_post_retention(
+    db: Session,
+    now: Optional[datetime] = None,
+    progress: Optional[Callable[[Dict], None]] = None
+) -> Dict:
+    """
+    Apply the configured retention: drop expired partitions, then batch-delete the rest
+
+    Args:
+        db: Database session
+        now: Current time (default: utcnow)
+        progress: Called with running totals after every delete batch
+
+    Returns:
+        Retention summary
+    """
+    settings = get_settings()
+    now = now or datetime.utcnow()
+    started = time.perf_counter()
+    cutoffs = retention_cutoffs(now, settings.POST_RETENTION_DAYS, settings.POST_RETENTION_DAYS_BY_MARKET)
+
+    # A partition holds every market, so only drop it past the longest retention
+    dropped, partition_snapshots, partition_hashtags = drop_expired_partitions(
+        db, min(cutoffs.values()), settings.RETENTION_BATCH_SIZE, settings.RETENTION_BATCH_PAUSE
+    )
+    summary = delete_expired_posts(
+        db, cutoffs, settings.RETENTION_BATCH_SIZE, settings.RETENTION_BATCH_PAUSE, progress
+    )
+    summary["deleted_snapshots"] += partition_snapshots
+    summary["deleted_post_hashtags"] += partition_hashtags
+    summary["partitions_dropped"] = dropped
+    summary["cutoffs"] = {market: cutoff.isoformat() for market, cutoff in cutoffs.items()}
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+    return summary
@@ -0,0 +1,294 @@
+"""
+Task Leases
+
+Expiring, heartbeat-renewed leases that keep periodic tasks from
+overlapping across workers:
+
+- A lease is acquired by name with a random token and a TTL; only the
+  token holder can renew or release it
+- While held, a heartbeat thread renews it every TTL / 3 and publishes
+  the holder's latest progress, so a crashed worker frees the lease
+  within one TTL and a live one never loses it mid-run
+- Holders and progress are readable by anyone (admin endpoint)
+
+Backends follow the rate limiter's layout:
+- Redis (token key + info key, compare-and-set in Lua), shared by every
+  worker and API process
+- In-memory, for a single process (development and tests)
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from app.core.config import get_settings
+
+
+# ========== Backends ==========
+
+class LeaseBackend(ABC):
+    """Storage backend for task leases"""
+
+    @abstractmethod
+    def acquire(self, name: str, token: str, info: Dict, ttl: float) -> bool:
+        """Take the lease if it is free, return whether it was taken"""
+
+    @abstractmethod
+    def renew(self, name: str, token: str, info: Dict, ttl: float) -> bool:
+        """Extend the lease and replace its info if `token` still holds it"""
+
+    @abstractmethod
+    def release(self, name: str, token: str) -> bool:
+        """Drop the lease if `token` still holds it"""
+
+    @abstractmethod
+    def get(self, name: str) -> Optional[Dict]:
+        """Info of the current holder (None when free)"""
+
+    @abstractmethod
+    def holders(self) -> List[Dict]:
+        """Info of every held lease"""
+
+
+class InMemoryLeaseBackend(LeaseBackend):
+    """Process-local backend"""
+
+    def __init__(self):
+        self._leases: Dict[str, tuple] = {}  # name → (token, info, expires at)
+        self._lock = threading.Lock()
+
+    def _current(self, name: str) -> Optional[tuple]:
+        lease = self._leases.get(name)
+        if lease is not None and lease[2] <= time.monotonic():
+            del self._leases[name]
+            return None
+        return lease
+
+    def acquire(self, name: str, token: str, info: Dict, ttl: float) -> bool:
+        with self._lock:
+            if self._current(name) is not None:
+                return False
+            self._leases[name] = (token, dict(info), time.monotonic() + ttl)
+            return True
+
+    def renew(self, name: str, token: str, info: Dict, ttl: float) -> bool:
+        with self._lock:
+            lease = self._current(name)
+            if lease is None or lease[0] != token:
+                return False
+            self._leases[name] = (token, dict(info), time.monotonic() + ttl)
+            return True
+
+    def release(self, name: str, token: str) -> bool:
+        with self._lock:
+            lease = self._current(name)
+            if lease is None or lease[0] != token:
+                return False
+            del self._leases[name]
+            return True
+
+    def get(self, name: str) -> Optional[Dict]:
+        with self._lock:
+            lease = self._current(name)
+            return dict(lease[1]) if lease else None
+
+    def holders(self) -> List[Dict]:
+        with self._lock:
+            names = list(self._leases)
+            return [dict(lease[1]) for lease in map(self._current, names) if lease]
+
+
+class RedisLeaseBackend(LeaseBackend):
+    """
+    Redis backend shared across processes
+
+    `<prefix><name>` holds the token and `<prefix><name>:info` the holder's
+    JSON info, both with the lease TTL. Renewal and release compare the
+    token inside a Lua script, so a worker whose lease already expired and
+    was taken over cannot extend or drop the new holder's lease.
+    """
+
+    RENEW_SCRIPT = """
+    if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+        return 0
+    end
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    redis.call('SET', KEYS[2], ARGV[3], 'PX', ARGV[2])
+    return 1
+    """
+
+    RELEASE_SCRIPT = """
+    if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+        return 0
+    end
+    redis.call('DEL', KEYS[1], KEYS[2])
+    return 1
+    """
+
+    def __init__(self, redis_url: str, prefix: str = "tasks:lease:"):
+        import redis
+
+        self.redis = redis.Redis.from_url(redis_url, decode_responses=True)
+        self.prefix = prefix
+        self._renew = self.redis.register_script(self.RENEW_SCRIPT)
+        self._release = self.redis.register_script(self.RELEASE_SCRIPT)
+
+    def _keys(self, name: str) -> List[str]:
+        return [self.prefix + name, f"{self.prefix}{name}:info"]
+
+    def acquire(self, name: str, token: str, info: Dict, ttl: float) -> bool:
+        key, info_key = self._keys(name)
+        milliseconds = int(ttl * 1000)
+        if not self.redis.set(key, token, nx=True, px=milliseconds):
+            return False
+        self.redis.set(info_key, json.dumps(info), px=milliseconds)
+        return True
+
+    def renew(self, name: str, token: str, info: Dict, ttl: float) -> bool:
+        return bool(int(self._renew(keys=self._keys(name), args=[token, int(ttl * 1000), json.dumps(info)])))
+
+    def release(self, name: str, token: str) -> bool:
+        return bool(int(self._release(keys=self._keys(name), args=[token])))
+
+    def get(self, name: str) -> Optional[Dict]:
+        value = self.redis.get(self._keys(name)[1])
+        return json.loads(value) if value else None
+
+    def holders(self) -> List[Dict]:
+        keys = list(self.redis.scan_iter(match=f"{self.prefix}*:info", count=100))
+        values = self.redis.mget(keys) if keys else []
+        return [json.loads(value) for value in values if value]
+
+
+_shared_backend: Optional[LeaseBackend] = None
+
+
+def get_lease_backend() -> LeaseBackend:
+    """
+    Get the process-wide lease backend configured by TASK_LEASE_BACKEND
+
+    Returns:
+        RedisLeaseBackend for "redis", InMemoryLeaseBackend otherwise
+    """
+    global _shared_backend
+    if _shared_backend is None:
+        settings = get_settings()
+        if settings.TASK_LEASE_BACKEND == "redis":
+            _shared_backend = RedisLeaseBackend(settings.REDIS_URL)
+        else:
+            _shared_backend = InMemoryLeaseBackend()
+    return _shared_backend
+
+
+def lease_holders() -> List[Dict]:
+    """Every held lease with its holder, heartbeat and progress, by name"""
+    return sorted(get_lease_backend().holders(), key=lambda info: info["name"])
+
+
+# ========== Lease ==========
+
+class TaskLease:
+    """
+    A named lease held for the duration of one task run
+
+    Usage:
+        lease = TaskLease("collect_instagram_posts")
+        if lease.acquire():
+            try:
+                ...
+                lease.progress(users=120)
+            finally:
+                lease.release()
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl: Optional[float] = None,
+        backend: Optional[LeaseBackend] = None,
+        task_id: Optional[str] = None
+    ):
+        """
+        Args:
+            name: Lease name (one holder per name)
+            ttl: Seconds the lease survives without a heartbeat (default: TASK_LEASE_TTL)
+            backend: Lease storage (default: get_lease_backend())
+            task_id: Celery task ID recorded with the holder
+        """
+        self.name = name
+        self.ttl = ttl or get_settings().TASK_LEASE_TTL
+        self.backend = backend or get_lease_backend()
+        self.token = uuid.uuid4().hex
+        self.info = {
+            "name": name,
+            "holder": f"{socket.gethostname()}:{os.getpid()}",
+            "task_id": task_id,
+            "acquired_at": None,
+            "heartbeat_at": None,
+            "expires_at": None,
+            "progress": {},
+        }
+        self.held = False
+        self.lost = False  # A heartbeat found the lease taken over
+        self._stop = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _stamp(self):
+        now = datetime.utcnow()
+        self.info["heartbeat_at"] = now.isoformat()
+        self.info["expires_at"] = (now + timedelta(seconds=self.ttl)).isoformat()
+
+    def acquire(self) -> bool:
+        """Take the lease and start the heartbeat; False if another run holds it"""
+        with self._lock:
+            self.info["acquired_at"] = datetime.utcnow().isoformat()
+            self._stamp()
+            self.held = self.backend.acquire(self.name, self.token, self.info, self.ttl)
+        if self.held:
+            self._heartbeat = threading.Thread(target=self._beat, name=f"lease:{self.name}", daemon=True)
+            self._heartbeat.start()
+        return self.held
+
+    def holder(self) -> Optional[Dict]:
+        """Info of whoever holds the lease now"""
+        return self.backend.get(self.name)
+
+    def renew(self) -> bool:
+        """Extend the lease and publish the latest progress"""
+        with self._lock:
+            if not self.held:
+                return False
+            self._stamp()
+            if not self.backend.renew(self.name, self.token, self.info, self.ttl):
+                self.held = False
+                self.lost = True
+                print(f"⚠️  Lease {self.name} was lost (expired and taken over)")
+            return self.held
+
+    def progress(self, **values) -> None:
+        """Merge values into the published progress"""
+        with self._lock:
+            self.info["progress"].update(values)
+        self.renew()
+
+    def release(self) -> None:
+        """Stop the heartbeat and drop the lease"""
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join()
+        with self._lock:
+            if self.held:
+                self.backend.release(self.name, self.token)
+                self.held = False
+
+    def _beat(self):
+        while not self._stop.wait(self.ttl / 3):
+            if not self.renew():
+                return
@@ -4,17 +4,62 @@ Instagram Data Collection Background Tasks
 Celery tasks for periodic Instagram data collection
 """
 
-from celery import Celery
+from celery import Celery, Task, chord
 from celery.schedules import crontab
+from celery.signals import worker_process_init, worker_process_shutdown
+from celery.utils import worker_direct
+from sqlalchemy import bindparam, update
 from sqlalchemy.orm import Session
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
 import asyncio
+import contextlib
+import hashlib
+import json
+import math
+import socket
+import threading
+import time
 
 from app.core.database import SessionLocal
 from app.core.config import get_settings
-from app.services.instagram_service import InstagramService
-from app.integrations.instagram_api import InstagramGraphAPI, InstagramAPIError
+from app.core.timeutils import naive_utc
+from app.integrations.instagram_api import InstagramGraphAPI, InstagramAPIError, InstagramUser
+from app.integrations.http_pool import get_http_client, close_http_client
+from app.services.post_ingest import (
+    POST_METRIC_COLUMNS,
+    calculate_engagement_rate,
+    extract_hashtags,
+    media_to_post_row,
+    refresh_post_metrics,
+    upsert_posts,
+)
+from app.services.collection_dead_letter import not_dead_lettered, record_collection_outcomes
+from app.services.collection_runs import (
+    RUN_KIND_DISPATCH,
+    checkpoint_accounts,
+    finish_run,
+    resume_stale_runs,
+    start_or_resume_run,
+    start_run,
+    touch_run,
+)
+from app.services.collection_state import plan_collection, save_collection_state
+from app.services.hashtag_harvester import HashtagHarvester
+from app.services.hashtag_trends import recompute_trend_scores
+from app.services.polling_scheduler import lease_accounts, pop_due_accounts
+from app.services.post_metrics import record_metric_snapshots, rollup_post_metrics
+from app.services.post_spool import (
+    SpoolWriter,
+    drain_spool,
+    get_spool_writer,
+    mark_record,
+    metrics_record,
+    post_record,
+    seal_spool,
+)
+from app.services.retention import apply_post_retention
+from app.services.task_leases import TaskLease
 from app.models.user import User
 from app.models.instagram_post import InstagramPost
 from app.models.instagram_hashtag import InstagramHashtag
@@ -38,185 +83,996 @@ celery_app.conf.update(
     enable_utc=True,
     task_track_started=True,
     task_time_limit=3600,  # 1 hour max per task
+    worker_direct=True,  # Per-worker queues, so the spool loader runs where the spool is
 )
 
 
-def get_active_instagram_users() -> List[User]:
-    """Get all users with active Instagram connections"""
+# ========== Worker Event Loop ==========
+
+# One event loop per worker process, so the shared HTTP connection pool
+# (which is bound to the loop that opened it) is reused across tasks
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def run_async(coro):
+    """Run a coroutine on the worker process event loop"""
+    global _worker_loop
+    if _worker_loop is None or _worker_loop.is_closed():
+        _worker_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_worker_loop)
+    return _worker_loop.run_until_complete(coro)
+
+
+async def _open_http_pool():
+    get_http_client()
+
+
+@worker_process_init.connect
+def init_worker_resources(**kwargs):
+    """Create the worker event loop and shared HTTP pool"""
+    run_async(_open_http_pool())
+
+
+@worker_process_shutdown.connect
+def shutdown_worker_resources(**kwargs):
+    """Seal the spool segment and close the shared HTTP pool and worker event loop"""
+    global _worker_loop
+    seal_spool()
+    if _worker_loop is not None and not _worker_loop.is_closed():
+        _worker_loop.run_until_complete(close_http_client())
+        _worker_loop.close()
+    _worker_loop = None
+
+
+# ========== Task Leases ==========
+
+# What a task does when another run still holds its lease
+SKIP_OVERLAP = "skip"  # Return without running (the next beat tick tries again)
+QUEUE_OVERLAP = "queue"  # Re-send the call after TASK_LEASE_QUEUE_DELAY
+
+_running = threading.local()
+
+
+class LeasedTask(Task):
+    """
+    Task base that holds a lease (app.services.task_leases) while it runs
+    
+    Task options:
+        lease_overlap: SKIP_OVERLAP or QUEUE_OVERLAP
+        lease_scope: "task" (one run cluster-wide), "args" (one run per
+            distinct arguments) or "host" (one run per worker host)
+    
+    The lease heartbeats while the task runs, so a run that outlives its
+    schedule still keeps the next one out, and a worker that dies frees it
+    within TASK_LEASE_TTL.
+    """
+    lease_overlap = SKIP_OVERLAP
+    lease_scope = "task"
+    
+    def lease_name(self, args: tuple, kwargs: Dict) -> str:
+        """Lease held by a call with these arguments"""
+        if self.lease_scope == "args":
+            digest = hashlib.sha1(json.dumps([args, kwargs], sort_keys=True, default=str).encode()).hexdigest()
+            return f"{self.name}:{digest[:12]}"
+        if self.lease_scope == "host":
+            return f"{self.name}@{socket.gethostname()}"
+        return self.name
+    
+    def __call__(self, *args, **kwargs):
+        lease = TaskLease(self.lease_name(args, kwargs), task_id=self.request.id)
+        if not lease.acquire():
+            return self.overlapped(lease, args, kwargs)
+        
+        _running.lease = lease
+        try:
+            return super().__call__(*args, **kwargs)
+        finally:
+            _running.lease = None
+            lease.release()
+    
+    def overlapped(self, lease: TaskLease, args: tuple, kwargs: Dict) -> Dict:
+        """Skip or re-queue a call whose lease is held by another run"""
+        holder = lease.holder() or {}
+        requeued = self.lease_overlap == QUEUE_OVERLAP
+        if requeued:
+            self.apply_async(args, kwargs, countdown=settings.TASK_LEASE_QUEUE_DELAY)
+        print(
+            f"⏳ {lease.name} is held by {holder.get('holder')} since {holder.get('acquired_at')}, "
+            f"{'re-queued' if requeued else 'skipped'}"
+        )
+        return {
+            "success": True,
+            "skipped": "previous run still in progress",
+            "requeued": requeued,
+            "lease": lease.name,
+            "lease_holder": holder,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+
+class CollectionShardTask(LeasedTask):
+    """
+    LeasedTask for collection chord members
+    
+    A shard skipped because the same shard is still running returns an
+    empty shard result, so the chord callback still gets one result per
+    shard and closes the run.
+    """
+    
+    def overlapped(self, lease: TaskLease, args: tuple, kwargs: Dict) -> Dict:
+        result = super().overlapped(lease, args, kwargs)
+        user_ids = args[0] if args else kwargs.get("user_ids", [])
+        return {
+            **result,
+            "skipped": True,
+            "user_ids": user_ids,
+            "users": [],
+            "dead_lettered": 0,
+            "duration_seconds": 0.0,
+        }
+
+
+def report_progress(**values):
+    """Publish progress on the running task's lease (no-op outside a leased task)"""
+    lease = getattr(_running, "lease", None)
+    if lease is not None:
+        lease.progress(**values)
+
+
+def _active_instagram_filter():
+    """Users with valid Instagram tokens"""
+    return (
+        User.instagram_access_token.isnot(None),
+        User.instagram_token_expires_at > datetime.utcnow(),
+        User.is_active == True
+    )
+
+
+def get_active_instagram_users(user_ids: Optional[List[int]] = None) -> List[User]:
+    """
+    Get users with active Instagram connections
+    
+    Args:
+        user_ids: Restrict to these users (default: all)
+    """
     db = SessionLocal()
     try:
-        # Get users with valid Instagram tokens
-        now = datetime.utcnow()
-        users = db.query(User).filter(
-            User.instagram_access_token.isnot(None),
-            User.instagram_token_expires_at > now,
-            User.is_active == True
-        ).all()
-        return users
+        query = db.query(User).filter(*_active_instagram_filter())
+        if user_ids is not None:
+            query = query.filter(User.id.in_(user_ids))
+        return query.order_by(User.id).all()
+    finally:
+        db.close()
+
+
+def get_active_instagram_user_ids() -> List[int]:
+    """IDs of users with active Instagram connections, leaving out dead-lettered accounts"""
+    db = SessionLocal()
+    try:
+        rows = db.query(User.id).filter(
+            *_active_instagram_filter(), not_dead_lettered(User.id)
+        ).order_by(User.id).all()
+        return [user_id for (user_id,) in rows]
     finally:
         db.close()
 
 
-async def collect_user_instagram_data(user: User, db: Session):
+async def fetch_user_instagram_data(user: User, plan: Optional[Dict] = None) -> Dict:
     """
-    Collect Instagram data for a specific user
+    Fetch what an account's collection plan asks for
+    
+    A full refresh reads the profile and the latest 50 media. An incremental
+    run revalidates the profile with the stored ETag, reads only media newer
+    than the high-water mark, and batches count lookups for posts whose
+    metric refresh is due.
     
     Args:
         user: User object with Instagram connection
-        db: Database session
+        plan: Plan from plan_collection (default: full refresh)
+        
+    Returns:
+        Dictionary with profile, profile_etag, media, metrics
+        (external_id → counts) and api_calls (rate limit quota charged)
     """
+    plan = plan or {"full_refresh": True, "profile_etag": None, "refresh_media_ids": []}
+    api_client = InstagramGraphAPI(user.instagram_access_token)
     try:
-        # Initialize Instagram service with user's token
-        service = InstagramService(db, access_token=user.instagram_access_token)
+        # Step 1: Get (or revalidate) user's Instagram profile
+        instagram_user, profile_etag = await api_client.get_user_profile_if_changed(
+            user.instagram_user_id, plan.get("profile_etag")
+        )
+        if instagram_user is None:
+            instagram_user = InstagramUser(**plan["profile"])
         
-        if not service.api_client:
-            print(f"⚠️  User {user.id} - No API client available")
-            return
+        # Step 2: Stream posts newer than the high-water mark
+        if plan["full_refresh"]:
+            media_iter = api_client.iter_user_media(user.instagram_user_id, max_items=50, fast_decode=True)
+        else:
+            media_iter = api_client.iter_user_media(
+                user.instagram_user_id, since=plan["since"], fast_decode=True
+            )
+        media_items = [
+            media async for media in media_iter
+            if media.id != plan.get("last_media_id")
+        ]
         
-        api_client = service.api_client
+        # Step 3: Refresh counts of older posts that are due
+        fetched_ids = {media.id for media in media_items}
+        refresh_ids = [media_id for media_id in plan["refresh_media_ids"] if media_id not in fetched_ids]
+        metrics = {}
+        if refresh_ids:
+            responses = await api_client.get_media_metrics_batch(refresh_ids)
+            metrics = {
+                media_id: response for media_id, response in responses.items()
+                if not isinstance(response, InstagramAPIError)
+            }
         
-        # Step 1: Get user's Instagram profile
-        instagram_user = await api_client.get_user_profile(user.instagram_user_id)
-        print(f"✅ User {user.id} - Profile: @{instagram_user.username}")
+        return {
+            "profile": instagram_user,
+            "profile_etag": profile_etag,
+            "media": media_items,
+            "metrics": metrics,
+            "api_calls": api_client.calls_charged,
+        }
+    finally:
+        await api_client.close()
+
+
+def save_user_instagram_data(
+    db: Session,
+    user: User,
+    instagram_user: InstagramUser,
+    media_items: List
+) -> Dict[str, int]:
+    """
+    Upsert a user's collected posts in one statement per chunk
+    
+    New posts are inserted; existing posts only get fresh metrics.
+    
+    Args:
+        db: Database session
+        user: User the media belongs to
+        instagram_user: User's Instagram profile
+        media_items: Media fetched for the user
         
-        # Step 2: Collect user's recent posts
-        media_list = await api_client.get_user_media(
-            user.instagram_user_id,
-            limit=50
+    Returns:
+        Dictionary with inserted and updated counts
+    """
+    rows = [
+        media_to_post_row(
+            media,
+            username=instagram_user.username,
+            instagram_user_id=user.instagram_user_id,
+            follower_basis=instagram_user.media_count or 1,
+            market="unknown",  # Would be determined by user's target market
+            category="beauty"  # Default category
         )
-        print(f"✅ User {user.id} - Collected {len(media_list)} posts")
+        for media in media_items
+    ]
+    return upsert_posts(db, rows, update_columns=POST_METRIC_COLUMNS)
+
+
+def spool_collection_run(
+    writer: SpoolWriter,
+    user: User,
+    fetched: Dict,
+    captured_at: Optional[datetime] = None
+) -> Dict[str, int]:
+    """
+    Append one account's posts and refreshed metrics to the ingestion spool
+    
+    The spool loader (load_post_spool) upserts them and records the metric
+    snapshots, so the collector never waits on post writes. The account's
+    new high-water mark is appended after its posts and advanced by the
+    loader when it commits them.
+    
+    Args:
+        writer: This process's spool writer
+        user: User the run belongs to
+        fetched: Result of fetch_user_instagram_data
+        captured_at: Capture time of the counts (default: utcnow)
         
-        # Step 3: Save posts to database
-        for media in media_list:
-            # Check if post already exists
-            existing_post = db.query(InstagramPost).filter(
-                InstagramPost.instagram_id == media.id
-            ).first()
-            
-            if not existing_post:
-                # Create new post
-                post = InstagramPost(
-                    instagram_id=media.id,
-                    username=instagram_user.username,
-                    caption=media.caption or "",
-                    like_count=media.like_count or 0,
-                    comment_count=media.comments_count or 0,
-                    media_url=media.media_url,
-                    timestamp=media.timestamp,
-                    hashtags=extract_hashtags(media.caption or ""),
-                    market="unknown",  # Would be determined by user's target market
-                    category="beauty",  # Default category
-                    engagement_rate=calculate_engagement_rate(
-                        media.like_count or 0,
-                        media.comments_count or 0,
-                        instagram_user.media_count or 1
-                    )
-                )
-                db.add(post)
-            else:
-                # Update existing post metrics
-                existing_post.like_count = media.like_count or 0
-                existing_post.comment_count = media.comments_count or 0
-                existing_post.engagement_rate = calculate_engagement_rate(
-                    media.like_count or 0,
-                    media.comments_count or 0,
-                    instagram_user.media_count or 1
-                )
+    Returns:
+        Dictionary with spooled and refreshed counts (inserted/updated are
+        only known to the loader)
+    """
+    captured_at = captured_at or datetime.utcnow()
+    instagram_user = fetched["profile"]
+    follower_basis = instagram_user.media_count or 1
+    records = []
+    for media in fetched["media"]:
+        row = media_to_post_row(
+            media,
+            username=instagram_user.username,
+            instagram_user_id=user.instagram_user_id,
+            follower_basis=follower_basis,
+            market="unknown",  # Would be determined by user's target market
+            category="beauty"  # Default category
+        )
+        row["metrics_refreshed_at"] = captured_at
+        records.append(post_record(row, captured_at))
+    if fetched["media"]:
+        newest = max(fetched["media"], key=lambda media: naive_utc(media.timestamp))
+        records.append(mark_record(user.id, newest.id, naive_utc(newest.timestamp), captured_at))
+    for media_id, values in fetched["metrics"].items():
+        like_count = values.get("like_count") or 0
+        comment_count = values.get("comments_count") or 0
+        records.append(metrics_record(
+            media_id, like_count, comment_count,
+            calculate_engagement_rate(like_count, comment_count, follower_basis), captured_at
+        ))
+    
+    spooled = writer.append(records)
+    return {"inserted": 0, "updated": 0, "refreshed": len(fetched["metrics"]), "spooled": spooled}
+
+
+def save_collection_run(db: Session, user: User, plan: Dict, fetched: Dict) -> Dict[str, int]:
+    """
+    Write one account's run: new posts, refreshed metrics, metric
+    snapshots and the new mark
+    
+    With INGEST_SPOOL_DIR set, posts, metrics and the mark go to the
+    ingestion spool instead (see spool_collection_run); only the profile
+    and poll schedule are written here.
+    
+    Args:
+        db: Database session
+        user: User the run belongs to
+        plan: Plan from plan_collection
+        fetched: Result of fetch_user_instagram_data
         
+    Returns:
+        Dictionary with inserted, updated and refreshed counts
+    """
+    instagram_user = fetched["profile"]
+    writer = get_spool_writer(settings.INGEST_SPOOL_DIR)
+    if writer is not None:
+        counts = spool_collection_run(writer, user, fetched)
+        save_collection_state(
+            db, user, plan, instagram_user, fetched["profile_etag"], [],
+            api_calls=fetched.get("api_calls")
+        )
+        return counts
+    
+    counts = {"inserted": 0, "updated": 0}
+    if fetched["media"]:
+        counts = save_user_instagram_data(db, user, instagram_user, fetched["media"])
+    refreshed = refresh_post_metrics(db, fetched["metrics"], instagram_user.media_count or 1)
+    
+    # Append a snapshot for every post whose counts were fetched in this pass
+    snapshots = {
+        media.id: {"like_count": media.like_count, "comment_count": media.comments_count}
+        for media in fetched["media"]
+    }
+    for media_id, values in fetched["metrics"].items():
+        snapshots[media_id] = {"like_count": values.get("like_count"), "comment_count": values.get("comments_count")}
+    record_metric_snapshots(db, snapshots)
+    
+    save_collection_state(
+        db, user, plan, instagram_user, fetched["profile_etag"], fetched["media"],
+        api_calls=fetched.get("api_calls")
+    )
+    return {**counts, "refreshed": refreshed}
+
+
+def _plan_in_new_session(user: User) -> Dict:
+    """Plan one user's run in its own session (runs in a worker thread)"""
+    db = SessionLocal()
+    try:
+        return plan_collection(db, user)
+    finally:
+        db.close()
+
+
+def _save_in_new_session(user: User, plan: Dict, fetched: Dict) -> Dict[str, int]:
+    """Save one user's run in its own session (runs in a worker thread)"""
+    db = SessionLocal()
+    try:
+        return save_collection_run(db, user, plan, fetched)
+    finally:
+        db.close()
+
+
+def _clear_expired_token(user_id: int):
+    """Remove a user's expired Instagram token"""
+    db = SessionLocal()
+    try:
+        db.query(User).filter(User.id == user_id).update({User.instagram_access_token: None})
         db.commit()
-        print(f"✅ User {user.id} - Data saved to database")
+    finally:
+        db.close()
+
+
+async def collect_user_instagram_data(user: User, semaphore: Optional[asyncio.Semaphore] = None) -> Dict:
+    """
+    Collect Instagram data for a specific user
+    
+    API calls run on the event loop; database writes run in a worker
+    thread with a session of their own, so other users' requests keep
+    flowing while one user's posts are written.
+    
+    Args:
+        user: User object with Instagram connection
+        semaphore: Limits how many users are collected at once
         
-        # Close API client
-        await api_client.close()
+    Returns:
+        Per-user result with status, posts collected and timings (seconds)
+    """
+    result = {"user_id": user.id, "status": "ok", "collected": 0, "seconds": 0.0}
+    if not settings.USE_REAL_INSTAGRAM_API or not user.instagram_access_token:
+        print(f"⚠️  User {user.id} - No API client available")
+        result["status"] = "skipped"
+        return result
+    
+    async with semaphore or contextlib.nullcontext():
+        started = time.perf_counter()
+        try:
+            plan = await asyncio.to_thread(_plan_in_new_session, user)
+            result["mode"] = "full" if plan["full_refresh"] else "incremental"
+            
+            fetch_started = time.perf_counter()
+            fetched = await fetch_user_instagram_data(user, plan)
+            result["fetch_seconds"] = round(time.perf_counter() - fetch_started, 3)
+            result["api_calls"] = fetched.get("api_calls", 0)
+            
+            write_started = time.perf_counter()
+            counts = await asyncio.to_thread(_save_in_new_session, user, plan, fetched)
+            result.update(collected=len(fetched["media"]), **counts)
+            result["write_seconds"] = round(time.perf_counter() - write_started, 3)
+            print(
+                f"✅ User {user.id} - @{fetched['profile'].username} ({result['mode']}): "
+                f"{result['collected']} new posts, {result['refreshed']} refreshed"
+            )
+        
+        except InstagramAPIError as e:
+            print(f"❌ User {user.id} - Instagram API Error: {e.message}")
+            result.update(status="api_error", error=e.message, error_code=e.code, transient=e.transient)
+            # Handle specific errors
+            if e.code == 190:  # Token expired
+                await asyncio.to_thread(_clear_expired_token, user.id)
+                result["status"] = "token_expired"
+                print(f"⚠️  User {user.id} - Token expired and removed")
+        
+        except Exception as e:
+            print(f"❌ User {user.id} - Unexpected error: {str(e)}")
+            result.update(status="error", error=str(e))
+        
+        result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+async def collect_all_users(
+    users: List[User],
+    concurrency: int,
+    timeout: Optional[float] = None
+) -> List[Dict]:
+    """
+    Collect every user's data on one event loop, at most `concurrency` at a time
+    
+    Args:
+        users: Users with Instagram connections
+        concurrency: Maximum users collected concurrently
+        timeout: Seconds to wait for all users; users still running are
+            cancelled and reported with status "timeout"
+        
+    Returns:
+        Per-user results in the same order as `users`
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    if timeout is None:
+        return await asyncio.gather(*[collect_user_instagram_data(user, semaphore) for user in users])
+    
+    tasks = [asyncio.ensure_future(collect_user_instagram_data(user, semaphore)) for user in users]
+    if not tasks:
+        return []
+    _, pending = await asyncio.wait(tasks, timeout=timeout)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+    
+    results = []
+    for user, task in zip(users, tasks):
+        if task in pending:
+            print(f"⚠️  User {user.id} - Collection timed out after {timeout:.0f}s")
+            results.append({
+                "user_id": user.id, "status": "timeout", "collected": 0,
+                "seconds": round(timeout, 3), "error": "Shard deadline exceeded"
+            })
+        else:
+            results.append(task.result())
+    return results
+
+
+# ========== Token Refresh ==========
+
+def get_expiring_token_users(expire_threshold: datetime) -> List:
+    """ID and token of users whose Instagram token expires before the threshold"""
+    db = SessionLocal()
+    try:
+        return db.query(User.id, User.instagram_access_token).filter(
+            User.instagram_access_token.isnot(None),
+            User.instagram_token_expires_at < expire_threshold,
+            User.instagram_token_expires_at > datetime.utcnow()
+        ).order_by(User.id).all()
+    finally:
+        db.close()
+
+
+async def refresh_user_token(user, semaphore: Optional[asyncio.Semaphore] = None) -> Dict:
+    """
+    Refresh one long-lived token through the shared HTTP pool
+    
+    Args:
+        user: Object with id and instagram_access_token
+        semaphore: Limits how many refreshes run at once
         
-    except InstagramAPIError as e:
-        print(f"❌ User {user.id} - Instagram API Error: {e.message}")
-        # Handle specific errors
-        if e.code == 190:  # Token expired
-            user.instagram_access_token = None
-            db.commit()
-            print(f"⚠️  User {user.id} - Token expired and removed")
+    Returns:
+        Per-user result with status, latency (seconds) and, on success,
+        the new token and its expiry
+    """
+    result = {"user_id": user.id, "status": "ok", "error": None, "seconds": 0.0,
+              "old_token": user.instagram_access_token}
+    async with semaphore or contextlib.nullcontext():
+        started = time.perf_counter()
+        client = InstagramGraphAPI(user.instagram_access_token)
+        try:
+            token_data = await client.refresh_long_lived_token(user.instagram_access_token)
+            expires_in = token_data.get("expires_in", 5184000)
+            result["access_token"] = token_data["access_token"]
+            result["expires_at"] = datetime.utcnow() + timedelta(seconds=expires_in)
+        except InstagramAPIError as e:
+            result.update(status="token_expired" if e.code == 190 else "api_error", error=e.message)
+        except Exception as e:
+            result.update(status="error", error=str(e))
+        finally:
+            await client.close()
+            result["seconds"] = round(time.perf_counter() - started, 3)
     
-    except Exception as e:
-        print(f"❌ User {user.id} - Unexpected error: {str(e)}")
+    if result["status"] != "ok":
+        print(f"❌ User {user.id} - Failed to refresh token: {result['error']}")
+    return result
+
+
+async def refresh_all_tokens(users: List, concurrency: int) -> List[Dict]:
+    """
+    Refresh every user's token on one event loop, at most `concurrency` at a time
+    
+    Returns:
+        Per-user results in the same order as `users`
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    return await asyncio.gather(*[refresh_user_token(user, semaphore) for user in users])
 
 
-def extract_hashtags(caption: str) -> List[str]:
-    """Extract hashtags from caption text"""
-    words = caption.split()
-    hashtags = [word[1:] for word in words if word.startswith('#')]
-    return hashtags[:10]  # Limit to 10 hashtags
+def save_refreshed_tokens(db: Session, results: List[Dict]) -> int:
+    """
+    Write refreshed tokens in one executemany UPDATE
+    
+    A row is only updated if it still holds the token that was refreshed,
+    so a reconnect during the run is not overwritten.
+    
+    Returns:
+        Number of refreshed tokens submitted
+    """
+    params = [
+        {
+            "b_id": result["user_id"],
+            "b_old_token": result["old_token"],
+            "b_token": result["access_token"],
+            "b_expires_at": result["expires_at"],
+        }
+        for result in results if result["status"] == "ok"
+    ]
+    if not params:
+        return 0
+    
+    table = User.__table__
+    statement = (
+        update(table)
+        .where(table.c.id == bindparam("b_id"), table.c.instagram_access_token == bindparam("b_old_token"))
+        .values(
+            instagram_access_token=bindparam("b_token"),
+            instagram_token_expires_at=bindparam("b_expires_at"),
+            updated_at=datetime.utcnow()
+        )
+    )
+    db.execute(statement, params)
+    db.commit()
+    return len(params)
 
 
-def calculate_engagement_rate(likes: int, comments: int, followers: int) -> float:
-    """Calculate engagement rate"""
-    if followers == 0:
-        return 0.0
-    engagement = ((likes + comments) / followers) * 100
-    return round(engagement, 2)
+def latency_summary(latencies: List[float]) -> Dict:
+    """Nearest-rank p50/p95 and max of latencies given in seconds, in milliseconds"""
+    if not latencies:
+        return {"p50": None, "p95": None, "max": None}
+    ordered = sorted(latencies)
+    
+    def rank(percent: float) -> float:
+        index = max(0, math.ceil(percent / 100 * len(ordered)) - 1)
+        return round(ordered[index] * 1000, 1)
+    
+    return {"p50": rank(50), "p95": rank(95), "max": round(ordered[-1] * 1000, 1)}
 
 
 # ========== Celery Tasks ==========
 
-@celery_app.task(name="collect_instagram_posts")
+# Hard kill margin after a shard's own deadline has cancelled slow users
+SHARD_TIME_LIMIT_GRACE = 120
+
+# A loader run stops claiming batches after this, so runs started every minute barely overlap
+LOADER_MAX_SECONDS = 50
+
+
+def shard_user_ids(user_ids: List[int], shard_size: int) -> List[List[int]]:
+    """Split user IDs into consecutive shards of at most shard_size"""
+    shard_size = max(1, shard_size)
+    return [user_ids[start:start + shard_size] for start in range(0, len(user_ids), shard_size)]
+
+
+def summarize_collection_run(shard_results: List[Dict], wall_seconds: float) -> Dict:
+    """
+    Aggregate shard results into one run summary
+    
+    Args:
+        shard_results: Results of collect_instagram_shard
+        wall_seconds: Time from dispatch to the last shard finishing
+        
+    Returns:
+        Run summary with shard, account, media, API call and failure totals
+        (skipped shards count as shards without accounts)
+    """
+    results = [result for shard in shard_results for result in shard["users"]]
+    failures = [
+        {"user_id": result["user_id"], "status": result["status"], "error": result.get("error")}
+        for result in results
+        if result["status"] not in ("ok", "skipped")
+    ]
+    slowest = sorted(results, key=lambda result: result["seconds"], reverse=True)[:5]
+    
+    return {
+        "success": True,
+        "shards": len(shard_results),
+        "shards_skipped": sum(1 for shard in shard_results if shard.get("skipped")),
+        "users_processed": len(results),
+        "users_succeeded": sum(1 for result in results if result["status"] == "ok"),
+        "users_failed": len(failures),
+        "posts_collected": sum(result["collected"] for result in results),
+        "posts_inserted": sum(result.get("inserted", 0) for result in results),
+        "posts_updated": sum(result.get("updated", 0) for result in results),
+        "posts_refreshed": sum(result.get("refreshed", 0) for result in results),
+        "full_refreshes": sum(1 for result in results if result.get("mode") == "full"),
+        "api_calls": sum(result.get("api_calls", 0) for result in results),
+        "wall_seconds": round(wall_seconds, 3),
+        "slowest_shard_seconds": max((shard["duration_seconds"] for shard in shard_results), default=0.0),
+        "slowest_users": [
+            {"user_id": result["user_id"], "seconds": result["seconds"]} for result in slowest
+        ],
+        "failures": failures,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
+@celery_app.task(
+    name="collect_instagram_shard",
+    base=CollectionShardTask,
+    lease_scope="args",
+    time_limit=settings.INSTAGRAM_COLLECT_SHARD_TIMEOUT + SHARD_TIME_LIMIT_GRACE
+)
+def collect_instagram_shard(user_ids: List[int], run_id: Optional[int] = None) -> Dict:
+    """
+    Collect Instagram posts for one shard of users
+    
+    Users are collected concurrently on the worker event loop, bounded by
+    INSTAGRAM_COLLECT_CONCURRENCY. Users still running after
+    INSTAGRAM_COLLECT_SHARD_TIMEOUT are cancelled and reported as timed out,
+    so a slow account only holds up its own shard and the shard still
+    returns a result for the chord callback.
+    
+    Failures are recorded in the dead-letter table (successes clear it),
+    and when the shard belongs to a checkpointed run its accounts are
+    marked done or failed there.
+    
+    Args:
+        user_ids: Users in this shard
+        run_id: Checkpointed run the shard belongs to (see send_run_shards)
+        
+    Returns:
+        Shard result with per-user results, dead-letter counts and duration
+    """
+    if run_id is not None:
+        db = SessionLocal()
+        try:
+            touch_run(db, run_id)
+        finally:
+            db.close()
+    
+    users = get_active_instagram_users(user_ids)
+    report_progress(phase="collecting", users=len(users))
+    started = time.perf_counter()
+    results = run_async(collect_all_users(
+        users, settings.INSTAGRAM_COLLECT_CONCURRENCY, timeout=settings.INSTAGRAM_COLLECT_SHARD_TIMEOUT
+    ))
+    duration = time.perf_counter() - started
+    hand_spool_to_loader()
+    report_progress(phase="checkpointing", collected=len(results))
+    
+    db = SessionLocal()
+    try:
+        outcomes = record_collection_outcomes(db, results)
+        if run_id is not None:
+            # Accounts that lost their connection since dispatch count as done
+            collected = {result["user_id"] for result in results}
+            skipped = [{"user_id": user_id, "status": "skipped"} for user_id in user_ids if user_id not in collected]
+            checkpoint_accounts(db, run_id, results + skipped)
+    finally:
+        db.close()
+    
+    succeeded = sum(1 for result in results if result["status"] == "ok")
+    print(f"✅ Shard of {len(user_ids)} users: {succeeded}/{len(users)} collected in {duration:.1f}s")
+    return {
+        "user_ids": user_ids,
+        "users": results,
+        "dead_lettered": outcomes["dead_lettered"],
+        "duration_seconds": round(duration, 3),
+    }
+
+
+@celery_app.task(name="finish_instagram_collection")
+def finish_instagram_collection(shard_results: List[Dict], dispatched_at: float, run_id: Optional[int] = None) -> Dict:
+    """
+    Chord callback: aggregate shard results into the run summary and close the run
+    
+    Not leased: a skipped callback would leave the run open.
+    
+    Args:
+        shard_results: Results of every collect_instagram_shard in the run
+        dispatched_at: Unix time the run was dispatched
+        run_id: Checkpointed run to close
+        
+    Returns:
+        Run summary
+    """
+    summary = summarize_collection_run(shard_results, time.time() - dispatched_at)
+    if run_id is not None:
+        db = SessionLocal()
+        try:
+            summary["run_id"] = run_id
+            summary["checkpoints"] = finish_run(db, run_id)
+        finally:
+            db.close()
+    print(
+        f"✅ Instagram post collection completed: {summary['users_succeeded']}/{summary['users_processed']} users, "
+        f"{summary['posts_collected']} posts, {summary['api_calls']} API calls, "
+        f"{summary['users_failed']} failures in {summary['wall_seconds']:.1f}s "
+        f"across {summary['shards']} shards"
+    )
+    return summary
+
+
+def send_run_shards(run_id: int, user_ids: List[int], dispatched_at: float) -> int:
+    """
+    Send a run's accounts as shard tasks joined by the run's chord callback
+    
+    Returns:
+        Number of shards sent
+    """
+    shards = shard_user_ids(user_ids, settings.INSTAGRAM_COLLECT_SHARD_SIZE)
+    if shards:
+        chord(collect_instagram_shard.s(shard, run_id) for shard in shards)(
+            finish_instagram_collection.s(dispatched_at, run_id)
+        )
+    return len(shards)
+
+
+@celery_app.task(name="collect_instagram_posts", base=LeasedTask)
 def collect_instagram_posts():
     """
-    Collect Instagram posts for all active users
+    Collect Instagram posts for all active users at once
     
-    Runs every 6 hours
+    Not on the beat schedule (dispatch_due_collections polls accounts as
+    they come due); kept for manual full sweeps. Active users are split into shards of
+    INSTAGRAM_COLLECT_SHARD_SIZE; each shard is its own task, so collection
+    spreads across worker nodes, and a chord callback
+    (finish_instagram_collection) emits the run summary once every shard
+    has finished. Each account is collected incrementally from its
+    high-water mark (see app.services.collection_state).
+    
+    Runs are checkpointed (see app.services.collection_runs): if the
+    previous run died before its callback, only its pending accounts are
+    dispatched; if it is still checking in, nothing is dispatched.
+    Dead-lettered accounts are left out until their retry is due. The
+    task lease keeps a second sweep from starting while this one dispatches.
     """
     print("🚀 Starting Instagram post collection...")
     
-    users = get_active_instagram_users()
-    print(f"📊 Found {len(users)} active Instagram users")
+    stale_after = timedelta(seconds=settings.INSTAGRAM_COLLECT_SHARD_TIMEOUT + SHARD_TIME_LIMIT_GRACE)
+    db = SessionLocal()
+    try:
+        run = start_or_resume_run(db, get_active_instagram_user_ids(), stale_after)
+        if run["in_progress"]:
+            print(f"⏳ Collection run {run['run_id']} is still in progress, not starting another")
+        elif not run["user_ids"]:
+            finish_run(db, run["run_id"])
+    finally:
+        db.close()
+    
+    user_ids = run["user_ids"]
+    shards = shard_user_ids(user_ids, settings.INSTAGRAM_COLLECT_SHARD_SIZE)
+    report_progress(run_id=run["run_id"], users=len(user_ids), shards=len(shards))
+    verb = "Resuming" if run["resumed"] else "Found"
+    print(f"📊 {verb} {len(user_ids)} active Instagram users in {len(shards)} shards (run {run['run_id']})")
+    
+    send_run_shards(run["run_id"], user_ids, time.time())
+    
+    return {
+        "success": True,
+        "run_id": run["run_id"],
+        "resumed": run["resumed"],
+        "in_progress": run["in_progress"],
+        "users_processed": len(user_ids),
+        "shards": len(shards),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
+@celery_app.task(name="dispatch_due_collections", base=LeasedTask)
+def dispatch_due_collections():
+    """
+    Dispatch collection for accounts that are due, within the global API budget
+    
+    Runs every minute. Accounts are popped from the polling queue (see
+    app.services.polling_scheduler) soonest-due first while their estimated
+    API cost fits SCHEDULER_API_CALLS_PER_TICK; the rest stay queued for the
+    next tick. Popped accounts are sent out as collect_instagram_shard
+    tasks, and each finished run schedules the account's next poll.
     
+    Each tick is a checkpointed run (see app.services.collection_runs)
+    closed by finish_instagram_collection. Earlier ticks' runs whose shards
+    stopped checking in are resumed first: their pending accounts are
+    leased again and re-sent under the same run. They were budgeted by the
+    tick that first popped them.
+    """
+    stale_after = timedelta(seconds=settings.INSTAGRAM_COLLECT_SHARD_TIMEOUT + SHARD_TIME_LIMIT_GRACE)
     db = SessionLocal()
     try:
-        for user in users:
-            try:
-                # Run async function in sync context
-                asyncio.run(collect_user_instagram_data(user, db))
-            except Exception as e:
-                print(f"❌ Failed to collect data for user {user.id}: {str(e)}")
-                continue
-        
-        print("✅ Instagram post collection completed")
-        
+        resumed = resume_stale_runs(db, RUN_KIND_DISPATCH, stale_after)
+        for run in resumed:
+            if run["user_ids"]:
+                lease_accounts(db, run["user_ids"])
+            else:
+                finish_run(db, run["run_id"])
+        tick = pop_due_accounts(db, settings.SCHEDULER_API_CALLS_PER_TICK)
+        runs = [run for run in resumed if run["user_ids"]]
+        if tick["user_ids"]:
+            runs.append({"run_id": start_run(db, tick["user_ids"], RUN_KIND_DISPATCH), "user_ids": tick["user_ids"]})
     finally:
         db.close()
     
+    dispatched_at = time.time()
+    shards = sum(send_run_shards(run["run_id"], run["user_ids"], dispatched_at) for run in runs)
+    resumed_accounts = sum(len(run["user_ids"]) for run in resumed)
+    
+    if tick["due"] or resumed_accounts:
+        print(
+            f"📬 Dispatched {len(tick['user_ids'])}/{tick['due']} due accounts "
+            f"(+{resumed_accounts} resumed) in {shards} shards "
+            f"({tick['budget_used']}/{settings.SCHEDULER_API_CALLS_PER_TICK} API calls budgeted)"
+        )
+    
     return {
         "success": True,
-        "users_processed": len(users),
+        "dispatched": len(tick["user_ids"]),
+        "resumed": resumed_accounts,
+        "deferred": tick["deferred"],
+        "shards": shards,
+        "budget_used": tick["budget_used"],
         "timestamp": datetime.utcnow().isoformat()
     }
 
 
-@celery_app.task(name="update_hashtag_trends")
+def hand_spool_to_loader():
+    """
+    Seal this process's spool segment and load it on this worker
+    
+    The spool is local disk, so the loader is sent to the worker's own
+    direct queue rather than to whichever worker takes it off the shared one.
+    """
+    seal_spool()
+    hostname = collect_instagram_shard.request.hostname
+    if settings.INGEST_SPOOL_DIR and hostname:
+        load_post_spool.apply_async(queue=worker_direct(hostname))
+
+
+@celery_app.task(name="load_post_spool", base=LeasedTask, lease_scope="host")
+def load_post_spool():
+    """
+    Load spooled posts and metrics into the database
+    
+    Sealed spool segments are claimed and loaded in batches of
+    INGEST_LOAD_BATCH_SIZE records (see app.services.post_spool). One loader
+    runs per host at a time; each segment is claimed by exactly one loader.
+    
+    The spool is local to the host that collected it: every collection
+    shard sends this task to its own worker once it seals its segment
+    (hand_spool_to_loader). The every-minute beat run lands on any one
+    worker and only catches up on that host; it drains every host only
+    when INGEST_SPOOL_DIR is a volume shared by all workers.
+    """
+    if not settings.INGEST_SPOOL_DIR:
+        return {"success": True, "skipped": "INGEST_SPOOL_DIR not set", "timestamp": datetime.utcnow().isoformat()}
+    
+    db = SessionLocal()
+    try:
+        summary = drain_spool(db, settings.INGEST_SPOOL_DIR, max_seconds=LOADER_MAX_SECONDS)
+        if summary["segments"]:
+            print(
+                f"📥 Loaded {summary['records']} spooled records from {summary['segments']} segments "
+                f"in {summary['batches']} batches ({summary['posts']} posts, {summary['metrics']} metric refreshes) "
+                f"in {summary['seconds']:.1f}s"
+            )
+        
+        return {
+            "success": True,
+            **summary,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        
+    finally:
+        db.close()
+
+
+@celery_app.task(name="update_hashtag_trends", base=LeasedTask)
 def update_hashtag_trends():
     """
     Update hashtag trend scores
     
-    Runs every 12 hours
+    Runs every 12 hours. Scores are recomputed in SQL, one id range per
+    UPDATE, without loading hashtags into memory.
     """
     print("🚀 Starting hashtag trend update...")
     
     db = SessionLocal()
     try:
-        # Get all tracked hashtags
-        hashtags = db.query(InstagramHashtag).all()
-        print(f"📊 Updating {len(hashtags)} hashtags")
+        started = time.perf_counter()
+        summary = recompute_trend_scores(db)
+        print(f"✅ Hashtag trends updated: {summary['updated']} hashtags in {summary['chunks']} chunks")
         
-        for hashtag in hashtags:
-            # Recalculate trend scores
-            hashtag.update_trend_status()
+        return {
+            "success": True,
+            "hashtags_updated": summary["updated"],
+            "chunks": summary["chunks"],
+            "duration_seconds": round(time.perf_counter() - started, 3),
+            "timestamp": datetime.utcnow().isoformat()
+        }
         
-        db.commit()
-        print("✅ Hashtag trends updated")
+    finally:
+        db.close()
+
+
+@celery_app.task(name="harvest_hashtag_metrics", base=LeasedTask)
+def harvest_hashtag_metrics():
+    """
+    Refresh tracked hashtags' metrics from their live top/recent media
+    
+    Runs every 3 hours. See app.services.hashtag_harvester for the pipeline.
+    """
+    print("🚀 Starting hashtag harvest...")
+    
+    accounts = get_active_instagram_users()
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        summary = run_async(HashtagHarvester(db).run(accounts))
+        summary["duration_seconds"] = round(time.perf_counter() - started, 3)
+        print(
+            f"✅ Hashtag harvest completed: {summary['updated']} hashtags updated from "
+            f"{summary['observations']} media ({summary['failed']} failed)"
+        )
         
         return {
             "success": True,
-            "hashtags_updated": len(hashtags),
+            **summary,
             "timestamp": datetime.utcnow().isoformat()
         }
         
@@ -224,60 +1080,90 @@ def update_hashtag_trends():
         db.close()
 
 
-@celery_app.task(name="refresh_expiring_tokens")
+@celery_app.task(name="refresh_expiring_tokens", base=LeasedTask, lease_overlap=QUEUE_OVERLAP)
 def refresh_expiring_tokens():
     """
     Refresh Instagram tokens that are expiring soon (within 7 days)
     
-    Runs daily
+    Runs daily. Tokens are refreshed concurrently on the worker event
+    loop (bounded by INSTAGRAM_TOKEN_REFRESH_CONCURRENCY) and written back
+    in one bulk UPDATE.
     """
     print("🚀 Starting token refresh check...")
     
+    users = get_expiring_token_users(datetime.utcnow() + timedelta(days=7))
+    print(f"📊 Found {len(users)} users with expiring tokens")
+    report_progress(phase="refreshing", users=len(users))
+    
+    started = time.perf_counter()
+    results = run_async(refresh_all_tokens(users, settings.INSTAGRAM_TOKEN_REFRESH_CONCURRENCY))
+    report_progress(phase="saving", refreshed=sum(1 for result in results if result["status"] == "ok"))
+    
     db = SessionLocal()
     try:
-        # Get users with tokens expiring in next 7 days
-        expire_threshold = datetime.utcnow() + timedelta(days=7)
-        users = db.query(User).filter(
-            User.instagram_access_token.isnot(None),
-            User.instagram_token_expires_at < expire_threshold,
-            User.instagram_token_expires_at > datetime.utcnow()
-        ).all()
-        
-        print(f"📊 Found {len(users)} users with expiring tokens")
-        
-        refreshed_count = 0
-        for user in users:
-            try:
-                # Create API client
-                client = InstagramGraphAPI(user.instagram_access_token)
-                
-                # Refresh token
-                async def refresh():
-                    result = await client.refresh_long_lived_token(user.instagram_access_token)
-                    await client.close()
-                    return result
-                
-                new_token_data = asyncio.run(refresh())
-                
-                # Update user record
-                user.instagram_access_token = new_token_data["access_token"]
-                expires_in = new_token_data.get("expires_in", 5184000)
-                user.instagram_token_expires_at = datetime.utcnow() + timedelta(seconds=expires_in)
-                
-                db.commit()
-                refreshed_count += 1
-                print(f"✅ User {user.id} - Token refreshed")
-                
-            except Exception as e:
-                print(f"❌ User {user.id} - Failed to refresh token: {str(e)}")
-                continue
-        
-        print(f"✅ Token refresh completed: {refreshed_count}/{len(users)} successful")
+        saved = save_refreshed_tokens(db, results)
+    finally:
+        db.close()
+    duration = time.perf_counter() - started
+    
+    refreshed = [result for result in results if result["status"] == "ok"]
+    failures = [
+        {key: result[key] for key in ("user_id", "status", "error", "seconds")}
+        for result in results if result["status"] != "ok"
+    ]
+    print(f"✅ Token refresh completed: {len(refreshed)}/{len(users)} successful in {duration:.1f}s")
+    
+    return {
+        "success": True,
+        "total_users": len(users),
+        "refreshed": len(refreshed),
+        "saved": saved,
+        "failed": len(failures),
+        "failures": failures,
+        "latency_ms": latency_summary([result["seconds"] for result in results]),
+        "users": [
+            {key: result[key] for key in ("user_id", "status", "seconds")} for result in results
+        ],
+        "duration_seconds": round(duration, 3),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
+@celery_app.task(name="cleanup_old_data", bind=True, base=LeasedTask, lease_overlap=QUEUE_OVERLAP)
+def cleanup_old_data(self):
+    """
+    Clean up Instagram posts past their market's retention period
+    
+    Runs weekly. Expired monthly partitions are dropped whole; other
+    expired posts are deleted in small batches with a pause in between
+    (see app.services.retention). Progress is reported as task state and
+    on the task lease.
+    """
+    print("🚀 Starting data cleanup...")
+    
+    def report(progress: Dict):
+        if progress["batches"] % 20 == 0:
+            print(f"🗑️  {progress['deleted_posts']} posts deleted ({progress['market']}, {progress['batches']} batches)")
+        meta = {
+            "deleted_posts": progress["deleted_posts"],
+            "batches": progress["batches"],
+            "market": progress["market"],
+        }
+        report_progress(**meta)
+        if self.request.id:
+            self.update_state(state="PROGRESS", meta=meta)
+    
+    db = SessionLocal()
+    try:
+        summary = apply_post_retention(db, progress=report)
+        print(
+            f"✅ Deleted {summary['deleted_posts']} old posts in {summary['batches']} batches, "
+            f"dropped {len(summary['partitions_dropped'])} partitions in {summary['seconds']:.1f}s"
+        )
         
         return {
             "success": True,
-            "total_users": len(users),
-            "refreshed": refreshed_count,
+            **summary,
             "timestamp": datetime.utcnow().isoformat()
         }
         
@@ -285,31 +1171,28 @@ def refresh_expiring_tokens():
         db.close()
 
 
-@celery_app.task(name="cleanup_old_data")
-def cleanup_old_data():
+@celery_app.task(name="rollup_post_metrics", base=LeasedTask, lease_overlap=QUEUE_OVERLAP)
+def rollup_post_metric_snapshots():
     """
-    Clean up old Instagram data (older than 90 days)
+    Downsample post metric snapshots older than POST_METRICS_RAW_RETENTION_DAYS to daily rows
     
-    Runs weekly
+    Runs daily
     """
-    print("🚀 Starting data cleanup...")
+    print("🚀 Starting post metric rollup...")
     
     db = SessionLocal()
     try:
-        cutoff_date = datetime.utcnow() - timedelta(days=90)
-        
-        # Delete old posts
-        deleted_posts = db.query(InstagramPost).filter(
-            InstagramPost.timestamp < cutoff_date
-        ).delete()
-        
-        db.commit()
-        print(f"✅ Deleted {deleted_posts} old posts")
+        cutoff = datetime.utcnow() - timedelta(days=settings.POST_METRICS_RAW_RETENTION_DAYS)
+        summary = rollup_post_metrics(db, cutoff)
+        print(
+            f"✅ Rolled up {summary['deleted']} snapshots into {summary['rolled_up']} daily rows "
+            f"over {summary['days']} days"
+        )
         
         return {
             "success": True,
-            "deleted_posts": deleted_posts,
-            "cutoff_date": cutoff_date.isoformat(),
+            **summary,
+            "cutoff_date": cutoff.isoformat(),
             "timestamp": datetime.utcnow().isoformat()
         }
         
@@ -320,10 +1203,16 @@ def cleanup_old_data():
 # ========== Celery Beat Schedule ==========
 
 celery_app.conf.beat_schedule = {
-    # Collect Instagram posts every 6 hours
-    'collect-posts-every-6-hours': {
-        'task': 'collect_instagram_posts',
-        'schedule': crontab(hour='*/6'),
+    # Dispatch collection for accounts that are due, every minute
+    'dispatch-due-collections-every-minute': {
+        'task': 'dispatch_due_collections',
+        'schedule': crontab(),
+    },
+    
+    # Catch-up load of spooled posts every minute (no-op unless INGEST_SPOOL_DIR is set)
+    'load-post-spool-every-minute': {
+        'task': 'load_post_spool',
+        'schedule': crontab(),
     },
     
     # Update hashtag trends every 12 hours
@@ -332,12 +1221,24 @@ celery_app.conf.beat_schedule = {
         'schedule': crontab(hour='*/12'),
     },
     
+    # Harvest hashtag media and metrics every 3 hours
+    'harvest-hashtags-every-3-hours': {
+        'task': 'harvest_hashtag_metrics',
+        'schedule': crontab(minute=30, hour='*/3'),
+    },
+    
     # Refresh expiring tokens daily at 2 AM
     'refresh-tokens-daily': {
         'task': 'refresh_expiring_tokens',
         'schedule': crontab(hour=2, minute=0),
     },
     
+    # Roll up post metric snapshots daily at 4 AM
+    'rollup-post-metrics-daily': {
+        'task': 'rollup_post_metrics',
+        'schedule': crontab(hour=4, minute=0),
+    },
+    
     # Clean up old data weekly on Sunday at 3 AM
     'cleanup-old-data-weekly': {
         'task': 'cleanup_old_data',
@@ -2,12 +2,27 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import os
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from datetime import datetime
 
 # Load environment variables
 load_dotenv()
 
+from app.integrations.http_pool import get_http_client, close_http_client
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application lifespan - open shared resources on startup, release on shutdown
+    """
+    # Shared Instagram API connection pool
+    get_http_client()
+    yield
+    await close_http_client()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="K-Beauty Global Leap API",
@@ -15,6 +30,7 @@ app = FastAPI(
     version="0.1.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
     contact={
         "name": "Yongrak Park",
         "url": "https://yongrak.pro",
@@ -0,0 +1,97 @@
+"""
+Collection Throughput Benchmark
+
+Streams every user's media through InstagramGraphAPI against the Graph API
+stand-in and reports items/second, requests and injected failures.
+
+By default the stand-in runs in-process (no sockets); pass --url to target
+a server started with scripts/run_graph_api_standin.py instead.
+
+Usage:
+    python scripts/benchmark_collection_throughput.py --users 50 --latency-ms 50
+    python scripts/benchmark_collection_throughput.py --url http://127.0.0.1:8900 --users 10
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.integrations.graph_api_standin import StandinConfig, create_standin_app
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark collection against the Graph API stand-in")
+    parser.add_argument("--url", help="Base URL of a running stand-in (default: in-process)")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--media-per-user", type=int, default=500)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--validate", action="store_true", help="Use the validating decoder")
+    return parser.parse_args()
+
+
+async def run(args: argparse.Namespace):
+    if args.url:
+        os.environ["INSTAGRAM_API_BASE_URL"] = args.url
+        http_client = httpx.AsyncClient(timeout=30.0)
+        standin = None
+    else:
+        app = create_standin_app(StandinConfig(
+            users=args.users,
+            media_per_user=args.media_per_user,
+            latency_ms=args.latency_ms,
+            error_rate=args.error_rate,
+            error_kinds=["server"],
+            quota_calls=1_000_000,
+        ))
+        http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), timeout=30.0)
+        standin = app.state.standin
+
+    # Settings are read at client construction, after INSTAGRAM_API_BASE_URL is set
+    from app.integrations.instagram_api import InstagramGraphAPI, InstagramAPIError, RateLimiter
+
+    user_ids = [f"178414{index + 1:011d}" for index in range(args.users)]
+    semaphore = asyncio.Semaphore(args.concurrency)
+    failures = []
+
+    async def collect(index: int, user_id: str) -> int:
+        client = InstagramGraphAPI(f"standin-token-{index}", http_client=http_client)
+        client.rate_limiter = RateLimiter(max_calls=1_000_000, period=3600)
+        collected = 0
+        async with semaphore:
+            try:
+                async for _ in client.iter_user_media(
+                    user_id, page_size=args.page_size, fast_decode=not args.validate
+                ):
+                    collected += 1
+            except InstagramAPIError as e:
+                failures.append((user_id, e.message))
+        return collected
+
+    started = time.perf_counter()
+    counts = await asyncio.gather(*[collect(index, user_id) for index, user_id in enumerate(user_ids)])
+    elapsed = time.perf_counter() - started
+    await http_client.aclose()
+
+    total = sum(counts)
+    print(f"📦 {args.users} users, page size {args.page_size}, concurrency {args.concurrency}, "
+          f"latency {args.latency_ms:.0f} ms, error rate {args.error_rate:.0%}")
+    print(f"✅ Collected {total:,} media in {elapsed:.2f}s ({total / elapsed:,.0f} items/s)")
+    if standin is not None:
+        print(f"📊 Stand-in stats: {dict(standin.stats)}")
+    if failures:
+        print(f"❌ {len(failures)} users failed, e.g. {failures[0]}")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(parse_args()))
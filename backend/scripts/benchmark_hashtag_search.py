@@ -0,0 +1,175 @@
+"""
+Hashtag Search Benchmark
+
+Compares the two ways of answering search_posts(market, hashtag):
+1. JSON containment on instagram_posts.hashtags (the previous filter): no
+   index applies, so every post is scanned and its JSON parsed
+   (json_each on SQLite, hashtags::jsonb @> on PostgreSQL)
+2. Index join through post_hashtags (filter_by_hashtag)
+
+Posts get 3-8 hashtags from a Zipf-like vocabulary, so the benchmark
+covers a common hashtag (in roughly a third of posts), a mid-frequency
+one and a rare one. Each query is the shape search_posts sends: market
+filter, highest engagement first, 50 rows.
+
+By default a temporary SQLite file is used; pass --database-url to run
+against PostgreSQL (the tables are created and dropped).
+
+Usage:
+    python scripts/benchmark_hashtag_search.py
+    python scripts/benchmark_hashtag_search.py --posts 200000 --database-url postgresql://...
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.instagram_post import InstagramPost
+from app.models.post_hashtag import HashtagName, PostHashtag
+from app.services.post_hashtags import filter_by_hashtag
+
+
+MARKETS = ("germany", "france", "japan")
+LOAD_BATCH_SIZE = 50_000
+SEARCH_LIMIT = 50
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark hashtag search: JSON containment vs post_hashtags join")
+    parser.add_argument("--posts", type=int, default=1_000_000)
+    parser.add_argument("--vocabulary", type=int, default=5000, help="Distinct hashtags")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per query (median reported)")
+    parser.add_argument("--database-url", help="Database to use (default: temporary SQLite file)")
+    return parser.parse_args()
+
+
+def load_posts(engine, posts: int, vocabulary: int):
+    """Insert synthetic posts and their post_hashtags rows in batches"""
+    rng = random.Random(42)
+    names = [f"tag{rank}" for rank in range(vocabulary)]
+    weights = [1 / (rank + 1) for rank in range(vocabulary)]
+    started_at = datetime(2024, 1, 1)
+
+    with engine.begin() as connection:
+        connection.execute(insert(HashtagName.__table__), [
+            {"id": rank + 1, "name": name} for rank, name in enumerate(names)
+        ])
+
+    for start in range(0, posts, LOAD_BATCH_SIZE):
+        post_rows, link_rows = [], []
+        for post_id in range(start + 1, min(start + LOAD_BATCH_SIZE, posts) + 1):
+            ranks = set(rng.choices(range(vocabulary), weights=weights, k=rng.randint(3, 8)))
+            post_rows.append({
+                "id": post_id,
+                "external_id": f"bench_{post_id}",
+                "username": f"user{post_id % 5000}",
+                "media_type": "IMAGE",
+                "timestamp": started_at + timedelta(minutes=post_id),
+                "market": MARKETS[post_id % len(MARKETS)],
+                "hashtags": [names[rank] for rank in ranks],
+                "like_count": rng.randint(0, 5000),
+                "comment_count": rng.randint(0, 300),
+                "engagement_rate": round(rng.uniform(0, 10), 2),
+            })
+            link_rows.extend({"post_id": post_id, "hashtag_id": rank + 1} for rank in ranks)
+        with engine.begin() as connection:
+            connection.execute(insert(InstagramPost.__table__), post_rows)
+            connection.execute(insert(PostHashtag.__table__), link_rows)
+
+
+def json_contains_query(db, market: str, hashtag: str):
+    """The previous filter, spelled for the dialect (the JSON column has no operator an index can serve)"""
+    if db.get_bind().dialect.name == "postgresql":
+        condition = text("instagram_posts.hashtags::jsonb @> CAST(:tags AS jsonb)").bindparams(tags=json.dumps([hashtag]))
+    else:
+        condition = text(
+            "EXISTS (SELECT 1 FROM json_each(instagram_posts.hashtags) WHERE json_each.value = :tag)"
+        ).bindparams(tag=hashtag)
+    return db.query(InstagramPost).filter(InstagramPost.market == market, condition)
+
+
+def index_join_query(db, market: str, hashtag: str):
+    return filter_by_hashtag(db.query(InstagramPost).filter(InstagramPost.market == market), hashtag)
+
+
+def time_query(build, db, market: str, hashtag: str, repeat: int):
+    """Median milliseconds and result IDs of a search_posts-shaped query"""
+    timings, ids = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        posts = build(db, market, hashtag).order_by(
+            InstagramPost.engagement_rate.desc(), InstagramPost.id
+        ).limit(SEARCH_LIMIT).all()
+        timings.append((time.perf_counter() - started) * 1000)
+        ids = [post.id for post in posts]
+        db.expunge_all()
+    return statistics.median(timings), ids
+
+
+def drop_tables(engine):
+    PostHashtag.__table__.drop(engine, checkfirst=True)
+    HashtagName.__table__.drop(engine, checkfirst=True)
+    InstagramPost.__table__.drop(engine, checkfirst=True)
+
+
+def main():
+    args = parse_args()
+    path = None
+    url = args.database_url
+    if not url:
+        handle, path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        url = f"sqlite:///{path}"
+
+    engine = create_engine(url)
+    try:
+        drop_tables(engine)
+        InstagramPost.__table__.create(engine)
+        HashtagName.__table__.create(engine)
+        PostHashtag.__table__.create(engine)
+
+        started = time.perf_counter()
+        load_posts(engine, args.posts, args.vocabulary)
+        with engine.begin() as connection:
+            connection.execute(text("ANALYZE"))
+        print(f"📦 {args.posts:,} posts loaded in {time.perf_counter() - started:.0f}s ({engine.dialect.name})")
+
+        db = sessionmaker(bind=engine)()
+        try:
+            tag_counts = dict(db.execute(text(
+                "SELECT h.name, COUNT(*) FROM post_hashtags p JOIN hashtag_names h ON h.id = p.hashtag_id "
+                "WHERE h.name IN ('tag0', 'tag20', 'tag2000') GROUP BY h.name"
+            )).all())
+            print(f"{'hashtag':<10}{'posts':>10}{'JSON scan ms':>15}{'index join ms':>15}{'speedup':>10}")
+            for hashtag in ("tag0", "tag20", "tag2000"):
+                scan_ms, scan_ids = time_query(json_contains_query, db, "germany", hashtag, args.repeat)
+                join_ms, join_ids = time_query(index_join_query, db, "germany", hashtag, args.repeat)
+                assert scan_ids == join_ids, f"results differ for {hashtag}"
+                print(
+                    f"{hashtag:<10}{tag_counts.get(hashtag, 0):>10,}{scan_ms:>15,.1f}{join_ms:>15,.1f}"
+                    f"{scan_ms / join_ms:>9.1f}x"
+                )
+        finally:
+            db.close()
+    finally:
+        drop_tables(engine)
+        engine.dispose()
+        if path:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
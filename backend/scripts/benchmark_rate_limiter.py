@@ -0,0 +1,102 @@
+"""
+Rate Limiter Benchmark
+
+Measures admission cost per call as the number of calls inside the
+window grows, comparing:
+1. Legacy list-based limiter (rebuilds the list on every call)
+2. In-memory deque backend
+3. Redis sorted-set backend (only if REDIS_URL is reachable)
+
+Usage:
+    python scripts/benchmark_rate_limiter.py
+"""
+
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.integrations.rate_limiter import (
+    RateLimiter,
+    InMemoryRateLimitBackend,
+    RedisRateLimitBackend,
+)
+
+
+WINDOW_SIZES = [1_000, 10_000, 50_000]
+SAMPLES = 5_000
+LEGACY_SAMPLES = 200
+
+
+class LegacyListRateLimiter:
+    """Previous implementation: list comprehension over the whole window per call"""
+
+    def __init__(self, max_calls: int, period: int):
+        self.max_calls = max_calls
+        self.period = period
+        self.calls: List[float] = []
+
+    def is_allowed(self) -> bool:
+        now = time.time()
+        self.calls = [call_time for call_time in self.calls if call_time > now - self.period]
+        if len(self.calls) < self.max_calls:
+            self.calls.append(now)
+            return True
+        return False
+
+
+def measure(limiter, prefill: int, samples: int) -> float:
+    """Fill the window with `prefill` calls, then return mean µs for `samples` more admissions"""
+    for _ in range(prefill):
+        limiter.is_allowed()
+    start = time.perf_counter()
+    for _ in range(samples):
+        limiter.is_allowed()
+    return (time.perf_counter() - start) / samples * 1_000_000
+
+
+def main():
+    redis_backend = None
+    try:
+        from app.core.config import get_settings
+        redis_backend = RedisRateLimitBackend(get_settings().REDIS_URL, prefix="benchmark:ratelimit:")
+        redis_backend.redis.ping()
+    except Exception as e:
+        print(f"⚠️  Redis unavailable, skipping Redis backend: {e}")
+        redis_backend = None
+
+    print("\n" + "=" * 60)
+    print("Rate limiter admission cost (µs per call) by calls already in window")
+    print("=" * 60)
+    print(f"{'in window':>10} {'legacy list':>14} {'deque':>10} {'redis':>10}")
+
+    for size in WINDOW_SIZES:
+        max_calls = size + SAMPLES
+
+        # Legacy limiter is too slow to prefill call by call, so seed its list directly
+        legacy_limiter = LegacyListRateLimiter(max_calls=max_calls, period=3600)
+        legacy_limiter.calls = [time.time()] * size
+        legacy = measure(legacy_limiter, 0, LEGACY_SAMPLES)
+
+        deque_limiter = RateLimiter(max_calls=max_calls, period=3600, backend=InMemoryRateLimitBackend())
+        deque_cost = measure(deque_limiter, size, SAMPLES)
+
+        redis_cost = "-"
+        if redis_backend:
+            key = f"bench-{size}"
+            redis_backend.redis.delete(redis_backend.prefix + key)
+            redis_limiter = RateLimiter(max_calls=max_calls, period=3600, key=key, backend=redis_backend)
+            redis_cost = f"{measure(redis_limiter, size, SAMPLES):.2f}"
+            redis_backend.redis.delete(redis_backend.prefix + key)
+
+        print(f"{size:>10} {legacy:>14.2f} {deque_cost:>10.2f} {redis_cost:>10}")
+
+    print("\nDeque and Redis costs should stay flat as the window grows;")
+    print("the legacy list cost grows linearly with the number of calls in the window.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Spool-and-Load Ingestion Benchmark
+
+Compares writing collected posts for many accounts:
+1. Direct path: per account, upsert_posts() plus record_metric_snapshots(),
+   one transaction each (what a collector coroutine does inline today)
+2. Spool path, measured per stage:
+   - fetch side: SpoolWriter.append() per account (what collectors wait on)
+   - load side: drain_spool() in INGEST_LOAD_BATCH_SIZE batches
+     (COPY into a staging table on PostgreSQL)
+
+The second half of the accounts re-collects posts the first half already
+wrote, so both paths exercise inserts and upsert conflicts.
+
+By default a temporary SQLite file is used; pass --database-url to run
+against PostgreSQL (the tables are created and dropped).
+
+Usage:
+    python scripts/benchmark_spool_ingest.py
+    python scripts/benchmark_spool_ingest.py --accounts 2000 --media-per-account 50 --database-url postgresql://...
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.instagram_post import InstagramPost
+from app.models.instagram_post_metric import InstagramPostMetric
+from app.services.post_ingest import POST_METRIC_COLUMNS, upsert_posts
+from app.services.post_metrics import record_metric_snapshots
+from app.services.post_spool import SpoolWriter, drain_spool, post_record
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark spool-and-load ingestion against direct writes")
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--media-per-account", type=int, default=25)
+    parser.add_argument("--batch-size", type=int, default=20_000, help="Loader records per batch")
+    parser.add_argument("--database-url", help="Database to use (default: temporary SQLite file)")
+    return parser.parse_args()
+
+
+def account_rows(accounts: int, media_per_account: int, captured_at: datetime):
+    """Synthetic instagram_posts rows per account (the second half overlaps the first)"""
+    rng = random.Random(42)
+    half = max(accounts // 2, 1)
+    for account in range(accounts):
+        owner = account % half
+        yield account, [
+            {
+                "external_id": f"bench_{owner}_{index}",
+                "username": f"user{owner}",
+                "user_id": f"ig_{owner}",
+                "caption": "Glass skin routine #kbeauty #skincare",
+                "media_type": "IMAGE",
+                "media_url": "https://example.com/image.jpg",
+                "permalink": "https://instagram.com/p/bench",
+                "like_count": rng.randint(0, 5000),
+                "comment_count": rng.randint(0, 300),
+                "timestamp": captured_at - timedelta(hours=index),
+                "hashtags": ["kbeauty", "skincare"],
+                "market": "unknown",
+                "category": "beauty",
+                "engagement_rate": round(rng.uniform(0, 10), 2),
+                "metrics_refreshed_at": captured_at + timedelta(seconds=account),
+            }
+            for index in range(media_per_account)
+        ]
+
+
+def reset_tables(engine):
+    InstagramPostMetric.__table__.drop(engine, checkfirst=True)
+    InstagramPost.__table__.drop(engine, checkfirst=True)
+    InstagramPost.__table__.create(engine)
+    InstagramPostMetric.__table__.create(engine)
+
+
+def direct_path(session_factory, args, captured_at) -> float:
+    db = session_factory()
+    try:
+        started = time.perf_counter()
+        for account, rows in account_rows(args.accounts, args.media_per_account, captured_at):
+            upsert_posts(db, rows, update_columns=POST_METRIC_COLUMNS)
+            record_metric_snapshots(db, {
+                row["external_id"]: {"like_count": row["like_count"], "comment_count": row["comment_count"]}
+                for row in rows
+            }, rows[0]["metrics_refreshed_at"])
+        return time.perf_counter() - started
+    finally:
+        db.close()
+
+
+def spool_path(session_factory, args, captured_at, spool_dir: str):
+    writer = SpoolWriter(spool_dir)
+    started = time.perf_counter()
+    for account, rows in account_rows(args.accounts, args.media_per_account, captured_at):
+        writer.append([post_record(row, row["metrics_refreshed_at"]) for row in rows])
+    writer.seal()
+    append_seconds = time.perf_counter() - started
+
+    db = session_factory()
+    try:
+        started = time.perf_counter()
+        summary = drain_spool(db, spool_dir, batch_size=args.batch_size)
+        return append_seconds, time.perf_counter() - started, summary
+    finally:
+        db.close()
+
+
+def main():
+    args = parse_args()
+    path = None
+    url = args.database_url
+    if not url:
+        handle, path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        url = f"sqlite:///{path}"
+
+    engine = create_engine(url)
+    session_factory = sessionmaker(bind=engine)
+    spool_dir = tempfile.mkdtemp(prefix="post_spool_")
+    captured_at = datetime.utcnow().replace(microsecond=0)
+    records = args.accounts * args.media_per_account
+
+    try:
+        reset_tables(engine)
+        direct_seconds = direct_path(session_factory, args, captured_at)
+
+        reset_tables(engine)
+        append_seconds, load_seconds, summary = spool_path(session_factory, args, captured_at, spool_dir)
+        db = session_factory()
+        try:
+            spool_posts = db.query(InstagramPost).count()
+        finally:
+            db.close()
+
+        print(f"📦 {args.accounts:,} accounts × {args.media_per_account} media = {records:,} records ({engine.dialect.name})")
+        print(f"{'stage':<22}{'seconds':>10}{'records/s':>14}")
+        print(f"{'direct (inline)':<22}{direct_seconds:>10.2f}{records / direct_seconds:>14,.0f}")
+        print(f"{'spool append (fetch)':<22}{append_seconds:>10.2f}{records / append_seconds:>14,.0f}")
+        print(f"{'spool load':<22}{load_seconds:>10.2f}{records / load_seconds:>14,.0f}")
+        print(
+            f"📥 Loader: {summary['batches']} batches, {summary['segments']} segments, "
+            f"{spool_posts:,} distinct posts, {summary['snapshots']:,} snapshots"
+        )
+        print(f"⚡ Collectors wait {direct_seconds / append_seconds:.0f}x less on writes; "
+              f"end-to-end load is {direct_seconds / load_seconds:.1f}x faster")
+    finally:
+        shutil.rmtree(spool_dir, ignore_errors=True)
+        InstagramPostMetric.__table__.drop(engine, checkfirst=True)
+        InstagramPost.__table__.drop(engine, checkfirst=True)
+        engine.dispose()
+        if path:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
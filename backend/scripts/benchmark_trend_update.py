@@ -0,0 +1,149 @@
+"""
+Hashtag Trend Update Benchmark
+
+Compares recomputing trend scores for a large instagram_hashtags table:
+1. ORM path: load every InstagramHashtag and call update_trend_status()
+   (the previous update_hashtag_trends implementation)
+2. Set-based path: recompute_trend_scores(), one UPDATE per id range
+
+The ORM path is timed on --orm-rows rows and extrapolated linearly, since
+loading a million ORM objects mostly measures memory pressure.
+
+By default a temporary SQLite file is used; pass --database-url to run
+against PostgreSQL (the table is created and dropped).
+
+Usage:
+    python scripts/benchmark_trend_update.py
+    python scripts/benchmark_trend_update.py --rows 1000000 --database-url postgresql://...
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.instagram_hashtag import InstagramHashtag, compute_trend_score
+from app.services.hashtag_trends import recompute_trend_scores
+
+
+INSERT_BATCH = 50_000
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark hashtag trend recomputation")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--orm-rows", type=int, default=100_000, help="Rows for the ORM path (extrapolated)")
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--database-url", help="Database to use (default: temporary SQLite file)")
+    return parser.parse_args()
+
+
+def populate(engine, rows: int):
+    """Fill instagram_hashtags with synthetic rows"""
+    rng = random.Random(42)
+    table = InstagramHashtag.__table__
+    markets = ["germany", "france", "japan", "usa"]
+    with engine.begin() as connection:
+        for start in range(0, rows, INSERT_BATCH):
+            connection.execute(insert(table), [
+                {
+                    "external_id": f"bench_{index}",
+                    "name": f"tag{index}",
+                    "market": markets[index % len(markets)],
+                    "post_count": rng.randint(0, 200_000),
+                    "avg_engagement": rng.uniform(0, 15),
+                    "growth_rate": rng.uniform(-50, 150),
+                    "velocity": rng.uniform(0, 800),
+                    "trend_score": 0.0,
+                    "is_trending": False,
+                }
+                for index in range(start, min(start + INSERT_BATCH, rows))
+            ])
+
+
+def orm_path(session_factory, limit: int) -> float:
+    """Seconds for the ORM loop over the first `limit` rows"""
+    db = session_factory()
+    try:
+        started = time.perf_counter()
+        hashtags = db.query(InstagramHashtag).order_by(InstagramHashtag.id).limit(limit).all()
+        for hashtag in hashtags:
+            hashtag.update_trend_status()
+        db.commit()
+        return time.perf_counter() - started
+    finally:
+        db.close()
+
+
+def set_based_path(session_factory, chunk_size: int):
+    db = session_factory()
+    try:
+        started = time.perf_counter()
+        summary = recompute_trend_scores(db, chunk_size=chunk_size)
+        return time.perf_counter() - started, summary
+    finally:
+        db.close()
+
+
+def verify(session_factory, samples: int = 1000):
+    """Spot-check SQL scores against the Python reference"""
+    db = session_factory()
+    try:
+        rows = db.query(InstagramHashtag).order_by(InstagramHashtag.id).limit(samples).all()
+        for row in rows:
+            expected = compute_trend_score(row.growth_rate, row.velocity, row.avg_engagement, row.post_count)
+            assert abs(row.trend_score - expected) < 1e-6, (row.id, row.trend_score, expected)
+    finally:
+        db.close()
+
+
+def main():
+    args = parse_args()
+    path = None
+    url = args.database_url
+    if not url:
+        handle, path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        url = f"sqlite:///{path}"
+
+    engine = create_engine(url)
+    table = InstagramHashtag.__table__
+    table.drop(engine, checkfirst=True)
+    table.create(engine)
+    session_factory = sessionmaker(bind=engine)
+
+    try:
+        started = time.perf_counter()
+        populate(engine, args.rows)
+        print(f"📦 Inserted {args.rows:,} hashtags in {time.perf_counter() - started:.1f}s ({engine.dialect.name})")
+
+        orm_rows = min(args.orm_rows, args.rows)
+        orm_seconds = orm_path(session_factory, orm_rows)
+        orm_estimate = orm_seconds * args.rows / orm_rows
+
+        set_seconds, summary = set_based_path(session_factory, args.chunk_size)
+        verify(session_factory)
+
+        print(f"{'path':<12}{'rows':>12}{'seconds':>12}{'rows/s':>14}")
+        print(f"{'orm':<12}{orm_rows:>12,}{orm_seconds:>12.2f}{orm_rows / orm_seconds:>14,.0f}")
+        print(f"{'set-based':<12}{summary['updated']:>12,}{set_seconds:>12.2f}{summary['updated'] / set_seconds:>14,.0f}")
+        print(f"⏱️  ORM path at {args.rows:,} rows (extrapolated): {orm_estimate:.1f}s")
+        print(f"⚡ Speedup: {orm_estimate / set_seconds:.1f}x over {summary['chunks']} chunks")
+    finally:
+        table.drop(engine, checkfirst=True)
+        engine.dispose()
+        if path:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Run the Instagram Graph API Stand-in Server
+
+Serves seeded synthetic data on the endpoints InstagramGraphAPI uses.
+Point the backend or Celery workers at it with INSTAGRAM_API_BASE_URL.
+
+Usage:
+    python scripts/run_graph_api_standin.py --port 8900 --users 100 \\
+        --latency-ms 80 --latency-jitter-ms 40 --error-rate 0.02
+    INSTAGRAM_API_BASE_URL=http://127.0.0.1:8900 python -m pytest ...
+
+Behaviour can be changed while running:
+    curl -X POST localhost:8900/__standin/config -d '{"error_rate": 0.1}'
+    curl localhost:8900/__standin/stats
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import uvicorn
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.integrations.graph_api_standin import StandinConfig, create_standin_app
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Instagram Graph API stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--media-per-user", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-kinds", default="server,throttle",
+                        help="Comma-separated: server, unknown, throttle, user_throttle, expired")
+    parser.add_argument("--quota-calls", type=int, default=200)
+    parser.add_argument("--quota-period", type=float, default=3600.0)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    config = StandinConfig(
+        seed=args.seed,
+        users=args.users,
+        media_per_user=args.media_per_user,
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        error_rate=args.error_rate,
+        error_kinds=args.error_kinds.split(","),
+        quota_calls=args.quota_calls,
+        quota_period=args.quota_period,
+    )
+    print(f"🧪 Graph API stand-in: {config.users} users × {config.media_per_user} media "
+          f"on http://{args.host}:{args.port}")
+    uvicorn.run(create_standin_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""
+Shared Test Fixtures
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401  Registers every model's table on Base.metadata
+from app.core.database import Base
+
+
+@pytest.fixture
+def db():
+    """
+    In-memory database with every model's table
+
+    Test modules that need rows to start with override it with a fixture
+    of the same name that takes this one (`def db(db)`) and seeds it.
+    """
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
@@ -0,0 +1,76 @@
+"""
+Collection Dead Letter Tests
+
+Unit tests for failure classification, retry backoff and dead-lettering
+"""
+
+import pytest
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app.models.instagram_collection_failure import InstagramCollectionFailure
+from app.models.user import User
+from app.services.collection_dead_letter import (
+    classify_failure,
+    not_dead_lettered,
+    record_collection_outcomes,
+    retry_backoff,
+)
+
+
+NOW = datetime(2024, 3, 1, 12, 0)
+
+
+@pytest.fixture
+def db(db):
+    """Database with users 1 and 2"""
+    for user_id in (1, 2):
+        db.add(User(id=user_id, email=f"u{user_id}@example.com", hashed_password="x"))
+    db.commit()
+    return db
+
+
+def test_classify_failure():
+    """Test results are classified by status, Graph API code and retryability"""
+    assert classify_failure({"status": "token_expired", "error_code": 190}) == "auth"
+    assert classify_failure({"status": "api_error", "error_code": 4}) == "rate_limited"
+    assert classify_failure({"status": "api_error", "error_code": 200}) == "permission"
+    assert classify_failure({"status": "api_error", "error_code": 2, "transient": True}) == "transient"
+    assert classify_failure({"status": "api_error", "error_code": 100}) == "api"
+    assert classify_failure({"status": "timeout"}) == "timeout"
+    assert classify_failure({"status": "error"}) == "internal"
+
+
+def test_retry_backoff_doubles_up_to_cap():
+    """Test the retry delay doubles per consecutive failure and is capped"""
+    cap = timedelta(hours=48)
+    assert retry_backoff("transient", 1, cap) == timedelta(minutes=15)
+    assert retry_backoff("transient", 3, cap) == timedelta(hours=1)
+    assert retry_backoff("auth", 10, cap) == cap
+
+
+def test_repeated_failures_dead_letter_until_retry(db):
+    """Test accounts are skipped after repeated failures until the backoff passes, and cleared on success"""
+    failure = {"user_id": 1, "status": "api_error", "error": "Service unavailable", "error_code": 2, "transient": True}
+    eligible = lambda now: db.execute(
+        select(User.id).where(not_dead_lettered(User.id, now)).order_by(User.id)
+    ).scalars().all()
+
+    # INSTAGRAM_DEAD_LETTER_AFTER defaults to 3
+    for attempt in range(2):
+        record_collection_outcomes(db, [failure, {"user_id": 2, "status": "ok"}], NOW)
+    assert eligible(NOW) == [1, 2]
+
+    summary = record_collection_outcomes(db, [failure], NOW)
+    assert summary == {"cleared": 0, "failed": 1, "dead_lettered": 1}
+    row = db.query(InstagramCollectionFailure).one()
+    assert row.failure_count == 3 and row.error_class == "transient"
+    assert row.last_error == "Service unavailable"
+    assert row.next_retry_at == NOW + timedelta(hours=1)
+
+    assert eligible(NOW) == [2]
+    assert eligible(NOW + timedelta(hours=1, seconds=1)) == [1, 2]
+
+    assert record_collection_outcomes(db, [{"user_id": 1, "status": "ok"}], NOW)["cleared"] == 1
+    assert db.query(InstagramCollectionFailure).count() == 0
@@ -0,0 +1,74 @@
+"""
+Collection Run Checkpoint Tests
+
+Unit tests for starting, checkpointing, resuming and finishing runs
+"""
+
+from datetime import datetime, timedelta
+
+from app.models.instagram_collection_run import InstagramCollectionRun
+from app.services.collection_runs import (
+    RUN_KIND_DISPATCH,
+    checkpoint_accounts,
+    finish_run,
+    resume_stale_runs,
+    start_or_resume_run,
+    start_run,
+)
+
+
+NOW = datetime(2024, 3, 1, 12, 0)
+STALE_AFTER = timedelta(minutes=17)
+
+
+def test_interrupted_run_resumes_pending_accounts(db):
+    """Test a run that stopped checking in resumes with only its unfinished accounts"""
+    run = start_or_resume_run(db, [1, 2, 3, 4, 5], STALE_AFTER, NOW)
+    assert run["user_ids"] == [1, 2, 3, 4, 5] and not run["resumed"]
+
+    # One shard finished before the crash: 1 collected, 2 failed
+    checkpoint_accounts(db, run["run_id"], [
+        {"user_id": 1, "status": "ok"}, {"user_id": 2, "status": "api_error"}
+    ], NOW + timedelta(minutes=5))
+
+    # Still checking in recently: leave it alone
+    busy = start_or_resume_run(db, [1, 2, 3, 4, 5], STALE_AFTER, NOW + timedelta(minutes=10))
+    assert busy == {"run_id": run["run_id"], "user_ids": [], "resumed": False, "in_progress": True}
+
+    # Account 5 lost its connection meanwhile
+    resumed = start_or_resume_run(db, [1, 2, 3, 4], STALE_AFTER, NOW + timedelta(hours=1))
+    assert resumed["run_id"] == run["run_id"] and resumed["resumed"]
+    assert resumed["user_ids"] == [3, 4]
+
+    checkpoint_accounts(db, run["run_id"], [
+        {"user_id": 3, "status": "ok"}, {"user_id": 4, "status": "timeout"}
+    ], NOW + timedelta(hours=1, minutes=5))
+    counts = finish_run(db, run["run_id"], NOW + timedelta(hours=1, minutes=6))
+    assert counts == {"pending": 0, "done": 2, "failed": 2, "skipped": 1}
+
+    stored = db.query(InstagramCollectionRun).one()
+    assert stored.status == "completed" and stored.resumed_count == 1
+
+    # The next run starts fresh
+    fresh = start_or_resume_run(db, [1, 2], STALE_AFTER, NOW + timedelta(hours=6))
+    assert fresh["run_id"] != run["run_id"] and fresh["user_ids"] == [1, 2] and not fresh["resumed"]
+
+
+def test_dispatch_runs_resume_independently_of_sweeps(db):
+    """Test every stale dispatcher run is resumed with its pending accounts, apart from the sweep run"""
+    sweep = start_or_resume_run(db, [1, 2], STALE_AFTER, NOW)
+    first = start_run(db, [3, 4], RUN_KIND_DISPATCH, NOW)
+    second = start_run(db, [5], RUN_KIND_DISPATCH, NOW + timedelta(minutes=1))
+    checkpoint_accounts(db, first, [{"user_id": 3, "status": "ok"}], NOW + timedelta(minutes=2))
+    checkpoint_accounts(db, second, [{"user_id": 5, "status": "skipped"}], NOW + timedelta(minutes=2))
+
+    assert resume_stale_runs(db, RUN_KIND_DISPATCH, STALE_AFTER, NOW + timedelta(minutes=10)) == []
+
+    resumed = resume_stale_runs(db, RUN_KIND_DISPATCH, STALE_AFTER, NOW + timedelta(hours=1))
+    assert resumed == [{"run_id": first, "user_ids": [4]}, {"run_id": second, "user_ids": []}]
+    assert finish_run(db, second) == {"pending": 0, "done": 0, "failed": 0, "skipped": 1}
+
+    # The sweep run is neither resumed as a dispatcher run nor mistaken for one
+    busy = start_or_resume_run(db, [1, 2], STALE_AFTER, NOW + timedelta(minutes=10))
+    assert busy["run_id"] == sweep["run_id"] and busy["in_progress"]
+    assert db.get(InstagramCollectionRun, first).resumed_count == 1
@@ -0,0 +1,118 @@
+"""
+Tests for the local Graph API stand-in server
+
+Runs the real InstagramGraphAPI client against the stand-in in-process.
+"""
+
+import pytest
+from unittest.mock import AsyncMock, patch
+import httpx
+
+from app.integrations.circuit_breaker import ENDPOINT_FAMILIES, CircuitBreaker
+from app.integrations.graph_api_standin import StandinConfig, create_standin_app
+from app.integrations.instagram_api import (
+    InstagramGraphAPI,
+    InstagramAPIError,
+    RateLimitError,
+    RateLimiter
+)
+
+
+USER_ID = "17841400000000001"
+
+
+def _standin_client(token: str, **config):
+    """Client wired to a fresh stand-in app"""
+    app = create_standin_app(StandinConfig(users=2, media_per_user=45, **config))
+    http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+    client = InstagramGraphAPI(access_token=token, http_client=http_client)
+    client.rate_limiter = RateLimiter(max_calls=1000, period=3600)
+    client.circuit_breakers = {family: CircuitBreaker(family) for family in ENDPOINT_FAMILIES}
+    return client, app.state.standin, http_client
+
+
+@pytest.mark.asyncio
+async def test_standin_serves_paged_user_media():
+    """Test the client streams every page of a user's media, newest first"""
+    client, standin, http_client = _standin_client("standin-paging")
+
+    media = [item async for item in client.iter_user_media(USER_ID, page_size=20)]
+
+    assert len(media) == 45
+    assert [m.timestamp for m in media] == sorted((m.timestamp for m in media), reverse=True)
+    assert standin.stats["user_media"] == 3
+
+    await http_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_standin_profile_etag_and_hashtags():
+    """Test profile revalidation, hashtag search and hashtag media"""
+    client, standin, http_client = _standin_client("standin-profile")
+
+    profile = await client.get_user_profile(USER_ID)
+    assert profile.media_count == 45
+    for entry in client.response_cache._entries.values():
+        entry.expires_at = 0
+    await client.get_user_profile(USER_ID)
+    assert standin.stats["not_modified"] == 1
+
+    hashtag = await client.search_hashtag(USER_ID, "kbeauty")
+    assert hashtag.name == "kbeauty"
+    top_media = await client.get_hashtag_top_media(hashtag.id, USER_ID, limit=10)
+    likes = [media.like_count for media in top_media]
+    assert likes == sorted(likes, reverse=True)
+
+    insights = await client.get_media_insights_batch([top_media[0].id, "missing"], metrics=["reach"])
+    assert insights[top_media[0].id]["reach"] > 0
+    assert isinstance(insights["missing"], InstagramAPIError)
+
+    await http_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_standin_quota_headers_and_limit():
+    """Test usage headers feed the throttle and the quota is enforced"""
+    client, standin, http_client = _standin_client("standin-quota", quota_calls=4)
+    client.max_retries = 0
+
+    await client.get_user_media(USER_ID, limit=5)
+    await client.get_user_media(USER_ID, limit=5)
+    assert client.throttle.app_usage == 50
+
+    await client.get_user_media(USER_ID, limit=5)
+    await client.get_user_media(USER_ID, limit=5)
+    # At 100% usage the client backs off without sending the request
+    with pytest.raises(RateLimitError):
+        await client.get_user_media(USER_ID, limit=5)
+    assert standin.stats["requests"] == 4
+
+    response = await http_client.get(
+        f"http://standin/{USER_ID}/media", params={"access_token": "standin-quota"}
+    )
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == 4
+    assert standin.stats["quota_exceeded"] == 1
+
+    await http_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_standin_error_injection_and_token_refresh():
+    """Test injected transient errors are retried and token refresh works"""
+    client, standin, http_client = _standin_client(
+        "standin-errors", error_rate=1.0, error_kinds=["server"]
+    )
+
+    with patch("app.integrations.instagram_api.asyncio.sleep", new=AsyncMock()):
+        with pytest.raises(InstagramAPIError) as exc_info:
+            await client.get_user_media(USER_ID)
+    assert exc_info.value.transient
+    assert standin.stats["injected_server"] == client.max_retries + 1
+
+    standin.config = standin.config.model_copy(update={"error_rate": 0.0})
+    refreshed = await client.refresh_long_lived_token("standin-errors")
+    assert refreshed["access_token"].startswith("standin-")
+    assert refreshed["expires_in"] > 0
+
+    await http_client.aclose()
@@ -0,0 +1,123 @@
+"""
+Hashtag Harvester Tests
+
+Unit tests for hashtag window metrics and the harvesting pipeline
+"""
+
+import pytest
+from unittest.mock import patch
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import httpx
+
+from app.integrations.circuit_breaker import ENDPOINT_FAMILIES, CircuitBreaker
+from app.integrations.graph_api_standin import StandinConfig, create_standin_app
+from app.integrations.instagram_api import InstagramGraphAPI, RateLimiter
+from app.models.instagram_hashtag import InstagramHashtag
+from app.models.instagram_hashtag_lookup import InstagramHashtagLookup
+from app.models.instagram_hashtag_media import InstagramHashtagMedia
+from app.services.hashtag_harvester import HashtagHarvester, compute_window_metrics
+from app.services.hashtag_resolver import get_lookup_cache
+
+
+NOW = datetime(2024, 3, 1, 12, 0)
+
+
+@pytest.fixture
+def db(db):
+    """Database with an empty hashtag lookup cache"""
+    get_lookup_cache().clear()
+    return db
+
+
+def _observation(name, media_id, age, likes=100, comments=10):
+    return InstagramHashtagMedia(
+        hashtag_name=name, media_id=media_id, posted_at=NOW - age,
+        like_count=likes, comment_count=comments, observed_at=NOW
+    )
+
+
+def _hashtag(name, market):
+    return InstagramHashtag(
+        external_id=f"hashtag_{market}_{name}", name=name, market=market,
+        avg_engagement=5.0, data_source="mock"
+    )
+
+
+def test_compute_window_metrics(db):
+    """Test velocity, averages and growth come from the sliding window"""
+    db.add_all([
+        _observation("kbeauty", "1", timedelta(hours=2), likes=100, comments=10),
+        _observation("kbeauty", "2", timedelta(hours=20), likes=300, comments=30),
+        _observation("kbeauty", "3", timedelta(days=3), likes=200, comments=20),
+        _observation("kbeauty", "4", timedelta(days=10), likes=1000, comments=0),
+        _observation("kbeauty", "5", timedelta(days=20), likes=1000, comments=0),
+        _observation("glassskin", "6", timedelta(days=9)),
+    ])
+    db.commit()
+
+    metrics = compute_window_metrics(db, ["kbeauty", "glassskin", "missing"], NOW, timedelta(days=7))
+
+    assert metrics["kbeauty"] == {
+        "post_count": 3,
+        "avg_likes": 200.0,
+        "avg_comments": 20.0,
+        "velocity": round(2 / 24, 2),
+        "growth_rate": 200.0,
+    }
+    assert metrics["glassskin"]["post_count"] == 0
+    assert metrics["glassskin"]["growth_rate"] == -100.0
+    assert "missing" not in metrics
+
+
+@pytest.mark.asyncio
+async def test_harvester_updates_tracked_hashtags_from_standin(db):
+    """Test the pipeline resolves, harvests and writes metrics for every market"""
+    app = create_standin_app(StandinConfig(users=2, media_per_user=150))
+    http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+
+    def make_client(token):
+        client = InstagramGraphAPI(access_token=token, http_client=http_client)
+        client.rate_limiter = RateLimiter(max_calls=1000, period=3600)
+        client.circuit_breakers = {family: CircuitBreaker(family) for family in ENDPOINT_FAMILIES}
+        return client
+
+    db.add_all([
+        _hashtag("kbeauty", "germany"),
+        _hashtag("KBeauty", "france"),
+        _hashtag("glassskin", "germany"),
+        _hashtag("nosuchtag", "japan"),
+    ])
+    db.commit()
+    accounts = [
+        SimpleNamespace(id=index, instagram_user_id=f"178414{index:011d}", instagram_access_token=f"harvest_{index}")
+        for index in (1, 2)
+    ]
+    now = datetime.utcnow()
+
+    with patch("app.services.hashtag_resolver.InstagramGraphAPI", side_effect=make_client), \
+            patch("app.services.hashtag_harvester.InstagramGraphAPI", side_effect=make_client):
+        summary = await HashtagHarvester(db, max_media=50).run(accounts, now)
+        second = await HashtagHarvester(db, max_media=50).run(accounts, now)
+
+    assert summary["tracked"] == 3 and summary["resolved"] == 2
+    assert summary["fetched"] == 2 and summary["updated"] == 3
+    assert second["updated"] == 3
+    assert db.query(InstagramHashtagLookup).count() == 3  # Lookups are not repeated
+
+    hashtags = {(hashtag.name, hashtag.market): hashtag for hashtag in db.query(InstagramHashtag).all()}
+    expected = compute_window_metrics(db, ["kbeauty"], now)["kbeauty"]
+    for key in (("kbeauty", "germany"), ("KBeauty", "france")):
+        hashtag = hashtags[key]
+        assert hashtag.post_count == expected["post_count"] > 0
+        assert hashtag.velocity == expected["velocity"] > 0
+        assert hashtag.avg_likes == expected["avg_likes"]
+        assert hashtag.data_source == "instagram_api"
+        assert hashtag.trend_score == round(hashtag.calculate_trend_score(), 2)
+    assert hashtags[("nosuchtag", "japan")].data_source == "mock"
+
+    oldest = db.query(InstagramHashtagMedia.posted_at).order_by(InstagramHashtagMedia.posted_at).first()[0]
+    assert oldest >= now - timedelta(days=14)
+
+    await http_client.aclose()
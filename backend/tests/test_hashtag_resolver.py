@@ -0,0 +1,128 @@
+"""
+Hashtag Resolver Tests
+
+Unit tests for hashtag ID caching and lookup budget planning
+"""
+
+import pytest
+from unittest.mock import AsyncMock, patch
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from app.integrations.instagram_api import InstagramHashtag
+from app.models.instagram_hashtag_lookup import InstagramHashtagLookup
+from app.services.hashtag_resolver import (
+    HashtagResolver,
+    get_lookup_cache,
+    normalize_hashtag,
+    plan_hashtag_lookups,
+)
+
+
+@pytest.fixture
+def db(db):
+    """Database with an empty hashtag lookup cache"""
+    get_lookup_cache().clear()
+    return db
+
+
+def _account(user_id):
+    return SimpleNamespace(instagram_user_id=user_id, instagram_access_token=f"token_{user_id}")
+
+
+def test_normalize_hashtag():
+    """Test hashtag normalization"""
+    assert normalize_hashtag("#KBeauty ") == "kbeauty"
+    assert normalize_hashtag("ＫＢｅａｕｔｙ") == "kbeauty"
+    assert normalize_hashtag("韓国コスメ") == "韓国コスメ"
+
+
+def test_plan_hashtag_lookups_balances_budgets():
+    """Test lookups go to the accounts with most budget left"""
+    plan, deferred = plan_hashtag_lookups(
+        ["a", "b", "c", "d", "e"],
+        {"acct_1": 3, "acct_2": 1, "acct_3": 0}
+    )
+    
+    assert len(plan["acct_1"]) == 3
+    assert len(plan["acct_2"]) == 1
+    assert "acct_3" not in plan
+    assert deferred == ["e"]
+
+
+@pytest.mark.asyncio
+async def test_resolve_many_uses_cache_before_network(db):
+    """Test cached names skip the network and new lookups are persisted"""
+    db.add(InstagramHashtagLookup(name="kbeauty", external_id="111", resolved_by="acct_1"))
+    db.commit()
+    
+    resolver = HashtagResolver(db)
+    search = AsyncMock(side_effect=lambda user_id, name: InstagramHashtag(id=f"id_{name}", name=name))
+    
+    with patch("app.services.hashtag_resolver.InstagramGraphAPI.search_hashtag", new=search):
+        resolved = await resolver.resolve_many(["#KBeauty", "glassskin"], [_account("acct_1")])
+        
+        assert resolved == {"kbeauty": "111", "glassskin": "id_glassskin"}
+        assert search.await_count == 1
+        
+        # Second call is served from the LRU
+        resolved = await resolver.resolve_many(["glassskin"], [_account("acct_1")])
+        assert resolved == {"glassskin": "id_glassskin"}
+        assert search.await_count == 1
+    
+    assert db.query(InstagramHashtagLookup).count() == 2
+    assert resolver.remaining_budgets(["acct_1"]) == {"acct_1": 28}
+
+
+@pytest.mark.asyncio
+async def test_resolve_many_defers_when_budget_exhausted(db):
+    """Test lookups are deferred once every account used its weekly budget"""
+    now = datetime.utcnow()
+    db.add_all([
+        InstagramHashtagLookup(name=f"tag{i}", external_id=str(i), resolved_by="acct_1", resolved_at=now)
+        for i in range(30)
+    ])
+    db.add(InstagramHashtagLookup(
+        name="old", external_id="0", resolved_by="acct_1", resolved_at=now - timedelta(days=8)
+    ))
+    db.commit()
+    
+    resolver = HashtagResolver(db)
+    search = AsyncMock()
+    
+    with patch("app.services.hashtag_resolver.InstagramGraphAPI.search_hashtag", new=search):
+        resolved = await resolver.resolve_many(["newtag"], [_account("acct_1")])
+    
+    assert resolved == {}
+    search.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_resolve_many_retries_expired_not_found(db):
+    """Test not-found results are only cached for the negative TTL"""
+    now = datetime.utcnow()
+    db.add_all([
+        InstagramHashtagLookup(name="recent", external_id=None, resolved_by="acct_1", resolved_at=now),
+        InstagramHashtagLookup(
+            name="stale", external_id=None, resolved_by="acct_1", resolved_at=now - timedelta(days=8)
+        ),
+    ])
+    db.commit()
+    
+    resolver = HashtagResolver(db)
+    search = AsyncMock(side_effect=lambda user_id, name: InstagramHashtag(id=f"id_{name}", name=name))
+    
+    with patch("app.services.hashtag_resolver.InstagramGraphAPI.search_hashtag", new=search):
+        resolved = await resolver.resolve_many(["recent", "stale"], [_account("acct_1")])
+    
+    assert resolved == {"recent": None, "stale": "id_stale"}
+    assert search.await_count == 1
+    
+    row = db.query(InstagramHashtagLookup).filter_by(name="stale").one()
+    assert row.external_id == "id_stale"
+    assert row.resolved_at > now - timedelta(minutes=1)
+    
+    # In-process negative entries expire as well
+    cache = get_lookup_cache()
+    cache.put("gone", None, ttl=0)
+    assert cache.get("gone", "missing") == "missing"
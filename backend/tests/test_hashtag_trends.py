@@ -0,0 +1,54 @@
+"""
+Hashtag Trend Recomputation Tests
+
+Checks the set-based UPDATE against the Python reference formula
+"""
+
+import random
+import pytest
+from datetime import datetime
+
+from app.models.instagram_hashtag import InstagramHashtag, TRENDING_THRESHOLD, compute_trend_score
+from app.services.hashtag_trends import recompute_trend_scores
+
+
+NOW = datetime(2024, 3, 1, 12, 0)
+EARLIER = datetime(2024, 1, 1)
+
+
+def test_sql_trend_scores_match_python_reference(db):
+    """Test every row gets the same score and flags as compute_trend_score"""
+    rng = random.Random(7)
+    rows = []
+    for index in range(500):
+        rows.append({
+            "external_id": f"h{index}",
+            "name": f"tag{index}",
+            "market": "germany",
+            "growth_rate": rng.choice([None, rng.uniform(-250, 250)]),
+            "velocity": rng.choice([None, rng.uniform(0, 1500)]),
+            "avg_engagement": rng.uniform(0, 150),
+            "post_count": rng.choice([0, rng.randint(0, 200_000)]),
+            "peak_trend_date": EARLIER if index % 10 == 0 else None,
+        })
+    db.bulk_insert_mappings(InstagramHashtag, rows)
+    db.commit()
+
+    summary = recompute_trend_scores(db, chunk_size=64, now=NOW)
+
+    assert summary == {"updated": 500, "chunks": 8}
+    hashtags = db.query(InstagramHashtag).order_by(InstagramHashtag.id).all()
+    for row, hashtag in zip(rows, hashtags):
+        expected = compute_trend_score(row["growth_rate"], row["velocity"], row["avg_engagement"], row["post_count"])
+        assert hashtag.trend_score == pytest.approx(expected, abs=1e-9)
+        assert hashtag.is_trending == (expected >= TRENDING_THRESHOLD)
+        if hashtag.is_trending:
+            assert hashtag.peak_trend_date == (row["peak_trend_date"] or NOW)
+        else:
+            assert hashtag.peak_trend_date == row["peak_trend_date"]
+    assert any(hashtag.is_trending for hashtag in hashtags)
+
+
+def test_recompute_trend_scores_empty_table(db):
+    """Test an empty table needs no statements"""
+    assert recompute_trend_scores(db) == {"updated": 0, "chunks": 0}
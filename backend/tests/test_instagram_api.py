@@ -6,8 +6,12 @@ Unit tests for Instagram API client functionality
 
 import pytest
 import asyncio
+import threading
+import time
+import json
 from unittest.mock import Mock, AsyncMock, patch
-from datetime import datetime
+from datetime import datetime, timezone
+import httpx
 
 from app.integrations.instagram_api import (
     InstagramGraphAPI,
@@ -18,8 +22,15 @@ from app.integrations.instagram_api import (
     PermissionError,
     InstagramUser,
     InstagramMedia,
-    InstagramHashtag
+    InstagramHashtag,
+    MediaRecord,
+    CircuitOpenError
 )
+from app.integrations.http_pool import close_http_client, get_http_client
+from app.integrations.rate_limiter import InMemoryRateLimitBackend, rate_limit_key
+from app.integrations.throttling import AdaptiveThrottle, parse_usage_headers, decorrelated_jitter
+from app.integrations.response_cache import ResponseCache, SingleFlight, CacheStats
+from app.integrations.circuit_breaker import CircuitBreaker, endpoint_family, CLOSED, OPEN, HALF_OPEN
 
 
 # ========== Rate Limiter Tests ==========
@@ -65,6 +76,242 @@ def test_rate_limiter_time_until_reset():
     assert wait_time > 0
 
 
+def test_rate_limiter_window_expires():
+    """Test that calls older than the period free up slots"""
+    limiter = RateLimiter(max_calls=2, period=60)
+    
+    with patch("app.integrations.rate_limiter.time.time", return_value=1000.0):
+        assert limiter.is_allowed() == True
+        assert limiter.is_allowed() == True
+        assert limiter.is_allowed() == False
+    
+    with patch("app.integrations.rate_limiter.time.time", return_value=1061.0):
+        assert limiter.get_remaining_calls() == 2
+        assert limiter.is_allowed() == True
+
+
+def test_rate_limiter_shared_backend_per_token():
+    """Test that limiters for the same token share one budget"""
+    backend = InMemoryRateLimitBackend()
+    first = RateLimiter(max_calls=3, period=60, key=rate_limit_key("token_a"), backend=backend)
+    second = RateLimiter(max_calls=3, period=60, key=rate_limit_key("token_a"), backend=backend)
+    other = RateLimiter(max_calls=3, period=60, key=rate_limit_key("token_b"), backend=backend)
+    
+    first.is_allowed()
+    first.is_allowed()
+    
+    assert second.get_remaining_calls() == 1
+    assert other.get_remaining_calls() == 3
+    assert rate_limit_key("token_a") != "token_a"
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_acquire_waits_for_slot():
+    """Test that acquire waits for a slot within max_wait"""
+    limiter = RateLimiter(max_calls=1, period=0.05)
+    
+    assert await limiter.acquire() == True
+    assert await limiter.acquire(max_wait=0) == False
+    assert await limiter.acquire(max_wait=1.0) == True
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_blocking_backend_runs_off_the_loop():
+    """Test a network backend (Redis) is called from a worker thread in async paths"""
+    loop_thread = threading.get_ident()
+    backend = InMemoryRateLimitBackend()
+    backend.blocking = True
+    calls = []
+    try_acquire = backend.try_acquire
+    
+    def record_thread(*args):
+        calls.append(threading.get_ident())
+        return try_acquire(*args)
+    
+    backend.try_acquire = record_thread
+    limiter = RateLimiter(max_calls=1, period=60, backend=backend)
+    
+    assert await limiter.admit() == True
+    assert await limiter.acquire(max_wait=0) == False
+    assert len(calls) == 2 and loop_thread not in calls
+
+
+# ========== Adaptive Throttling Tests ==========
+
+def test_parse_usage_headers():
+    """Test parsing Graph API usage headers"""
+    headers = {
+        "X-App-Usage": '{"call_count": 28, "total_time": 40, "total_cputime": 12}',
+        "X-Business-Use-Case-Usage": (
+            '{"123": [{"type": "instagram", "call_count": 91, "total_time": 5, '
+            '"total_cputime": 5, "estimated_time_to_regain_access": 3}]}'
+        ),
+    }
+    
+    usage = parse_usage_headers(headers)
+    
+    assert usage["app_usage"] == 40
+    assert usage["business_usage"] == 91
+    assert usage["regain_access_minutes"] == 3
+    assert parse_usage_headers({}) is None
+
+
+def test_adaptive_throttle_delay_grows_with_usage():
+    """Test pacing delay as usage approaches 100%"""
+    throttle = AdaptiveThrottle(soft_limit=75.0, max_delay=10.0)
+    
+    throttle.update({"X-App-Usage": '{"call_count": 50}'})
+    assert throttle.current_delay() == 0.0
+    
+    throttle.update({"X-App-Usage": '{"call_count": 90}'})
+    low_delay = throttle.current_delay()
+    throttle.update({"X-App-Usage": '{"call_count": 99}'})
+    high_delay = throttle.current_delay()
+    assert 0 < low_delay < high_delay < 10.0
+    
+    throttle.update({
+        "X-Business-Use-Case-Usage": '{"1": [{"call_count": 100, "estimated_time_to_regain_access": 2}]}'
+    })
+    assert throttle.current_delay() > 100
+    assert throttle.status()["blocked_for"] > 100
+
+
+def test_decorrelated_jitter_bounds():
+    """Test backoff delays stay within base and cap"""
+    backoff = decorrelated_jitter(0.5, 4.0)
+    delays = [next(backoff) for _ in range(50)]
+    
+    assert all(0.5 <= delay <= 4.0 for delay in delays)
+
+
+@pytest.mark.asyncio
+async def test_make_request_retries_transient_errors():
+    """Test GET requests are retried on 5xx and succeed afterwards"""
+    client = InstagramGraphAPI(access_token="retry_token")
+    client.rate_limiter.is_allowed = Mock(return_value=True)
+    
+    request = httpx.Request("GET", "https://graph.instagram.com/me")
+    failure = httpx.Response(503, json={"error": {"code": 2, "message": "Service unavailable"}}, request=request)
+    success = httpx.Response(200, json={"id": "me"}, request=request)
+    
+    with patch.object(client.client, 'get', side_effect=[failure, success]) as mock_get, \
+            patch("app.integrations.instagram_api.asyncio.sleep", new=AsyncMock()) as mock_sleep:
+        result = await client._make_request("GET", "me")
+        
+        assert result == {"id": "me"}
+        assert mock_get.call_count == 2
+        assert mock_sleep.await_count == 1
+    
+    with patch.object(client.client, 'post', return_value=failure) as mock_post, \
+            patch("app.integrations.instagram_api.asyncio.sleep", new=AsyncMock()):
+        with pytest.raises(InstagramAPIError):
+            await client._make_request("POST", "me")
+        
+        # POST is not idempotent, so it is never retried
+        assert mock_post.call_count == 1
+    
+    await client.close()
+
+
+# ========== Circuit Breaker Tests ==========
+
+def test_circuit_breaker_opens_and_probes():
+    """Test the breaker opens at the threshold and half-open probing closes it"""
+    breaker = CircuitBreaker("media", failure_threshold=2, recovery_timeout=0.05)
+    
+    breaker.record_failure(0.1)
+    assert breaker.state == CLOSED
+    breaker.record_failure(0.1)
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+    
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()  # Only one probe at a time
+    
+    breaker.record_failure(0.1)  # Failed probe re-opens immediately
+    assert breaker.state == OPEN
+    
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    breaker.record_success(0.02)
+    assert breaker.state == CLOSED
+    assert breaker.status()["rejected"] == 2
+
+
+def test_circuit_breaker_latency_percentiles():
+    """Test latency percentiles in the status report"""
+    breaker = CircuitBreaker("insights")
+    for latency_ms in range(1, 101):
+        breaker.record_success(latency_ms / 1000)
+    
+    latency = breaker.status()["latency_ms"]
+    assert latency["samples"] == 100
+    assert latency["p50"] == 50.0
+    assert latency["p95"] == 95.0
+    assert latency["p99"] == 99.0
+
+
+def test_endpoint_family_classification():
+    """Test requests are grouped into endpoint families"""
+    assert endpoint_family("GET", "12345/media") == "media"
+    assert endpoint_family("GET", "12345") == "media"
+    assert endpoint_family("GET", "m1/insights") == "insights"
+    assert endpoint_family("GET", "12345", {"fields": "media.limit(5){id,insights.metric(reach)}"}) == "insights"
+    assert endpoint_family("POST", "") == "insights"
+    assert endpoint_family("GET", "ig_hashtag_search") == "hashtag"
+    assert endpoint_family("GET", "h1/recent_media") == "hashtag"
+    assert endpoint_family("GET", "refresh_access_token") == "oauth"
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast():
+    """Test an open circuit rejects requests without touching the network"""
+    client = InstagramGraphAPI(access_token="test_token")
+    client.circuit_breakers = {**client.circuit_breakers, "media": CircuitBreaker("media", failure_threshold=1)}
+    client.max_retries = 0
+    client.rate_limiter.is_allowed = Mock(return_value=True)
+    
+    with patch.object(client.client, 'get', side_effect=httpx.ConnectTimeout("timed out")) as mock_get:
+        with pytest.raises(InstagramAPIError) as exc_info:
+            await client.get_user_media("12345")
+        assert exc_info.value.transient
+        
+        with pytest.raises(CircuitOpenError):
+            await client.get_user_media("12345")
+        assert mock_get.call_count == 1
+    
+    assert not client.is_available("media")
+    assert client.is_available("hashtag")
+    
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_probe_rejected_by_rate_limit_frees_half_open_slot():
+    """Test a half-open probe that never reaches the network lets the next request probe"""
+    client = _cache_client("probe_token")
+    breaker = CircuitBreaker("media", failure_threshold=1, recovery_timeout=0.5)
+    client.circuit_breakers = {**client.circuit_breakers, "media": breaker}
+    client.max_retries = 0
+    client.max_rate_limit_wait = 0
+    breaker.record_failure()
+    await asyncio.sleep(0.5)
+    
+    client.rate_limiter.is_allowed = Mock(return_value=False)
+    with pytest.raises(RateLimitError):
+        await client.get_user_profile("12345")
+    assert breaker.state == HALF_OPEN
+    
+    client.rate_limiter.is_allowed = Mock(return_value=True)
+    with patch.object(client.client, 'get', return_value=_profile_response()):
+        await client.get_user_profile("12345")
+    assert breaker.state == CLOSED
+    
+    await client.close()
+
+
 # ========== API Client Tests ==========
 
 @pytest.mark.asyncio
@@ -79,6 +326,40 @@ async def test_instagram_api_initialization():
     await client.close()
 
 
+@pytest.mark.asyncio
+async def test_clients_share_http_pool():
+    """Test that client views reuse one pooled HTTP client"""
+    first = InstagramGraphAPI(access_token="token_a")
+    second = InstagramGraphAPI(access_token="token_b")
+    
+    assert first.client is second.client
+    
+    # Closing a view leaves the shared pool open for other clients
+    await first.close()
+    assert not second.client.is_closed
+    
+    # An explicit client overrides the pool
+    own_client = httpx.AsyncClient()
+    third = InstagramGraphAPI(access_token="token_c", http_client=own_client)
+    assert third.client is own_client
+    await own_client.aclose()
+
+
+def test_http_pool_client_per_event_loop():
+    """Test each event loop gets its own pooled client, closed before the loop finishes"""
+    async def run_task():
+        client = get_http_client()
+        assert get_http_client() is client
+        await close_http_client()
+        return client
+    
+    first = asyncio.run(run_task())
+    second = asyncio.run(run_task())
+    
+    assert first is not second
+    assert first.is_closed and second.is_closed
+
+
 @pytest.mark.asyncio
 async def test_build_url():
     """Test URL building"""
@@ -116,6 +397,8 @@ async def test_handle_api_error_token_expired():
     # Mock HTTP response with token expired error
     with patch.object(client.client, 'get') as mock_get:
         mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.headers = {}
         mock_response.json.return_value = {
             "error": {
                 "code": 190,
@@ -141,6 +424,8 @@ async def test_handle_api_error_permission():
     # Mock HTTP response with permission error
     with patch.object(client.client, 'get') as mock_get:
         mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.headers = {}
         mock_response.json.return_value = {
             "error": {
                 "code": 200,
@@ -166,6 +451,8 @@ async def test_get_user_profile():
     # Mock successful API response
     with patch.object(client.client, 'get') as mock_get:
         mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.headers = {}
         mock_response.json.return_value = {
             "id": "12345",
             "username": "test_user",
@@ -196,6 +483,8 @@ async def test_get_user_media():
     # Mock successful API response
     with patch.object(client.client, 'get') as mock_get:
         mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.headers = {}
         mock_response.json.return_value = {
             "data": [
                 {
@@ -226,6 +515,333 @@ async def test_get_user_media():
     await client.close()
 
 
+def _media_page(ids, next_cursor=None, day=15):
+    """Build a mocked media page response"""
+    response = Mock()
+    response.status_code = 200
+    response.headers = {}
+    payload = {
+        "data": [
+            {
+                "id": media_id,
+                "caption": f"Post {media_id}",
+                "media_type": "IMAGE",
+                "media_url": "https://example.com/image.jpg",
+                "permalink": "https://instagram.com/p/test",
+                "timestamp": f"2024-01-{day - index:02d}T10:00:00+0000",
+                "like_count": 100,
+                "comments_count": 10
+            }
+            for index, media_id in enumerate(ids)
+        ]
+    }
+    if next_cursor:
+        payload["paging"] = {
+            "cursors": {"after": next_cursor},
+            "next": f"https://graph.instagram.com/next?after={next_cursor}"
+        }
+    response.json.return_value = payload
+    response.raise_for_status = Mock()
+    return response
+
+
+@pytest.mark.asyncio
+async def test_iter_user_media_follows_cursors():
+    """Test streaming user media across pages"""
+    client = InstagramGraphAPI(access_token="test_token")
+    client.rate_limiter.is_allowed = Mock(return_value=True)
+    
+    with patch.object(client.client, 'get') as mock_get:
+        mock_get.side_effect = [
+            _media_page(["m1", "m2"], next_cursor="cursor_1", day=15),
+            _media_page(["m3", "m4"], day=13),
+        ]
+        
+        media_ids = [media.id async for media in client.iter_user_media("12345", page_size=2)]
+        
+        assert media_ids == ["m1", "m2", "m3", "m4"]
+        assert mock_get.call_count == 2
+        assert mock_get.call_args_list[1].kwargs["params"]["after"] == "cursor_1"
+    
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_iter_user_media_max_items_and_since():
+    """Test max_items cap and since window stop pagination early"""
+    client = InstagramGraphAPI(access_token="test_token")
+    client.rate_limiter.is_allowed = Mock(return_value=True)
+    
+    with patch.object(client.client, 'get') as mock_get:
+        mock_get.side_effect = [_media_page(["m1", "m2", "m3"], next_cursor="cursor_1")]
+        
+        media_ids = [media.id async for media in client.iter_user_media("12345", max_items=3)]
+        
+        assert media_ids == ["m1", "m2", "m3"]
+        assert mock_get.call_count == 1  # Next page is not prefetched once the cap is reached
+    
+    with patch.object(client.client, 'get') as mock_get:
+        mock_get.side_effect = [_media_page(["m1", "m2", "m3"], next_cursor="cursor_1", day=15)]
+        
+        since = datetime(2024, 1, 14)
+        media_ids = [media.id async for media in client.iter_user_media("12345", since=since)]
+        
+        assert media_ids == ["m1", "m2"]
+        assert mock_get.call_args_list[0].kwargs["params"]["since"] == int(
+            datetime(2024, 1, 14, tzinfo=timezone.utc).timestamp()
+        )
+    
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_iter_user_media_window_filtered_page_fetches_next():
+    """Test items skipped by the time window do not count towards max_items"""
+    client = InstagramGraphAPI(access_token="test_token")
+    client.rate_limiter.is_allowed = Mock(return_value=True)
+    
+    with patch.object(client.client, 'get') as mock_get:
+        mock_get.side_effect = [
+            _media_page(["m1", "m2", "m3"], next_cursor="cursor_1", day=15),
+            _media_page(["m4", "m5", "m6"], day=12),
+        ]
+        
+        until = datetime(2024, 1, 13, 12)
+        media_ids = [media.id async for media in client.iter_user_media("12345", max_items=3, until=until)]
+        
+        assert media_ids == ["m3", "m4", "m5"]
+        assert mock_get.call_count == 2
+    
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_iter_user_media_fast_decode_matches_validated():
+    """Test the fast decoding path yields the same values as the validating path"""
+    client = InstagramGraphAPI(access_token="test_token")
+    client.rate_limiter.is_allowed = Mock(return_value=True)
+    
+    with patch.object(client.client, 'get') as mock_get:
+        mock_get.side_effect = [_media_page(["m1", "m2"]), _media_page(["m1", "m2"])]
+        validated = [media async for media in client.iter_user_media("12345")]
+        fast = [media async for media in client.iter_user_media("12345", fast_decode=True)]
+    
+    assert all(isinstance(media, MediaRecord) for media in fast)
+    assert [media.model_dump() for media in fast] == [media.model_dump() for media in validated]
+    assert fast[0].timestamp == datetime(2024, 1, 15, 10, 0, tzinfo=timezone.utc)
+    
+    # Items missing required fields still go through validation
+    with patch.object(client.client, 'get') as mock_get:
+        page = _media_page(["m1"])
+        del page.json.return_value["data"][0]["media_url"]
+        mock_get.return_value = page
+        with pytest.raises(ValueError):
+            [media async for media in client.iter_user_media("12345", fast_decode=True)]
+    
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_get_media_insights_batch():
+    """Test batched insights demultiplex results and per-item errors"""
+    client = InstagramGraphAPI(access_token="test_token")
+    client.rate_limiter = RateLimiter(max_calls=200, period=3600)
+    
+    insights_body = {"data": [{"name": "reach", "values": [{"value": 42}]}]}
+    error_body = {"error": {"code": 100, "message": "Unsupported get request", "type": "GraphMethodException"}}
+    
+    with patch.object(client.client, 'post') as mock_post:
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.headers = {}
+        mock_response.json.return_value = [
+            {"code": 200, "body": json.dumps(insights_body)},
+            {"code": 400, "body": json.dumps(error_body)},
+            None,
+        ]
+        mock_response.raise_for_status = Mock()
+        mock_post.return_value = mock_response
+        
+        results = await client.get_media_insights_batch(["m1", "m2", "m3"], metrics=["reach"])
+        
+        assert results["m1"] == {"reach": 42}
+        assert isinstance(results["m2"], InstagramAPIError)
+        assert results["m2"].code == 100
+        assert isinstance(results["m3"], InstagramAPIError)
+        assert mock_post.call_count == 1
+        
+        batch = json.loads(mock_post.call_args.kwargs["json"]["batch"])
+        assert batch[0]["relative_url"] == "m1/insights?metric=reach"
+    
+    # Every sub-request is charged against the rate limit
+    assert client.rate_limiter.get_remaining_calls() == 197
+    assert client.requests_sent == 1 and client.calls_charged == 3
+    
+    await client.close()
+
+
+def _cache_client(token: str) -> InstagramGraphAPI:
+    """Client with its own response cache and single-flight group"""
+    client = InstagramGraphAPI(access_token=token)
+    client.response_cache = ResponseCache(ttl=60, maxsize=16)
+    client.single_flight = SingleFlight(client.response_cache.stats)
+    client.rate_limiter = RateLimiter(max_calls=200, period=3600)
+    return client
+
+
+def _profile_response(status_code: int = 200, etag: str = None) -> Mock:
+    response = Mock()
+    response.status_code = status_code
+    response.headers = {"ETag": etag} if etag else {}
+    response.json.return_value = {
+        "id": "12345", "username": "test_user", "account_type": "BUSINESS", "media_count": 100
+    }
+    response.raise_for_status = Mock()
+    return response
+
+
+@pytest.mark.asyncio
+async def test_concurrent_profile_requests_are_coalesced():
+    """Test identical in-flight requests share one HTTP call"""
+    client = _cache_client("coalesce_token")
+    
+    async def slow_get(*args, **kwargs):
+        await asyncio.sleep(0.01)
+        return _profile_response()
+    
+    with patch.object(client.client, 'get', side_effect=slow_get) as mock_get:
+        first, second = await asyncio.gather(
+            client.get_user_profile("12345"),
+            client.get_user_profile("12345")
+        )
+    
+    assert mock_get.call_count == 1
+    assert first.username == second.username == "test_user"
+    assert client.get_cache_stats()["coalesced"] == 1
+    
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_token_exchanges_are_not_coalesced():
+    """Test exchanges for different users each get their own request and token"""
+    client = _cache_client(None)
+    
+    async def exchange(*args, params=None, **kwargs):
+        await asyncio.sleep(0.01)
+        response = Mock()
+        response.status_code = 200
+        response.headers = {}
+        response.json.return_value = {"access_token": f"LONG-for-{params['access_token']}"}
+        response.raise_for_status = Mock()
+        return response
+    
+    with patch.object(client.client, 'get', side_effect=exchange) as mock_get:
+        first, second = await asyncio.gather(
+            client.exchange_short_for_long_token("userA-short"),
+            client.exchange_short_for_long_token("userB-short")
+        )
+    
+    assert mock_get.call_count == 2
+    assert first["access_token"] == "LONG-for-userA-short"
+    assert second["access_token"] == "LONG-for-userB-short"
+    
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_single_flight_leader_cancel_leaves_followers_waiting():
+    """Test cancelling the caller that started a call does not fail the others"""
+    flight = SingleFlight(CacheStats())
+    release = asyncio.Event()
+    calls = 0
+    
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return {"data": [1]}
+    
+    leader = asyncio.create_task(flight.do("key", fetch))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("key", fetch))
+    await asyncio.sleep(0)
+    
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+    
+    assert await follower == {"data": [1]}
+    assert leader.cancelled()
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_single_flight_cancels_call_nobody_awaits():
+    """Test the shared call is cancelled once its last caller is"""
+    flight = SingleFlight(CacheStats())
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+    
+    async def fetch():
+        started.set()
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+    
+    caller = asyncio.create_task(flight.do("key", fetch))
+    await started.wait()
+    caller.cancel()
+    
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+    assert await flight.do("key", lambda: asyncio.sleep(0)) is None  # A new call, not the cancelled one
+
+
+@pytest.mark.asyncio
+async def test_profile_served_from_cache_within_ttl():
+    """Test a fresh cached profile is returned without a request"""
+    client = _cache_client("ttl_token")
+    
+    with patch.object(client.client, 'get', return_value=_profile_response()) as mock_get:
+        await client.get_user_profile("12345")
+        user = await client.get_user_profile("12345")
+    
+    assert mock_get.call_count == 1
+    assert user.id == "12345"
+    stats = client.get_cache_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+    
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_stale_profile_revalidated_with_etag():
+    """Test an expired entry is revalidated with If-None-Match and a 304 reuses it"""
+    client = _cache_client("etag_token")
+    
+    with patch.object(client.client, 'get') as mock_get:
+        mock_get.return_value = _profile_response(etag='"v1"')
+        await client.get_user_profile("12345")
+        
+        for entry in client.response_cache._entries.values():
+            entry.expires_at = 0
+        
+        not_modified = _profile_response(status_code=304)
+        not_modified.json.side_effect = AssertionError("304 has no body")
+        mock_get.return_value = not_modified
+        user = await client.get_user_profile("12345")
+    
+    assert user.username == "test_user"
+    assert mock_get.call_args.kwargs["headers"] == {"If-None-Match": '"v1"'}
+    assert client.get_cache_stats()["revalidated"] == 1
+    
+    await client.close()
+
+
 @pytest.mark.asyncio
 async def test_search_hashtag():
     """Test hashtag search"""
@@ -234,6 +850,8 @@ async def test_search_hashtag():
     # Mock successful API response
     with patch.object(client.client, 'get') as mock_get:
         mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.headers = {}
         mock_response.json.return_value = {
             "data": [
                 {
@@ -0,0 +1,487 @@
+"""
+Instagram Collector Tests
+
+Unit tests for concurrent per-user and incremental collection
+"""
+
+import asyncio
+import pytest
+from unittest.mock import Mock, patch
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import httpx
+
+from app.integrations.circuit_breaker import ENDPOINT_FAMILIES, CircuitBreaker
+from app.integrations.graph_api_standin import StandinConfig, create_standin_app
+from app.integrations.instagram_api import (
+    InstagramAPIError,
+    InstagramGraphAPI,
+    InstagramUser,
+    MediaRecord,
+    RateLimiter
+)
+from app.models.instagram_collection_state import InstagramCollectionState
+from app.models.instagram_post import InstagramPost
+from app.models.instagram_post_metric import InstagramPostMetric
+from app.models.user import User
+from app.services.collection_state import metrics_refresh_due, plan_collection
+from app.services.post_spool import drain_spool
+from app.services.task_leases import InMemoryLeaseBackend, TaskLease
+from app.tasks import instagram_collector
+from app.tasks.instagram_collector import (
+    collect_all_users,
+    latency_summary,
+    refresh_all_tokens,
+    save_refreshed_tokens,
+    collect_instagram_posts,
+    dispatch_due_collections,
+    fetch_user_instagram_data,
+    finish_instagram_collection,
+    rollup_post_metric_snapshots,
+    save_collection_run,
+    save_user_instagram_data,
+    shard_user_ids,
+    update_hashtag_trends
+)
+
+
+@pytest.fixture(autouse=True)
+def real_api_enabled():
+    with patch.object(instagram_collector.settings, "USE_REAL_INSTAGRAM_API", True):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def lease_backend():
+    """Task leases in process memory instead of Redis"""
+    backend = InMemoryLeaseBackend()
+    with patch("app.services.task_leases._shared_backend", backend):
+        yield backend
+
+
+def _user(user_id):
+    return SimpleNamespace(
+        id=user_id,
+        instagram_user_id=f"ig_{user_id}",
+        instagram_access_token=f"token_{user_id}"
+    )
+
+
+def _media(media_id, likes=100):
+    return MediaRecord(
+        id=media_id,
+        caption="Glass skin #kbeauty #skincare",
+        media_type="IMAGE",
+        media_url="https://example.com/image.jpg",
+        permalink="https://instagram.com/p/test",
+        timestamp=datetime(2024, 1, 15, tzinfo=timezone.utc),
+        like_count=likes,
+        comments_count=10
+    )
+
+
+def _fetched(media_items):
+    return {"profile": PROFILE, "profile_etag": None, "media": media_items, "metrics": {}, "api_calls": 2}
+
+
+def _fake_plan(user):
+    return {"full_refresh": True, "profile_etag": None, "refresh_media_ids": []}
+
+
+def _fake_save(user, plan, fetched):
+    return {"inserted": len(fetched["media"]), "updated": 0, "refreshed": 0}
+
+
+PROFILE = InstagramUser(id="ig_1", username="test_user", account_type="BUSINESS", media_count=100)
+
+
+@pytest.mark.asyncio
+async def test_collect_all_users_bounds_concurrency():
+    """Test users are collected concurrently up to the limit, with per-user timings"""
+    in_flight = 0
+    peak = 0
+
+    async def fake_fetch(user, plan):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return _fetched([_media(f"{user.id}_1"), _media(f"{user.id}_2")])
+
+    with patch.object(instagram_collector, "fetch_user_instagram_data", side_effect=fake_fetch), \
+            patch.object(instagram_collector, "_plan_in_new_session", side_effect=_fake_plan), \
+            patch.object(instagram_collector, "_save_in_new_session", side_effect=_fake_save):
+        results = await collect_all_users([_user(index) for index in range(6)], concurrency=2)
+
+    assert peak == 2
+    assert [result["user_id"] for result in results] == list(range(6))
+    assert all(result["status"] == "ok" and result["inserted"] == 2 for result in results)
+    assert all(result["fetch_seconds"] >= 0.01 and "write_seconds" in result for result in results)
+
+
+@pytest.mark.asyncio
+async def test_collect_all_users_isolates_failures():
+    """Test one user's failure does not stop the others and expired tokens are cleared"""
+    async def fake_fetch(user, plan):
+        if user.id == 1:
+            raise InstagramAPIError(190, "Access token expired")
+        return _fetched([_media("m1")])
+
+    clear_token = Mock()
+    with patch.object(instagram_collector, "fetch_user_instagram_data", side_effect=fake_fetch), \
+            patch.object(instagram_collector, "_plan_in_new_session", side_effect=_fake_plan), \
+            patch.object(instagram_collector, "_save_in_new_session", side_effect=_fake_save), \
+            patch.object(instagram_collector, "_clear_expired_token", clear_token):
+        results = await collect_all_users([_user(0), _user(1), _user(2)], concurrency=3)
+
+    assert [result["status"] for result in results] == ["ok", "token_expired", "ok"]
+    clear_token.assert_called_once_with(1)
+
+
+@pytest.mark.asyncio
+async def test_collect_all_users_deadline_cancels_slow_users():
+    """Test users still running at the shard deadline are reported as timed out"""
+    async def fake_fetch(user, plan):
+        await asyncio.sleep(5 if user.id == 1 else 0)
+        return _fetched([_media(f"{user.id}_1")])
+
+    with patch.object(instagram_collector, "fetch_user_instagram_data", side_effect=fake_fetch), \
+            patch.object(instagram_collector, "_plan_in_new_session", side_effect=_fake_plan), \
+            patch.object(instagram_collector, "_save_in_new_session", side_effect=_fake_save):
+        results = await collect_all_users([_user(0), _user(1), _user(2)], concurrency=3, timeout=0.2)
+
+    assert [result["status"] for result in results] == ["ok", "timeout", "ok"]
+    assert results[0]["api_calls"] == 2
+
+
+def test_collect_instagram_posts_fans_out_shards():
+    """Test the beat task dispatches one shard task per chunk joined by a chord"""
+    dispatched = {}
+
+    def fake_chord(header):
+        dispatched["header"] = list(header)
+        return lambda callback: dispatched.setdefault("callback", callback)
+
+    run = {"run_id": 12, "user_ids": list(range(1, 8)), "resumed": False, "in_progress": False}
+    with patch.object(instagram_collector, "get_active_instagram_user_ids", return_value=list(range(1, 8))), \
+            patch.object(instagram_collector, "SessionLocal"), \
+            patch.object(instagram_collector, "start_or_resume_run", return_value=run), \
+            patch.object(instagram_collector.settings, "INSTAGRAM_COLLECT_SHARD_SIZE", 3), \
+            patch.object(instagram_collector, "chord", side_effect=fake_chord):
+        result = collect_instagram_posts()
+
+    assert shard_user_ids(list(range(1, 8)), 3) == [[1, 2, 3], [4, 5, 6], [7]]
+    assert result["shards"] == 3 and result["users_processed"] == 7 and result["run_id"] == 12
+    assert [signature.args for signature in dispatched["header"]] == [([1, 2, 3], 12), ([4, 5, 6], 12), ([7], 12)]
+    assert dispatched["callback"].task == "finish_instagram_collection"
+    assert dispatched["callback"].args[1] == 12
+
+
+def test_dispatch_due_collections_sends_popped_accounts():
+    """Test the dispatcher tick sends due accounts as a checkpointed run, after resuming stale runs"""
+    sent = []
+
+    def fake_chord(header):
+        sent.append([signature.args for signature in header])
+        return lambda callback: sent.append(callback)
+
+    tick = {"user_ids": [4, 2, 9], "due": 5, "deferred": 2, "budget_used": 9}
+    stale = [{"run_id": 7, "user_ids": [5]}, {"run_id": 8, "user_ids": []}]
+    with patch.object(instagram_collector, "SessionLocal"), \
+            patch.object(instagram_collector, "resume_stale_runs", return_value=stale), \
+            patch.object(instagram_collector, "lease_accounts") as lease, \
+            patch.object(instagram_collector, "finish_run") as finish, \
+            patch.object(instagram_collector, "pop_due_accounts", return_value=tick), \
+            patch.object(instagram_collector, "start_run", return_value=12), \
+            patch.object(instagram_collector.settings, "INSTAGRAM_COLLECT_SHARD_SIZE", 2), \
+            patch.object(instagram_collector, "chord", side_effect=fake_chord):
+        result = dispatch_due_collections()
+
+    assert lease.call_args.args[1] == [5]
+    assert finish.call_args.args[1] == 8
+    assert sent[0] == [([5], 7)] and sent[1].args[1] == 7
+    assert sent[2] == [([4, 2], 12), ([9], 12)] and sent[3].task == "finish_instagram_collection"
+    assert result["dispatched"] == 3 and result["resumed"] == 1 and result["shards"] == 3
+    assert result["deferred"] == 2 and result["budget_used"] == 9
+
+
+def test_overlapping_runs_are_skipped_or_queued(lease_backend):
+    """Test a task whose lease is held skips ("skip") or re-sends itself ("queue") without running"""
+    running = TaskLease("update_hashtag_trends", ttl=60, backend=lease_backend)
+    assert running.acquire()
+    running.progress(chunks=3)
+    with patch.object(instagram_collector, "SessionLocal") as session:
+        result = update_hashtag_trends()
+    running.release()
+
+    session.assert_not_called()
+    assert result["skipped"] and result["requeued"] is False
+    assert result["lease_holder"]["progress"] == {"chunks": 3}
+
+    running = TaskLease("rollup_post_metrics", ttl=60, backend=lease_backend)
+    assert running.acquire()
+    with patch.object(instagram_collector, "SessionLocal") as session, \
+            patch.object(rollup_post_metric_snapshots, "apply_async") as apply_async:
+        result = rollup_post_metric_snapshots()
+    running.release()
+
+    session.assert_not_called()
+    assert result["requeued"] is True
+    assert apply_async.call_args.kwargs["countdown"] == instagram_collector.settings.TASK_LEASE_QUEUE_DELAY
+
+    # Free again: the task runs and gives its lease back
+    summary = {"deleted": 0, "rolled_up": 0, "days": 0}
+    with patch.object(instagram_collector, "SessionLocal"), \
+            patch.object(instagram_collector, "rollup_post_metrics", return_value=summary):
+        assert rollup_post_metric_snapshots()["success"] and "skipped" not in rollup_post_metric_snapshots()
+    assert lease_backend.holders() == []
+
+
+def test_finish_instagram_collection_summarizes_shards():
+    """Test the chord callback aggregates accounts, media, API calls and failures"""
+    ok = {"status": "ok", "collected": 3, "inserted": 2, "updated": 1, "refreshed": 4,
+          "api_calls": 3, "mode": "incremental", "seconds": 1.5}
+    shard_results = [
+        {"user_ids": [1, 2], "duration_seconds": 2.0, "users": [
+            {**ok, "user_id": 1},
+            {"user_id": 2, "status": "token_expired", "collected": 0, "seconds": 0.2, "error": "expired"},
+        ]},
+        {"user_ids": [3], "duration_seconds": 4.0, "users": [{**ok, "user_id": 3, "mode": "full", "seconds": 3.5}]},
+    ]
+
+    summary = finish_instagram_collection(shard_results, datetime.now().timestamp() - 5)
+
+    assert summary["shards"] == 2
+    assert summary["users_processed"] == 3 and summary["users_succeeded"] == 2
+    assert summary["failures"] == [{"user_id": 2, "status": "token_expired", "error": "expired"}]
+    assert summary["posts_collected"] == 6 and summary["posts_refreshed"] == 8
+    assert summary["api_calls"] == 6 and summary["full_refreshes"] == 1
+    assert summary["slowest_shard_seconds"] == 4.0
+    assert summary["slowest_users"][0] == {"user_id": 3, "seconds": 3.5}
+    assert summary["wall_seconds"] >= 5
+
+
+def test_skipped_shard_still_reaches_the_run_summary(lease_backend):
+    """Test a shard skipped for overlap returns an empty shard result the callback can summarize"""
+    shard = instagram_collector.collect_instagram_shard
+    running = TaskLease(shard.lease_name(([1, 2], None), {}), ttl=60, backend=lease_backend)
+    assert running.acquire()
+    with patch.object(instagram_collector, "SessionLocal") as session:
+        skipped = shard([1, 2], None)
+    running.release()
+
+    session.assert_not_called()
+    assert skipped["skipped"] is True and skipped["users"] == [] and skipped["user_ids"] == [1, 2]
+
+    ok = {"user_id": 3, "status": "ok", "collected": 1, "seconds": 0.5}
+    summary = finish_instagram_collection(
+        [skipped, {"user_ids": [3], "duration_seconds": 1.0, "users": [ok]}], datetime.now().timestamp()
+    )
+    assert summary["shards"] == 2 and summary["shards_skipped"] == 1
+    assert summary["users_processed"] == 1 and summary["slowest_shard_seconds"] == 1.0
+
+
+def test_save_user_instagram_data_inserts_then_updates(db):
+    """Test new posts are inserted and existing posts get fresh metrics"""
+    assert save_user_instagram_data(db, _user(1), PROFILE, [_media("m1"), _media("m2")]) == {
+        "inserted": 2, "updated": 0
+    }
+    assert save_user_instagram_data(db, _user(1), PROFILE, [_media("m1", likes=500), _media("m3")]) == {
+        "inserted": 1, "updated": 1
+    }
+
+    posts = {post.external_id: post for post in db.query(InstagramPost).all()}
+    assert set(posts) == {"m1", "m2", "m3"}
+    assert posts["m1"].like_count == 500
+    assert posts["m1"].hashtags == ["kbeauty", "skincare"]
+    assert posts["m2"].user_id == "ig_1"
+    assert posts["m1"].timestamp == datetime(2024, 1, 15)  # Stored as naive UTC
+
+
+def test_save_collection_run_spools_posts_for_the_loader(db, tmp_path):
+    """Test spool mode appends posts, metrics and the mark, and leaves writes to the loader"""
+    user = _user(1)
+    plan = {"full_refresh": True}
+    fetched = {**_fetched([_media("m1"), _media("m2", likes=5)]), "metrics": {"m0": {"like_count": 7}}}
+
+    with patch.object(instagram_collector.settings, "INGEST_SPOOL_DIR", str(tmp_path)):
+        counts = save_collection_run(db, user, plan, fetched)
+        instagram_collector.seal_spool()
+
+    assert counts == {"inserted": 0, "updated": 0, "refreshed": 1, "spooled": 4}
+    assert db.query(InstagramPost).count() == 0
+    state = db.query(InstagramCollectionState).one()
+    assert state.last_media_id is None  # Not advanced past posts the database does not hold yet
+    assert state.last_full_refresh_at is not None
+
+    summary = drain_spool(db, str(tmp_path))
+    assert summary["records"] == 4 and summary["posts"] == 2 and summary["marks"] == 1
+    db.refresh(state)
+    assert state.last_media_id in ("m1", "m2")
+    assert dict(db.query(InstagramPost.external_id, InstagramPost.like_count).all()) == {"m1": 100, "m2": 5}
+    assert db.query(InstagramPostMetric).count() == 2
+
+
+def test_metrics_refresh_schedule_decays_with_age():
+    """Test young posts are refreshed often, older ones rarely, old ones never"""
+    now = datetime(2024, 3, 1, 12, 0)
+
+    assert metrics_refresh_due(now - timedelta(hours=5), None, now)
+    assert metrics_refresh_due(now - timedelta(hours=5), now - timedelta(hours=1), now)
+    assert not metrics_refresh_due(now - timedelta(hours=5), now - timedelta(minutes=30), now)
+    assert not metrics_refresh_due(now - timedelta(days=3), now - timedelta(hours=6), now)
+    assert metrics_refresh_due(now - timedelta(days=3), now - timedelta(hours=13), now)
+    assert not metrics_refresh_due(now - timedelta(days=20), now - timedelta(days=2), now)
+    assert not metrics_refresh_due(now - timedelta(days=45), None, now)
+
+
+def test_plan_collection_selects_due_posts(db):
+    """Test the SQL due filter matches the schedule and the full refresh interval"""
+    now = datetime(2024, 3, 1, 12, 0)
+    user = _user(1)
+    assert plan_collection(db, user, now)["full_refresh"]
+
+    cases = {
+        "fresh_young": (timedelta(hours=5), timedelta(minutes=30)),
+        "stale_young": (timedelta(hours=5), timedelta(hours=2)),
+        "stale_week": (timedelta(days=3), timedelta(hours=13)),
+        "fresh_month": (timedelta(days=20), timedelta(days=1)),
+        "never_month": (timedelta(days=20), None),
+        "old": (timedelta(days=45), None),
+    }
+    for external_id, (age, refreshed_ago) in cases.items():
+        db.add(InstagramPost(
+            external_id=external_id, media_type="IMAGE", username="test_user", user_id="ig_1",
+            timestamp=now - age, market="unknown",
+            metrics_refreshed_at=now - refreshed_ago if refreshed_ago else None
+        ))
+    db.add(InstagramCollectionState(
+        user_id=1, instagram_user_id="ig_1", last_media_id="fresh_young",
+        last_media_timestamp=now - timedelta(hours=5), profile_etag='"v1"', username="test_user",
+        account_type="BUSINESS", media_count=100, last_full_refresh_at=now - timedelta(days=1)
+    ))
+    db.commit()
+
+    plan = plan_collection(db, user, now)
+    assert not plan["full_refresh"]
+    assert plan["profile_etag"] == '"v1"'
+    assert plan["refresh_media_ids"] == ["stale_young", "stale_week", "never_month"]
+    for external_id, (age, refreshed_ago) in cases.items():
+        expected = metrics_refresh_due(now - age, now - refreshed_ago if refreshed_ago else None, now)
+        assert (external_id in plan["refresh_media_ids"]) == expected
+
+    assert plan_collection(db, user, now + timedelta(days=7))["full_refresh"]
+
+
+@pytest.mark.asyncio
+async def test_incremental_collection_against_standin(db):
+    """Test the second run fetches only new media, revalidates the profile and refreshes due counts"""
+    app = create_standin_app(StandinConfig(users=1, media_per_user=40))
+    standin = app.state.standin
+    http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+
+    def make_client(token):
+        client = InstagramGraphAPI(access_token=token, http_client=http_client)
+        client.rate_limiter = RateLimiter(max_calls=1000, period=3600)
+        client.circuit_breakers = {family: CircuitBreaker(family) for family in ENDPOINT_FAMILIES}
+        return client
+
+    user = SimpleNamespace(id=1, instagram_user_id="17841400000000001", instagram_access_token="incremental")
+    with patch.object(instagram_collector, "InstagramGraphAPI", side_effect=make_client):
+        plan = plan_collection(db, user)
+        fetched = await fetch_user_instagram_data(user, plan)
+        first = save_collection_run(db, user, plan, fetched)
+        assert plan["full_refresh"] and first["inserted"] == 40
+        requests_after_full = standin.stats["requests"]
+
+        # A new post appears; the oldest recent post is due for a count refresh
+        data = standin.data
+        newest_id = data.user_media[user.instagram_user_id][0]
+        new_id = "17999999999999999"
+        posted_at = data.media[newest_id]["_posted_at"] + timedelta(minutes=5)
+        data.media[new_id] = {
+            **data.media[newest_id], "id": new_id, "_posted_at": posted_at,
+            "timestamp": posted_at.strftime("%Y-%m-%dT%H:%M:%S+0000"),
+        }
+        data.user_media[user.instagram_user_id].insert(0, new_id)
+        db.query(InstagramPost).filter(InstagramPost.external_id == newest_id).update(
+            {InstagramPost.metrics_refreshed_at: datetime.utcnow() - timedelta(hours=2)}
+        )
+        db.commit()
+
+        plan = plan_collection(db, user)
+        fetched = await fetch_user_instagram_data(user, plan)
+        second = save_collection_run(db, user, plan, fetched)
+
+    assert not plan["full_refresh"]
+    assert plan["refresh_media_ids"] == [newest_id]
+    assert [media.id for media in fetched["media"]] == [new_id]
+    assert second == {"inserted": 1, "updated": 0, "refreshed": 1}
+    # Profile (304), one media page and one batch call
+    assert standin.stats["requests"] - requests_after_full == 3
+    assert standin.stats["not_modified"] == 1
+
+    state = db.query(InstagramCollectionState).filter(InstagramCollectionState.user_id == 1).one()
+    assert state.last_media_id == new_id
+    assert db.query(InstagramPost).count() == 41
+    # 40 + 1 new + 1 refreshed snapshots
+    assert db.query(InstagramPostMetric).count() == 42
+
+    await http_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_refresh_all_tokens_concurrently_with_per_user_results():
+    """Test tokens refresh concurrently up to the limit and failures are recorded per user"""
+    in_flight = 0
+    peak = 0
+
+    class FakeClient:
+        def __init__(self, token):
+            self.token = token
+
+        async def refresh_long_lived_token(self, token):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            if token == "token_2":
+                raise InstagramAPIError(190, "Session has expired")
+            return {"access_token": f"new_{token}", "expires_in": 3600}
+
+        async def close(self):
+            pass
+
+    with patch.object(instagram_collector, "InstagramGraphAPI", FakeClient):
+        results = await refresh_all_tokens([_user(index) for index in range(5)], concurrency=2)
+
+    assert peak == 2
+    assert [result["status"] for result in results] == ["ok", "ok", "token_expired", "ok", "ok"]
+    assert results[0]["access_token"] == "new_token_0"
+    assert results[2]["error"] == "Session has expired"
+    assert all(result["seconds"] >= 0.01 for result in results)
+    assert latency_summary([0.01, 0.02, 0.5])["p50"] == 20.0
+
+
+def test_save_refreshed_tokens_in_one_statement(db):
+    """Test refreshed tokens are written unless the user reconnected meanwhile"""
+    for user_id in (1, 2, 3):
+        db.add(User(id=user_id, email=f"u{user_id}@example.com", hashed_password="x",
+                    instagram_access_token=f"token_{user_id}"))
+    db.commit()
+    expires_at = datetime(2024, 5, 1)
+    db.query(User).filter(User.id == 3).update({User.instagram_access_token: "reconnected"})
+    db.commit()
+
+    results = [
+        {"user_id": user_id, "status": "ok", "old_token": f"token_{user_id}",
+         "access_token": f"new_{user_id}", "expires_at": expires_at}
+        for user_id in (1, 3)
+    ] + [{"user_id": 2, "status": "api_error", "old_token": "token_2"}]
+
+    assert save_refreshed_tokens(db, results) == 2
+    tokens = dict(db.query(User.id, User.instagram_access_token).all())
+    assert tokens == {1: "new_1", 2: "token_2", 3: "reconnected"}
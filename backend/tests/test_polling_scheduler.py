@@ -0,0 +1,126 @@
+"""
+Polling Scheduler Tests
+
+Unit tests for activity-based poll intervals and the budgeted due queue
+"""
+
+import pytest
+from datetime import datetime, timedelta
+
+from app.models.instagram_collection_failure import InstagramCollectionFailure
+from app.models.instagram_collection_state import InstagramCollectionState
+from app.models.instagram_post import InstagramPost
+from app.models.instagram_post_metric import InstagramPostMetric
+from app.models.user import User
+from app.services.polling_scheduler import (
+    DEFAULT_POLL_COST,
+    compute_poll_interval,
+    due_accounts,
+    pop_due_accounts,
+    schedule_next_poll,
+    take_within_budget,
+)
+
+
+NOW = datetime(2024, 3, 1, 12, 0)
+
+
+@pytest.fixture
+def db(db):
+    """Database with four connected users"""
+    for user_id in (1, 2, 3, 4):
+        db.add(User(
+            id=user_id, email=f"u{user_id}@example.com", hashed_password="x",
+            instagram_user_id=f"ig_{user_id}", instagram_access_token=f"token_{user_id}",
+            instagram_token_expires_at=NOW + timedelta(days=30)
+        ))
+    db.commit()
+    return db
+
+
+def test_poll_interval_follows_posting_frequency_and_velocity():
+    """Test dormant accounts back off, busy ones are polled often, velocity shortens the wait"""
+    bounds = {"min_interval": timedelta(minutes=15), "max_interval": timedelta(hours=24), "velocity_scale": 100.0}
+
+    assert compute_poll_interval(0, **bounds) == timedelta(hours=24)
+    assert compute_poll_interval(1, **bounds) == timedelta(hours=12)
+    assert compute_poll_interval(1, velocity=100, **bounds) == timedelta(hours=6)
+    assert compute_poll_interval(4, velocity=300, **bounds) == timedelta(minutes=45)
+    assert compute_poll_interval(48, velocity=1000, **bounds) == timedelta(minutes=15)
+
+
+def test_schedule_next_poll_from_observed_activity(db):
+    """Test the next-due time uses posts of the last 30 days and recent snapshot velocity"""
+    for day in range(15):
+        db.add(InstagramPost(
+            external_id=f"m{day}", user_id="ig_1", media_type="IMAGE", username="test_user",
+            timestamp=NOW - timedelta(days=day, hours=1), market="unknown"
+        ))
+    db.commit()
+    recent = db.query(InstagramPost).filter(InstagramPost.external_id == "m0").one()
+    db.add(InstagramPostMetric(post_id=recent.id, captured_at=NOW - timedelta(hours=2), like_count=100))
+    db.add(InstagramPostMetric(post_id=recent.id, captured_at=NOW - timedelta(hours=1), like_count=200))
+    state = InstagramCollectionState(user_id=1, instagram_user_id="ig_1")
+    db.add(state)
+    db.commit()
+
+    due = schedule_next_poll(db, state, api_calls=5, now=NOW)
+
+    # 0.5 posts/day → every 48h / 2 = 24h, halved by 100 engagement/hour
+    assert state.posts_per_day == 0.5
+    assert state.engagement_velocity == 100.0
+    assert due == NOW + timedelta(hours=12)
+    assert state.poll_interval_seconds == 12 * 3600
+    assert state.last_api_calls == 5
+
+
+def test_due_accounts_in_queue_order(db):
+    """Test never-collected accounts come first, then the soonest due; future ones wait"""
+    db.add_all([
+        InstagramCollectionState(user_id=1, next_due_at=NOW - timedelta(minutes=5), last_api_calls=7),
+        InstagramCollectionState(user_id=2, next_due_at=NOW - timedelta(hours=1)),
+        InstagramCollectionState(user_id=3, next_due_at=NOW + timedelta(hours=1)),
+    ])
+    db.commit()
+
+    assert due_accounts(db, NOW) == [(4, DEFAULT_POLL_COST), (2, DEFAULT_POLL_COST), (1, 7)]
+
+    # Dead-lettered accounts wait for their retry
+    db.add(InstagramCollectionFailure(
+        user_id=4, error_class="api", failure_count=3, next_retry_at=NOW + timedelta(hours=1)
+    ))
+    db.commit()
+    assert [user_id for user_id, _ in due_accounts(db, NOW)] == [2, 1]
+
+
+def test_take_within_budget_keeps_queue_order():
+    """Test the head of the queue is never skipped for cheaper accounts behind it"""
+    assert take_within_budget([(1, 3), (2, 10), (3, 1)], budget=12) == [1]
+    assert take_within_budget([(1, 3), (2, 10), (3, 1)], budget=14) == [1, 2, 3]
+
+
+def test_take_within_budget_admits_head_above_budget():
+    """Test an account estimated above the whole budget is still dispatched alone, not stuck at the head"""
+    assert take_within_budget([(1, 450), (2, 3)], budget=300) == [1]
+    assert take_within_budget([(2, 3), (3, 3)], budget=300) == [2, 3]
+
+
+def test_pop_due_accounts_leases_dispatched_accounts(db):
+    """Test a tick spends at most its budget and leased accounts are not popped again"""
+    db.add(InstagramCollectionState(user_id=1, next_due_at=NOW - timedelta(hours=1)))
+    db.commit()
+
+    tick = pop_due_accounts(db, budget=2 * DEFAULT_POLL_COST, now=NOW)
+    assert tick["user_ids"] == [2, 3]
+    assert tick["due"] == 4 and tick["deferred"] == 2
+    assert tick["budget_used"] == 2 * DEFAULT_POLL_COST
+
+    tick = pop_due_accounts(db, budget=100, now=NOW)
+    assert tick["user_ids"] == [4, 1]
+    assert pop_due_accounts(db, budget=100, now=NOW)["user_ids"] == []
+
+    lease_until = db.query(InstagramCollectionState.next_due_at).filter(
+        InstagramCollectionState.user_id == 2
+    ).scalar()
+    assert lease_until > NOW
+    assert pop_due_accounts(db, budget=100, now=lease_until)["user_ids"] == [1, 2, 3, 4]
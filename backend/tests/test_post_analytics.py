@@ -0,0 +1,56 @@
+"""
+Post Analytics Tests
+
+Unit tests for the SQL engagement aggregation against the Python path
+"""
+
+import json
+import pytest
+from datetime import datetime
+from pathlib import Path
+
+from app.models.instagram_post import InstagramPost
+from app.services.instagram_service import SEARCH_ORDER, InstagramService
+from app.services.post_analytics import aggregate_post_engagement
+from app.services.post_ingest import upsert_posts
+
+
+MOCK_DATA = Path(__file__).parent.parent / "scripts" / "mock_instagram_data.json"
+
+
+@pytest.fixture
+def db(db):
+    """Database with the mock dataset's posts"""
+    posts = json.loads(MOCK_DATA.read_text(encoding="utf-8"))["posts"]
+    for post in posts:
+        post["timestamp"] = datetime.fromisoformat(post["timestamp"].replace("Z", "+00:00"))
+    upsert_posts(db, posts)
+    return db
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("market", ["germany", "france", "japan"])
+async def test_sql_aggregation_matches_python_path(db, market):
+    """Test totals, averages, top hashtags and peak hours equal the in-memory analysis, ties included"""
+    service = InstagramService(db)
+    query = db.query(InstagramPost).filter(InstagramPost.market == market)
+
+    expected = await service.analyze_post_engagement(query.order_by(InstagramPost.id).all())
+    assert expected["total_posts"] == 50
+    assert aggregate_post_engagement(db, query) == expected
+
+    # The /posts/analyze shape: top posts by engagement, optionally by hashtag
+    for hashtag in (None, "kbeauty"):
+        posts = await service.search_posts(market, hashtag=hashtag, limit=20)
+        assert await service.analyze_matching_posts(market, hashtag=hashtag, limit=20) == \
+            await service.analyze_post_engagement(posts)
+
+
+@pytest.mark.asyncio
+async def test_sql_aggregation_of_no_posts(db):
+    """Test a query matching nothing gives the empty summary"""
+    service = InstagramService(db)
+    query = db.query(InstagramPost).filter(InstagramPost.market == "brazil")
+
+    assert aggregate_post_engagement(db, query) == await service.analyze_post_engagement([])
+    assert aggregate_post_engagement(db, query, order_by=SEARCH_ORDER, limit=10)["total_posts"] == 0
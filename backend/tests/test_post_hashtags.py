@@ -0,0 +1,76 @@
+"""
+Post Hashtag Index Tests
+
+Unit tests for the normalized post_hashtags index and hashtag filters
+"""
+
+from datetime import datetime
+
+from app.models.instagram_post import InstagramPost
+from app.models.post_hashtag import HashtagName, PostHashtag
+from app.services.post_hashtags import filter_by_hashtag
+from app.services.post_ingest import POST_METRIC_COLUMNS, upsert_posts
+from app.services.post_spool import load_records, post_record
+
+
+CAPTURED = datetime(2024, 3, 1, 12, 0)
+
+
+def _row(external_id, hashtags, market="germany", **values):
+    row = {
+        "external_id": external_id,
+        "media_type": "IMAGE",
+        "username": "test_user",
+        "timestamp": datetime(2024, 1, 15),
+        "market": market,
+        "hashtags": hashtags,
+        "like_count": 10,
+        "comment_count": 1,
+        "engagement_rate": 1.0,
+        "metrics_refreshed_at": CAPTURED,
+    }
+    row.update(values)
+    return row
+
+
+def _tagged(db, hashtag, market="germany"):
+    query = db.query(InstagramPost).filter(InstagramPost.market == market)
+    return sorted(post.external_id for post in filter_by_hashtag(query, hashtag).all())
+
+
+def test_upsert_posts_indexes_hashtags(db):
+    """Test posts are indexed on insert, re-indexed when their hashtags are overwritten, and names interned once"""
+    upsert_posts(db, [
+        _row("p1", ["KBeauty", "skincare"]),
+        _row("p2", ["kbeauty", "#kbeauty"]),
+        _row("p3", ["skincare"], market="france"),
+        _row("p4", []),
+    ])
+
+    assert sorted(name for name, in db.query(HashtagName.name).all()) == ["kbeauty", "skincare"]
+    assert db.query(PostHashtag).count() == 4
+    assert _tagged(db, "#KBeauty") == ["p1", "p2"]
+    assert _tagged(db, "skincare") == ["p1"]
+    assert _tagged(db, "skincare", market="france") == ["p3"]
+    assert _tagged(db, "glassskin") == []
+
+    # Metric refreshes keep the stored hashtags, so the index stays as it was
+    upsert_posts(db, [_row("p1", ["glassskin"], like_count=50)], update_columns=POST_METRIC_COLUMNS)
+    assert _tagged(db, "kbeauty") == ["p1", "p2"] and _tagged(db, "glassskin") == []
+
+    upsert_posts(db, [_row("p1", ["glassskin"])])
+    assert _tagged(db, "kbeauty") == ["p2"] and _tagged(db, "glassskin") == ["p1"]
+    assert db.query(PostHashtag).count() == 3
+
+
+def test_spool_loader_indexes_new_posts_once(db):
+    """Test spooled posts are indexed when loaded and a replayed batch writes no index rows"""
+    records = [
+        post_record(_row("m1", ["kbeauty", "skincare"]), CAPTURED),
+        post_record(_row("m2", ["kbeauty"]), CAPTURED),
+    ]
+
+    assert load_records(db, records)["hashtags"] == 3
+    assert load_records(db, records)["hashtags"] == 0
+    assert _tagged(db, "kbeauty") == ["m1", "m2"]
+    assert db.query(PostHashtag).count() == 3
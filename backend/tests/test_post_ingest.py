@@ -0,0 +1,52 @@
+"""
+Post Ingestion Tests
+
+Unit tests for the bulk post upsert
+"""
+
+from datetime import datetime
+
+from app.models.instagram_post import InstagramPost
+from app.services.post_ingest import upsert_posts
+
+
+def _row(external_id, **values):
+    row = {
+        "external_id": external_id,
+        "media_type": "IMAGE",
+        "username": "test_user",
+        "timestamp": datetime(2024, 1, 15),
+        "market": "germany",
+    }
+    row.update(values)
+    return row
+
+
+def test_upsert_posts_fills_defaults_and_dedupes(db):
+    """Test rows with different keys share column defaults and duplicates collapse"""
+    counts = upsert_posts(db, [
+        _row("p1", like_count=10),
+        _row("p2", category="skincare"),
+        _row("p1", like_count=20),
+    ], chunk_size=1)
+
+    assert counts == {"inserted": 2, "updated": 0}
+    posts = {post.external_id: post for post in db.query(InstagramPost).all()}
+    assert posts["p1"].like_count == 20
+    assert posts["p2"].like_count == 0
+    assert posts["p2"].hashtags == []
+
+
+def test_upsert_posts_limits_updated_columns(db):
+    """Test only the requested columns are overwritten on conflict"""
+    upsert_posts(db, [_row("p1", like_count=10, category="skincare")])
+    counts = upsert_posts(
+        db,
+        [_row("p1", like_count=99, category="makeup")],
+        update_columns=["like_count"]
+    )
+
+    post = db.query(InstagramPost).one()
+    assert counts == {"inserted": 0, "updated": 1}
+    assert post.like_count == 99
+    assert post.category == "skincare"
@@ -0,0 +1,92 @@
+"""
+Post Metric Time Series Tests
+
+Unit tests for metric snapshots, engagement velocity and rollups
+"""
+
+import pytest
+from datetime import datetime, timedelta
+
+from app.models.instagram_post import InstagramPost
+from app.models.instagram_post_metric import InstagramPostMetric
+from app.services.post_metrics import (
+    engagement_trajectory,
+    get_engagement_velocity,
+    get_post_metric_series,
+    record_metric_snapshots,
+    rollup_post_metrics,
+)
+
+
+START = datetime(2024, 3, 1, 0, 0)
+
+
+@pytest.fixture
+def db(db):
+    """Database with posts m1 and m2"""
+    for external_id in ("m1", "m2"):
+        db.add(InstagramPost(
+            external_id=external_id, media_type="IMAGE", username="test_user",
+            timestamp=START, market="unknown"
+        ))
+    db.commit()
+    return db
+
+
+def test_engagement_trajectory():
+    """Test velocity is engagement per hour and acceleration its change per hour"""
+    points = engagement_trajectory([
+        (START, 100, 0),
+        (START + timedelta(hours=2), 200, 20),
+        (START + timedelta(hours=3), 400, 40),
+    ])
+
+    assert [point["engagement"] for point in points] == [100, 220, 440]
+    assert [point["velocity"] for point in points] == [None, 60.0, 220.0]
+    assert [point["acceleration"] for point in points] == [None, None, 160.0]
+
+
+def test_record_snapshots_and_velocity(db):
+    """Test snapshots are appended per pass and velocities come from one query"""
+    for hour, likes in enumerate([10, 40, 100]):
+        written = record_metric_snapshots(db, {
+            "m1": {"like_count": likes, "comment_count": 0},
+            "m2": {"like_count": 5, "comment_count": 1},
+            "unknown": {"like_count": 1, "comment_count": 1},
+        }, START + timedelta(hours=hour))
+        assert written == 2
+
+    post_ids = dict(db.query(InstagramPost.external_id, InstagramPost.id).all())
+    series = get_post_metric_series(db, post_ids["m1"])
+    assert [point["like_count"] for point in series] == [10, 40, 100]
+
+    velocity = get_engagement_velocity(db, list(post_ids.values()))
+    assert velocity[post_ids["m1"]]["velocity"] == 60.0
+    assert velocity[post_ids["m1"]]["acceleration"] == 30.0
+    assert velocity[post_ids["m2"]]["velocity"] == 0.0
+    assert velocity[post_ids["m2"]]["snapshots"] == 3
+
+    recent = get_engagement_velocity(db, [post_ids["m1"]], since=START + timedelta(hours=1))
+    assert recent[post_ids["m1"]]["snapshots"] == 2
+
+
+def test_rollup_downsamples_whole_days(db):
+    """Test raw snapshots before the cutoff day become one daily row per post"""
+    for hour in range(0, 48, 6):
+        record_metric_snapshots(db, {
+            "m1": {"like_count": 10 * hour, "comment_count": hour},
+            "m2": {"like_count": 5, "comment_count": 0},
+        }, START + timedelta(hours=hour))
+    assert db.query(InstagramPostMetric).count() == 16
+
+    summary = rollup_post_metrics(db, START + timedelta(days=1, hours=13))
+
+    assert summary == {"days": 1, "rolled_up": 2, "deleted": 8}
+    daily = db.query(InstagramPostMetric).filter(InstagramPostMetric.resolution == "daily").all()
+    m1_id = db.query(InstagramPost.id).filter(InstagramPost.external_id == "m1").scalar()
+    m1_daily = next(row for row in daily if row.post_id == m1_id)
+    assert m1_daily.like_count == 180 and m1_daily.captured_at == START + timedelta(hours=18)
+    assert db.query(InstagramPostMetric).count() == 10
+
+    # Nothing left to roll up for the same cutoff
+    assert rollup_post_metrics(db, START + timedelta(days=1, hours=13))["days"] == 0
@@ -0,0 +1,133 @@
+"""
+Post Spool Tests
+
+Unit tests for spool segments and the at-least-once batch loader
+"""
+
+import os
+from datetime import datetime, timedelta
+
+from app.models.instagram_post import InstagramPost
+from app.models.instagram_post_metric import InstagramPostMetric
+from app.services.post_spool import (
+    SpoolWriter,
+    claim_segment,
+    drain_spool,
+    metrics_record,
+    post_record,
+    read_segment,
+    recover_segments,
+)
+
+
+CAPTURED = datetime(2024, 3, 1, 12, 0)
+
+
+def _row(external_id, likes, captured_at=CAPTURED):
+    return {
+        "external_id": external_id,
+        "username": "test_user",
+        "user_id": "ig_1",
+        "caption": "Glass skin #kbeauty",
+        "media_type": "IMAGE",
+        "like_count": likes,
+        "comment_count": 10,
+        "timestamp": datetime(2024, 2, 28),
+        "hashtags": ["kbeauty"],
+        "market": "unknown",
+        "engagement_rate": 1.5,
+        "metrics_refreshed_at": captured_at,
+    }
+
+
+def test_writer_seals_segments_by_size(tmp_path):
+    """Test segments are sealed at the size limit and read back with datetimes restored"""
+    writer = SpoolWriter(str(tmp_path), segment_bytes=600, segment_seconds=3600)
+    for index in range(4):
+        writer.append([post_record(_row(f"m{index}", 100), CAPTURED)])
+    writer.seal()
+
+    segments = sorted(tmp_path.glob("*.jsonl"))
+    assert len(segments) == writer.segments_sealed >= 2
+    assert not list(tmp_path.glob("*.open"))
+
+    records = [record for segment in segments for record in read_segment(segment)]
+    assert [record["row"]["external_id"] for record in records] == ["m0", "m1", "m2", "m3"]
+    assert records[0]["captured_at"] == CAPTURED
+    assert records[0]["row"]["timestamp"] == datetime(2024, 2, 28)
+
+
+def test_drain_spool_dedupes_and_replays_idempotently(db, tmp_path):
+    """Test batches upsert by external_id, newest capture wins, and a replayed segment changes nothing"""
+    later = CAPTURED + timedelta(hours=1)
+    writer = SpoolWriter(str(tmp_path), segment_seconds=3600)
+    writer.append([
+        post_record(_row("m1", 100), CAPTURED),
+        post_record(_row("m2", 50), CAPTURED),
+        post_record(_row("m1", 150, later), later),
+    ])
+    writer.seal()
+
+    summary = drain_spool(db, str(tmp_path), batch_size=1000)
+    assert summary["segments"] == 1 and summary["records"] == 3 and summary["batches"] == 1
+    assert dict(db.query(InstagramPost.external_id, InstagramPost.like_count).all()) == {"m1": 150, "m2": 50}
+    assert db.query(InstagramPostMetric).count() == 3
+    assert not list(tmp_path.iterdir())
+
+    # An older capture of m1 and a metric refresh of m2, loaded twice (loader died after committing)
+    writer.append([
+        post_record(_row("m1", 120), CAPTURED),
+        metrics_record("m2", 80, 12, 2.0, later),
+    ])
+    sealed = writer.seal()
+    content = sealed.read_text()
+    drain_spool(db, str(tmp_path))
+    (tmp_path / sealed.name).write_text(content)
+    assert drain_spool(db, str(tmp_path))["records"] == 2
+
+    posts = {post.external_id: post for post in db.query(InstagramPost).all()}
+    assert posts["m1"].like_count == 150
+    assert posts["m2"].like_count == 80 and posts["m2"].engagement_rate == 2.0
+    assert db.query(InstagramPost).count() == 2
+    m2_snapshots = db.query(InstagramPostMetric).filter(
+        InstagramPostMetric.post_id == posts["m2"].id, InstagramPostMetric.captured_at == later
+    ).count()
+    assert m2_snapshots == 1
+
+
+def test_abandoned_segments_are_requeued(tmp_path):
+    """Test segments left by a dead loader or writer are requeued and torn lines skipped"""
+    writer = SpoolWriter(str(tmp_path), segment_seconds=3600)
+    writer.append([post_record(_row("m1", 100), CAPTURED)])
+    writer.seal()
+    claimed = claim_segment(str(tmp_path))
+    assert claimed.suffix == ".loading" and claim_segment(str(tmp_path)) is None
+
+    torn = tmp_path / "00000000000000000001-1-dead.open"
+    torn.write_text(claimed.read_text() + '{"kind":"post","captured')
+
+    assert recover_segments(str(tmp_path), older_than=60) == 0
+    stale = datetime.now().timestamp() - 120
+    for path in (claimed, torn):
+        os.utime(path, (stale, stale))
+    assert recover_segments(str(tmp_path), older_than=60) == 2
+
+    segments = sorted(tmp_path.glob("*.jsonl"))
+    assert len(segments) == 2
+    assert [len(read_segment(segment)) for segment in segments] == [1, 1]
+
+
+def test_open_segment_of_live_writer_is_not_requeued(tmp_path):
+    """Test a slow writer keeps its idle segment until it seals it"""
+    writer = SpoolWriter(str(tmp_path), segment_seconds=3600)
+    writer.append([post_record(_row("m1", 100), CAPTURED)])
+    (segment,) = tmp_path.glob("*.open")
+    stale = datetime.now().timestamp() - 120
+    os.utime(segment, (stale, stale))
+
+    assert recover_segments(str(tmp_path), older_than=60) == 0
+
+    writer.append([post_record(_row("m2", 50), CAPTURED)])
+    writer.seal()
+    (sealed,) = tmp_path.glob("*.jsonl")
+    assert [record["row"]["external_id"] for record in read_segment(sealed)] == ["m1", "m2"]
@@ -0,0 +1,85 @@
+"""
+Post Retention Tests
+
+Unit tests for batched, per-market post retention
+"""
+
+import pytest
+from unittest.mock import patch
+from datetime import datetime, timedelta
+
+from app.models.instagram_post import InstagramPost
+from app.models.instagram_post_metric import InstagramPostMetric
+from app.models.post_hashtag import HashtagName, PostHashtag
+from app.services import retention
+from app.services.retention import (
+    DEFAULT_MARKET,
+    apply_post_retention,
+    parse_partition_bounds,
+    retention_cutoffs,
+)
+
+
+NOW = datetime(2024, 6, 1)
+
+
+@pytest.fixture
+def db(db):
+    """Database with the kbeauty hashtag name"""
+    db.add(HashtagName(id=1, name="kbeauty"))
+    db.commit()
+    return db
+
+
+def _add_posts(db, market, days_old, count):
+    for index in range(count):
+        post = InstagramPost(
+            external_id=f"{market}_{days_old}_{index}", media_type="IMAGE", username="test_user",
+            timestamp=NOW - timedelta(days=days_old), market=market
+        )
+        db.add(post)
+        db.flush()
+        db.add(InstagramPostMetric(post_id=post.id, captured_at=post.timestamp, like_count=1, comment_count=0))
+        db.add(PostHashtag(post_id=post.id, hashtag_id=1))
+    db.commit()
+
+
+def test_retention_cutoffs_and_partition_bounds():
+    """Test per-market cutoffs and partition bound parsing"""
+    cutoffs = retention_cutoffs(NOW, 90, {"germany": 30})
+    assert cutoffs == {DEFAULT_MARKET: NOW - timedelta(days=90), "germany": NOW - timedelta(days=30)}
+
+    assert parse_partition_bounds(
+        "FOR VALUES FROM ('2024-01-01 00:00:00') TO ('2024-02-01 00:00:00')"
+    ) == (datetime(2024, 1, 1), datetime(2024, 2, 1))
+    assert parse_partition_bounds("DEFAULT") is None
+
+
+def test_apply_post_retention_batches_per_market(db):
+    """Test expired posts, their snapshots and hashtag rows are deleted in bounded batches"""
+    _add_posts(db, "germany", 45, 7)   # Expired under the 30-day German retention
+    _add_posts(db, "germany", 10, 2)
+    _add_posts(db, "france", 45, 3)    # Kept under the 90-day default
+    _add_posts(db, "france", 120, 5)
+    progress = []
+
+    with patch.object(retention, "get_settings") as settings, patch.object(retention.time, "sleep") as sleep:
+        settings.return_value.POST_RETENTION_DAYS = 90
+        settings.return_value.POST_RETENTION_DAYS_BY_MARKET = {"germany": 30}
+        settings.return_value.RETENTION_BATCH_SIZE = 3
+        settings.return_value.RETENTION_BATCH_PAUSE = 0.5
+        summary = apply_post_retention(db, now=NOW, progress=progress.append)
+
+    assert summary["deleted_posts"] == 12
+    assert summary["deleted_by_market"] == {DEFAULT_MARKET: 5, "germany": 7}
+    assert summary["deleted_snapshots"] == 12
+    assert summary["deleted_post_hashtags"] == 12
+    assert summary["batches"] == 5  # 3 + 2 default, 3 + 3 + 1 German
+    assert summary["partitions_dropped"] == []
+    assert [entry["deleted_posts"] for entry in progress] == [3, 5, 8, 11, 12]
+    assert sleep.call_count == 3  # Only between full batches
+
+    remaining = {(post.market, post.external_id.split("_")[1]) for post in db.query(InstagramPost).all()}
+    assert remaining == {("germany", "10"), ("france", "45")}
+    assert db.query(InstagramPostMetric).count() == 5
+    assert db.query(PostHashtag).count() == 5
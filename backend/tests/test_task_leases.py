@@ -0,0 +1,60 @@
+"""
+Task Lease Tests
+
+Unit tests for exclusive, heartbeat-renewed task leases
+"""
+
+import time
+
+from app.services.task_leases import InMemoryLeaseBackend, TaskLease
+
+
+def test_lease_is_exclusive_until_released():
+    """Test a second run cannot take a held lease, and can once it is released"""
+    backend = InMemoryLeaseBackend()
+    first = TaskLease("collect_instagram_posts", ttl=60, backend=backend, task_id="task-1")
+    second = TaskLease("collect_instagram_posts", ttl=60, backend=backend)
+
+    assert first.acquire()
+    assert not second.acquire()
+    assert second.holder()["task_id"] == "task-1"
+    assert TaskLease("update_hashtag_trends", ttl=60, backend=backend).acquire()
+
+    first.release()
+    assert second.acquire()
+    second.release()
+    assert [info["name"] for info in backend.holders()] == ["update_hashtag_trends"]
+
+
+def test_heartbeat_keeps_lease_and_publishes_progress():
+    """Test a lease outlives its TTL while heartbeating, with progress visible to others"""
+    backend = InMemoryLeaseBackend()
+    lease = TaskLease("cleanup_old_data", ttl=0.3, backend=backend)
+    assert lease.acquire()
+    lease.progress(deleted_posts=5000, market="germany")
+    first_beat = lease.holder()["heartbeat_at"]
+
+    time.sleep(0.5)
+    holder = lease.holder()
+    assert holder is not None and holder["heartbeat_at"] > first_beat
+    assert holder["progress"] == {"deleted_posts": 5000, "market": "germany"}
+    assert not TaskLease("cleanup_old_data", ttl=0.3, backend=backend).acquire()
+
+    lease.release()
+    assert lease.holder() is None
+
+
+def test_expired_lease_is_lost_to_the_next_run():
+    """Test a holder that stopped heartbeating cannot renew or release its successor's lease"""
+    backend = InMemoryLeaseBackend()
+    stalled = TaskLease("refresh_expiring_tokens", ttl=0.05, backend=backend)
+    assert backend.acquire(stalled.name, stalled.token, stalled.info, stalled.ttl)
+    stalled.held = True  # Acquired without a heartbeat, as if the worker froze
+    time.sleep(0.1)
+
+    successor = TaskLease("refresh_expiring_tokens", ttl=60, backend=backend, task_id="task-2")
+    assert successor.acquire()
+    assert not stalled.renew() and stalled.lost
+    stalled.release()
+    assert successor.holder()["task_id"] == "task-2"
+    successor.release()